@@ -1,15 +1,25 @@
 import os
-import json
-import requests
-import sqlite3
 from datetime import datetime
 from dotenv import load_dotenv
-import python_bithumb
-from openai import OpenAI
 import time
-import schedule
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
-import telegram
+from sizing import order_krw_amount
+from llm_cache import DecisionCache, market_fingerprint
+from payload_encoder import encode_frame
+from rate_limit import RateLimiter
+import price_feed
+import tracing
+from trigger_engine import TriggerEngine, DailyTimer, PriceMoveTrigger, VolatilityTrigger, NewsBurstTrigger
+from notifier import create_notifier
+from storage import get_database
+from exchange_client import BithumbClient
+from execution import ExecutionEngine, record_execution, format_report
+from portfolio import PortfolioState
+from news import NewsCollector
+from market_data import collect_market_snapshot, missing_fields, format_latency_report
+from strategies import GATE_MIN_CONFIDENCE, LLMStrategy, create_strategy
+import llm_batch
 
 # .env 파일에서 API 키 로드
 load_dotenv()
@@ -17,157 +27,196 @@ load_dotenv()
 # Bithumb API
 ACCESS_KEY = os.getenv("BITHUMB_ACCESS_KEY")
 SECRET_KEY = os.getenv("BITHUMB_SECRET_KEY")
-bithumb = python_bithumb.Bithumb(ACCESS_KEY, SECRET_KEY)
+bithumb = BithumbClient(ACCESS_KEY, SECRET_KEY)
+
+# 거래할 마켓 목록 (쉼표로 구분, 예: KRW-BTC,KRW-ETH,KRW-XRP)
+MARKETS = [m.strip() for m in os.getenv("MARKETS", "KRW-BTC").split(",") if m.strip()]
+COIN_NAMES = {"BTC": "Bitcoin", "ETH": "Ethereum", "XRP": "XRP", "SOL": "Solana", "DOGE": "Dogecoin"}
+
+# 모든 마켓이 함께 쓰는 OpenAI 호출 제한 (초당 요청 수, 거래소 호출 제한은 exchange_client에서 관리)
+openai_limiter = RateLimiter(rate=float(os.getenv("OPENAI_RATE_LIMIT", "2")))
 
 # Telegram API
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
+# 텔레그램 알림은 백그라운드 큐로 전송 (거래 흐름은 기다리지 않음, TELEGRAM_API_URL은 대체 서버용)
+notifier = create_notifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, base_url=os.getenv("TELEGRAM_API_URL"))
+
+
+def current_quote(market):
+  # WebSocket 호가가 있으면 사용, 없으면 REST 현재가
+  return price_feed.get_quote(market) or {"price": price_feed.get_price(market)}
+
+
+# 잔고/평균 매수가 캐시 (PORTFOLIO_TTL초 동안 재사용, 주문이 끝나면 바로 무효화)
+portfolio = PortfolioState(bithumb, ttl=float(os.getenv("PORTFOLIO_TTL", "5")))
+
+# 주문 실행 (TWAP_THRESHOLD_KRW를 넘는 주문은 TWAP_SLICES개로 나눠 TWAP_INTERVAL초 간격으로 실행)
+execution_engine = ExecutionEngine(
+    bithumb,
+    quote_fn=current_quote,
+    timeout=float(os.getenv("ORDER_FILL_TIMEOUT", "30")),
+    twap_threshold_krw=float(os.getenv("TWAP_THRESHOLD_KRW")) if os.getenv("TWAP_THRESHOLD_KRW") else None,
+    twap_slices=int(os.getenv("TWAP_SLICES", "4")),
+    twap_interval=float(os.getenv("TWAP_INTERVAL", "30")),
+    on_order=portfolio.on_order,
+)
+
+# OpenAI API (클라이언트는 판단 엔진이 프로세스당 하나만 생성해서 재사용)
+OPENAI_MODEL = "gpt-4o"
+
+# 차트 데이터 인코딩 방식 (columns, rows, csv, summary)
+PAYLOAD_FORMAT = os.getenv("PAYLOAD_FORMAT", "rows")
+
+# OpenAI 판단 캐시
+decision_cache = DecisionCache(
+    ttl=int(os.getenv("LLM_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500")),
+    near_duplicate=os.getenv("LLM_CACHE_NEAR_DUPLICATE", "false").lower() == "true",
+    price_tolerance=float(os.getenv("LLM_CACHE_PRICE_TOLERANCE", "0.002")),
+    candle_tolerance=float(os.getenv("LLM_CACHE_CANDLE_TOLERANCE", "0.002")),
+)
+
+
+# 판단 알림 실행 방식 (ADVISORY_MODE: live, batch)
+# batch는 매매하지 않는 예약 실행(10:00/18:00/23:00)의 판단을 OpenAI Batch API로 묶어서 보내고 (동기 호출의 절반 가격)
+# 결과가 나오면(최대 24시간) 백그라운드 조회 스레드가 batch_decisions에 저장하고 판단 알림을 보냄
+ADVISORY_MODE = os.getenv("ADVISORY_MODE", "live")
+ADVISORY_MODEL = os.getenv("ADVISORY_MODEL", OPENAI_MODEL)
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "300"))
+
+
+# 실행 단계별 추적을 Prometheus 텍스트로 내보낼 파일 (node_exporter textfile collector, 없으면 내보내지 않음)
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")
 
 
 def init_db():
-  # SQLite 데이터베이스 초기화 함수
-  conn = sqlite3.connect('bitcoin_trading.db')
-  c = conn.cursor()
-  c.execute('''CREATE TABLE IF NOT EXISTS trades
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  timestamp TEXT,
-                  decision TEXT,
-                  percentage INTEGER,
-                  reason TEXT,
-                  btc_balance REAL,
-                  krw_balance REAL,
-                  btc_price REAL)''')
-  conn.commit()
-  return conn
-
-
-def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_price):
-  # 거래 정보를 DB에 기록하는 함수
-  c = conn.cursor()
-  timestamp = datetime.now().isoformat()
-  c.execute("""INSERT INTO trades
-                 (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_price)
-                 VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_price))
-  conn.commit()
-
-
-def get_db_connection():
-  # DB 연결 가져오기
-  return sqlite3.connect('bitcoin_trading.db')
-
-
-def get_recent_trades(conn, limit=5):
-  c = conn.cursor()
-
-  c.execute("""
-    SELECT timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_price
-    FROM trades
-    ORDER BY timestamp DESC
+  # 프로세스 전체가 공유하는 저장소 (처음 한 번만 열고 마이그레이션)
+  return get_database()
+
+
+def log_trade(db, decision, percentage, reason, btc_balance, krw_balance, btc_price, market="KRW-BTC", report=None):
+  # 거래 판단을 쓰기 큐에 넣고 바로 반환 (Future 결과는 판단 id)
+  # btc_balance/btc_price 컬럼에는 해당 마켓 코인의 잔고/가격을 기록
+  # report(execution 보고서)가 있으면 주문/체결도 같은 트랜잭션에서 판단 id에 연결해 저장
+  def insert(conn):
+    decision_id = conn.execute("""INSERT INTO decisions
+                                    (ts, decision, percentage, reason, btc_balance, krw_balance, btc_price, market)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                               (int(time.time()), decision, percentage, reason, btc_balance, krw_balance,
+                                btc_price, market)).lastrowid
+    if report is not None:
+      record_execution(conn, decision_id, report)
+    return decision_id
+
+  return db.write(insert)
+
+
+def get_recent_trades(db, limit=5, market="KRW-BTC"):
+  # (market, ts) 인덱스를 역순으로 읽으므로 정렬 없이 최근 limit개만 읽음
+  rows = db.read("""
+    SELECT strftime('%Y-%m-%dT%H:%M:%S', ts, 'unixepoch', 'localtime'),
+           decision, percentage, reason, btc_balance, krw_balance, btc_price
+    FROM decisions
+    WHERE market = ?
+    ORDER BY ts DESC
     LIMIT ?
-    """, (limit,))
+    """, (market, limit))
 
   columns = ['timestamp', 'decision', 'percentage', 'reason', 'btc_balance', 'krw_balance', 'btc_price']
   trades = []
 
-  for row in c.fetchall():
+  for row in rows:
     trade = {columns[i]: row[i] for i in range(len(columns))}
     trades.append(trade)
 
   return trades
 
 
-def get_bitcoin_news(query="bitcoin", location="us", language="en", num_results=5):
-  SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
-  api_url = "https://serpapi.com/search.json"
-  params = {
-      "engine": "google_news",
-      "q": query,
-      "gl": location,
-      "hl": language,
-      "api_key": SERPAPI_API_KEY
-  }
+def coin_name(market):
+  currency = market.split("-")[1]
+  return COIN_NAMES.get(currency, currency)
 
-  try:
-    response = requests.get(api_url, params=params)
-    response.raise_for_status()
-    results = response.json()
-  except Exception as e:
-    print(f"[NEWS ERROR] {str(e)}")
-    return []
 
-  news_data = []
-  if "news_results" in results:
-    for news_item in results["news_results"][:num_results]:
-      news_data.append({
-          "title": news_item.get("title"),
-          "date": news_item.get("date")
-      })
-  return news_data
+def news_query(market):
+  return coin_name(market).lower()
 
 
-async def send_telegram_message(text):
-  try:
-    await bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=text)
-  except Exception as e:
-    print(f"[TELEGRAM ERROR] {str(e)}")
+# 뉴스 수집기 (백그라운드에서 SerpAPI 조회 후 로컬 테이블에 저장, 처음 사용할 때 시작)
+news_collector = None
+
 
+def get_news_collector():
+  global news_collector
+  if news_collector is None:
+    news_collector = NewsCollector([news_query(market) for market in MARKETS]).start()
+  return news_collector
 
-def run_async(coro):
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_closed():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(coro)
-    except RuntimeError:
-        # 루프가 없으면 새로 생성
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(coro)
 
+def get_news_sentiment(market):
+  # 판단 경로는 로컬에 저장된 기사의 감성 요약만 읽음 (SerpAPI 응답을 기다리지 않음)
+  return get_news_collector().sentiment(news_query(market))
 
-def get_ai_decision(conn):
-  # 차트 데이터 수집
-  short_term_df = python_bithumb.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-  mid_term_df = python_bithumb.get_ohlcv("KRW-BTC", interval="minute240", count=30)
-  long_term_df = python_bithumb.get_ohlcv("KRW-BTC", interval="day", count=30)
 
-  # 뉴스 데이터 수집
-  news_articles = get_bitcoin_news("bitcoin", "us", "en", 5)
+def format_sentiment(summary):
+  if not summary or summary.get("sentiment") is None:
+    return "기사 없음"
+  trend = f", 추세 {summary['trend']:+.2f}" if summary.get("trend") is not None else ""
+  return (f"{summary['sentiment']:+.2f} (기사 {summary['articles']}개, "
+          f"긍정 {summary['positive']} / 부정 {summary['negative']}{trend})")
 
-  # 현재 잔고 확인
-  krw_balance = bithumb.get_balance("KRW")
-  btc_balance = bithumb.get_balance("BTC")
-  current_btc_price = python_bithumb.get_current_price("KRW-BTC")
+
+def market_prompt(script, market):
+  # 프롬프트는 비트코인 기준으로 작성되어 있으므로 다른 마켓은 코인 이름만 바꿔서 사용
+  currency = market.split("-")[1]
+  if currency == "BTC":
+    return script
+  return script.replace("Bitcoin", coin_name(market)).replace("BTC", currency)
+
+
+def build_payload(snapshot):
+  # LLM에 넘기는 데이터 (병렬로 수집된 스냅샷 + 최근 판단 기록)
+  short_term_df = snapshot["short_term_df"]
+  mid_term_df = snapshot["mid_term_df"]
+  long_term_df = snapshot["long_term_df"]
+  news_sentiment = snapshot["news"] or {"articles": 0}
+  krw_balance = snapshot["krw_balance"]
+  coin_balance = snapshot["coin_balance"]
+  current_price = snapshot["current_price"]
+  market = snapshot["market"]
+  currency = market.split("-")[1].lower()
 
   # 최근 거래 내역 가져오기
-  recent_trades = get_recent_trades(conn, limit=5)
+  recent_trades = get_recent_trades(init_db(), limit=5, market=market)
 
   # 데이터 페이로드 준비
   data_payload = {
-      "short_term": json.loads(short_term_df.to_json()) if short_term_df is not None else None,
-      "mid_term": json.loads(mid_term_df.to_json()) if mid_term_df is not None else None,
-      "long_term": json.loads(long_term_df.to_json()) if long_term_df is not None else None,
-      "news": news_articles,
+      "short_term": encode_frame(short_term_df, PAYLOAD_FORMAT),
+      "mid_term": encode_frame(mid_term_df, PAYLOAD_FORMAT),
+      "long_term": encode_frame(long_term_df, PAYLOAD_FORMAT),
+      "indicators": snapshot["indicators"],
+      "news_sentiment": news_sentiment,
       "current_balance": {
           "krw": krw_balance,
-          "btc": btc_balance,
-          "btc_price": current_btc_price,
-          "total_value": krw_balance + (btc_balance * current_btc_price)
+          currency: coin_balance,
+          f"{currency}_price": current_price,
+          "total_value": krw_balance + (coin_balance * current_price)
       },
       "recent_trades": recent_trades
   }
+  return data_payload
 
-  script = """
+
+# 판단 프롬프트 (비트코인 기준, 다른 마켓은 market_prompt로 코인 이름만 바꿈)
+DECISION_PROMPT = """
 You are an expert in Bitcoin investing.
 
 Analyze the provided data:
 1. Chart Data: Multi-timeframe OHLCV data ('short_term': 1h, 'mid_term': 4h, 'long_term': daily).
-2. News Data: Recent Bitcoin news articles with 'title' and 'date'.
-3. Current Balance: Current KRW and BTC balances and current BTC price.
-4. Recent Trades: History of recent trading decisions and their outcomes.
+2. Indicators: Precomputed latest technical indicators per timeframe (SMA/EMA, RSI, MACD, Bollinger Bands, ATR, volume z-score).
+3. News Sentiment: Scores of recent Bitcoin news headlines ('sentiment': relevance-weighted mean from -1 to 1, 'positive'/'negative': article counts, 'trend': recent minus earlier sentiment).
+4. Current Balance: Current KRW and BTC balances and current BTC price.
+5. Recent Trades: History of recent trading decisions and their outcomes.
 
 When analyzing recent trades:
 - Evaluate if previous decisions were profitable
@@ -184,14 +233,16 @@ For buy or sell decisions, include a percentage (1-100) indicating what portion
 {"decision": "sell", "percentage": 50, "reason": "some technical reason"}
 {"decision": "hold", "percentage": 0, "reason": "some technical reason"}
 """
-  script_buy_or_sell_only = """
+
+DECISION_PROMPT_BUY_OR_SELL = """
 You are an expert in Bitcoin investing.
 
 Analyze the provided data:
 1. Chart Data: Multi-timeframe OHLCV data ('short_term': 1h, 'mid_term': 4h, 'long_term': daily).
-2. News Data: Recent Bitcoin news articles with 'title' and 'date'.
-3. Current Balance: Current KRW and BTC balances and current BTC price.
-4. Recent Trades: History of recent trading decisions and their outcomes.
+2. Indicators: Precomputed latest technical indicators per timeframe (SMA/EMA, RSI, MACD, Bollinger Bands, ATR, volume z-score).
+3. News Sentiment: Scores of recent Bitcoin news headlines ('sentiment': relevance-weighted mean from -1 to 1, 'positive'/'negative': article counts, 'trend': recent minus earlier sentiment).
+4. Current Balance: Current KRW and BTC balances and current BTC price.
+5. Recent Trades: History of recent trading decisions and their outcomes.
 
 When analyzing recent trades:
 - Evaluate if previous decisions were profitable
@@ -208,139 +259,251 @@ For buy or sell decisions, include a percentage (1-100) indicating what portion
 {"decision": "sell", "percentage": 50, "reason": "some technical reason"}
 """
 
-  # OpenAI GPT에게 판단 요청
-  client = OpenAI()
-  response = client.chat.completions.create(
-      model="gpt-4o",
-      messages=[
-          {
-              "role": "system",
-              "content": script_buy_or_sell_only
-          },
-          {
-              "role": "user",
-              "content": json.dumps(data_payload)
-          }
-      ],
-      response_format={"type": "json_object"}
-  )
 
-  result = json.loads(response.choices[0].message.content)
-  return result
+def decision_prompt(market):
+  return market_prompt(DECISION_PROMPT_BUY_OR_SELL, market)
+
+
+# 판단 엔진 (DECISION_ENGINE: llm, rules, gated)
+# gated는 지표 규칙이 확실한 경우(confidence >= RULE_MIN_CONFIDENCE) 바로 결정하고 애매할 때만 LLM 호출
+# LLM 판단이 LLM_DEADLINE(초) 안에 오지 않거나 형식이 잘못되면
+# LLM_FALLBACK_MODEL(있으면, LLM_FALLBACK_DEADLINE 안에) -> LLM_FALLBACK_DECISION 순서로 대체
+llm_strategy = LLMStrategy(
+    decision_prompt,
+    build_payload,
+    model=OPENAI_MODEL,
+    cache=decision_cache,
+    fingerprint_fn=lambda snapshot: market_fingerprint(snapshot["current_price"], snapshot["short_term_df"]),
+    limiter=openai_limiter,
+    deadline=float(os.getenv("LLM_DEADLINE", "30")),
+    fallback_model=os.getenv("LLM_FALLBACK_MODEL") or None,
+    fallback_deadline=float(os.getenv("LLM_FALLBACK_DEADLINE", "10")),
+    fallback_decision=os.getenv("LLM_FALLBACK_DECISION", "hold"),
+)
+decision_engine = create_strategy(
+    os.getenv("DECISION_ENGINE", "llm"),
+    llm_strategy,
+    min_confidence=float(os.getenv("RULE_MIN_CONFIDENCE", GATE_MIN_CONFIDENCE)),
+)
+
+
+def execute_trade(run_transaction=True, market="KRW-BTC"):
+  # 트레이딩 실행 함수
+  # 한 번의 실행에서 나온 알림(결정 + 주문)은 하나의 메시지로 묶어서 전송
+  # 실행 한 번이 trace 하나 (단계별 소요 시간/토큰/HTTP 상태는 spans 테이블에 저장)
+  group = f"{market}-{time.time()}"
+  try:
+    with tracing.trace("execute_trade", market=market, run_transaction=run_transaction):
+      try:
+        _execute_trade(run_transaction, market, group)
+      finally:
+        notifier.release(group)
+  finally:
+    export_metrics()
 
 
-def execute_trade(run_transaction=True):
-  # 트레이딩 실행 함수
+def export_metrics():
+  if not METRICS_TEXTFILE:
+    return
+  try:
+    tracing.get_tracer().flush()
+    tracing.write_textfile(METRICS_TEXTFILE, init_db())
+  except Exception as e:
+    print(f"[METRICS ERROR] {str(e)}")
+
 
-  # 데이터베이스 초기화
-  conn = init_db()
+def _execute_trade(run_transaction, market, group):
+  currency = market.split("-")[1]
+
+  # 공유 저장소
+  db = init_db()
 
   # 로그에 실행 시간 기록
   current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-  print(f"[{current_time}] 트레이딩 작업 실행 중...")
+  print(f"[{current_time}] {market} 트레이딩 작업 실행 중...")
+
+  # 차트/뉴스/잔고/현재가 병렬 수집
+  with tracing.span("snapshot") as span:
+    snapshot = collect_market_snapshot(portfolio, lambda: get_news_sentiment(market), market)
+    span.set(errors=sorted(snapshot["errors"]) or None)
+  print(f"[{market}] " + format_latency_report(snapshot))
+  for name, error in snapshot["errors"].items():
+    print(f"[DATA ERROR] {market} {name}: {error}")
+
+  missing = missing_fields(snapshot)
+  if missing:
+    print(f"### {market} 필수 데이터 수집 실패: {', '.join(missing)} ###")
+    tracing.current().fail(f"missing: {', '.join(missing)}")
+    return
 
-  # AI 결정 얻기
-  result = get_ai_decision(conn)
+  # 판단 엔진으로 결정 (DECISION_ENGINE)
+  with tracing.span("decide") as span:
+    result = decision_engine.decide(snapshot)
+    span.set(engine=result["engine"], decision=result["decision"], confidence=result.get("confidence"))
+  tracing.current().set(decision=result["decision"], engine=result["engine"])
+  ttft = f" (첫 토큰 {result['ttft_ms']:.0f} ms)" if result.get("ttft_ms") is not None else ""
+  print(f"[DECISION] {market} {result['engine']} {result['latency_ms']:.1f} ms{ttft}, ${result['cost_usd']:.4f}")
   ai_decision = result["decision"]
   reason = result["reason"]
   percentage = result.get("percentage", 0)  # 투자 비율 (0-100%)
 
-  # 잔고 확인
-  krw_balance = bithumb.get_balance("KRW")
-  btc_balance = bithumb.get_balance("BTC")
-  current_btc_price = python_bithumb.get_current_price("KRW-BTC")
+  # 잔고 확인 (스냅샷 재사용)
+  krw_balance = snapshot["krw_balance"]
+  coin_balance = snapshot["coin_balance"]
+  current_price = snapshot["current_price"]
 
-  # 최소 금액과 최대 금액 설정
-  min_amount = 10100
-  max_amount = 20000
-  normalized_percentage = percentage / 100.0
-  target_krw_amount = (min_amount + (max_amount - min_amount) * normalized_percentage) / 0.997
+  # 최소/최대 금액 사이에서 주문 금액 결정
+  target_krw_amount = order_krw_amount(percentage)
 
   telegram_message = f"""
-✨ AI 투자 결정 ✨
+✨ AI 투자 결정 ({market}) ✨
 
-- 📌 결정: {ai_decision.upper()}
+- 📌 결정: {ai_decision.upper()} ({result["engine"]})
 - 📝 사유: {reason}
 ━━━━━━━━━━━━━━━━━━━━━━
-- 📈 현재가: {current_btc_price:,.0f} 원
+- 📈 현재가: {current_price:,.0f} 원
 - 📊 투자 비율: {percentage}%
 - 💸 주문 금액: {target_krw_amount:,.0f} 원
 ━━━━━━━━━━━━━━━━━━━━━━
 - 💰 KRW 잔고: {krw_balance}
-- 🪙 BTC 잔고: {btc_balance}
+- 🪙 {currency} 잔고: {coin_balance}
+- 🧮 평균 매수가: {snapshot["avg_buy_price"]:,.0f} 원
+- 📰 뉴스 감성: {format_sentiment(snapshot["news"])}
 """
-  run_async(send_telegram_message(telegram_message))
+  notifier.send(telegram_message, group=group)
 
   if run_transaction == False:
     return
 
   order_executed = False
-
-  # order by ai decision
-  if ai_decision == "buy":
-    try:
-      bithumb.buy_market_order("KRW-BTC", target_krw_amount)
-      order_executed = True
-    except Exception as e:
-      print(f"### Buy Failed: {str(e)} ###")
-
+  order_pending = False
+  report = None
+
+  # order by ai decision (체결될 때까지 확인 후 실제 체결 내역으로 보고)
+  if ai_decision in ("buy", "sell"):
+    with tracing.span("order", side=ai_decision, krw_amount=target_krw_amount) as span:
+      try:
+        if ai_decision == "buy":
+          report = execution_engine.buy(market, target_krw_amount)
+        else:
+          # 매도 수량은 주문 직전 호가로 환산
+          report = execution_engine.sell_krw(market, target_krw_amount, max_volume=coin_balance)
+        # 접수됐지만 상태 조회가 실패한 주문은 체결됐을 수 있으므로 미체결로 기록하지 않음
+        order_pending = report["state"] == "unknown"
+        order_executed = order_pending or report["executed_volume"] > 0
+        span.set(executed_volume=report["executed_volume"], state=report["state"])
+      except Exception as e:
+        span.fail(e)
+        print(f"### {ai_decision.capitalize()} Failed: {str(e)} ###")
+
+    if order_pending:
+      status = "주문이 접수됐지만 체결 여부를 확인하지 못했습니다"
+    else:
+      status = "주문이 체결되었습니다" if order_executed else "주문이 체결되지 않았습니다"
     message = f"""
-📈 ₿ BUY Order ₿ 📈
+📈 ₿ {ai_decision.upper()} Order ({market}) ₿ 📈
 
-- 💰 거래금액: {target_krw_amount:,.0f} 원
-- 💹 체결가격: {current_btc_price:,.0f} 원
-- 🪙 거래수량: {target_krw_amount / current_btc_price:,.8f} BTC
+{format_report(report, currency) if report else f"- ❌ 주문 실패 (주문 금액 {target_krw_amount:,.0f} 원)"}
 ━━━━━━━━━━━━━━━━━━━━━━
-주문이 실행되었습니다
+{status}
 """
     print(message)
-    run_async(send_telegram_message(message))
-  elif ai_decision == "sell":
-    target_btc_amount = target_krw_amount / current_btc_price
-
-    try:
-      bithumb.sell_market_order("KRW-BTC", target_btc_amount)
-      order_executed = True
-    except Exception as e:
-      print(f"### Sell Failed: {str(e)} ###")
-
-    message = f"""
-📈 ₿ SELL Order ₿ 📈
-
-- 💰 거래금액: {target_krw_amount:,.0f} 원
-- 💹 체결가격: {current_btc_price:,.0f} 원
-- 🪙 거래수량: {target_btc_amount:,.8f} BTC
-━━━━━━━━━━━━━━━━━━━━━━  
-주문이 실행되었습니다
-"""
-    print(message)
-    run_async(send_telegram_message(message))
+    notifier.send(message, group=group)
   elif ai_decision == "hold":
     print("### Hold Position ###")
     order_executed = True  # 'hold'도 성공한 결정으로 간주
 
-    # 잔고 업데이트를 위해 잠시 대기
-    time.sleep(1)
+  # 거래 후 잔고 (주문이 있었으면 캐시가 무효화되어 한 번만 새로 조회, hold는 캐시 재사용)
+  with tracing.span("post_trade_balances"):
+    updated_krw = portfolio.get_balance("KRW")
+    updated_coin = portfolio.get_balance(currency)
+    updated_price = price_feed.get_price(market)
+
+  # 거래 정보 로깅 (주문/체결 내역은 같은 트랜잭션에서 판단 id에 연결)
+  log_trade(
+      db,
+      ai_decision,
+      percentage if order_executed else 0,
+      reason,
+      updated_coin,
+      updated_krw,
+      updated_price,
+      market,
+      report
+  )
+
+  print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {market} 트레이딩 작업 완료")
+
+
+def run_advisory_batch(run_transaction=False, market=None, reason=None):
+  # 예약된 판단 알림 (ADVISORY_MODE=batch): 모든 마켓의 스냅샷을 모아 배치 하나로 제출, 매매 없음
+  print(f"[TRIGGER] 실행 사유: {reason} (배치 판단 알림)")
+  items = []
+  with tracing.trace("advisory_batch", run_transaction=False) as root:
+    for market in MARKETS:
+      with tracing.span("snapshot", market=market) as span:
+        snapshot = collect_market_snapshot(portfolio, lambda: get_news_sentiment(market), market)
+        span.set(errors=sorted(snapshot["errors"]) or None)
+      missing = missing_fields(snapshot)
+      if missing:
+        print(f"### {market} 필수 데이터 수집 실패: {', '.join(missing)} ###")
+        continue
+      items.append(llm_batch.make_item(market, time.time(), decision_prompt(market), build_payload(snapshot),
+                                       snapshot["current_price"], snapshot["krw_balance"], snapshot["coin_balance"]))
+    if not items:
+      root.fail("no snapshots")
+      return []
+    with tracing.span("batch_submit", requests=len(items)):
+      batch_ids = llm_batch.submit(llm_strategy.get_client(), "advisory", ADVISORY_MODEL, items)
+    root.set(batch_ids=batch_ids)
+  return batch_ids
+
+
+def notify_batch(batch_id, kind):
+  # 배치 결과가 저장되면 호출 (BatchPoller): 판단 알림 배치는 마켓별 판단 메시지 전송
+  if kind != "advisory":
+    return
+  for row in llm_batch.batch_results(batch_id):
+    market = row["market"]
+    snapshot_time = datetime.fromtimestamp(row["ts"]).strftime("%Y-%m-%d %H:%M")
+    if row["status"] != "ok":
+      notifier.send(f"⚠️ 배치 판단 실패 ({market}, {snapshot_time} 기준): {row['error']}")
+      continue
+    notifier.send(f"""
+✨ AI 투자 결정 ({market}, 배치) ✨
+
+- 🕒 기준 시각: {snapshot_time}
+- 📌 결정: {row["decision"].upper()} ({ADVISORY_MODEL} batch)
+- 📝 사유: {row["reason"]}
+━━━━━━━━━━━━━━━━━━━━━━
+- 📈 기준 시각 가격: {row["btc_price"]:,.0f} 원
+- 📊 투자 비율: {row["percentage"]}%
+━━━━━━━━━━━━━━━━━━━━━━
+- 💰 KRW 잔고: {row["krw_balance"]}
+- 🪙 {market.split("-")[1]} 잔고: {row["btc_balance"]}
+""")
 
-    # 거래 후 최신 잔고 조회
-    updated_krw = bithumb.get_balance("KRW")
-    updated_btc = bithumb.get_balance("BTC")
-    updated_price = python_bithumb.get_current_price("KRW-BTC")
 
-    # 거래 정보 로깅
-    log_trade(
-        conn,
-        ai_decision,
-        percentage if order_executed else 0,
-        reason,
-        updated_btc,
-        updated_krw,
-        updated_price
-    )
+def run_cycle(run_transaction=True):
+  # 설정된 모든 마켓의 파이프라인을 동시에 실행 (호출 제한은 마켓끼리 공유)
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=len(MARKETS)) as executor:
+    futures = {executor.submit(execute_trade, run_transaction, market): market for market in MARKETS}
+    for future in as_completed(futures):
+      try:
+        future.result()
+      except Exception as e:
+        print(f"### {futures[future]} 트레이딩 작업 실패: {str(e)} ###")
+  print(f"[CYCLE] {len(MARKETS)}개 마켓 완료: {time.perf_counter() - start:.2f}s")
 
-    conn.close()
 
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 트레이딩 작업 완료")
+def run_triggered(run_transaction=False, market=None, reason=None):
+  # 트리거 엔진에서 호출: 예약 실행은 모든 마켓, 시장 트리거는 해당 마켓만 실행
+  print(f"[TRIGGER] 실행 사유: {reason}")
+  if market is None:
+    run_cycle(run_transaction)
+  else:
+    execute_trade(run_transaction, market)
 
 
 def run_scheduler():
@@ -348,22 +511,45 @@ def run_scheduler():
 
   SCHEDULE_TIME = "03:17"
   print(f"스케줄링된 실행 시간: 매일 {SCHEDULE_TIME}")
+  print(f"대상 마켓: {', '.join(MARKETS)}")
+
+  # 실시간 시세 구독 (현재가 조회는 모두 이 캐시를 거침)
+  price_feed.start_default_feed(MARKETS)
+
+  engine = TriggerEngine(
+      run_triggered,
+      max_concurrent=int(os.getenv("MAX_CONCURRENT_RUNS", "1")),
+      global_cooldown=int(os.getenv("TRIGGER_GLOBAL_COOLDOWN", "600"))
+  )
 
-  schedule.every().day.at(SCHEDULE_TIME).do(execute_trade, run_transaction=True)
-  schedule.every().day.at("10:00").do(execute_trade, run_transaction=False)
-  schedule.every().day.at("18:00").do(execute_trade, run_transaction=False)
-  schedule.every().day.at("23:00").do(execute_trade, run_transaction=False)
-
-  # 매일 특정 시간에 작업 실행하도록 스케줄링
-  # print("스케줄링된 실행 시간: 매일 09:00, 15:00, 21:00")
-  # schedule.every().day.at("09:00").do(execute_trade)
-  # schedule.every().day.at("15:00").do(execute_trade)
-  # schedule.every().day.at("21:00").do(execute_trade)
-
-  # 스케줄 루프 실행
-  while True:
-    schedule.run_pending()
-    time.sleep(60)  # 1분마다 스케줄 확인
+  # 정해진 시각 실행 (03:17 매매, 나머지는 판단 알림만, ADVISORY_MODE=batch면 판단 알림은 Batch API로)
+  engine.add(DailyTimer(SCHEDULE_TIME, run_transaction=True))
+  advisory_action = run_advisory_batch if ADVISORY_MODE == "batch" else None
+  for at in ("10:00", "18:00", "23:00"):
+    engine.add(DailyTimer(at, run_transaction=False, action=advisory_action))
+  if ADVISORY_MODE == "batch":
+    # 재시작 전에 제출한 배치도 이어서 조회
+    llm_batch.BatchPoller(llm_strategy.get_client(), notify_batch, interval=BATCH_POLL_INTERVAL).start()
+
+  # 시장 트리거 (기본은 판단 알림만, TRIGGER_RUN_TRANSACTION=true면 매매까지)
+  trigger_trades = os.getenv("TRIGGER_RUN_TRANSACTION", "false").lower() == "true"
+  for market in MARKETS:
+    engine.add(PriceMoveTrigger(market, price_feed.get_price,
+                                threshold_pct=float(os.getenv("PRICE_MOVE_PCT", "3")),
+                                window=int(os.getenv("PRICE_MOVE_WINDOW", "3600")),
+                                run_transaction=trigger_trades))
+    engine.add(VolatilityTrigger(market, price_feed.get_price,
+                                 ratio=float(os.getenv("VOLATILITY_RATIO", "2.5")),
+                                 run_transaction=trigger_trades))
+
+  # 뉴스 급증 트리거 (모든 마켓 실행, 기사는 백그라운드 수집기가 저장)
+  engine.add(NewsBurstTrigger(get_news_collector().count_since,
+                              threshold=int(os.getenv("NEWS_BURST_THRESHOLD", "5")),
+                              window=int(os.getenv("NEWS_BURST_WINDOW", "1800")),
+                              run_transaction=trigger_trades))
+
+  # 이벤트 루프 실행 (타이머는 정확한 시각에, 시장 트리거는 몇 초마다 확인)
+  asyncio.run(engine.run())
 
 
 # 실행
@@ -0,0 +1,181 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import get_database
+from candle_store import CandleStore, INTERVAL_SECONDS, KST_OFFSET
+from sizing import order_krw_amount, MIN_ORDER_KRW, MAX_ORDER_KRW, FEE_FACTOR
+
+DB_PATH = 'bitcoin_trading.db'
+
+
+# 판단 소스: 캔들 인덱스에 맞춘 decision / percentage 프레임을 반환
+# 각 판단은 해당 봉의 시가에 체결된다고 가정 (미래 데이터 참조 방지)
+
+def decisions_from_records(records, candles):
+  # [{"timestamp", "decision", "percentage"}, ...] 형태의 기록을 캔들에 정렬
+  # 기록된 시각 이후 처음 열리는 봉에서 체결
+  signals = pd.DataFrame({'decision': None, 'percentage': 0.0}, index=candles.index)
+  if not records:
+    return signals
+  recs = pd.DataFrame(records)
+  times = pd.to_datetime(recs['timestamp']).to_numpy(dtype='datetime64[ns]')
+  bar_idx = np.searchsorted(candles.index.to_numpy(dtype='datetime64[ns]'), times, side='left')
+  valid = bar_idx < len(candles)
+  recs, bar_idx = recs[valid], bar_idx[valid]
+  # 같은 봉에 여러 판단이 있으면 마지막 판단만 사용
+  recs = recs.assign(bar=bar_idx).drop_duplicates('bar', keep='last')
+  signals.iloc[recs['bar'].to_numpy(), 0] = recs['decision'].str.lower().to_numpy()
+  signals.iloc[recs['bar'].to_numpy(), 1] = recs['percentage'].fillna(0).astype(float).to_numpy()
+  return signals
+
+
+def recorded_decisions(candles, db_path=DB_PATH, market="KRW-BTC"):
+  # 기록된 실제 AI 판단 재생 (market, ts 인덱스 순서로 조회)
+  # trades 뷰의 timestamp는 서버 로컬 시각이므로 epoch ts를 캔들 인덱스와 같은 KST로 변환
+  with get_database(db_path).reading() as conn:
+    records = pd.read_sql_query(
+        "SELECT ts, decision, percentage FROM decisions WHERE market = ? ORDER BY ts",
+        conn, params=(market,))
+  records['timestamp'] = pd.to_datetime(records.pop('ts'), unit='s') + KST_OFFSET
+  return decisions_from_records(records.to_dict('records'), candles)
+
+
+def batch_decisions(candles, batch_ids, db_path=DB_PATH, market="KRW-BTC"):
+  # Batch API로 받은 판단 재생 (llm_batch.py research: 판단 시각은 봉 마감 -> 다음 봉 시가에 체결)
+  # epoch ts를 캔들 인덱스와 같은 KST로 변환 (서버 로컬 시간대와 무관)
+  placeholders = ", ".join("?" * len(batch_ids))
+  with get_database(db_path).reading() as conn:
+    records = pd.read_sql_query(
+        f"""SELECT ts, decision, percentage FROM batch_decisions
+            WHERE batch_id IN ({placeholders}) AND market = ? AND status = 'ok' ORDER BY ts""",
+        conn, params=(*batch_ids, market))
+  records['timestamp'] = pd.to_datetime(records.pop('ts'), unit='s') + KST_OFFSET
+  return decisions_from_records(records.to_dict('records'), candles)
+
+
+def sma_cross_decisions(candles, fast=12, slow=48, percentage=50):
+  # LLM 대신 쓰는 규칙 기반 판단: 단기 이평이 장기 이평을 돌파하면 매수, 이탈하면 매도
+  close = candles['close']
+  above = (close.rolling(fast).mean() > close.rolling(slow).mean()).astype(int)
+  cross = above.diff().fillna(0)
+  # 봉 마감 후 판단 -> 다음 봉 시가에 체결
+  cross = cross.shift(1).fillna(0)
+  decision = np.select([cross > 0, cross < 0], ['buy', 'sell'], default=None)
+  return pd.DataFrame({
+      'decision': decision,
+      'percentage': np.where(decision != None, float(percentage), 0.0)  # noqa: E711
+  }, index=candles.index)
+
+
+def simulate(price, close, decision, percentage, initial_krw=1_000_000, initial_btc=0.0,
+             min_amount=MIN_ORDER_KRW, max_amount=MAX_ORDER_KRW, fee_factor=FEE_FACTOR):
+  # numpy 배열만으로 판단 재생 (run_backtest와 파라미터 탐색 워커가 공유)
+  # 반환: (요약 dict, krw, btc, equity, drawdown 배열)
+  is_buy = decision == 'buy'
+  is_sell = decision == 'sell'
+
+  order_krw = order_krw_amount(percentage, min_amount, max_amount, fee_factor)
+  buy_krw = np.where(is_buy, order_krw, 0.0)
+  sell_qty = np.where(is_sell, order_krw / price, 0.0)
+
+  # 잔고가 부족한 주문은 거래소처럼 거절
+  # 주문이 있는 봉만 순서대로 잔고를 따라가며 거절할 주문을 고르고, 잔고 곡선은 누적합으로 한 번에 계산
+  # (거절이 많아도 주문 수에 비례, 파라미터 탐색처럼 매수/매도 신호가 잦은 경우에도 빠름)
+  rejected = 0
+  krw_now, btc_now = float(initial_krw), float(initial_btc)
+  orders = np.flatnonzero(is_buy | is_sell)
+  for i, buy, krw_amount, qty, p in zip(orders.tolist(), is_buy[orders].tolist(), buy_krw[orders].tolist(),
+                                         sell_qty[orders].tolist(), price[orders].tolist()):
+    if buy:
+      if krw_now - krw_amount < -1e-9:
+        buy_krw[i] = 0.0
+        rejected += 1
+        continue
+      krw_now -= krw_amount
+      btc_now += krw_amount * fee_factor / p
+    else:
+      if btc_now - qty < -1e-12:
+        sell_qty[i] = 0.0
+        rejected += 1
+        continue
+      btc_now -= qty
+      krw_now += qty * p * fee_factor
+  buy_qty = buy_krw * fee_factor / price
+  sell_krw = sell_qty * price * fee_factor
+  krw = initial_krw - np.cumsum(buy_krw) + np.cumsum(sell_krw)
+  btc = initial_btc + np.cumsum(buy_qty) - np.cumsum(sell_qty)
+
+  equity = krw + btc * close
+  initial_equity = initial_krw + initial_btc * price[0] if len(price) else initial_krw
+  drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else np.array([0.0])
+
+  executed_buys = int(np.count_nonzero(buy_krw))
+  executed_sells = int(np.count_nonzero(sell_qty))
+  summary = {
+      'bars': len(price),
+      'trades': executed_buys + executed_sells,
+      'buys': executed_buys,
+      'sells': executed_sells,
+      'rejected': rejected,
+      'initial_equity': float(initial_equity),
+      'final_equity': float(equity[-1]) if len(equity) else float(initial_equity),
+      'pnl': float(equity[-1] - initial_equity) if len(equity) else 0.0,
+      'return_pct': float((equity[-1] / initial_equity - 1) * 100) if len(equity) else 0.0,
+      'max_drawdown_pct': float(drawdown.min() * 100),
+      'fees_krw': float(np.sum(buy_krw) * (1 - fee_factor) + np.sum(sell_qty * price) * (1 - fee_factor)),
+  }
+  return summary, krw, btc, equity, drawdown
+
+
+def run_backtest(candles, signals, initial_krw=1_000_000, initial_btc=0.0,
+                 min_amount=MIN_ORDER_KRW, max_amount=MAX_ORDER_KRW, fee_factor=FEE_FACTOR):
+  # execute_trade와 같은 금액 산정 방식으로 판단을 캔들 위에서 재생
+  summary, krw, btc, equity, drawdown = simulate(
+      candles['open'].to_numpy(dtype=float),
+      candles['close'].to_numpy(dtype=float),
+      signals['decision'].to_numpy(),
+      signals['percentage'].to_numpy(dtype=float),
+      initial_krw, initial_btc, min_amount, max_amount, fee_factor)
+  curve = pd.DataFrame({'krw': krw, 'btc': btc, 'equity': equity, 'drawdown': drawdown}, index=candles.index)
+  return summary, curve
+
+
+def load_history(market, interval, days, db_path=DB_PATH, sync=True):
+  # 캔들 저장소에서 최근 days일치 히스토리를 가져옴 (필요하면 먼저 동기화)
+  store = CandleStore(db_path)
+  count = int(days * 86400 // INTERVAL_SECONDS[interval])
+  if sync:
+    store.sync(market, interval, count)
+  return store.get_range(market, interval, start=time.time() - days * 86400)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="저장된 캔들로 매매 전략 백테스트")
+  parser.add_argument("--market", default="KRW-BTC")
+  parser.add_argument("--interval", default="minute60")
+  parser.add_argument("--days", type=int, default=180)
+  parser.add_argument("--source", choices=["trades", "sma", "batch"], default="trades")
+  parser.add_argument("--batch-id", nargs="+", default=[], help="--source batch: llm_batch.py research 배치 id")
+  parser.add_argument("--initial-krw", type=float, default=1_000_000)
+  parser.add_argument("--initial-btc", type=float, default=0.0)
+  parser.add_argument("--no-sync", action="store_true", help="거래소 호출 없이 로컬 데이터만 사용")
+  args = parser.parse_args()
+
+  candles = load_history(args.market, args.interval, args.days, sync=not args.no_sync)
+  if args.source == "trades":
+    signals = recorded_decisions(candles, market=args.market)
+  elif args.source == "batch":
+    signals = batch_decisions(candles, args.batch_id, market=args.market)
+  else:
+    signals = sma_cross_decisions(candles)
+
+  start = time.perf_counter()
+  summary, _ = run_backtest(candles, signals, initial_krw=args.initial_krw, initial_btc=args.initial_btc)
+  elapsed = time.perf_counter() - start
+
+  for key, value in summary.items():
+    print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+  print(f"elapsed: {elapsed * 1000:.1f} ms")
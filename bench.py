@@ -0,0 +1,365 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from fakes import fixtures
+from fakes.bithumb_http import FakeBithumbServer
+from fakes.exchange import MockExchange
+from fakes.openai_server import FakeOpenAIServer
+from fakes.serpapi_server import FakeSerpAPIServer
+from fakes.telegram_server import FakeTelegramServer
+
+# 오프라인 벤치마크: 기록된 응답(fakes.fixtures)을 로컬 대체 서버로 돌려주고 파이프라인 각 부분의 시간을 잼
+#   pipeline: execute_trade 한 사이클(규칙/LLM), 데이터 수집, 판단, 페이로드 인코딩, 뉴스 수집
+#   db:       판단 기록 쓰기/조회와 대시보드 로드/파생 계산 (1만/100만 행)
+# 결과는 저장된 기준값(bench_baseline.json)과 비교해 느려진 항목이 있으면 종료 코드 1 (배포 전 확인용)
+# 임시 디렉터리에서 실행하므로 실제 bitcoin_trading.db는 건드리지 않음
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# 기준값 대비 중앙값과 최솟값이 모두 이 비율 넘게 늘고, 중앙값 차이가 NOISE_FLOOR_MS보다 크면 회귀
+# (최솟값까지 보는 건 다른 프로세스 때문에 몇 번 느려진 측정을 회귀로 보지 않기 위해)
+TOLERANCE = 0.25
+NOISE_FLOOR_MS = 1.0
+SCALES = {"10k": 10_000, "1m": 1_000_000}
+MARKET = "KRW-BTC"
+
+
+def summarize_samples(samples, **extra):
+  samples = np.asarray(samples, dtype=float)
+  return {
+      "median_ms": float(np.median(samples)),
+      "p95_ms": float(np.percentile(samples, 95)),
+      "min_ms": float(samples.min()),
+      "n": len(samples),
+      **extra,
+  }
+
+
+def measure(fn, repeat=10, warmup=1, setup=None, quiet=False):
+  # fn을 warmup번 실행한 뒤 repeat번 잰 결과 (setup은 매번 fn 전에 실행, 시간에 포함하지 않음)
+  output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+  samples = []
+  with output:
+    for i in range(warmup + repeat):
+      if setup is not None:
+        setup()
+      start = time.perf_counter()
+      fn()
+      if i >= warmup:
+        samples.append((time.perf_counter() - start) * 1000)
+  return summarize_samples(samples)
+
+
+# ---- 대체 서버 ----
+
+class StandIns:
+  # 기록된 응답으로 빗썸/SerpAPI/OpenAI/텔레그램 대체 서버를 띄우고 환경변수로 연결
+  # 환경변수는 프로젝트 모듈을 import하기 전에 설정해야 함 (exchange_client가 import 시 주소를 읽음)
+
+  def __init__(self, recorded, openai_delay=0.0, serpapi_delay=0.0, bithumb_delay=0.0):
+    currency = MARKET.split("-")[1]
+    accounts = {row["currency"]: row for row in recorded["accounts"]}
+    exchange = MockExchange(
+        prices={MARKET: float(recorded["ticker"][0]["trade_price"])},
+        balances={code: float(row["balance"]) for code, row in accounts.items()},
+    )
+    if currency in accounts:
+      exchange.avg_buy_prices[currency] = float(accounts[currency].get("avg_buy_price") or 0)
+    self.bithumb = FakeBithumbServer(exchange, delay=bithumb_delay, candles={
+        interval: recorded[f"candles_{interval}"] for interval in fixtures.CANDLE_ENDPOINTS})
+    self.serpapi = FakeSerpAPIServer(recorded["serpapi_google_news"], delay=serpapi_delay)
+    self.openai = FakeOpenAIServer(recorded["openai_chat_completion"], delay=openai_delay)
+    self.telegram = FakeTelegramServer()
+
+  def start(self):
+    for server in (self.bithumb, self.serpapi, self.openai, self.telegram):
+      server.start()
+    os.environ.update({
+        "BITHUMB_API_URL": self.bithumb.url,
+        "BITHUMB_ACCESS_KEY": "bench-access-key-0000000000000000",
+        "BITHUMB_SECRET_KEY": "bench-secret-key-0000000000000000",
+        "SERPAPI_URL": self.serpapi.url,
+        "SERPAPI_API_KEY": "bench",
+        "OPENAI_BASE_URL": self.openai.base_url,
+        "OPENAI_API_KEY": "bench",
+        "TELEGRAM_API_URL": self.telegram.base_url,
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "MARKETS": MARKET,
+        "DECISION_ENGINE": "rules",
+    })
+    return self
+
+  def stop(self):
+    for server in (self.bithumb, self.serpapi, self.openai, self.telegram):
+      server.stop()
+
+
+# ---- 파이프라인 ----
+
+def _expire_candle_sync():
+  # 실제 운영처럼 지난 실행 이후 새 봉이 생긴 상태로 (증분 동기화가 매번 일어나게)
+  import indicators
+  indicators.get_default_cache().db.execute("UPDATE candle_sync SET synced_at = synced_at - 3600").result()
+
+
+def bench_pipeline(repeat):
+  import autotrade
+  import news
+  from market_data import collect_market_snapshot
+  from payload_encoder import FORMATS, count_tokens, encode_charts
+  from strategies import RuleStrategy
+  from tracing import stage_summary
+  from news import sentiment_series
+
+  results = {}
+  query = autotrade.news_query(MARKET)
+  collector = news.NewsCollector([query], monthly_quota=0)
+  autotrade.news_collector = collector
+  results["news.refresh"] = measure(lambda: collector.refresh(query), repeat, quiet=True)
+
+  snapshot = {}
+
+  def snap():
+    snapshot.update(collect_market_snapshot(autotrade.portfolio, lambda: autotrade.get_news_sentiment(MARKET),
+                                            MARKET))
+  results["pipeline.snapshot"] = measure(snap, repeat, setup=_expire_candle_sync, quiet=True)
+
+  rules = RuleStrategy()
+  results["decide.rules"] = measure(lambda: rules.decide(snapshot), repeat * 10)
+  llm = autotrade.llm_strategy
+  llm.cache = None
+  results["decide.llm"] = measure(lambda: llm.decide(snapshot), repeat, quiet=True)
+
+  frames = {name: snapshot[f"{name}_df"] for name in ("short_term", "mid_term", "long_term")}
+  for fmt in FORMATS:
+    tokens = count_tokens(json.dumps(encode_charts(frames, fmt)))
+    results[f"payload.encode.{fmt}"] = {**measure(lambda: encode_charts(frames, fmt), repeat * 10), "tokens": tokens}
+  payload_size = len(json.dumps(autotrade.build_payload(snapshot)))
+  results["payload.build"] = {**measure(lambda: json.dumps(autotrade.build_payload(snapshot)), repeat * 10),
+                              "bytes": payload_size}
+
+  # 한 사이클 전체 (주문 포함, 기록된 LLM 판단이 매수면 매번 주문)
+  for engine in ("rules", "llm"):
+    autotrade.decision_engine = rules if engine == "rules" else llm
+    results[f"execute_trade.{engine}"] = measure(lambda: autotrade.execute_trade(True, MARKET), repeat,
+                                                 setup=_expire_candle_sync, quiet=True)
+  autotrade.notifier.flush()
+
+  db = autotrade.init_db()
+  import tracing
+  tracing.get_tracer().flush()
+  results["dashboard.stage_summary"] = measure(lambda: stage_summary(db, 0, MARKET), repeat * 10)
+  results["dashboard.sentiment_series"] = measure(lambda: sentiment_series(db, query, 0), repeat * 10)
+  return results
+
+
+# ---- 저장소 / 대시보드 ----
+
+def _decision_rows(n, seed=0):
+  rng = np.random.default_rng(seed)
+  now = int(time.time())
+  decisions = rng.choice(["buy", "sell", "hold"], n, p=[0.3, 0.3, 0.4])
+  prices = 100_000_000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+  krw = rng.uniform(100_000, 1_000_000, n)
+  coin = rng.uniform(0, 0.01, n)
+  for i in range(n):
+    yield (now - (n - i) * 60, MARKET, str(decisions[i]), int(rng.integers(0, 100)),
+           "bench: RSI and MACD histogram suggest a short-term move with neutral news sentiment",
+           float(coin[i]), float(krw[i]), float(prices[i]))
+
+
+def _insert_decisions(conn, rows):
+  conn.executemany('''INSERT INTO decisions
+                        (ts, market, decision, percentage, reason, btc_balance, krw_balance, btc_price)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+  return len(rows)
+
+
+def bench_db(label, n, repeat):
+  import autotrade
+  from chart_data import decision_markers, downsample
+  from storage import Database
+  from trade_history import TradeHistory
+
+  results = {}
+  path = f"bench_{label}.db"
+  db = Database(path)
+  try:
+    # 대량 기록: 1000행씩 묶은 쓰기 작업을 쓰기 큐에 넣고 마지막 커밋까지
+    start = time.perf_counter()
+    chunk, futures = [], []
+    for row in _decision_rows(n):
+      chunk.append(row)
+      if len(chunk) == 1000:
+        futures.append(db.write(_insert_decisions, chunk))
+        chunk = []
+    if chunk:
+      futures.append(db.write(_insert_decisions, chunk))
+    for future in futures:
+      future.result()
+    elapsed = time.perf_counter() - start
+    results[f"db.bulk_insert.{label}"] = {**summarize_samples([elapsed * 1000]), "rows_per_s": n / elapsed}
+
+    # 거래 한 번의 기록 (log_trade) 1000개를 큐에 넣고 모두 커밋될 때까지, 표시 값은 한 건당 ms
+    def log_trades():
+      pending = [autotrade.log_trade(db, "hold", 0, "bench", 0.001, 500_000.0, 100_000_000.0, MARKET)
+                 for _ in range(1000)]
+      for future in pending:
+        future.result()
+    batch = measure(log_trades, max(1, repeat // 5))
+    results[f"db.log_trade.{label}"] = {key: value / 1000 if key.endswith("_ms") else value
+                                        for key, value in batch.items()}
+    results[f"db.recent_trades.{label}"] = measure(lambda: autotrade.get_recent_trades(db, 5, MARKET), repeat * 5)
+
+    # 대시보드: 전체 로드 + 파생 컬럼, 구간 조회, 차트 다운샘플링
+    history = {}
+
+    def load():
+      history["h"] = TradeHistory(path=path, market=MARKET)
+      history["h"].refresh()
+    results[f"dashboard.history_load.{label}"] = measure(load, 1 if n >= 1_000_000 else repeat, warmup=0)
+    frame = history["h"].df
+    since = frame['timestamp'].iloc[-1] - np.timedelta64(30, "D")
+    results[f"dashboard.window.{label}"] = measure(lambda: history["h"].window(since), repeat)
+
+    def derive():
+      downsample(frame, 'timestamp', 'profit_loss_pct', method="lttb")
+      downsample(frame, 'timestamp', 'btc_price', method="minmax")
+      decision_markers(frame, 'timestamp', 'buy')
+      decision_markers(frame, 'timestamp', 'sell')
+    results[f"dashboard.downsample.{label}"] = measure(derive, repeat)
+  finally:
+    db.close()
+    from storage import _databases
+    if path in _databases:
+      _databases.pop(path).close()
+    for suffix in ("", "-wal", "-shm"):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+  return results
+
+
+# ---- 기준값 비교 ----
+
+def fixture_digest():
+  digest = {}
+  for name in fixtures.NAMES:
+    with open(fixtures.path(name), "rb") as f:
+      digest[name] = hashlib.sha1(f.read()).hexdigest()[:12]
+  return digest
+
+
+def machine_info():
+  return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise_floor=NOISE_FLOOR_MS):
+  # 항목별 (이름, 현재, 기준, 변화율, 상태), 회귀 항목 이름 목록
+  rows, regressions = [], []
+  reference = (baseline or {}).get("results", {})
+  for name, result in results.items():
+    base = reference.get(name)
+    if base is None:
+      rows.append((name, result, None, None, "new"))
+      continue
+    change = result["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+    min_change = result["min_ms"] / base["min_ms"] - 1 if base.get("min_ms") else change
+    if change > tolerance and min_change > tolerance and result["median_ms"] - base["median_ms"] > noise_floor:
+      status = "REGRESSION"
+      regressions.append(name)
+    elif change < -tolerance and base["median_ms"] - result["median_ms"] > noise_floor:
+      status = "faster"
+    else:
+      status = "ok"
+    rows.append((name, result, base, change, status))
+  return rows, regressions
+
+
+def print_report(rows):
+  print(f"{'항목':<34}{'중앙값 ms':>12}{'p95 ms':>12}{'기준 ms':>12}{'변화':>9}  상태")
+  for name, result, base, change, status in rows:
+    base_text = f"{base['median_ms']:>12.3f}" if base else f"{'-':>12}"
+    change_text = f"{change * 100:>+8.1f}%" if change is not None else f"{'-':>9}"
+    print(f"{name:<34}{result['median_ms']:>12.3f}{result['p95_ms']:>12.3f}{base_text}{change_text}  {status}")
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="기록된 응답으로 파이프라인/저장소/대시보드 성능을 재고 기준값과 비교")
+  parser.add_argument("--groups", nargs="*", choices=["pipeline", "db"], default=["pipeline", "db"])
+  parser.add_argument("--scales", nargs="*", choices=list(SCALES), default=list(SCALES),
+                      help="db 그룹의 판단 기록 행 수")
+  parser.add_argument("--repeat", type=int, default=10)
+  parser.add_argument("--baseline", default=BASELINE_PATH)
+  parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+  parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+  parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+  parser.add_argument("--openai-latency", type=float, default=0.0, help="대체 OpenAI 서버 응답 지연(초)")
+  parser.add_argument("--keep", action="store_true", help="임시 작업 디렉터리를 지우지 않음")
+  args = parser.parse_args(argv)
+
+  baseline_path = os.path.abspath(args.baseline)
+  output_path = os.path.abspath(args.output) if args.output else None
+  created = fixtures.ensure(MARKET)
+  if created:
+    print(f"기록이 없어 합성 응답 생성: {', '.join(created)} (실제 응답: python -m fakes.fixtures record)")
+  stand_ins = StandIns(fixtures.load_all(), openai_delay=args.openai_latency).start()
+
+  workdir = tempfile.mkdtemp(prefix="bench-")
+  cwd = os.getcwd()
+  os.chdir(workdir)
+  results = {}
+  try:
+    if "pipeline" in args.groups:
+      results.update(bench_pipeline(args.repeat))
+    if "db" in args.groups:
+      for label in args.scales:
+        results.update(bench_db(label, SCALES[label], args.repeat))
+  finally:
+    os.chdir(cwd)
+    stand_ins.stop()
+    if args.keep:
+      print(f"작업 디렉터리: {workdir}")
+    else:
+      shutil.rmtree(workdir, ignore_errors=True)
+
+  run = {"created": datetime.now().isoformat(timespec="seconds"), "machine": machine_info(),
+         "fixtures": fixture_digest(), "results": results}
+  baseline = None
+  if os.path.exists(baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+      baseline = json.load(f)
+    if baseline.get("machine") != run["machine"]:
+      print(f"[주의] 기준값은 다른 환경에서 측정됨: {baseline.get('machine')}")
+    if baseline.get("fixtures") != run["fixtures"]:
+      print("[주의] 기준값과 기록된 응답이 다름 (fakes/fixtures)")
+  rows, regressions = compare(results, baseline, args.tolerance)
+  print_report(rows)
+
+  if output_path:
+    with open(output_path, "w", encoding="utf-8") as f:
+      json.dump(run, f, indent=1)
+  if args.save_baseline:
+    with open(baseline_path, "w", encoding="utf-8") as f:
+      json.dump(run, f, indent=1)
+    print(f"기준값 저장: {baseline_path}")
+    return 0
+  if regressions:
+    print(f"[회귀] {len(regressions)}개 항목이 기준보다 {args.tolerance * 100:.0f}% 넘게 느려짐: {', '.join(regressions)}")
+    return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,154 @@
+import time
+
+import pandas as pd
+
+import exchange_client
+from storage import get_database
+
+DB_PATH = 'bitcoin_trading.db'
+
+# 인터벌별 캔들 길이 (초)
+INTERVAL_SECONDS = {
+    "minute1": 60,
+    "minute3": 180,
+    "minute5": 300,
+    "minute10": 600,
+    "minute15": 900,
+    "minute30": 1800,
+    "minute60": 3600,
+    "minute240": 14400,
+    "day": 86400,
+    "week": 604800,
+}
+
+# 이 시간 안에 다시 동기화를 요청하면 거래소 호출 없이 로컬 데이터만 사용
+MIN_REFRESH_SECONDS = 30
+
+KST_OFFSET = pd.Timedelta(hours=9)
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'value']
+
+
+class CandleStore:
+  # (market, interval, open_time) 키로 캔들을 저장하는 로컬 OHLCV 저장소
+  # open_time은 UTC 기준 epoch 초
+
+  def __init__(self, path=DB_PATH, fetch_fn=None):
+    # 테이블은 migrations.py (v9), 읽기/쓰기는 공유 Database (읽기 풀 + 쓰기 스레드)
+    self.path = path
+    self.fetch_fn = fetch_fn or exchange_client.get_ohlcv
+    self.db = get_database(path)
+
+  def _sync_state(self, conn, market, interval):
+    return conn.execute(
+        "SELECT verified_from, synced_at FROM candle_sync WHERE market = ? AND interval = ?",
+        (market, interval)).fetchone()
+
+  def _last_open_time(self, conn, market, interval):
+    row = conn.execute(
+        "SELECT MAX(open_time) FROM candles WHERE market = ? AND interval = ?",
+        (market, interval)).fetchone()
+    return row[0]
+
+  def _fetch(self, market, interval, count):
+    df = self.fetch_fn(market, interval=interval, count=count)
+    if df is None or df.empty:
+      return []
+    open_times = (pd.to_datetime(df['candle_date_time_utc'], utc=True)
+                  - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    return list(zip(
+        [market] * len(df), [interval] * len(df), open_times.astype(int).tolist(),
+        *(df[col].astype(float).tolist() for col in OHLCV_COLUMNS)))
+
+  def _save(self, conn, market, interval, rows, verified_from, synced_at):
+    # 받아온 캔들과 동기화 상태를 한 번에 기록 (진행 중인 마지막 캔들은 다시 받아올 때마다 덮어씀)
+    conn.executemany('''INSERT OR REPLACE INTO candles
+                          (market, interval, open_time, open, high, low, close, volume, value)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+    conn.execute('''INSERT OR REPLACE INTO candle_sync (market, interval, verified_from, synced_at)
+                      VALUES (?, ?, ?, ?)''', (market, interval, verified_from, synced_at))
+
+  def sync(self, market, interval, count):
+    # 마지막 저장 캔들 이후 것만 받아오고, 요청 구간에 빈 곳이 있으면 채움
+    # 반환: 거래소에서 받아온 캔들 수
+    if interval not in INTERVAL_SECONDS:
+      raise ValueError(f"Unsupported interval for candle store: {interval}")
+    step = INTERVAL_SECONDS[interval]
+    now = time.time()
+
+    with self.db.reading() as conn:
+      state = self._sync_state(conn, market, interval)
+      last = self._last_open_time(conn, market, interval)
+    recently_synced = state is not None and state[1] is not None and now - state[1] < MIN_REFRESH_SECONDS
+    verified_from = state[0] if state is not None else None
+    rows = []
+
+    # 증분 동기화: 마지막 캔들(진행 중이었을 수 있음)부터 현재까지
+    if verified_from is not None and last is not None and not recently_synced:
+      rows += self._fetch(market, interval, int((now - last) // step) + 1)
+      last = max([last] + [row[2] for row in rows])
+
+    # 처음이거나, 요청 구간이 연속 구간보다 길면 구간 전체를 받아옴
+    if verified_from is None or last is None or verified_from > last - (count - 1) * step:
+      window = self._fetch(market, interval, count)
+      rows += window
+      if window:
+        oldest = min(row[2] for row in window)
+        verified_from = oldest if verified_from is None else min(verified_from, oldest)
+
+    if recently_synced and not rows:
+      return 0
+    # 바로 뒤의 조회가 새 캔들을 보도록 커밋까지 기다림
+    self.db.write(self._save, market, interval, rows, verified_from, now).result()
+    return len(rows)
+
+  def get_window(self, market, interval, count):
+    # 로컬 데이터만으로 최근 count개 캔들을 exchange_client.get_ohlcv와 같은 모양으로 반환
+    with self.db.reading() as conn:
+      df = pd.read_sql_query('''SELECT open_time, open, high, low, close, volume, value
+                                  FROM candles
+                                  WHERE market = ? AND interval = ?
+                                  ORDER BY open_time DESC
+                                  LIMIT ?''', conn, params=(market, interval, count))
+    return _to_frame(df, market)
+
+  def get_range(self, market, interval, start=None, end=None):
+    # 저장된 히스토리에서 [start, end] 구간 (epoch 초) 조회
+    query = "SELECT open_time, open, high, low, close, volume, value FROM candles WHERE market = ? AND interval = ?"
+    params = [market, interval]
+    if start is not None:
+      query += " AND open_time >= ?"
+      params.append(int(start))
+    if end is not None:
+      query += " AND open_time <= ?"
+      params.append(int(end))
+    query += " ORDER BY open_time"
+    with self.db.reading() as conn:
+      df = pd.read_sql_query(query, conn, params=params)
+    return _to_frame(df, market)
+
+  def get_ohlcv(self, market, interval="day", count=200):
+    self.sync(market, interval, count)
+    return self.get_window(market, interval, count)
+
+
+def _to_frame(df, market):
+  df = df.sort_values('open_time')
+  df.index = pd.to_datetime(df['open_time'], unit='s') + KST_OFFSET
+  df.index.name = 'candle_date_time_kst'
+  df.insert(0, 'market', market)
+  return df
+
+
+_default_store = None
+
+
+def get_default_store():
+  global _default_store
+  if _default_store is None:
+    _default_store = CandleStore()
+  return _default_store
+
+
+def get_ohlcv(market, interval="day", count=200):
+  # exchange_client.get_ohlcv 대신 사용하는 로컬 저장소 기반 조회
+  return get_default_store().get_ohlcv(market, interval=interval, count=count)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# 대시보드 차트용 다운샘플링
+# 거래 내역이 아무리 많아도 브라우저로 보내는 점 개수를 MAX_POINTS 근처로 제한
+#   lttb:   Largest-Triangle-Three-Buckets (선 모양 유지, 수익률 곡선용)
+#   minmax: 구간마다 최저/최고점 유지 (가격 급등락 유지)
+#   last:   구간마다 마지막 값 (결정 마커용)
+METHODS = ("lttb", "minmax", "last")
+
+MAX_POINTS = 2000
+# 이 개수를 넘는 트레이스는 WebGL(Scattergl)로 그림
+SCATTERGL_THRESHOLD = 1000
+
+
+def _as_float(x):
+  values = np.asarray(x)
+  if np.issubdtype(values.dtype, np.datetime64):
+    return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+  return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+  # 첫/마지막 점은 항상 유지하고, 나머지 구간마다 이전 선택점-다음 구간 평균과 삼각형 넓이가 가장 큰 점 선택
+  x = _as_float(x)
+  y = _as_float(y)
+  n = len(x)
+  if n_out >= n or n_out < 3:
+    return np.arange(n)
+  edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+  selected = np.empty(n_out, dtype=int)
+  selected[0] = 0
+  selected[-1] = n - 1
+  prev = 0
+  for i in range(n_out - 2):
+    start, end = edges[i], edges[i + 1]
+    next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+    avg_x = x[next_start:next_end].mean()
+    avg_y = y[next_start:next_end].mean()
+    area = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+    prev = start + int(area.argmax())
+    selected[i + 1] = prev
+  return selected
+
+
+def minmax_indices(y, n_out):
+  # n_out/2개 구간마다 최저점과 최고점 인덱스 (순서 유지)
+  y = _as_float(y)
+  n = len(y)
+  if n_out >= n or n_out < 2:
+    return np.arange(n)
+  buckets = np.array_split(np.arange(n), n_out // 2)
+  picks = []
+  for bucket in buckets:
+    values = y[bucket]
+    picks.append(bucket[values.argmin()])
+    picks.append(bucket[values.argmax()])
+  return np.unique(picks)
+
+
+def last_indices(x, n_out):
+  # 시간축을 n_out개 구간으로 나눠 구간마다 마지막 점
+  x = _as_float(x)
+  n = len(x)
+  if n_out >= n or n_out < 1:
+    return np.arange(n)
+  edges = np.linspace(x[0], x[-1], n_out + 1)[1:-1]
+  bucket = np.searchsorted(edges, x, side='right')
+  is_last = np.append(bucket[1:] != bucket[:-1], True)
+  return np.flatnonzero(is_last)
+
+
+def downsample(df, x_col, y_col, max_points=MAX_POINTS, method="lttb"):
+  # df는 x_col 기준 오름차순이어야 함
+  if method not in METHODS:
+    raise ValueError(f"unknown method: {method}")
+  if len(df) <= max_points:
+    return df
+  if method == "lttb":
+    idx = lttb_indices(df[x_col].to_numpy(), df[y_col].to_numpy(), max_points)
+  elif method == "minmax":
+    idx = minmax_indices(df[y_col].to_numpy(), max_points)
+  else:
+    idx = last_indices(df[x_col].to_numpy(), max_points)
+  return df.iloc[idx]
+
+
+def decision_markers(df, x_col, decision, max_points=MAX_POINTS // 4):
+  # 한 결정 유형의 마커: 많으면 시간 구간마다 마지막 거래만 남기고 구간 내 거래 수를 count로 기록
+  points = df[df['decision'] == decision]
+  if len(points) <= max_points:
+    return points.assign(count=1)
+  idx = last_indices(points[x_col].to_numpy(), max_points)
+  counts = np.diff(np.append(-1, idx))
+  return points.iloc[idx].assign(count=counts)
+
+
+def scatter_class(n_points):
+  # 점이 많으면 SVG 대신 WebGL 트레이스
+  return go.Scattergl if n_points > SCATTERGL_THRESHOLD else go.Scatter
+
+
+def range_step(start, end, steps=500):
+  # 구간 선택 슬라이더 간격 (최소 1분)
+  span = pd.Timestamp(end) - pd.Timestamp(start)
+  return max(pd.Timedelta(minutes=1), span / steps).to_pytimedelta()
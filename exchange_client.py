@@ -0,0 +1,359 @@
+import bisect
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import pandas as pd
+import python_bithumb
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+from rate_limit import RateLimiter
+
+# 모든 외부 HTTP 호출이 거치는 공용 클라이언트
+#   - keep-alive 세션 재사용 (연결 풀)
+#   - 그룹별 토큰 버킷 (빗썸 public / private)
+#   - 지수 백오프 + 지터 재시도 (429/5xx/연결 오류)
+#   - 엔드포인트별 (연결, 읽기) 타임아웃과 지연시간 히스토그램
+
+BITHUMB_API_URL = os.getenv("BITHUMB_API_URL", "https://api.bithumb.com")
+
+# 초당 요청 수 (환경변수로 조정)
+RATE_LIMITS = {
+    "public": float(os.getenv("BITHUMB_PUBLIC_RATE", "150")),
+    "private": float(os.getenv("BITHUMB_PRIVATE_RATE", "140")),
+}
+
+# 엔드포인트별 (연결, 읽기) 타임아웃 (초)
+DEFAULT_TIMEOUT = (3.05, 10)
+TIMEOUTS = {
+    "ticker": (3.05, 3),
+    "orderbook": (3.05, 3),
+    "candles": (3.05, 10),
+    "accounts": (3.05, 5),
+    "orders": (3.05, 10),
+    "order": (3.05, 5),
+    "serpapi": (3.05, 8),
+}
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# 지연시간 히스토그램 버킷 상한 (ms)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+
+  def __init__(self, buckets=LATENCY_BUCKETS_MS):
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.count = 0
+    self.total = 0.0
+    self.errors = 0
+    self.lock = threading.Lock()
+
+  def observe(self, seconds, error=False):
+    ms = seconds * 1000
+    with self.lock:
+      self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+      self.count += 1
+      self.total += ms
+      if error:
+        self.errors += 1
+
+  def quantile(self, q):
+    # 버킷 상한으로 근사한 분위수 (ms)
+    with self.lock:
+      if not self.count:
+        return None
+      target = q * self.count
+      seen = 0
+      for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+        seen += count
+        if seen >= target:
+          return bound
+    return float("inf")
+
+  def snapshot(self):
+    with self.lock:
+      count, total, errors, counts = self.count, self.total, self.errors, list(self.counts)
+    return {
+        "count": count,
+        "errors": errors,
+        "mean_ms": total / count if count else None,
+        "p50_ms": self.quantile(0.5),
+        "p95_ms": self.quantile(0.95),
+        "p99_ms": self.quantile(0.99),
+        "buckets": dict(zip([str(b) for b in self.buckets] + ["inf"], counts)),
+    }
+
+
+def endpoint_name(url):
+  # https://api.bithumb.com/v1/candles/minutes/60 -> candles, https://serpapi.com/search.json -> serpapi
+  parts = urlsplit(url)
+  path = [p for p in parts.path.split("/") if p]
+  if len(path) > 1 and path[0] == "v1":
+    return path[1]
+  labels = parts.hostname.split(".") if parts.hostname else ["/"]
+  return labels[-2] if len(labels) > 1 else labels[0]
+
+
+class HttpClient:
+
+  def __init__(self, limiters=None, timeouts=None, retries=3, backoff=0.5, max_backoff=8,
+               pool_size=10, session=None, sleep=time.sleep):
+    self.limiters = limiters or {}
+    self.timeouts = {**TIMEOUTS, **(timeouts or {})}
+    self.retries = retries
+    self.backoff = backoff
+    self.max_backoff = max_backoff
+    self.sleep = sleep
+    self.latency = {}
+    self.stats = {"requests": 0, "retries": 0, "failures": 0}
+    self._latency_lock = threading.Lock()
+    self.session = session or requests.Session()
+    # 재시도는 직접 처리하므로 어댑터 재시도는 끔
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    self.session.mount("https://", adapter)
+    self.session.mount("http://", adapter)
+
+  def _histogram(self, key):
+    with self._latency_lock:
+      if key not in self.latency:
+        self.latency[key] = LatencyHistogram()
+      return self.latency[key]
+
+  def _delay(self, attempt, response=None):
+    # Retry-After가 있으면 따르고, 없으면 지수 백오프 + 지터
+    if response is not None and response.headers.get("Retry-After"):
+      try:
+        return float(response.headers["Retry-After"])
+      except ValueError:
+        pass
+    return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+  def request(self, method, url, endpoint=None, group=None, timeout=None, idempotent=None, **kwargs):
+    # requests.Response 반환 (재시도 후에도 실패한 상태 코드는 그대로 반환, 연결 오류는 예외)
+    method = method.upper()
+    endpoint = endpoint or endpoint_name(url)
+    timeout = timeout or self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+    # 주문처럼 멱등이 아닌 요청은 서버에 닿지 않은 게 확실할 때(연결 실패, 429)만 재시도
+    idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+    histogram = self._histogram(f"{method} {endpoint}")
+    limiter = self.limiters.get(group)
+    # 진행 중인 trace가 있으면 호출 하나(재시도 포함)를 span으로 기록
+    with tracing.span(f"http.{endpoint}", method=method) as span:
+      attempt = 0
+      while True:
+        if limiter is not None:
+          limiter.acquire()
+        self.stats["requests"] += 1
+        start = time.perf_counter()
+        error = None
+        try:
+          response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.ConnectTimeout as e:
+          histogram.observe(time.perf_counter() - start, error=True)
+          retryable, response, error = True, None, e
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+          histogram.observe(time.perf_counter() - start, error=True)
+          retryable, response, error = idempotent, None, e
+        else:
+          histogram.observe(time.perf_counter() - start, error=response.status_code >= 400)
+          span.set(http_status=response.status_code, retries=attempt)
+          if response.status_code not in RETRY_STATUS:
+            return response
+          retryable = idempotent or response.status_code == 429
+        if not retryable or attempt >= self.retries:
+          self.stats["failures"] += 1
+          if response is not None:
+            return response
+          raise error
+        delay = self._delay(attempt, response)
+        attempt += 1
+        self.stats["retries"] += 1
+        print(f"[HTTP] {method} {endpoint} 재시도 {attempt}/{self.retries} ({delay:.2f}s 후)")
+        self.sleep(delay)
+
+  def get(self, url, params=None, **kwargs):
+    return self.request("GET", url, params=params, **kwargs)
+
+  def latency_report(self):
+    lines = []
+    for key, histogram in sorted(self.latency.items()):
+      snap = histogram.snapshot()
+      if snap["count"]:
+        lines.append(f"{key}: n={snap['count']} err={snap['errors']} mean={snap['mean_ms']:.0f}ms "
+                     f"p50<={snap['p50_ms']}ms p95<={snap['p95_ms']}ms")
+    return "\n".join(lines)
+
+
+class BithumbClient(python_bithumb.Bithumb):
+  # python_bithumb.Bithumb과 같은 메서드를 공용 HttpClient로 호출 (인증/응답 처리는 원래 구현 재사용)
+  # 키 없이 만들면 시세 조회(public)만 사용 가능
+
+  def __init__(self, access_key=None, secret_key=None, base_url=None, http=None):
+    super().__init__(access_key, secret_key)
+    self.BASE_URL = (base_url or BITHUMB_API_URL).rstrip("/")
+    self.http = http or get_bithumb_http()
+
+  def _send(self, method, endpoint, group, **kwargs):
+    response = self.http.request(method, f"{self.BASE_URL}{endpoint}", group=group, **kwargs)
+    return self._handle_response(response)
+
+  @staticmethod
+  def _query_hash(query):
+    return hashlib.sha512(query.encode()).hexdigest()
+
+  def _request(self, method, endpoint, params=None, data=None):
+    method = method.upper()
+    headers = {}
+    if method in ("POST", "DELETE", "PUT") and data is not None:
+      headers["Authorization"] = self._create_token(self._query_hash(urlencode(data)), "SHA512")
+      headers["Content-Type"] = "application/json"
+      return self._send(method, endpoint, "private", headers=headers, data=json.dumps(data))
+    query = urlencode(params) if params else ""
+    headers["Authorization"] = self._create_token(self._query_hash(query), "SHA512") if query else self._create_token()
+    return self._send(method, endpoint, "private", headers=headers, params=params)
+
+  def get_orders(self, market=None, uuids=None, state=None, states=None, page=1, limit=100, order_by='desc'):
+    params = {}
+    if market:
+      params["market"] = market
+    if state:
+      params["state"] = state
+    params.update({"page": page, "limit": limit, "order_by": order_by})
+    query = [urlencode(params)]
+    if uuids:
+      query.append("&".join(f"uuids[]={u}" for u in uuids))
+    if states:
+      query.append("&".join(f"states[]={s}" for s in states))
+    final_query = "&".join(query)
+    headers = {"Authorization": self._create_token(self._query_hash(final_query), "SHA512")}
+    return self._send("GET", f"/v1/orders?{final_query}", "private", headers=headers)
+
+  def cancel_order(self, order_uuid):
+    params = {"uuid": order_uuid}
+    headers = {"Authorization": self._create_token(self._query_hash(urlencode(params)), "SHA512")}
+    return self._send("DELETE", "/v1/order", "private", headers=headers, params=params)
+
+  # ---- 시세 (python_bithumb 모듈 함수와 같은 반환 형태) ----
+
+  def get_ohlcv(self, ticker, interval="day", count=200, period=0.1, to=None):
+    if interval == "day":
+      endpoint = "/v1/candles/days"
+    elif interval == "week":
+      endpoint = "/v1/candles/weeks"
+    elif interval == "month":
+      endpoint = "/v1/candles/months"
+    elif interval.startswith("minute"):
+      unit = int(interval.replace("minute", "") or 1)
+      if unit not in (1, 3, 5, 10, 15, 30, 60, 240):
+        raise ValueError("Invalid interval unit for minute candles. Choose from [1,3,5,10,15,30,60,240].")
+      endpoint = f"/v1/candles/minutes/{unit}"
+    else:
+      endpoint = "/v1/candles/days"
+    rows = []
+    remaining = count
+    current_to = to
+    # 한 번에 최대 200개, 토큰 버킷이 호출 간격을 관리하므로 period는 호환용
+    while remaining > 0:
+      params = {"market": ticker, "count": min(remaining, 200)}
+      if current_to:
+        params["to"] = current_to
+      data = self._send("GET", endpoint, "public", params=params)
+      if not isinstance(data, list) or not data:
+        break
+      rows.extend(data)
+      remaining -= params["count"]
+      current_to = data[-1]["candle_date_time_kst"]
+    if not rows:
+      return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df['candle_date_time_kst'] = pd.to_datetime(df['candle_date_time_kst'])
+    df.set_index('candle_date_time_kst', inplace=True)
+    df.sort_index(inplace=True)
+    return df.rename(columns={
+        "opening_price": "open",
+        "high_price": "high",
+        "low_price": "low",
+        "trade_price": "close",
+        "candle_acc_trade_volume": "volume",
+        "candle_acc_trade_price": "value",
+    })
+
+  def _market_list(self, endpoint, markets):
+    market_str = ",".join(markets) if isinstance(markets, list) else markets
+    data = self._send("GET", endpoint, "public", params={"markets": market_str})
+    return data if isinstance(data, list) else (data.get("data", []) if isinstance(data, dict) else [])
+
+  def get_current_price(self, markets):
+    items = self._market_list("/v1/ticker", markets)
+    if not items:
+      return None
+    if len(items) == 1:
+      return float(items[0]["trade_price"])
+    return {item["market"]: float(item["trade_price"]) for item in items}
+
+  def get_orderbook(self, markets):
+    items = self._market_list("/v1/orderbook", markets)
+    if not items:
+      return None
+    keys = ("market", "timestamp", "total_ask_size", "total_bid_size", "orderbook_units")
+    books = {item["market"]: {key: item[key] for key in keys} for item in items}
+    return next(iter(books.values())) if len(books) == 1 else books
+
+
+_bithumb_http = None
+_web_http = None
+_public_client = None
+_clients_lock = threading.Lock()
+
+
+def get_bithumb_http():
+  # 빗썸 호출이 모두 공유하는 세션 + 호출 제한
+  global _bithumb_http
+  with _clients_lock:
+    if _bithumb_http is None:
+      _bithumb_http = HttpClient(limiters={group: RateLimiter(rate) for group, rate in RATE_LIMITS.items()})
+    return _bithumb_http
+
+
+def get_web_http():
+  # 뉴스 등 외부 API용 세션
+  global _web_http
+  with _clients_lock:
+    if _web_http is None:
+      _web_http = HttpClient()
+    return _web_http
+
+
+def get_public_client():
+  global _public_client
+  if _public_client is None:
+    _public_client = BithumbClient()
+  return _public_client
+
+
+# python_bithumb 모듈 함수 대신 쓰는 진입점
+
+def get_ohlcv(ticker, interval="day", count=200, period=0.1, to=None):
+  return get_public_client().get_ohlcv(ticker, interval, count, period, to)
+
+
+def get_current_price(markets):
+  return get_public_client().get_current_price(markets)
+
+
+def get_orderbook(markets):
+  return get_public_client().get_orderbook(markets)
+
+
+def http_get(url, params=None, **kwargs):
+  return get_web_http().get(url, params=params, **kwargs)
@@ -0,0 +1,281 @@
+import time
+from datetime import datetime
+
+# 주문 실행: 주문을 넣고 체결될 때까지 상태를 조회한 뒤 실제 평균 체결가/수수료/슬리피지를 보고
+# exchange는 exchange_client.BithumbClient 또는 fakes.exchange.MockExchange
+# 보고서(report)는 dict:
+#   uuid, market, side(bid/ask), ord_type, state, executed_volume, funds(체결 금액),
+#   avg_price, fee, reference_price(주문 직전 호가), slippage_bps(+면 불리), trades, children(TWAP)
+
+FINAL_STATES = ("done", "cancel")
+
+
+def _float(value):
+  return float(value) if value not in (None, "") else 0.0
+
+
+def _epoch(value):
+  # 빗썸 시각 문자열 (예: 2025-01-01T12:00:00+09:00) -> epoch 초
+  if not value:
+    return int(time.time())
+  try:
+    return int(datetime.fromisoformat(value).timestamp())
+  except ValueError:
+    return int(time.time())
+
+
+def slippage_bps(side, avg_price, reference_price):
+  # 매수는 기준가보다 비싸게, 매도는 싸게 체결될수록 양수
+  if not avg_price or not reference_price:
+    return None
+  sign = 1 if side == "bid" else -1
+  return sign * (avg_price / reference_price - 1) * 10000
+
+
+def summarize_order(order, reference_price=None):
+  trades = order.get("trades") or []
+  if trades:
+    volume = sum(_float(t["volume"]) for t in trades)
+    funds = sum(_float(t.get("funds")) or _float(t["price"]) * _float(t["volume"]) for t in trades)
+  else:
+    # 체결 내역이 없는 응답: 체결 금액 필드, 없으면 주문 금액(시장가 매수) / 주문 가격 x 체결 수량(지정가)
+    volume = _float(order.get("executed_volume"))
+    funds = _float(order.get("executed_funds"))
+    if not funds and volume:
+      price = _float(order.get("price"))
+      funds = price if order.get("ord_type") == "price" else price * volume
+  avg_price = funds / volume if volume and funds else None
+  return {
+      "uuid": order.get("uuid"),
+      "market": order.get("market"),
+      "side": order.get("side"),
+      "ord_type": order.get("ord_type"),
+      "state": order.get("state"),
+      "price": _float(order.get("price")) or None,
+      "volume": _float(order.get("volume")) or None,
+      "executed_volume": volume,
+      "funds": funds,
+      "avg_price": avg_price,
+      "fee": _float(order.get("paid_fee")),
+      "reference_price": reference_price,
+      "slippage_bps": slippage_bps(order.get("side"), avg_price, reference_price),
+      "trades": trades,
+      "children": [],
+  }
+
+
+def _combined_state(reports):
+  # 상태를 모르는 조각이 하나라도 있으면 전체도 unknown (체결 여부를 거래소에서 확인해야 함)
+  if any(r["state"] == "unknown" for r in reports):
+    return "unknown"
+  return "done" if reports and all(r["state"] == "done" for r in reports) else "partial"
+
+
+def combine_reports(reports, reference_price=None):
+  # TWAP 조각 주문 보고서를 하나로 합침 (기준가는 첫 조각 직전 호가)
+  filled = [r for r in reports if r["executed_volume"]]
+  volume = sum(r["executed_volume"] for r in filled)
+  funds = sum(r["funds"] for r in filled)
+  avg_price = funds / volume if volume and funds else None
+  side = reports[0]["side"] if reports else None
+  return {
+      "uuid": None,
+      "market": reports[0]["market"] if reports else None,
+      "side": side,
+      "ord_type": "twap",
+      "state": _combined_state(reports),
+      "price": None,
+      "volume": None,
+      "executed_volume": volume,
+      "funds": funds,
+      "avg_price": avg_price,
+      "fee": sum(r["fee"] for r in reports),
+      "reference_price": reference_price,
+      "slippage_bps": slippage_bps(side, avg_price, reference_price),
+      "trades": [t for r in reports for t in r["trades"]],
+      "children": reports,
+  }
+
+
+class ExecutionEngine:
+
+  def __init__(self, exchange, quote_fn=None, limiter=None, poll_interval=0.5, max_poll_interval=5,
+               timeout=30, twap_threshold_krw=None, twap_slices=4, twap_interval=30, sleep=time.sleep,
+               on_order=None):
+    # quote_fn(market) -> {"price", "bid", "ask"} (price_feed.get_quote 형태)
+    # on_order(market, report): 주문이 끝날 때마다 호출 (잔고 캐시 무효화 등, 실패 시 report는 None)
+    # twap_threshold_krw: 이 금액을 넘는 주문은 twap_slices개로 나눠 twap_interval초 간격으로 실행
+    self.exchange = exchange
+    self.quote_fn = quote_fn
+    self.limiter = limiter
+    self.poll_interval = poll_interval
+    self.max_poll_interval = max_poll_interval
+    self.timeout = timeout
+    self.twap_threshold_krw = twap_threshold_krw
+    self.twap_slices = twap_slices
+    self.twap_interval = twap_interval
+    self.sleep = sleep
+    self.on_order = on_order
+
+  def _call(self, fn, *args):
+    if self.limiter is not None:
+      self.limiter.acquire()
+    return fn(*args)
+
+  def reference_price(self, market, side):
+    # 매수는 최우선 매도호가, 매도는 최우선 매수호가 (호가가 없으면 현재가)
+    quote = self.quote_fn(market) if self.quote_fn else None
+    if not quote:
+      return None
+    return quote.get("ask" if side == "bid" else "bid") or quote.get("price")
+
+  def wait(self, uuid, timeout=None):
+    # 최종 상태(done/cancel)가 될 때까지 조회 간격을 늘려가며 확인, 시간 초과 시 마지막 상태 반환
+    deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+    interval = self.poll_interval
+    while True:
+      order = self._call(self.exchange.get_order, uuid)
+      if order.get("state") in FINAL_STATES or time.monotonic() >= deadline:
+        return order
+      self.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+      interval = min(interval * 1.5, self.max_poll_interval)
+
+  def _run(self, submit, args, side, market, timeout=None, cancel_on_timeout=True):
+    reference = self.reference_price(market, side)
+    placed = self._call(submit, *args)
+    report = None
+    try:
+      try:
+        order = self.wait(placed["uuid"], timeout)
+        if order.get("state") not in FINAL_STATES and cancel_on_timeout:
+          # 미체결 지정가 주문은 취소하고 취소 확정 상태(부분 체결 포함)를 다시 조회
+          try:
+            self._call(self.exchange.cancel_order, placed["uuid"])
+          except Exception as e:
+            print(f"[EXECUTION] {market} 주문 취소 실패: {str(e)}")
+          order = self.wait(placed["uuid"], timeout=self.max_poll_interval * 2)
+      except Exception as e:
+        # 주문은 거래소에 접수됨: 상태를 모르는 주문으로 보고해서 orders에 남김 (나중에 uuid로 대조)
+        print(f"[EXECUTION] {market} 주문 {placed.get('uuid')} 상태 조회 실패: {str(e)}")
+        order = {"market": market, "side": side, **placed, "state": "unknown"}
+      report = summarize_order(order, reference)
+      return report
+    finally:
+      # 주문이 접수된 뒤에는 상태 조회가 실패해도 잔고가 바뀌었을 수 있음
+      if self.on_order is not None:
+        self.on_order(market, report)
+
+  # ---- 단일 주문 ----
+
+  def market_buy(self, market, krw_amount):
+    return self._run(self.exchange.buy_market_order, (market, krw_amount), "bid", market)
+
+  def market_sell(self, market, volume):
+    return self._run(self.exchange.sell_market_order, (market, volume), "ask", market)
+
+  def limit_buy(self, market, price, volume, timeout=None, cancel_on_timeout=True):
+    return self._run(self.exchange.buy_limit_order, (market, price, volume), "bid", market,
+                     timeout, cancel_on_timeout)
+
+  def limit_sell(self, market, price, volume, timeout=None, cancel_on_timeout=True):
+    return self._run(self.exchange.sell_limit_order, (market, price, volume), "ask", market,
+                     timeout, cancel_on_timeout)
+
+  # ---- 분할 주문 ----
+
+  def twap(self, market, side, amount, slices=None, interval=None):
+    # amount: 매수는 KRW 금액, 매도는 코인 수량
+    slices = slices or self.twap_slices
+    interval = self.twap_interval if interval is None else interval
+    reference = self.reference_price(market, side)
+    reports = []
+    for i in range(slices):
+      part = amount / slices
+      try:
+        if side == "bid":
+          reports.append(self.market_buy(market, part))
+        else:
+          reports.append(self.market_sell(market, part))
+      except Exception as e:
+        # 주문 접수 자체가 실패 (접수된 뒤의 조회 실패는 state unknown 보고서로 돌아옴)
+        print(f"[EXECUTION] {market} TWAP {i + 1}/{slices} 실패: {str(e)}")
+        break
+      if reports[-1]["state"] == "unknown":
+        # 상태를 모르는 조각이 있으면 남은 조각은 넣지 않음 (중복 체결 방지)
+        print(f"[EXECUTION] {market} TWAP {i + 1}/{slices} 상태 확인 실패, 남은 조각 중단")
+        break
+      if i < slices - 1 and interval:
+        self.sleep(interval)
+    if not reports:
+      raise RuntimeError(f"{market} TWAP 주문이 하나도 실행되지 않았습니다")
+    return combine_reports(reports, reference)
+
+  def _use_twap(self, krw_amount):
+    return self.twap_threshold_krw is not None and krw_amount > self.twap_threshold_krw and self.twap_slices > 1
+
+  def buy(self, market, krw_amount):
+    if self._use_twap(krw_amount):
+      return self.twap(market, "bid", krw_amount)
+    return self.market_buy(market, krw_amount)
+
+  def sell(self, market, volume):
+    reference = self.reference_price(market, "ask")
+    if reference and self._use_twap(volume * reference):
+      return self.twap(market, "ask", volume)
+    return self.market_sell(market, volume)
+
+  def sell_krw(self, market, krw_amount, max_volume=None):
+    # 주문 직전 매수호가로 KRW 금액을 수량으로 환산 (보유 수량을 넘지 않게)
+    reference = self.reference_price(market, "ask")
+    if not reference:
+      raise RuntimeError(f"{market} 호가를 가져오지 못했습니다")
+    volume = krw_amount / reference
+    if max_volume is not None:
+      volume = min(volume, max_volume)
+    return self.sell(market, volume)
+
+
+def record_execution(conn, decision_id, report):
+  # 쓰기 스레드에서 실행 (storage.Database.write): 주문/체결을 판단 id에 연결해 저장
+  now = int(time.time())
+  order_ids = []
+  for order in report["children"] or [report]:
+    cursor = conn.execute('''INSERT INTO orders
+                               (decision_id, ts, market, side, order_type, exchange_order_id,
+                                price, volume, krw_amount, state, updated_at)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                          (decision_id, now, order["market"], order["side"], order["ord_type"], order["uuid"],
+                           order["price"], order["volume"], order["funds"], order["state"], now))
+    order_id = cursor.lastrowid
+    order_ids.append(order_id)
+    # 주문 수수료는 체결 금액 비율로 각 체결에 나눔
+    total_funds = order["funds"] or 1.0
+    for trade in order["trades"]:
+      price = _float(trade["price"])
+      volume = _float(trade["volume"])
+      funds = _float(trade.get("funds")) or price * volume
+      conn.execute('''INSERT OR IGNORE INTO fills (order_id, ts, price, volume, fee, exchange_trade_id)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                   (order_id, _epoch(trade.get("created_at")), price, volume,
+                    order["fee"] * funds / total_funds, trade.get("uuid")))
+  return order_ids
+
+
+def format_report(report, currency):
+  if report["state"] == "unknown" and not report["executed_volume"]:
+    return f"- ⏳ 체결 확인 실패: 주문 접수됨 ({report['uuid'] or '분할 주문'}), 거래소에서 확인 필요"
+  if not report["executed_volume"]:
+    return f"- ⚠️ 체결 없음 (상태: {report['state']})"
+  lines = [
+      f"- 💰 체결금액: {report['funds']:,.0f} 원",
+      f"- 💹 평균 체결가: {report['avg_price']:,.0f} 원" if report["avg_price"] else "- 💹 평균 체결가: -",
+      f"- 🪙 체결수량: {report['executed_volume']:,.8f} {currency}",
+      f"- 🧾 수수료: {report['fee']:,.2f} 원",
+  ]
+  if report["slippage_bps"] is not None:
+    lines.append(f"- 📐 슬리피지: {report['slippage_bps']:+.1f} bp (기준가 {report['reference_price']:,.0f} 원)")
+  if report["children"]:
+    lines.append(f"- ✂️ 분할 주문: {len(report['children'])}회")
+  if report["state"] == "unknown":
+    lines.append("- ⏳ 일부 주문의 체결 여부를 확인하지 못함 (거래소에서 확인 필요)")
+  return "\n".join(lines)
@@ -0,0 +1 @@
+# 오프라인 테스트용 로컬 대체 서버들 (거래소, 텔레그램, OpenAI 등)
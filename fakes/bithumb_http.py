@@ -0,0 +1,223 @@
+import json
+import math
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from python_bithumb import BithumbAPIException
+
+from fakes.exchange import MockExchange
+
+# 빗썸 REST API 대체 서버 (오프라인 테스트용)
+# 주문/잔고는 MockExchange가 처리, 시세와 캔들은 MockExchange 가격으로 만들어 응답
+# exchange_client.BithumbClient(base_url=server.url) 로 연결
+
+KST = timezone(timedelta(hours=9))
+MINUTE_UNITS = (1, 3, 5, 10, 15, 30, 60, 240)
+
+
+class FakeBithumbServer:
+
+  def __init__(self, exchange=None, host="127.0.0.1", port=0, fail_first=0, rate_limit_first=0,
+               retry_after=0, delay=0.0, candles=None):
+    # fail_first: 처음 N번 요청에 503, rate_limit_first: 그다음 N번 요청에 429(Retry-After)
+    # delay: 모든 응답 전 지연(초)
+    # candles: {인터벌(minute60, day ...): 기록된 빗썸 캔들 응답} (fakes.fixtures), 있으면 생성 대신 기록을 응답
+    self.exchange = exchange or MockExchange()
+    self.candles = {
+        interval: sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+        for interval, rows in (candles or {}).items()
+    }
+    self.fail_first = fail_first
+    self.rate_limit_first = rate_limit_first
+    self.retry_after = retry_after
+    self.delay = delay
+    self.requests = []
+    self.connections = 0
+    self.lock = threading.Lock()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      # keep-alive 연결 재사용을 확인할 수 있도록 HTTP/1.1
+      protocol_version = "HTTP/1.1"
+
+      def log_message(self, *args):
+        pass
+
+      def setup(self):
+        super().setup()
+        with server.lock:
+          server.connections += 1
+
+      def _handle(self):
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+          params.update(json.loads(self.rfile.read(length).decode("utf-8") or "{}"))
+        status, payload, headers = server.handle(self.command, parts.path, params, self.headers)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+          self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+      do_GET = do_POST = do_DELETE = _handle
+
+    self.httpd = ThreadingHTTPServer((host, port), Handler)
+    self.host, self.port = self.httpd.server_address
+    self._thread = None
+
+  @property
+  def url(self):
+    return f"http://{self.host}:{self.port}"
+
+  def handle(self, method, path, params, headers):
+    if self.delay:
+      time.sleep(self.delay)
+    with self.lock:
+      self.requests.append((method, path))
+      if self.fail_first > 0:
+        self.fail_first -= 1
+        return 503, {"error": {"name": "service_unavailable", "message": "temporarily unavailable"}}, {}
+      if self.rate_limit_first > 0:
+        self.rate_limit_first -= 1
+        return 429, {"error": {"name": "too_many_requests", "message": "Too many requests"}}, \
+            {"Retry-After": str(self.retry_after)}
+    try:
+      if path.startswith("/v1/candles/"):
+        return 200, self._candles(path, params), {}
+      if path == "/v1/ticker":
+        return 200, self._ticker(params), {}
+      if path == "/v1/orderbook":
+        return 200, self._orderbook(params), {}
+      # 이하 private API: 인증 헤더 필요
+      if not headers.get("Authorization"):
+        return 401, {"error": {"name": "invalid_access_key", "message": "Authorization header missing"}}, {}
+      if path == "/v1/accounts":
+        return 200, self.exchange.get_balances(), {}
+      if path == "/v1/orders" and method == "POST":
+        return 201, self._place(params), {}
+      if path == "/v1/order" and method == "GET":
+        return 200, self.exchange.get_order(params["uuid"]), {}
+      if path == "/v1/order" and method == "DELETE":
+        return 200, self.exchange.cancel_order(params["uuid"]), {}
+    except BithumbAPIException as e:
+      name, _, message = e.error_msg.partition(": ")
+      return e.status_code, {"error": {"name": name.replace("Error ", ""), "message": message}}, {}
+    except (KeyError, ValueError) as e:
+      return 400, {"error": {"name": "invalid_parameter", "message": str(e)}}, {}
+    return 404, {"error": {"name": "not_found", "message": path}}, {}
+
+  def _place(self, body):
+    market, side, ord_type = body["market"], body["side"], body["ord_type"]
+    if side == "bid" and ord_type == "price":
+      return self.exchange.buy_market_order(market, float(body["price"]))
+    if side == "ask" and ord_type == "market":
+      return self.exchange.sell_market_order(market, float(body["volume"]))
+    if ord_type == "limit":
+      fn = self.exchange.buy_limit_order if side == "bid" else self.exchange.sell_limit_order
+      return fn(market, float(body["price"]), float(body["volume"]))
+    raise ValueError(f"unsupported order: {side} {ord_type}")
+
+  def _ticker(self, params):
+    return [{"market": market, "trade_price": self.exchange.get_current_price(market),
+             "timestamp": int(time.time() * 1000)}
+            for market in params["markets"].split(",")]
+
+  def _orderbook(self, params):
+    books = []
+    for market in params["markets"].split(","):
+      quote = self.exchange.get_quote(market)
+      books.append({
+          "market": market,
+          "timestamp": int(time.time() * 1000),
+          "total_ask_size": 1.0,
+          "total_bid_size": 1.0,
+          "orderbook_units": [{"ask_price": quote["ask"], "bid_price": quote["bid"], "ask_size": 1.0, "bid_size": 1.0}],
+      })
+    return books
+
+  def _candles(self, path, params):
+    # 현재가 주변을 오가는 결정적인 가격으로 최신 봉부터 count개 (to가 있으면 그 이전)
+    parts = path.strip("/").split("/")
+    if parts[2] == "minutes":
+      unit = int(parts[3])
+      if unit not in MINUTE_UNITS:
+        raise ValueError(f"invalid unit {unit}")
+      step = unit * 60
+      interval = f"minute{unit}"
+    else:
+      step = {"days": 86400, "weeks": 604800, "months": 2592000}[parts[2]]
+      interval = parts[2].rstrip("s")
+    market = params["market"]
+    count = min(int(params.get("count", 1)), 200)
+    end = time.time()
+    if params.get("to"):
+      end = datetime.fromisoformat(params["to"]).replace(tzinfo=KST).timestamp() - step
+    last_open = int(end // step * step)
+    if interval in self.candles:
+      return self._recorded_candles(interval, step, market, last_open, count)
+    base = self.exchange.get_current_price(market)
+    candles = []
+    for i in range(count):
+      open_time = last_open - i * step
+      wave = base * (1 + 0.02 * math.sin(open_time / (step * 12)))
+      close = wave * (1 + 0.002 * math.cos(open_time / step))
+      candles.append({
+          "market": market,
+          "candle_date_time_utc": datetime.fromtimestamp(open_time, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+          "candle_date_time_kst": datetime.fromtimestamp(open_time, KST).strftime("%Y-%m-%dT%H:%M:%S"),
+          "opening_price": wave,
+          "high_price": max(wave, close) * 1.001,
+          "low_price": min(wave, close) * 0.999,
+          "trade_price": close,
+          "timestamp": open_time * 1000,
+          "candle_acc_trade_price": close * 1.5,
+          "candle_acc_trade_volume": 1.5,
+      })
+    return candles
+
+  def _recorded_candles(self, interval, step, market, last_open, count):
+    # 기록의 최신 봉이 지금 진행 중인 봉이 되도록 시각만 옮겨서 응답 (가격/거래량은 기록 그대로)
+    rows = self.candles[interval]
+    shift = int(time.time() // step * step) - rows[0]["timestamp"] // 1000
+    candles = []
+    for row in rows:
+      open_time = row["timestamp"] // 1000 + shift
+      if open_time > last_open:
+        continue
+      candles.append({
+          **row,
+          "market": market,
+          "candle_date_time_utc": datetime.fromtimestamp(open_time, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+          "candle_date_time_kst": datetime.fromtimestamp(open_time, KST).strftime("%Y-%m-%dT%H:%M:%S"),
+          "timestamp": open_time * 1000,
+      })
+      if len(candles) >= count:
+        break
+    return candles
+
+  def start(self):
+    self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-bithumb", daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
+
+
+if __name__ == "__main__":
+  import sys
+  # 사용법: python -m fakes.bithumb_http 8080  (BITHUMB_API_URL=http://127.0.0.1:8080)
+  server = FakeBithumbServer(MockExchange(balances={"KRW": 1_000_000.0}),
+                             port=int(sys.argv[1]) if len(sys.argv) > 1 else 8080).start()
+  print(f"가짜 빗썸 서버 실행 중: {server.url}")
+  while True:
+    time.sleep(60)
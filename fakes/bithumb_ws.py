@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+
+import websockets
+
+# 녹화된 빗썸 WebSocket 메시지를 다시 재생하는 로컬 서버 (오프라인 테스트용)
+# 메시지 파일은 price_feed.py record 로 만든 JSON lines
+
+
+def load_messages(path):
+  with open(path, encoding="utf-8") as f:
+    return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+
+  def __init__(self, messages, host="127.0.0.1", port=0, interval=0.0, close_after=None):
+    # interval: 메시지 간 간격(초), close_after: 이 개수만큼 보낸 뒤 연결 끊기 (재연결 테스트용)
+    self.messages = messages
+    self.host = host
+    self.port = port
+    self.interval = interval
+    self.close_after = close_after
+    self.connections = 0
+    self.subscriptions = []
+    self._loop = None
+    self._server = None
+    self._thread = None
+    self._ready = threading.Event()
+
+  @property
+  def url(self):
+    return f"ws://{self.host}:{self.port}"
+
+  async def _handler(self, ws):
+    self.connections += 1
+    request = json.loads(await ws.recv())
+    self.subscriptions.append(request)
+    codes = set()
+    for item in request:
+      codes.update(item.get("codes", []))
+    sent = 0
+    try:
+      for message in self.messages:
+        if codes and message.get("code") not in codes:
+          continue
+        await ws.send(json.dumps(message).encode("utf-8"))
+        sent += 1
+        if self.close_after is not None and sent >= self.close_after:
+          await ws.close()
+          return
+        if self.interval:
+          await asyncio.sleep(self.interval)
+      await ws.wait_closed()
+    except websockets.ConnectionClosed:
+      pass  # 클라이언트가 먼저 끊음
+
+  async def _serve(self):
+    self._server = await websockets.serve(self._handler, self.host, self.port)
+    self.port = self._server.sockets[0].getsockname()[1]
+    self._ready.set()
+    await self._server.wait_closed()
+
+  def start(self):
+    def run():
+      self._loop = asyncio.new_event_loop()
+      self._loop.run_until_complete(self._serve())
+      self._loop.close()
+    self._thread = threading.Thread(target=run, name="ws-replay", daemon=True)
+    self._thread.start()
+    self._ready.wait(5)
+    return self
+
+  def stop(self):
+    if self._server is not None:
+      self._loop.call_soon_threadsafe(self._server.close)
+    if self._thread is not None:
+      self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+  import sys
+  import time
+  # 사용법: python -m fakes.bithumb_ws record.jsonl 8765
+  server = ReplayServer(load_messages(sys.argv[1]), port=int(sys.argv[2]) if len(sys.argv) > 2 else 8765,
+                        interval=0.1).start()
+  print(f"리플레이 서버 실행 중: {server.url}")
+  while True:
+    time.sleep(60)
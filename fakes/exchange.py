@@ -0,0 +1,189 @@
+import itertools
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from python_bithumb import BithumbAPIException
+
+# python_bithumb.Bithumb 주문/잔고 API를 흉내 내는 가짜 거래소 (오프라인 테스트용)
+# 시장가 주문은 fill_after번 조회한 뒤 체결되고, 금액이 클수록 호가를 밀어 올려 체결가가 나빠짐
+# 지정가 주문은 set_price로 가격이 지정가를 넘어설 때 체결
+
+KST = timezone(timedelta(hours=9))
+
+
+class MockExchange:
+
+  def __init__(self, prices=None, balances=None, fee_rate=0.0025, spread_bps=5.0,
+               impact_bps_per_million=2.0, fill_after=1, trades_per_order=3):
+    self.prices = dict(prices or {"KRW-BTC": 100_000_000.0})
+    self.balances = dict(balances or {"KRW": 1_000_000.0})
+    self.avg_buy_prices = {}
+    self.fee_rate = fee_rate
+    self.spread_bps = spread_bps
+    self.impact_bps_per_million = impact_bps_per_million
+    self.fill_after = fill_after
+    self.trades_per_order = trades_per_order
+    self.orders = {}
+    self.calls = []
+    self.lock = threading.Lock()
+    self._seq = itertools.count(1)
+
+  # ---- 시세 ----
+
+  def get_quote(self, market):
+    price = self.prices[market]
+    half = price * self.spread_bps / 20000
+    return {"market": market, "price": price, "bid": price - half, "ask": price + half}
+
+  def get_current_price(self, market):
+    return self.prices[market]
+
+  def set_price(self, market, price):
+    with self.lock:
+      self.prices[market] = float(price)
+      for order in self.orders.values():
+        if order["market"] == market and order["ord_type"] == "limit" and order["state"] == "wait":
+          self._try_fill_limit(order)
+
+  # ---- 잔고 ----
+
+  def get_balances(self):
+    with self.lock:
+      return [{"currency": currency, "balance": str(balance), "locked": "0",
+               "avg_buy_price": str(self.avg_buy_prices.get(currency, 0.0)), "unit_currency": "KRW"}
+              for currency, balance in self.balances.items()]
+
+  def get_balance(self, currency):
+    with self.lock:
+      return float(self.balances.get(currency, 0.0))
+
+  # ---- 주문 ----
+
+  def _new_order(self, market, side, ord_type, price=None, volume=None):
+    self.calls.append((side, ord_type, market, price, volume))
+    order = {
+        "uuid": str(uuid.uuid4()),
+        "market": market,
+        "side": side,
+        "ord_type": ord_type,
+        "price": None if price is None else str(price),
+        "volume": None if volume is None else str(volume),
+        "state": "wait",
+        "created_at": datetime.now(KST).isoformat(),
+        "remaining_volume": None if volume is None else str(volume),
+        "executed_volume": "0",
+        "paid_fee": "0",
+        "trades_count": 0,
+        "trades": [],
+        "_polls": 0,
+    }
+    self.orders[order["uuid"]] = order
+    return order
+
+  def _check_balance(self, currency, amount):
+    if self.balances.get(currency, 0.0) + 1e-12 < amount:
+      raise BithumbAPIException(400, f"Error insufficient_funds: {currency} 잔고 부족", None)
+
+  def buy_market_order(self, ticker, krw_amount):
+    with self.lock:
+      self._check_balance("KRW", float(krw_amount) * (1 + self.fee_rate))
+      return self._public(self._new_order(ticker, "bid", "price", price=krw_amount))
+
+  def sell_market_order(self, ticker, volume):
+    with self.lock:
+      self._check_balance(ticker.split("-")[1], float(volume))
+      return self._public(self._new_order(ticker, "ask", "market", volume=volume))
+
+  def buy_limit_order(self, ticker, price, volume):
+    with self.lock:
+      self._check_balance("KRW", float(price) * float(volume) * (1 + self.fee_rate))
+      order = self._new_order(ticker, "bid", "limit", price=price, volume=volume)
+      self._try_fill_limit(order)
+      return self._public(order)
+
+  def sell_limit_order(self, ticker, price, volume):
+    with self.lock:
+      self._check_balance(ticker.split("-")[1], float(volume))
+      order = self._new_order(ticker, "ask", "limit", price=price, volume=volume)
+      self._try_fill_limit(order)
+      return self._public(order)
+
+  def get_order(self, uuid):
+    with self.lock:
+      order = self.orders.get(uuid)
+      if order is None:
+        raise BithumbAPIException(404, "Error order_not_found: 주문을 찾을 수 없습니다", None)
+      order["_polls"] += 1
+      if order["state"] == "wait" and order["ord_type"] != "limit" and order["_polls"] >= self.fill_after:
+        self._fill_market(order)
+      return self._public(order)
+
+  def cancel_order(self, order_uuid):
+    with self.lock:
+      order = self.orders.get(order_uuid)
+      if order is None or order["state"] != "wait":
+        raise BithumbAPIException(400, "Error order_not_cancelable: 취소할 수 없는 주문입니다", None)
+      order["state"] = "cancel"
+      return self._public(order)
+
+  # ---- 체결 ----
+
+  def _public(self, order):
+    public = {key: value for key, value in order.items() if not key.startswith("_")}
+    public["trades"] = [dict(trade) for trade in order["trades"]]
+    return public
+
+  def _add_trade(self, order, price, volume):
+    funds = price * volume
+    order["trades"].append({
+        "market": order["market"],
+        "uuid": f"trade-{next(self._seq)}",
+        "price": str(price),
+        "volume": str(volume),
+        "funds": str(funds),
+        "side": order["side"],
+        "created_at": datetime.now(KST).isoformat(),
+    })
+    currency = order["market"].split("-")[1]
+    fee = funds * self.fee_rate
+    if order["side"] == "bid":
+      # 평균 매수가는 보유 수량 가중 평균 (수수료 제외)
+      held = self.balances.get(currency, 0.0)
+      self.avg_buy_prices[currency] = (held * self.avg_buy_prices.get(currency, 0.0) + funds) / (held + volume)
+      self.balances["KRW"] = self.balances.get("KRW", 0.0) - funds - fee
+      self.balances[currency] = held + volume
+    else:
+      self.balances[currency] = self.balances.get(currency, 0.0) - volume
+      self.balances["KRW"] = self.balances.get("KRW", 0.0) + funds - fee
+    executed = float(order["executed_volume"]) + volume
+    order["executed_volume"] = str(executed)
+    order["paid_fee"] = str(float(order["paid_fee"]) + fee)
+    order["trades_count"] = len(order["trades"])
+    if order["volume"] is not None:
+      order["remaining_volume"] = str(max(0.0, float(order["volume"]) - executed))
+
+  def _fill_market(self, order):
+    # 주문을 trades_per_order개로 나눠 체결, 조각마다 금액에 비례해 가격이 불리해짐
+    quote = self.get_quote(order["market"])
+    if order["side"] == "bid":
+      # 시장가 매수 금액(price)은 체결 금액, 수수료는 별도
+      part = float(order["price"]) / self.trades_per_order
+      for i in range(self.trades_per_order):
+        impact = self.impact_bps_per_million * (part * (i + 1)) / 1_000_000 / 10000
+        price = quote["ask"] * (1 + impact)
+        self._add_trade(order, price, part / price)
+    else:
+      volume = float(order["volume"])
+      part = volume / self.trades_per_order
+      for i in range(self.trades_per_order):
+        impact = self.impact_bps_per_million * (part * quote["bid"] * (i + 1)) / 1_000_000 / 10000
+        self._add_trade(order, quote["bid"] * (1 - impact), part)
+    order["state"] = "done"
+
+  def _try_fill_limit(self, order):
+    quote = self.get_quote(order["market"])
+    limit = float(order["price"])
+    if (order["side"] == "bid" and quote["ask"] <= limit) or (order["side"] == "ask" and quote["bid"] >= limit):
+      self._add_trade(order, limit, float(order["remaining_volume"]))
+      order["state"] = "done"
@@ -0,0 +1,260 @@
+import json
+import math
+import os
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+# 벤치마크/오프라인 재현용 응답 기록 (빗썸 캔들/잔고/현재가, SerpAPI, OpenAI)
+# record()는 실제 API 응답을 그대로 저장하고, 기록이 없으면 synthetic()이 같은 형태의 결정적인 응답을 만듦
+# fakes의 대체 서버(bithumb_http, serpapi_server, openai_server)가 이 파일들을 그대로 응답
+# 기록한 잔고는 실제 계좌 정보이므로 저장소에 올리지 않음 (.gitignore)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+KST = timezone(timedelta(hours=9))
+
+# 캔들 인터벌 -> 빗썸 엔드포인트 (market_data.CHART_WINDOWS에서 쓰는 것)
+CANDLE_ENDPOINTS = {
+    "minute60": "/v1/candles/minutes/60",
+    "minute240": "/v1/candles/minutes/240",
+    "day": "/v1/candles/days",
+}
+CANDLE_STEPS = {"minute60": 3600, "minute240": 14400, "day": 86400}
+# 지표 워밍업(200봉) + 차트 구간보다 넉넉하게
+CANDLE_COUNT = 400
+
+# 합성 기록의 기준 시각 (어느 장비에서 만들어도 같은 내용)
+SYNTHETIC_END = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+SYNTHETIC_PRICE = 140_000_000.0
+
+NAMES = ["candles_minute60", "candles_minute240", "candles_day", "accounts", "ticker", "serpapi_google_news",
+         "openai_chat_completion"]
+
+
+def path(name):
+  return os.path.join(FIXTURE_DIR, f"{name}.json")
+
+
+def exists(name):
+  return os.path.exists(path(name))
+
+
+def load(name):
+  with open(path(name), encoding="utf-8") as f:
+    return json.load(f)
+
+
+def save(name, data):
+  os.makedirs(FIXTURE_DIR, exist_ok=True)
+  with open(path(name), "w", encoding="utf-8") as f:
+    json.dump(data, f, ensure_ascii=False, indent=1)
+  return path(name)
+
+
+def load_all():
+  return {name: load(name) for name in NAMES}
+
+
+# ---- 합성 기록 ----
+
+def _candle(market, open_time, open_price, close, high, low, volume):
+  return {
+      "market": market,
+      "candle_date_time_utc": datetime.fromtimestamp(open_time, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+      "candle_date_time_kst": datetime.fromtimestamp(open_time, KST).strftime("%Y-%m-%dT%H:%M:%S"),
+      "opening_price": round(open_price),
+      "high_price": round(high),
+      "low_price": round(low),
+      "trade_price": round(close),
+      "timestamp": open_time * 1000,
+      "candle_acc_trade_price": round(close * volume, 2),
+      "candle_acc_trade_volume": round(volume, 8),
+  }
+
+
+def synthetic_candles(interval, market="KRW-BTC", count=CANDLE_COUNT, seed=0):
+  # 로그 수익률 랜덤워크 (인터벌 길이에 맞춘 변동성), 최신 봉 먼저 (빗썸 응답 순서)
+  step = CANDLE_STEPS[interval]
+  rng = np.random.default_rng(seed + step)
+  sigma = 0.006 * math.sqrt(step / 3600)
+  walk = np.exp(np.cumsum(rng.normal(0, sigma, count)))
+  closes = (walk / walk[-1] * SYNTHETIC_PRICE)[::-1]
+  volumes = rng.lognormal(0, 0.5, count) * 20 * step / 3600
+  last_open = SYNTHETIC_END // step * step
+  candles = []
+  for i in range(count):
+    close = float(closes[i])
+    open_price = float(closes[i + 1]) if i + 1 < count else close
+    wick = abs(rng.normal(0, sigma / 2))
+    candles.append(_candle(market, last_open - i * step, open_price, close,
+                           max(open_price, close) * (1 + wick), min(open_price, close) * (1 - wick),
+                           float(volumes[i])))
+  return candles
+
+
+def synthetic_accounts():
+  return [
+      {"currency": "KRW", "balance": "1000000.0", "locked": "0", "avg_buy_price": "0",
+       "avg_buy_price_modified": False, "unit_currency": "KRW"},
+      {"currency": "BTC", "balance": "0.005", "locked": "0", "avg_buy_price": "135000000",
+       "avg_buy_price_modified": False, "unit_currency": "KRW"},
+  ]
+
+
+def synthetic_ticker(market="KRW-BTC"):
+  return [{"market": market, "trade_price": SYNTHETIC_PRICE, "timestamp": SYNTHETIC_END * 1000}]
+
+
+HEADLINES = [
+    "Bitcoin surges past record high as ETF inflows accelerate",
+    "Bitcoin price slips as traders take profits after rally",
+    "Crypto markets steady ahead of Fed rate decision",
+    "Bitcoin miners face pressure as hash rate climbs",
+    "Major exchange hacked, millions in crypto stolen",
+    "BTC rebounds sharply after weekend sell-off",
+    "Analysts warn of liquidation risk as leverage builds",
+    "Bitcoin adoption grows as retailer launches BTC payments",
+    "Regulators probe stablecoin issuer over reserves",
+    "Bitcoin holds support despite outflows from spot ETFs",
+]
+
+
+def synthetic_serpapi(query="bitcoin", count=30):
+  # SerpAPI google_news 응답 형태 (일부 기사는 highlight/stories 묶음)
+  results = []
+  for i in range(count):
+    published = SYNTHETIC_END - i * 1800
+    item = {
+        "position": i + 1,
+        "title": f"{HEADLINES[i % len(HEADLINES)]} ({i // len(HEADLINES) + 1})",
+        "source": {"name": f"Source {i % 7}", "icon": "https://example.com/icon.png"},
+        "link": f"https://example.com/news/{query}/{i}",
+        "date": datetime.fromtimestamp(published, timezone.utc).strftime("%m/%d/%Y, %I:%M %p, +0000 UTC"),
+        "iso_date": datetime.fromtimestamp(published, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    if i % 10 == 0:
+      item["stories"] = [{
+          "title": f"{HEADLINES[(i + 3) % len(HEADLINES)]} - related {i}",
+          "source": {"name": "Related"},
+          "link": f"https://example.com/news/{query}/{i}/related",
+          "iso_date": item["iso_date"],
+      }]
+    results.append(item)
+  return {
+      "search_metadata": {"id": "synthetic", "status": "Success"},
+      "search_parameters": {"engine": "google_news", "q": query, "gl": "us", "hl": "en"},
+      "news_results": results,
+  }
+
+
+def synthetic_completion(model="gpt-4o", decision=None):
+  decision = decision or {"decision": "buy", "percentage": 20,
+                          "reason": "RSI recovering from oversold with positive MACD histogram and supportive news."}
+  return {
+      "id": "chatcmpl-synthetic",
+      "object": "chat.completion",
+      "created": SYNTHETIC_END,
+      "model": f"{model}-2024-08-06",
+      "choices": [{
+          "index": 0,
+          "message": {"role": "assistant", "content": json.dumps(decision), "refusal": None},
+          "logprobs": None,
+          "finish_reason": "stop",
+      }],
+      "usage": {"prompt_tokens": 6200, "completion_tokens": 48, "total_tokens": 6248},
+      "system_fingerprint": "fp_synthetic",
+  }
+
+
+def synthetic(name, market="KRW-BTC"):
+  if name.startswith("candles_"):
+    return synthetic_candles(name[len("candles_"):], market)
+  return {
+      "accounts": synthetic_accounts,
+      "ticker": lambda: synthetic_ticker(market),
+      "serpapi_google_news": synthetic_serpapi,
+      "openai_chat_completion": synthetic_completion,
+  }[name]()
+
+
+def ensure(market="KRW-BTC"):
+  # 기록이 없는 항목만 합성 기록으로 채움, 새로 만든 이름 목록 반환
+  created = []
+  for name in NAMES:
+    if not exists(name):
+      save(name, synthetic(name, market))
+      created.append(name)
+  return created
+
+
+# ---- 실제 응답 기록 ----
+
+def _raw_candles(client, market, interval, count):
+  rows, to = [], None
+  while len(rows) < count:
+    params = {"market": market, "count": min(200, count - len(rows))}
+    if to:
+      params["to"] = to
+    data = client._send("GET", CANDLE_ENDPOINTS[interval], "public", params=params)
+    if not isinstance(data, list) or not data:
+      break
+    rows.extend(data)
+    to = data[-1]["candle_date_time_kst"]
+  return rows
+
+
+def record(market="KRW-BTC", query="bitcoin", model="gpt-4o", names=None):
+  # 실제 API를 호출해 응답을 저장 (빗썸/SerpAPI/OpenAI 키와 네트워크 필요), 저장한 이름 목록 반환
+  from exchange_client import BithumbClient, http_get
+  import news
+
+  names = names or NAMES
+  client = BithumbClient(os.getenv("BITHUMB_ACCESS_KEY"), os.getenv("BITHUMB_SECRET_KEY"))
+  saved = []
+  for interval in CANDLE_ENDPOINTS:
+    if f"candles_{interval}" in names:
+      saved.append(save(f"candles_{interval}", _raw_candles(client, market, interval, CANDLE_COUNT)))
+  if "accounts" in names:
+    saved.append(save("accounts", client.get_balances()))
+  if "ticker" in names:
+    saved.append(save("ticker", client._send("GET", "/v1/ticker", "public", params={"markets": market})))
+  if "serpapi_google_news" in names:
+    response = http_get(news.SERPAPI_URL, params={"engine": "google_news", "q": query, "gl": "us", "hl": "en",
+                                                  "api_key": os.getenv("SERPAPI_API_KEY")})
+    response.raise_for_status()
+    saved.append(save("serpapi_google_news", response.json()))
+  if "openai_chat_completion" in names:
+    from openai import OpenAI
+    candles = load("candles_minute60")[:24] if exists("candles_minute60") else []
+    response = OpenAI().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You are an expert in Bitcoin investing. Decide whether to buy, sell or "
+                                          "hold. Respond ONLY in JSON like "
+                                          "{\"decision\": \"buy\", \"percentage\": 20, \"reason\": \"...\"}"},
+            {"role": "user", "content": json.dumps(candles)},
+        ],
+        response_format={"type": "json_object"}
+    )
+    saved.append(save("openai_chat_completion", response.model_dump()))
+  return saved
+
+
+if __name__ == "__main__":
+  import argparse
+
+  parser = argparse.ArgumentParser(description="벤치마크용 응답 기록 (record: 실제 API, synthetic: 합성)")
+  parser.add_argument("mode", choices=["record", "synthetic"])
+  parser.add_argument("--market", default="KRW-BTC")
+  parser.add_argument("--query", default="bitcoin")
+  parser.add_argument("--only", nargs="*", choices=NAMES, help="이 항목만")
+  args = parser.parse_args()
+
+  if args.mode == "record":
+    from dotenv import load_dotenv
+    load_dotenv()
+    for saved in record(args.market, args.query, names=args.only):
+      print(f"저장: {saved}")
+  else:
+    for name in args.only or NAMES:
+      print(f"저장: {save(name, synthetic(name, args.market))}")
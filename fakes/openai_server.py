@@ -0,0 +1,230 @@
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# OpenAI Chat Completions API 대체 서버 (오프라인 테스트/벤치마크용)
+# 요청 내용과 관계없이 기록된 응답(fakes.fixtures의 openai_chat_completion)을 id/시각만 바꿔서 돌려줌
+# stream=true 요청은 같은 응답을 몇 글자씩 나눈 SSE 조각으로 보냄 (마지막에 usage 조각)
+# Batch API: 파일 업로드(/v1/files) -> 배치 생성(/v1/batches) -> batch_delay초 뒤 조회하면 완료, 결과는 출력 파일 내용
+# OpenAI(base_url=server.base_url) 또는 OPENAI_BASE_URL=server.base_url 로 연결
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def _parse_multipart(content_type, data):
+  # multipart/form-data -> {필드 이름: (파일 이름, 내용 bytes)}
+  message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + data)
+  return {part.get_param("name", header="content-disposition"):
+          (part.get_filename(), part.get_payload(decode=True)) for part in message.iter_parts()}
+
+
+class FakeOpenAIServer:
+
+  def __init__(self, completion, host="127.0.0.1", port=0, delay=0.0, rate_limit_first=0, chunk_size=4,
+               chunk_delay=0.0, batch_delay=0.0, batch_errors=0):
+    # delay: 응답 전 지연(초, 모델 응답 시간 재현), rate_limit_first: 처음 N번 요청에 429
+    # chunk_size/chunk_delay: 스트리밍 조각 하나의 글자 수 / 조각 사이 지연(초)
+    # batch_delay: 배치 생성 후 완료될 때까지(초), batch_errors: 배치마다 처음 N개 요청은 오류 파일로
+    self.completion = completion
+    self.delay = delay
+    self.chunk_size = chunk_size
+    self.chunk_delay = chunk_delay
+    self.batch_delay = batch_delay
+    self.batch_errors = batch_errors
+    self.rate_limit_first = rate_limit_first
+    self.requests = []
+    self.files = {}
+    self.batches = {}
+    self.lock = threading.Lock()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+
+      def log_message(self, *args):
+        pass
+
+      def _send(self, status, payload, headers=None):
+        # bytes는 파일 내용 그대로
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if isinstance(payload, bytes) else
+                         "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+          self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+      def _send_events(self, chunks):
+        # SSE: 길이를 모르므로 연결을 닫아서 끝을 알림
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+          for i, chunk in enumerate(chunks):
+            if i and server.chunk_delay:
+              time.sleep(server.chunk_delay)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+          self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+          # 클라이언트가 기한 초과/검사 실패로 먼저 끊음
+          pass
+
+      def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+          body = _parse_multipart(content_type, data)
+        else:
+          body = json.loads(data.decode("utf-8") or "{}") if data else {}
+        status, payload, headers = server.handle("POST", self.path, body)
+        if status == 200 and body.get("stream"):
+          self._send_events(server.stream_chunks(payload, body))
+        else:
+          self._send(status, payload, headers)
+
+      def do_GET(self):
+        self._send(*server.handle("GET", self.path, {}))
+
+    self.httpd = ThreadingHTTPServer((host, port), Handler)
+    self.host, self.port = self.httpd.server_address
+    self._thread = None
+
+  @property
+  def base_url(self):
+    return f"http://{self.host}:{self.port}/v1"
+
+  def handle(self, method, path, body):
+    with self.lock:
+      self.requests.append((method, path, body))
+      if self.rate_limit_first > 0:
+        self.rate_limit_first -= 1
+        return 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}, \
+            {"Retry-After": "0"}
+    if method == "POST" and path == "/v1/chat/completions":
+      if self.delay:
+        time.sleep(self.delay)
+      return 200, self.chat_completion(body), {}
+    with self.lock:
+      if method == "POST" and path == "/v1/files":
+        return 200, self.upload(body), {}
+      match = re.fullmatch(r"/v1/files/([\w-]+)/content", path)
+      if method == "GET" and match and match.group(1) in self.files:
+        return 200, self.files[match.group(1)]["content"], {}
+      if method == "POST" and path == "/v1/batches":
+        return self.create_batch(body)
+      match = re.fullmatch(r"/v1/batches/([\w-]+)(/cancel)?", path)
+      if match and match.group(1) in self.batches:
+        batch = self.batches[match.group(1)]
+        if method == "POST" and match.group(2) and batch["status"] not in TERMINAL_STATUSES:
+          batch.update(status="cancelled", cancelled_at=int(time.time()))
+        return 200, self.advance(batch), {}
+    return 404, {"error": {"message": f"Unknown request URL: {method} {path}", "type": "invalid_request_error"}}, {}
+
+  def chat_completion(self, body):
+    return {**self.completion, "id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "created": int(time.time()),
+            "model": body.get("model", self.completion.get("model"))}
+
+  # ---- Batch API ----
+
+  def upload(self, body):
+    filename, content = body["file"]
+    file_id = f"file-{uuid.uuid4().hex[:24]}"
+    purpose = body["purpose"][1].decode("utf-8")
+    self.files[file_id] = {"filename": filename, "purpose": purpose, "content": content}
+    return self.file_object(file_id)
+
+  def file_object(self, file_id):
+    entry = self.files[file_id]
+    return {"id": file_id, "object": "file", "bytes": len(entry["content"]), "created_at": int(time.time()),
+            "filename": entry["filename"], "purpose": entry["purpose"], "status": "processed"}
+
+  def _add_file(self, filename, purpose, lines):
+    file_id = f"file-{uuid.uuid4().hex[:24]}"
+    content = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+    self.files[file_id] = {"filename": filename, "purpose": purpose, "content": content}
+    return file_id
+
+  def create_batch(self, body):
+    if body.get("input_file_id") not in self.files:
+      return 400, {"error": {"message": f"Invalid input file: {body.get('input_file_id')}",
+                             "type": "invalid_request_error"}}, {}
+    batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+    lines = self.files[body["input_file_id"]]["content"].decode("utf-8").splitlines()
+    self.batches[batch_id] = {
+        "id": batch_id, "object": "batch", "endpoint": body["endpoint"], "input_file_id": body["input_file_id"],
+        "completion_window": body["completion_window"], "status": "validating", "created_at": int(time.time()),
+        "expires_at": int(time.time()) + 86400, "output_file_id": None, "error_file_id": None, "errors": None,
+        "request_counts": {"total": sum(1 for line in lines if line.strip()), "completed": 0, "failed": 0},
+        "metadata": body.get("metadata"), "_created": time.monotonic(),
+    }
+    return 200, self.advance(self.batches[batch_id]), {}
+
+  def advance(self, batch):
+    # 조회할 때 상태를 진행: 생성 직후 validating -> in_progress -> batch_delay초 뒤 completed
+    if batch["status"] == "validating":
+      batch.update(status="in_progress", in_progress_at=int(time.time()))
+    elif batch["status"] == "in_progress" and time.monotonic() - batch["_created"] >= self.batch_delay:
+      self.complete(batch)
+    return {key: value for key, value in batch.items() if not key.startswith("_")}
+
+  def complete(self, batch):
+    outputs, errors = [], []
+    for line in self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+      if not line.strip():
+        continue
+      request = json.loads(line)
+      result = {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"]}
+      if len(errors) < self.batch_errors:
+        errors.append({**result, "response": {"status_code": 500, "request_id": uuid.uuid4().hex, "body": {
+            "error": {"message": "The server had an error processing your request", "type": "server_error"}}},
+            "error": None})
+      else:
+        outputs.append({**result, "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                                               "body": self.chat_completion(request["body"])}, "error": None})
+    now = int(time.time())
+    batch.update(status="completed", finalizing_at=now, completed_at=now,
+                 request_counts={"total": len(outputs) + len(errors), "completed": len(outputs),
+                                 "failed": len(errors)},
+                 output_file_id=self._add_file(f"{batch['id']}_output.jsonl", "batch_output", outputs)
+                 if outputs else None,
+                 error_file_id=self._add_file(f"{batch['id']}_error.jsonl", "batch_output", errors)
+                 if errors else None)
+
+  # ---- 스트리밍 ----
+
+  def stream_chunks(self, completion, body):
+    # 완성된 응답 -> chat.completion.chunk 목록 (역할 -> 내용 조각들 -> 종료 -> usage)
+    base = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"],
+            "model": completion["model"], "system_fingerprint": completion.get("system_fingerprint")}
+    choice = completion["choices"][0]
+    content = choice["message"]["content"] or ""
+
+    def chunk(delta, finish_reason=None):
+      return {**base, "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}]}
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    chunks += [chunk({"content": content[i:i + self.chunk_size]}) for i in range(0, len(content), self.chunk_size)]
+    chunks.append(chunk({}, choice.get("finish_reason", "stop")))
+    if (body.get("stream_options") or {}).get("include_usage"):
+      chunks.append({**base, "choices": [], "usage": completion.get("usage")})
+    return chunks
+
+  def start(self):
+    self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
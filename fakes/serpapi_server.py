@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# SerpAPI(/search.json) 대체 서버 (오프라인 테스트/벤치마크용)
+# 검색어와 관계없이 기록된 응답(fakes.fixtures의 serpapi_google_news)을 그대로 돌려줌
+# news.SERPAPI_URL 대신 SERPAPI_URL=server.url 로 연결
+
+
+class FakeSerpAPIServer:
+
+  def __init__(self, response, host="127.0.0.1", port=0, delay=0.0, fail_first=0):
+    # delay: 응답 전 지연(초), fail_first: 처음 N번 요청에 500
+    self.response = response
+    self.delay = delay
+    self.fail_first = fail_first
+    self.queries = []
+    self.lock = threading.Lock()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+
+      def log_message(self, *args):
+        pass
+
+      def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        status, payload = server.handle(parts.path, params)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    self.httpd = ThreadingHTTPServer((host, port), Handler)
+    self.host, self.port = self.httpd.server_address
+    self._thread = None
+
+  @property
+  def url(self):
+    return f"http://{self.host}:{self.port}/search.json"
+
+  def handle(self, path, params):
+    if self.delay:
+      time.sleep(self.delay)
+    with self.lock:
+      self.queries.append(params.get("q"))
+      if self.fail_first > 0:
+        self.fail_first -= 1
+        return 500, {"error": "temporarily unavailable"}
+    if path != "/search.json":
+      return 404, {"error": "not found"}
+    if not params.get("api_key"):
+      return 401, {"error": "Invalid API key."}
+    return 200, {**self.response, "search_parameters": {**self.response.get("search_parameters", {}),
+                                                        "q": params.get("q")}}
+
+  def start(self):
+    self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-serpapi", daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
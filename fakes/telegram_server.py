@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# 텔레그램 Bot API 대체 서버 (오프라인 테스트용)
+# telegram.Bot(token, base_url=server.base_url) 로 연결
+
+
+class FakeTelegramServer:
+
+  def __init__(self, host="127.0.0.1", port=0, rate_limit_first=0, retry_after=1, fail_init=0):
+    # rate_limit_first: 처음 N번의 sendMessage에 429(retry_after) 응답
+    # fail_init: 처음 N번의 getMe(봇 초기화)에 502 응답
+    self.messages = []
+    self.requests = 0
+    self.rate_limit_first = rate_limit_first
+    self.retry_after = retry_after
+    self.fail_init = fail_init
+    self.lock = threading.Lock()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+
+      def log_message(self, *args):
+        pass
+
+      def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+          params = json.loads(body or "{}")
+        else:
+          params = {key: values[0] for key, values in parse_qs(body).items()}
+        method = self.path.rsplit("/", 1)[-1]
+        status, payload = server.handle(method, params)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+      do_GET = do_POST
+
+    self.httpd = ThreadingHTTPServer((host, port), Handler)
+    self.host, self.port = self.httpd.server_address
+    self._thread = None
+
+  @property
+  def base_url(self):
+    return f"http://{self.host}:{self.port}/bot"
+
+  def handle(self, method, params):
+    with self.lock:
+      self.requests += 1
+      if method == "getMe":
+        if self.fail_init > 0:
+          self.fail_init -= 1
+          return 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+        return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot"}}
+      if method == "sendMessage":
+        if self.rate_limit_first > 0:
+          self.rate_limit_first -= 1
+          return 429, {"ok": False, "error_code": 429,
+                       "description": f"Too Many Requests: retry after {self.retry_after}",
+                       "parameters": {"retry_after": self.retry_after}}
+        self.messages.append({"chat_id": params.get("chat_id"), "text": params.get("text"), "time": time.time()})
+        return 200, {"ok": True, "result": {
+            "message_id": len(self.messages),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            "text": params.get("text"),
+        }}
+      return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+  def start(self):
+    self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-telegram", daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self.httpd.shutdown()
+    self.httpd.server_close()
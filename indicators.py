@@ -0,0 +1,170 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, DB_PATH, INTERVAL_SECONDS
+from storage import get_database
+
+# 지표 계산에 필요한 이전 봉 수 (가장 긴 지표 + EMA 수렴 여유분)
+WARMUP_BARS = 200
+
+INDICATOR_COLUMNS = [
+    'sma_20', 'sma_50', 'ema_12', 'ema_26',
+    'rsi_14', 'macd', 'macd_signal', 'macd_hist',
+    'bb_upper', 'bb_middle', 'bb_lower', 'bb_pct_b',
+    'atr_14', 'volume_z',
+]
+
+
+def compute_indicators(df):
+  # OHLCV 프레임 전체에 대해 표준 지표를 한 번에 계산 (봉 단위 반복 없음)
+  close = df['close'].astype(float)
+  high = df['high'].astype(float)
+  low = df['low'].astype(float)
+  volume = df['volume'].astype(float)
+  out = pd.DataFrame(index=df.index)
+
+  out['sma_20'] = close.rolling(20).mean()
+  out['sma_50'] = close.rolling(50).mean()
+  out['ema_12'] = close.ewm(span=12, adjust=False).mean()
+  out['ema_26'] = close.ewm(span=26, adjust=False).mean()
+
+  # RSI (Wilder 평활)
+  delta = close.diff()
+  gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+  loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+  rs = gain / loss.replace(0, np.nan)
+  out['rsi_14'] = (100 - 100 / (1 + rs)).where(loss != 0, 100.0)
+
+  out['macd'] = out['ema_12'] - out['ema_26']
+  out['macd_signal'] = out['macd'].ewm(span=9, adjust=False).mean()
+  out['macd_hist'] = out['macd'] - out['macd_signal']
+
+  std_20 = close.rolling(20).std(ddof=0)
+  out['bb_middle'] = out['sma_20']
+  out['bb_upper'] = out['sma_20'] + 2 * std_20
+  out['bb_lower'] = out['sma_20'] - 2 * std_20
+  out['bb_pct_b'] = (close - out['bb_lower']) / (out['bb_upper'] - out['bb_lower'])
+
+  prev_close = close.shift(1)
+  true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+  out['atr_14'] = true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+
+  volume_mean = volume.rolling(20).mean()
+  volume_std = volume.rolling(20).std(ddof=0)
+  out['volume_z'] = (volume - volume_mean) / volume_std.replace(0, np.nan)
+
+  return out[INDICATOR_COLUMNS]
+
+
+# 가격 단위 값은 가격의 유효숫자 PRICE_SIG_DIGITS자리까지 (1원 미만 코인도 0으로 뭉개지지 않게)
+PRICE_SIG_DIGITS = 5
+
+# 가격과 단위가 다른 지표 (소수 둘째 자리)
+RATIO_COLUMNS = ('rsi_14', 'bb_pct_b', 'volume_z')
+
+
+def price_digits(price):
+  # 가격 크기에 맞춘 소수 자릿수: 1억 원 -> 0, 150원 -> 2, 0.5원 -> 5
+  if not price or not np.isfinite(price):
+    return 0
+  return max(0, PRICE_SIG_DIGITS - 1 - int(np.floor(np.log10(abs(price)))))
+
+
+def round_price(value, digits):
+  # 정수 자리까지만 남길 때는 int (BTC 등 고가 코인의 기존 출력 그대로)
+  return round(float(value), digits) if digits else round(float(value))
+
+
+def summarize(row, close=None):
+  # 프롬프트/대시보드용으로 마지막 봉의 지표를 반올림한 dict
+  # 가격 단위 지표(SMA/EMA/MACD/볼린저/ATR)는 종가(없으면 SMA20) 크기에 맞춰 반올림
+  reference = close if close is not None else row.get('sma_20')
+  digits = price_digits(float(reference)) if reference is not None and not pd.isna(reference) else 0
+  summary = {}
+  for col in INDICATOR_COLUMNS:
+    value = row.get(col)
+    if value is None or pd.isna(value):
+      continue
+    summary[col] = round(float(value), 2) if col in RATIO_COLUMNS else round_price(value, digits)
+  if close and summary.get('atr_14'):
+    summary['atr_pct'] = round(float(row['atr_14']) / close * 100, 2)
+  return summary
+
+
+class IndicatorCache:
+  # 로컬 캔들 히스토리 위에 지표를 저장하고, 새 봉이 생긴 구간만 다시 계산
+
+  def __init__(self, path=DB_PATH, store=None, history=WARMUP_BARS):
+    self.path = path
+    self.store = store or CandleStore(path)
+    self.history = history
+    # 테이블은 migrations.py (v10)
+    self.db = get_database(path)
+
+  def _last_computed(self, market, interval):
+    return self.db.read("SELECT MAX(open_time) FROM indicators WHERE market = ? AND interval = ?",
+                        (market, interval))[0][0]
+
+  @staticmethod
+  def _save(conn, rows):
+    placeholders = ", ".join("?" * (len(INDICATOR_COLUMNS) + 3))
+    conn.executemany(f'''INSERT OR REPLACE INTO indicators
+                           (market, interval, open_time, {", ".join(INDICATOR_COLUMNS)})
+                           VALUES ({placeholders})''', rows)
+
+  def update(self, market, interval, sync=True):
+    # 마지막으로 계산한 봉(진행 중이었을 수 있음)부터 다시 계산
+    # EMA/RSI 연속성을 위해 그 앞 WARMUP_BARS개 봉을 함께 읽음
+    if sync:
+      self.store.sync(market, interval, self.history + 1)
+    step = INTERVAL_SECONDS[interval]
+    last = self._last_computed(market, interval)
+    start = None if last is None else last - WARMUP_BARS * step
+    candles = self.store.get_range(market, interval, start=start)
+    if candles.empty:
+      return 0
+    values = compute_indicators(candles)
+    values.insert(0, 'open_time', candles['open_time'].to_numpy())
+    if last is not None:
+      values = values[values['open_time'] >= last]
+    rows = [(market, interval, *row) for row in values.astype(object).where(values.notna(), None)
+            .itertuples(index=False, name=None)]
+    # 바로 뒤의 get()이 새 지표를 보도록 커밋까지 기다림
+    self.db.write(self._save, rows).result()
+    return len(rows)
+
+  def get(self, market, interval, count=1):
+    # 저장된 지표 중 최근 count개 (캔들 종가 포함)
+    with self.db.reading() as conn:
+      df = pd.read_sql_query(f'''SELECT i.open_time, c.close, {", ".join("i." + col for col in INDICATOR_COLUMNS)}
+                                   FROM indicators i
+                                   JOIN candles c USING (market, interval, open_time)
+                                   WHERE i.market = ? AND i.interval = ?
+                                   ORDER BY i.open_time DESC
+                                   LIMIT ?''', conn, params=(market, interval, count))
+    df = df.sort_values('open_time')
+    df.index = pd.to_datetime(df['open_time'], unit='s') + pd.Timedelta(hours=9)
+    return df
+
+  def latest_summary(self, market, interval, sync=True):
+    self.update(market, interval, sync=sync)
+    latest = self.get(market, interval, count=1)
+    if latest.empty:
+      return None
+    row = latest.iloc[-1]
+    return summarize(row, close=float(row['close']))
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+  # 차트 수집 스레드들이 동시에 불러도 하나만 생성
+  global _default_cache
+  with _default_cache_lock:
+    if _default_cache is None:
+      _default_cache = IndicatorCache()
+  return _default_cache
@@ -0,0 +1,350 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+
+from candle_store import INTERVAL_SECONDS, KST_OFFSET
+from llm_stream import validate_decision
+from storage import get_database
+from strategies import estimate_cost, snapshots_from_candles
+
+# OpenAI Batch API로 판단 요청을 묶어서 보냄 (동기 호출의 절반 가격, 결과는 최대 24시간 안에)
+# advisory: 매매하지 않는 예약 실행(10:00/18:00/23:00)의 판단 알림, research: 저장된 캔들로 만든 과거 스냅샷
+# 요청 하나 = JSONL 한 줄 (custom_id로 결과와 연결), 배치는 llm_batches, 요청별 판단은 batch_decisions 테이블
+# 매매하는 실행은 그대로 실시간 호출 (strategies.LLMStrategy)
+
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+# Batch API 단가 (동기 호출 대비)
+BATCH_DISCOUNT = 0.5
+# 배치 하나에 넣을 수 있는 최대 요청 수 (API 제한)
+MAX_REQUESTS = 50_000
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+POLL_INTERVAL = 60
+
+# 결과를 받으면 batch_decisions에 채우는 컬럼
+RESULT_FIELDS = ("status", "decision", "percentage", "reason", "prompt_tokens", "completion_tokens", "cost_usd",
+                 "error")
+
+# 과거 스냅샷 판단 프롬프트 (지표와 최근 종가만 보고 판단)
+RESEARCH_PROMPT = """
+You are an expert in cryptocurrency investing.
+
+Analyze the provided data for {market} at the close of one {interval} candle:
+1. Indicators: Technical indicators at that candle (SMA/EMA, RSI, MACD, Bollinger Bands, ATR, volume z-score).
+2. Recent Closes: Closing prices of the most recent candles, oldest first.
+
+**Task:** Decide whether to **buy**, **sell**, or **hold** at that moment.
+For buy or sell decisions, include a percentage (1-100) indicating what portion of available funds to use.
+
+**Output Format:** Respond ONLY in JSON format like:
+{{"decision": "buy", "percentage": 20, "reason": "some technical reason"}}
+{{"decision": "sell", "percentage": 50, "reason": "some technical reason"}}
+{{"decision": "hold", "percentage": 0, "reason": "some technical reason"}}
+"""
+
+# 과거 스냅샷은 이 지표가 모두 계산된 봉부터 (워밍업 구간 제외)
+REQUIRED_INDICATORS = ("sma_50", "rsi_14", "macd_hist", "bb_pct_b")
+
+
+def make_item(market, ts, system_prompt, payload, price=None, krw_balance=None, coin_balance=None):
+  # 배치 요청 하나 (스냅샷 시각/가격/잔고는 결과와 함께 batch_decisions에 저장)
+  return {
+      "market": market,
+      "ts": int(ts),
+      "system_prompt": system_prompt,
+      "payload": payload,
+      "btc_price": price,
+      "krw_balance": krw_balance,
+      "btc_balance": coin_balance,
+  }
+
+
+def batch_request(custom_id, model, item):
+  return {
+      "custom_id": custom_id,
+      "method": "POST",
+      "url": ENDPOINT,
+      "body": {
+          "model": model,
+          "messages": [
+              {"role": "system", "content": item["system_prompt"]},
+              {"role": "user", "content": item["payload"] if isinstance(item["payload"], str)
+               else json.dumps(item["payload"])},
+          ],
+          "response_format": {"type": "json_object"},
+      },
+  }
+
+
+def research_items(candles, market="KRW-BTC", interval="minute60", every=1, limit=None, closes=24):
+  # 저장된 캔들의 봉 마감 시점마다 지표 스냅샷 하나 (every봉 간격, 최근 limit개)
+  step = INTERVAL_SECONDS[interval]
+  prompt = RESEARCH_PROMPT.format(market=market, interval=interval)
+  close = candles["close"].to_numpy(dtype=float)
+  items = []
+  for i, snapshot in enumerate(snapshots_from_candles(candles, market)):
+    if i % every:
+      continue
+    ind = snapshot["indicators"]["short_term"]
+    if any(col not in ind for col in REQUIRED_INDICATORS):
+      continue
+    # 캔들 인덱스는 KST 시가 시각 -> 판단 시각은 봉 마감 (epoch 초)
+    ts = int((candles.index[i] - KST_OFFSET).value // 10**9) + step
+    payload = {
+        "indicators": ind,
+        "recent_closes": [round(c) for c in close[max(0, i - closes + 1):i + 1]],
+        "current_price": snapshot["current_price"],
+    }
+    items.append(make_item(market, ts, prompt, payload, snapshot["current_price"]))
+  return items[-limit:] if limit else items
+
+
+# ---- 제출 ----
+
+def _insert_batch(conn, batch, kind, model, rows):
+  conn.execute('''INSERT INTO llm_batches (id, ts, kind, model, status, requests, input_file_id)
+                  VALUES (?, ?, ?, ?, ?, ?, ?)''',
+               (batch.id, int(time.time()), kind, model, batch.status, len(rows), batch.input_file_id))
+  conn.executemany('''INSERT INTO batch_decisions
+                        (batch_id, custom_id, ts, market, status, btc_balance, krw_balance, btc_price)
+                        VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)''',
+                   [(batch.id, custom_id, item["ts"], item["market"], item["btc_balance"], item["krw_balance"],
+                     item["btc_price"]) for custom_id, item in rows])
+
+
+def submit(client, kind, model, items, db=None, metadata=None):
+  # items를 MAX_REQUESTS개씩 JSONL 파일로 올리고 배치 생성, 배치 id 목록 반환
+  db = db or get_database()
+  batch_ids = []
+  for start in range(0, len(items), MAX_REQUESTS):
+    prefix = f"{kind}-{uuid.uuid4().hex[:12]}"
+    rows = [(f"{prefix}-{i}", item) for i, item in enumerate(items[start:start + MAX_REQUESTS])]
+    content = "".join(json.dumps(batch_request(custom_id, model, item), ensure_ascii=False) + "\n"
+                      for custom_id, item in rows).encode("utf-8")
+    upload = client.files.create(file=(f"{prefix}.jsonl", content), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint=ENDPOINT, completion_window=COMPLETION_WINDOW,
+                                  metadata={"kind": kind, **(metadata or {})})
+    db.write(_insert_batch, batch, kind, model, rows).result()
+    batch_ids.append(batch.id)
+    print(f"[BATCH] {kind} {batch.id}: 요청 {len(rows)}개 제출 ({len(content) / 1024:.0f} KB)")
+  return batch_ids
+
+
+# ---- 결과 ----
+
+def parse_result(line, model):
+  # 출력/오류 파일 한 줄 -> (custom_id, batch_decisions에 채울 값)
+  response = line.get("response") or {}
+  if line.get("error") or response.get("status_code") != 200:
+    error = line.get("error") or (response.get("body") or {}).get("error") or {}
+    message = error.get("message", error) if isinstance(error, dict) else error
+    return line["custom_id"], {"status": "error", "error": f"HTTP {response.get('status_code')}: {message}"}
+  body = response["body"]
+  usage = body.get("usage") or {}
+  prompt_tokens = usage.get("prompt_tokens", 0) or 0
+  completion_tokens = usage.get("completion_tokens", 0) or 0
+  values = {
+      "prompt_tokens": prompt_tokens,
+      "completion_tokens": completion_tokens,
+      "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens) * BATCH_DISCOUNT,
+  }
+  try:
+    result = validate_decision(json.loads(body["choices"][0]["message"]["content"]))
+  except (ValueError, KeyError, IndexError, TypeError) as e:
+    return line["custom_id"], {**values, "status": "invalid", "error": f"{type(e).__name__}: {e}"}
+  return line["custom_id"], {**values, "status": "ok", **result}
+
+
+def _read_lines(client, file_id):
+  if not file_id:
+    return []
+  text = client.files.content(file_id).text
+  return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _save_results(conn, batch, results):
+  conn.executemany(f'''UPDATE batch_decisions SET {", ".join(f"{field} = ?" for field in RESULT_FIELDS)}
+                       WHERE batch_id = ? AND custom_id = ?''',
+                   [tuple(values.get(field) for field in RESULT_FIELDS) + (batch.id, custom_id)
+                    for custom_id, values in results])
+  # 결과 없이 끝난 요청 (만료/취소/배치 실패)
+  conn.execute("""UPDATE batch_decisions SET status = 'error', error = ?
+                  WHERE batch_id = ? AND status = 'pending'""", (f"batch {batch.status}", batch.id))
+  counts = batch.request_counts
+  conn.execute('''UPDATE llm_batches
+                  SET status = ?, completed = ?, failed = ?, output_file_id = ?, error_file_id = ?, finished_ts = ?,
+                      cost_usd = (SELECT SUM(cost_usd) FROM batch_decisions WHERE batch_id = ?)
+                  WHERE id = ?''',
+               (batch.status, counts.completed if counts else None, counts.failed if counts else None,
+                batch.output_file_id, batch.error_file_id, int(time.time()), batch.id, batch.id))
+
+
+def _save_status(conn, batch):
+  counts = batch.request_counts
+  conn.execute("UPDATE llm_batches SET status = ?, completed = ?, failed = ? WHERE id = ?",
+               (batch.status, counts.completed if counts else None, counts.failed if counts else None, batch.id))
+
+
+def poll(client, batch_id, db=None):
+  # 배치 하나 조회: 끝났으면 출력/오류 파일을 읽어 batch_decisions에 저장, 끝난 배치면 True
+  db = db or get_database()
+  row = db.read("SELECT model, status FROM llm_batches WHERE id = ?", (batch_id,))
+  if not row:
+    raise ValueError(f"저장되지 않은 배치: {batch_id}")
+  model, status = row[0]
+  if status in TERMINAL_STATUSES:
+    return True
+  batch = client.batches.retrieve(batch_id)
+  if batch.status not in TERMINAL_STATUSES:
+    db.write(_save_status, batch).result()
+    return False
+  results = [parse_result(line, model) for file_id in (batch.output_file_id, batch.error_file_id)
+             for line in _read_lines(client, file_id)]
+  db.write(_save_results, batch, results).result()
+  ok = sum(1 for _, values in results if values["status"] == "ok")
+  print(f"[BATCH] {batch_id} {batch.status}: 판단 {ok}/{len(results)}개 저장")
+  return True
+
+
+def pending_batches(db=None, kind=None):
+  sql = f"SELECT id, kind FROM llm_batches WHERE status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))})"
+  params = list(TERMINAL_STATUSES)
+  if kind:
+    sql += " AND kind = ?"
+    params.append(kind)
+  return (db or get_database()).read(sql + " ORDER BY ts", params)
+
+
+def poll_pending(client, db=None):
+  # 끝나지 않은 배치를 모두 조회, 이번에 끝난 (배치 id, kind) 목록 반환 (결과는 저장된 상태)
+  finished = []
+  for batch_id, kind in pending_batches(db):
+    try:
+      if poll(client, batch_id, db):
+        finished.append((batch_id, kind))
+    except Exception as e:
+      print(f"[BATCH ERROR] {batch_id} 조회 실패: {str(e)}")
+  return finished
+
+
+def wait(client, batch_ids, db=None, interval=POLL_INTERVAL, timeout=None):
+  # 배치들이 모두 끝날 때까지 조회 (timeout초가 지나면 남은 배치 id 목록 반환)
+  remaining = list(batch_ids)
+  deadline = time.monotonic() + timeout if timeout else None
+  while remaining:
+    remaining = [batch_id for batch_id in remaining if not poll(client, batch_id, db)]
+    if not remaining or (deadline and time.monotonic() >= deadline):
+      break
+    time.sleep(interval)
+  return remaining
+
+
+def batch_results(batch_id, db=None):
+  # 배치의 요청별 판단 (판단 시각 순)
+  columns = ["ts", "market", "status", "decision", "percentage", "reason", "btc_balance", "krw_balance",
+             "btc_price", "cost_usd", "error"]
+  rows = (db or get_database()).read(f'''SELECT {", ".join(columns)} FROM batch_decisions
+                                         WHERE batch_id = ? ORDER BY ts, id''', (batch_id,))
+  return [dict(zip(columns, row)) for row in rows]
+
+
+class BatchPoller:
+  # 끝나지 않은 배치를 interval초마다 조회하는 백그라운드 스레드 (재시작하면 저장된 배치부터 이어서)
+  # on_finished(batch_id, kind): 결과를 저장한 뒤 호출 (판단 알림 전송 등)
+
+  def __init__(self, client, on_finished=None, db=None, interval=POLL_INTERVAL):
+    self.client = client
+    self.on_finished = on_finished
+    self.db = db or get_database()
+    self.interval = interval
+    self.lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread = None
+    self.stats = {"polls": 0, "finished": 0, "errors": 0}
+
+  def run_once(self):
+    self.stats["polls"] += 1
+    finished = poll_pending(self.client, self.db)
+    for batch_id, kind in finished:
+      self.stats["finished"] += 1
+      if self.on_finished is not None:
+        try:
+          self.on_finished(batch_id, kind)
+        except Exception as e:
+          self.stats["errors"] += 1
+          print(f"[BATCH ERROR] {batch_id} 결과 처리 실패: {str(e)}")
+    return finished
+
+  def _run(self):
+    while not self._stop.is_set():
+      try:
+        self.run_once()
+      except Exception as e:
+        self.stats["errors"] += 1
+        print(f"[BATCH ERROR] 조회 실패: {str(e)}")
+      self._stop.wait(self.interval)
+
+  def start(self):
+    with self.lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="batch-poller", daemon=True)
+        self._thread.start()
+    return self
+
+  def stop(self, timeout=5):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+  from dotenv import load_dotenv
+  from openai import OpenAI
+
+  from backtest import load_history
+
+  parser = argparse.ArgumentParser(description="OpenAI Batch API 판단 요청 (과거 스냅샷 제출 / 결과 조회)")
+  sub = parser.add_subparsers(dest="command", required=True)
+  research = sub.add_parser("research", help="저장된 캔들로 만든 과거 스냅샷을 배치로 제출")
+  research.add_argument("--market", default="KRW-BTC")
+  research.add_argument("--interval", default="minute60")
+  research.add_argument("--days", type=int, default=90)
+  research.add_argument("--every", type=int, default=1, help="몇 봉마다 스냅샷 하나")
+  research.add_argument("--limit", type=int, default=None, help="최근 스냅샷 최대 개수")
+  research.add_argument("--model", default="gpt-4o-mini")
+  research.add_argument("--no-sync", action="store_true", help="거래소 호출 없이 로컬 데이터만 사용")
+  research.add_argument("--wait", action="store_true", help="끝날 때까지 조회")
+  research.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="조회 간격(초)")
+  poll_parser = sub.add_parser("poll", help="끝나지 않은 배치 조회 (끝났으면 결과 저장)")
+  poll_parser.add_argument("--wait", action="store_true", help="모두 끝날 때까지 조회")
+  poll_parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="조회 간격(초)")
+  status_parser = sub.add_parser("status", help="최근 배치 목록")
+  status_parser.add_argument("--limit", type=int, default=20)
+  args = parser.parse_args()
+
+  load_dotenv()
+  if args.command == "research":
+    candles = load_history(args.market, args.interval, args.days, sync=not args.no_sync)
+    items = research_items(candles, args.market, args.interval, args.every, args.limit)
+    print(f"{len(candles)}개 봉 -> 스냅샷 {len(items)}개 ({args.model})")
+    client = OpenAI()
+    batch_ids = submit(client, "research", args.model, items)
+    if args.wait:
+      wait(client, batch_ids, interval=args.poll_interval)
+    print(f"백테스트: python3 backtest.py --source batch --batch-id {' '.join(batch_ids)}")
+  elif args.command == "poll":
+    client = OpenAI()
+    if args.wait:
+      wait(client, [batch_id for batch_id, _ in pending_batches()], interval=args.poll_interval)
+    else:
+      poll_pending(client)
+  rows = get_database().read('''SELECT id, kind, model, status, requests, completed, failed, cost_usd,
+                                       strftime('%Y-%m-%d %H:%M', ts, 'unixepoch', 'localtime')
+                                FROM llm_batches ORDER BY ts DESC LIMIT ?''',
+                             (args.limit if args.command == "status" else 10,))
+  for batch_id, kind, model, status, requests, completed, failed, cost, submitted in rows:
+    print(f"{submitted}  {batch_id}  {kind:8s} {model:12s} {status:11s} 요청 {requests} "
+          f"(완료 {completed or 0}, 실패 {failed or 0})  ${cost or 0:.4f}")
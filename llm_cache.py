@@ -0,0 +1,108 @@
+import hashlib
+import json
+import time
+
+from storage import get_database
+
+DB_PATH = 'bitcoin_trading.db'
+
+
+def canonical_json(obj):
+  # 키 순서/공백 차이로 해시가 달라지지 않도록 정규화
+  return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def make_key(model, prompt, payload):
+  # 모델 + 프롬프트 + 페이로드 내용으로 만든 캐시 키
+  digest = hashlib.sha256()
+  for part in (model, prompt, canonical_json(payload)):
+    digest.update(part.encode('utf-8'))
+    digest.update(b'\0')
+  return digest.hexdigest()
+
+
+def prompt_hash(model, prompt):
+  return hashlib.sha256(f"{model}\0{prompt}".encode('utf-8')).hexdigest()
+
+
+def market_fingerprint(price, short_term_df, size=6):
+  # 근사 중복 판단용: 현재가와 최근 단기 종가 몇 개
+  closes = []
+  if short_term_df is not None and not short_term_df.empty:
+    closes = [float(c) for c in short_term_df['close'].tail(size)]
+  return {"price": float(price), "closes": closes}
+
+
+def _relative_diff(a, b):
+  return abs(a - b) / abs(b) if b else float('inf')
+
+
+def is_near_duplicate(current, previous, price_tolerance, candle_tolerance):
+  if _relative_diff(current["price"], previous["price"]) > price_tolerance:
+    return False
+  if len(current["closes"]) != len(previous["closes"]):
+    return False
+  return all(_relative_diff(a, b) <= candle_tolerance
+             for a, b in zip(current["closes"], previous["closes"]))
+
+
+class DecisionCache:
+  # OpenAI 판단 결과 캐시 (TTL + 최대 개수 초과 시 오래 안 쓴 항목부터 삭제)
+
+  def __init__(self, path=DB_PATH, ttl=3600, max_entries=500,
+               near_duplicate=False, price_tolerance=0.002, candle_tolerance=0.002):
+    self.path = path
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self.near_duplicate = near_duplicate
+    self.price_tolerance = price_tolerance
+    self.candle_tolerance = candle_tolerance
+    # 테이블은 migrations.py (v11)
+    self.db = get_database(self.path)
+
+  def _touch(self, key):
+    # 사용 시각 갱신은 쓰기 큐에 넣고 기다리지 않음
+    self.db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+
+  def get(self, key):
+    rows = self.db.read("SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?",
+                        (key, time.time() - self.ttl))
+    if not rows:
+      return None
+    self._touch(key)
+    return json.loads(rows[0][0])
+
+  def get_near_duplicate(self, model, prompt, fingerprint):
+    # 같은 모델/프롬프트의 가장 최근 판단을 시장이 거의 그대로면 재사용
+    if not self.near_duplicate:
+      return None
+    rows = self.db.read('''SELECT key, response, fingerprint FROM llm_cache
+                             WHERE prompt_hash = ? AND created_at >= ?
+                             ORDER BY created_at DESC LIMIT 1''',
+                        (prompt_hash(model, prompt), time.time() - self.ttl))
+    if not rows or rows[0][2] is None:
+      return None
+    key, response, previous = rows[0]
+    if not is_near_duplicate(fingerprint, json.loads(previous), self.price_tolerance, self.candle_tolerance):
+      return None
+    self._touch(key)
+    return json.loads(response)
+
+  def put(self, key, model, prompt, response, fingerprint=None):
+    # 응답 저장 + 오래된 항목 정리를 쓰기 큐에 넣고 바로 반환
+    now = time.time()
+    row = (key, prompt_hash(model, prompt), model, json.dumps(response, ensure_ascii=False),
+           json.dumps(fingerprint) if fingerprint is not None else None, now, now)
+    return self.db.write(self._insert, row, now)
+
+  def _insert(self, conn, row, now):
+    conn.execute('''INSERT OR REPLACE INTO llm_cache
+                      (key, prompt_hash, model, response, fingerprint, created_at, last_used)
+                      VALUES (?, ?, ?, ?, ?, ?, ?)''', row)
+    self._evict(conn, now)
+
+  def _evict(self, conn, now):
+    conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+    conn.execute('''DELETE FROM llm_cache WHERE key IN
+                      (SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)''',
+                 (self.max_entries,))
@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+
+# 스트리밍 판단 호출: 응답 JSON을 받는 대로 파싱해서 필드가 완성되는 즉시 검사하고, 기한(초)을 넘기면 포기
+# 잘못된 값(알 수 없는 decision, 범위 밖 percentage)은 응답이 끝나기 전에 바로 중단
+# 호출마다 첫 토큰까지 걸린 시간(ttft_ms)과 전체 시간(total_ms)을 돌려줌
+# 기한 초과/검사 실패 시의 대체 판단(보조 모델, 안전 판단)은 strategies.LLMStrategy에서 처리
+
+DECISIONS = ("buy", "sell", "hold")
+
+# JSON 값의 첫 글자 (그 외 문자로 시작하면 형식 오류)
+VALUE_START = '"{[-0123456789tfn'
+
+
+class DecisionError(ValueError):
+  # 판단 JSON 형식/스키마 오류
+  pass
+
+
+class DeadlineExceeded(TimeoutError):
+  pass
+
+
+def _check_decision(value):
+  if value not in DECISIONS:
+    raise DecisionError(f"알 수 없는 decision: {value!r}")
+
+
+def _check_percentage(value):
+  if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+    raise DecisionError(f"percentage는 0-100 사이 숫자여야 합니다: {value!r}")
+
+
+def _check_reason(value):
+  if not isinstance(value, str):
+    raise DecisionError(f"reason은 문자열이어야 합니다: {value!r}")
+
+
+# 판단 JSON 스키마: 필드 -> 검사 함수 (그 외 필드는 검사하지 않음)
+FIELD_CHECKS = {
+    "decision": _check_decision,
+    "percentage": _check_percentage,
+    "reason": _check_reason,
+}
+
+
+def check_field(key, value):
+  check = FIELD_CHECKS.get(key)
+  if check is not None:
+    check(value)
+
+
+def validate_decision(result, require_percentage=True):
+  # 완성된 응답 검사 -> decision/percentage/reason만 남긴 dict
+  # require_percentage: 매수/매도에 percentage 필수 (차트만 보는 단순 프롬프트는 percentage를 받지 않음)
+  if not isinstance(result, dict):
+    raise DecisionError(f"JSON 객체가 아닌 응답: {type(result).__name__}")
+  if "decision" not in result:
+    raise DecisionError("decision 필드 없음")
+  for key, value in result.items():
+    check_field(key, value)
+  if require_percentage and result["decision"] != "hold" and "percentage" not in result:
+    raise DecisionError(f"{result['decision']} 판단에 percentage 필드 없음")
+  return {
+      "decision": result["decision"],
+      "percentage": result.get("percentage", 0),
+      "reason": result.get("reason", ""),
+  }
+
+
+def _skip_ws(text, pos):
+  while pos < len(text) and text[pos] in " \t\r\n":
+    pos += 1
+  return pos
+
+
+class JSONFieldParser:
+  # 조각으로 들어오는 JSON 객체에서 최상위 필드가 완성될 때마다 (키, 값)을 돌려줌
+  # 아직 덜 온 키/값은 다음 조각을 기다리고, JSON으로 시작할 수 없는 문자는 바로 DecisionError
+
+  def __init__(self):
+    self.buffer = ""
+    self.pos = 0
+    self.opened = False
+    self.closed = False
+    self.fields = {}
+    self._decoder = json.JSONDecoder()
+
+  def feed(self, text):
+    self.buffer += text
+    buf = self.buffer
+    completed = []
+    while not self.closed:
+      pos = _skip_ws(buf, self.pos)
+      if pos >= len(buf):
+        break
+      if not self.opened:
+        if buf[pos] != "{":
+          raise DecisionError(f"JSON 객체가 아닌 응답: {buf[pos:pos + 20]!r}")
+        self.opened = True
+        self.pos = pos + 1
+        continue
+      if buf[pos] == ",":
+        self.pos = pos + 1
+        continue
+      if buf[pos] == "}":
+        self.closed = True
+        self.pos = pos + 1
+        break
+      if buf[pos] != '"':
+        raise DecisionError(f"잘못된 JSON: {buf[pos:pos + 20]!r}")
+      member = self._member(buf, pos)
+      if member is None:
+        break
+      key, value, self.pos = member
+      self.fields[key] = value
+      completed.append((key, value))
+    return completed
+
+  def _member(self, buf, pos):
+    try:
+      key, end = self._decoder.raw_decode(buf, pos)
+    except json.JSONDecodeError:
+      return None
+    end = _skip_ws(buf, end)
+    if end >= len(buf):
+      return None
+    if buf[end] != ":":
+      raise DecisionError(f"잘못된 JSON: {buf[end:end + 20]!r}")
+    start = _skip_ws(buf, end + 1)
+    if start >= len(buf):
+      return None
+    if buf[start] not in VALUE_START:
+      raise DecisionError(f"잘못된 JSON 값: {buf[start:start + 20]!r}")
+    try:
+      value, end = self._decoder.raw_decode(buf, start)
+    except json.JSONDecodeError:
+      return None
+    # 숫자/true/false/null은 뒤에 ',' 또는 '}'가 와야 끝난 값 ("12" 다음에 ".5", "1" 다음에 "e2"가 올 수 있음)
+    # 그 외 문자면 다음 조각을 기다림 (정말 잘못된 JSON은 응답이 끝난 뒤 전체 파싱에서 걸림)
+    if buf[start] not in '"{[':
+      after = _skip_ws(buf, end)
+      if after >= len(buf) or buf[after] not in ",}":
+        return None
+    return key, value, end
+
+
+def stream_decision(client, model, messages, deadline, require_percentage=True):
+  # 스트리밍으로 판단 요청 -> {"result", "ttft_ms", "total_ms", "prompt_tokens", "completion_tokens"}
+  # deadline(초) 안에 끝나지 않으면 연결을 닫고 DeadlineExceeded, 잘못된 응답은 DecisionError
+  # 응답은 별도 스레드에서 읽고 호출한 쪽은 기한까지만 기다림 (응답이 멈춰도 기한을 넘기지 않음)
+  start = time.perf_counter()
+  state = {"stream": None, "ttft_ms": None, "usage": None, "result": None, "error": None}
+  done = threading.Event()
+  abandoned = threading.Event()
+  parser = JSONFieldParser()
+
+  def consume():
+    try:
+      stream = client.chat.completions.create(
+          model=model,
+          messages=messages,
+          response_format={"type": "json_object"},
+          stream=True,
+          stream_options={"include_usage": True},
+          timeout=deadline,
+      )
+      state["stream"] = stream
+      if abandoned.is_set():
+        stream.close()
+        return
+      for chunk in stream:
+        if abandoned.is_set():
+          break
+        if chunk.usage is not None:
+          state["usage"] = chunk.usage
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if not text:
+          continue
+        if state["ttft_ms"] is None:
+          state["ttft_ms"] = (time.perf_counter() - start) * 1000
+        # 필드가 완성되는 즉시 검사 (잘못된 값이면 나머지를 기다리지 않고 중단)
+        for key, value in parser.feed(text):
+          check_field(key, value)
+      if not abandoned.is_set():
+        try:
+          result = json.loads(parser.buffer)
+        except json.JSONDecodeError as e:
+          raise DecisionError(f"완성되지 않은 JSON 응답: {e}")
+        state["result"] = validate_decision(result, require_percentage)
+    except BaseException as e:
+      state["error"] = e
+      if state["stream"] is not None:
+        state["stream"].close()
+    finally:
+      done.set()
+
+  thread = threading.Thread(target=consume, name="llm-stream", daemon=True)
+  thread.start()
+  if not done.wait(deadline):
+    abandoned.set()
+    if state["stream"] is not None:
+      try:
+        state["stream"].close()
+      except Exception:
+        pass
+    ttft = "없음" if state["ttft_ms"] is None else f"{state['ttft_ms']:.0f} ms"
+    raise DeadlineExceeded(f"{model} 응답이 {deadline:g}초 안에 끝나지 않음 (첫 토큰 {ttft})")
+  if state["error"] is not None:
+    raise state["error"]
+
+  usage = state["usage"]
+  return {
+      "result": state["result"],
+      "ttft_ms": state["ttft_ms"],
+      "total_ms": (time.perf_counter() - start) * 1000,
+      "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+      "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+  }
@@ -0,0 +1,149 @@
+import contextvars
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+import indicators
+import price_feed
+import tracing
+
+# 호출별 타임아웃 (초)
+DEFAULT_TIMEOUTS = {
+    "short_term": 5,
+    "mid_term": 5,
+    "long_term": 5,
+    "news": 8,
+    "balances": 5,
+    "current_price": 3,
+}
+
+# 차트 구간: 이름 -> (인터벌, 봉 개수)
+CHART_WINDOWS = {
+    "short_term": ("minute60", 24),
+    "mid_term": ("minute240", 30),
+    "long_term": ("day", 30),
+}
+
+# 이 값들이 없으면 매매 판단/주문을 진행할 수 없음
+REQUIRED_FIELDS = ("krw_balance", "coin_balance", "current_price")
+
+
+def _timed(fn, args, kwargs):
+  # 실패한 호출도 지연시간을 남기기 위해 예외를 값으로 돌려줌
+  start = time.perf_counter()
+  try:
+    return fn(*args, **kwargs), None, time.perf_counter() - start
+  except Exception as e:
+    return None, e, time.perf_counter() - start
+
+
+def run_parallel(calls, timeouts=None, default_timeout=5):
+  # 서로 독립적인 I/O 호출을 스레드 풀에서 동시에 실행
+  # calls: {이름: (함수, args, kwargs)}
+  # 반환: (결과 dict, 에러 dict, 호출별 지연시간 dict)
+  timeouts = timeouts or {}
+  results, errors, latency = {}, {}, {}
+  if not calls:
+    return results, errors, latency
+
+  executor = ThreadPoolExecutor(max_workers=len(calls))
+  started = time.perf_counter()
+  # 호출마다 현재 컨텍스트를 복사해서 실행 (진행 중인 trace의 하위 span으로 기록되도록)
+  futures = {
+      name: executor.submit(contextvars.copy_context().run, _timed, fn, args, kwargs)
+      for name, (fn, args, kwargs) in calls.items()
+  }
+
+  # 모든 호출이 같은 시점에 시작했으므로 마감 시각이 빠른 순서대로 기다림
+  deadlines = {name: started + timeouts.get(name, default_timeout) for name in futures}
+  for name in sorted(futures, key=deadlines.get):
+    remaining = max(0.0, deadlines[name] - time.perf_counter())
+    try:
+      result, error, latency[name] = futures[name].result(timeout=remaining)
+    except TimeoutError:
+      errors[name] = f"timeout after {timeouts.get(name, default_timeout)}s"
+      latency[name] = time.perf_counter() - started
+      continue
+    if error is not None:
+      errors[name] = str(error)
+    else:
+      results[name] = result
+
+  # 타임아웃된 호출은 기다리지 않고 버림
+  executor.shutdown(wait=False, cancel_futures=True)
+  return results, errors, latency
+
+
+def load_chart(market, interval, count):
+  # 로컬 캔들 저장소를 동기화(새 캔들만)하고 지표를 증분 계산한 뒤 차트 구간 반환
+  cache = indicators.get_default_cache()
+  summary = cache.latest_summary(market, interval)
+  return cache.store.get_window(market, interval, count), summary
+
+
+def _parse_balances(balances, currency, field="balance"):
+  for bal in balances:
+    if bal["currency"] == currency:
+      return float(bal.get(field) or 0.0)
+  return 0.0
+
+
+def collect_market_snapshot(bithumb, news_fn, market="KRW-BTC", timeouts=None, limiter=None):
+  # 판단과 주문에 필요한 데이터를 한 번에 병렬로 수집한 스냅샷
+  # bithumb: get_balances()가 있는 거래소 클라이언트 또는 portfolio.PortfolioState (잔고 캐시)
+  # limiter: 여러 마켓이 함께 쓰는 거래소 호출 제한 (rate_limit.RateLimiter)
+  timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+  limited = limiter.wrap if limiter is not None else (lambda fn: fn)
+  calls = {
+      # 차트는 로컬 캔들 저장소를 거쳐 새 캔들만 받아옴
+      **{name: (limited(load_chart), (market, interval, count), {})
+         for name, (interval, count) in CHART_WINDOWS.items()},
+      "news": (news_fn, (), {}),
+      # KRW/코인 잔고는 같은 /v1/accounts 응답에 있으므로 한 번만 호출
+      "balances": (limited(bithumb.get_balances), (), {}),
+      # 현재가는 WebSocket 시세 캐시에서, 오래됐을 때만 REST로 조회
+      "current_price": (price_feed.get_price, (market,), {}),
+  }
+  calls = {name: (tracing.traced(f"fetch.{name}", fn), args, kwargs) for name, (fn, args, kwargs) in calls.items()}
+  results, errors, latency = run_parallel(calls, timeouts)
+
+  snapshot = {
+      "market": market,
+      "fetched_at": datetime.now().isoformat(),
+      "short_term_df": None,
+      "mid_term_df": None,
+      "long_term_df": None,
+      "indicators": {},
+      "news": results.get("news"),
+      "krw_balance": None,
+      "coin_balance": None,
+      "avg_buy_price": None,
+      "current_price": results.get("current_price"),
+      "errors": errors,
+      "latency": latency,
+  }
+
+  for name in CHART_WINDOWS:
+    if name in results:
+      snapshot[f"{name}_df"], snapshot["indicators"][name] = results[name]
+
+  if "balances" in results:
+    currency = market.split("-")[1]
+    snapshot["krw_balance"] = _parse_balances(results["balances"], "KRW")
+    snapshot["coin_balance"] = _parse_balances(results["balances"], currency)
+    snapshot["avg_buy_price"] = _parse_balances(results["balances"], currency, "avg_buy_price")
+
+  return snapshot
+
+
+def missing_fields(snapshot):
+  return [field for field in REQUIRED_FIELDS if snapshot.get(field) is None]
+
+
+def format_latency_report(snapshot):
+  parts = []
+  for name, seconds in sorted(snapshot["latency"].items(), key=lambda item: -item[1]):
+    status = "ERR" if name in snapshot["errors"] else "ok"
+    parts.append(f"{name}={seconds:.2f}s({status})")
+  return "[DATA] " + ", ".join(parts)
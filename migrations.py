@@ -0,0 +1,328 @@
+import sqlite3
+
+DB_PATH = 'bitcoin_trading.db'
+
+# 스키마 버전은 PRAGMA user_version 에 기록
+# 새 변경은 항상 목록 끝에 (버전, 설명, 함수)로 추가하고 기존 항목은 수정하지 않음
+
+
+def _v1_trades(conn):
+  # 기존 trades 테이블 (마켓 컬럼이 없던 DB는 컬럼 추가, 기존 기록은 모두 KRW-BTC)
+  conn.execute('''CREATE TABLE IF NOT EXISTS trades
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  timestamp TEXT,
+                  decision TEXT,
+                  percentage INTEGER,
+                  reason TEXT,
+                  btc_balance REAL,
+                  krw_balance REAL,
+                  btc_price REAL,
+                  market TEXT DEFAULT 'KRW-BTC')''')
+  columns = [row[1] for row in conn.execute("PRAGMA table_info(trades)")]
+  if 'market' not in columns:
+    conn.execute("ALTER TABLE trades ADD COLUMN market TEXT DEFAULT 'KRW-BTC'")
+
+
+def _v2_decisions(conn):
+  # trades -> decisions: 정수 epoch 시각(ts) + 인덱스
+  # 기존 ISO 문자열은 로컬 시각이므로 'utc' 변환을 거쳐 epoch로 저장
+  # trades는 같은 컬럼을 보여주는 뷰로 남겨 기존 조회 코드가 그대로 동작하게 함
+  conn.execute('''CREATE TABLE decisions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts INTEGER NOT NULL,
+                  market TEXT NOT NULL DEFAULT 'KRW-BTC',
+                  decision TEXT NOT NULL,
+                  percentage INTEGER,
+                  reason TEXT,
+                  btc_balance REAL,
+                  krw_balance REAL,
+                  btc_price REAL)''')
+  conn.execute('''INSERT INTO decisions
+                    (id, ts, market, decision, percentage, reason, btc_balance, krw_balance, btc_price)
+                  SELECT id,
+                         COALESCE(CAST(strftime('%s', timestamp, 'utc') AS INTEGER), 0),
+                         COALESCE(market, 'KRW-BTC'),
+                         COALESCE(decision, 'hold'),
+                         percentage, reason, btc_balance, krw_balance, btc_price
+                  FROM trades ORDER BY id''')
+  conn.execute("DROP TABLE trades")
+  conn.execute("CREATE INDEX idx_decisions_market_ts ON decisions (market, ts)")
+  conn.execute("CREATE INDEX idx_decisions_ts ON decisions (ts)")
+  conn.execute("CREATE INDEX idx_decisions_decision ON decisions (decision, ts)")
+  conn.execute('''CREATE VIEW trades AS
+                  SELECT id,
+                         strftime('%Y-%m-%dT%H:%M:%S', ts, 'unixepoch', 'localtime') AS timestamp,
+                         decision, percentage, reason, btc_balance, krw_balance, btc_price, market, ts
+                  FROM decisions''')
+
+
+def _v3_orders_fills(conn):
+  # 판단 하나에 주문 여러 개, 주문 하나에 체결 여러 개
+  conn.execute('''CREATE TABLE orders
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  decision_id INTEGER NOT NULL REFERENCES decisions (id) ON DELETE CASCADE,
+                  ts INTEGER NOT NULL,
+                  market TEXT NOT NULL,
+                  side TEXT NOT NULL CHECK (side IN ('bid', 'ask')),
+                  order_type TEXT NOT NULL,
+                  exchange_order_id TEXT UNIQUE,
+                  price REAL,
+                  volume REAL,
+                  krw_amount REAL,
+                  state TEXT NOT NULL DEFAULT 'submitted',
+                  updated_at INTEGER)''')
+  conn.execute("CREATE INDEX idx_orders_decision ON orders (decision_id)")
+  conn.execute("CREATE INDEX idx_orders_market_ts ON orders (market, ts)")
+  conn.execute("CREATE INDEX idx_orders_state ON orders (state)")
+  conn.execute('''CREATE TABLE fills
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  order_id INTEGER NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+                  ts INTEGER NOT NULL,
+                  price REAL NOT NULL,
+                  volume REAL NOT NULL,
+                  fee REAL NOT NULL DEFAULT 0,
+                  exchange_trade_id TEXT UNIQUE)''')
+  conn.execute("CREATE INDEX idx_fills_order ON fills (order_id)")
+
+
+def _v4_news(conn):
+  # 백그라운드 뉴스 수집기가 저장하는 기사 (검색어별로 URL/제목 해시 중복 제거)
+  # news_fetches는 SerpAPI 호출 기록 (재시작해도 월 사용량을 이어서 계산)
+  conn.execute('''CREATE TABLE news
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts INTEGER NOT NULL,
+                  published_ts INTEGER NOT NULL,
+                  query TEXT NOT NULL,
+                  title TEXT NOT NULL,
+                  date TEXT,
+                  url TEXT,
+                  source TEXT,
+                  url_hash TEXT,
+                  title_hash TEXT NOT NULL,
+                  UNIQUE (query, url_hash),
+                  UNIQUE (query, title_hash))''')
+  conn.execute("CREATE INDEX idx_news_query_published ON news (query, published_ts)")
+  conn.execute("CREATE INDEX idx_news_published ON news (published_ts)")
+  conn.execute('''CREATE TABLE news_fetches
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts INTEGER NOT NULL,
+                  query TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  articles INTEGER NOT NULL DEFAULT 0,
+                  inserted INTEGER NOT NULL DEFAULT 0)''')
+  conn.execute("CREATE INDEX idx_news_fetches_ts ON news_fetches (ts)")
+
+
+def _v5_news_sentiment(conn):
+  # 수집할 때 한 번 매긴 제목 감성/관련도 점수 (기존 기사는 NULL, 수집기가 시작할 때 채움)
+  conn.execute("ALTER TABLE news ADD COLUMN sentiment REAL")
+  conn.execute("ALTER TABLE news ADD COLUMN relevance REAL")
+
+
+def _v6_sweeps(conn):
+  # 파라미터 탐색 실행(sweep_runs)과 설정별 백테스트 결과(sweep_results, params는 JSON)
+  conn.execute('''CREATE TABLE sweep_runs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts INTEGER NOT NULL,
+                  market TEXT NOT NULL,
+                  interval TEXT NOT NULL,
+                  start_ts INTEGER,
+                  end_ts INTEGER,
+                  bars INTEGER NOT NULL,
+                  method TEXT NOT NULL,
+                  configs INTEGER NOT NULL,
+                  workers INTEGER NOT NULL,
+                  elapsed REAL)''')
+  conn.execute('''CREATE TABLE sweep_results
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  run_id INTEGER NOT NULL REFERENCES sweep_runs (id) ON DELETE CASCADE,
+                  params TEXT NOT NULL,
+                  return_pct REAL,
+                  max_drawdown_pct REAL,
+                  sharpe REAL,
+                  trades INTEGER,
+                  rejected INTEGER,
+                  fees_krw REAL,
+                  final_equity REAL)''')
+  conn.execute("CREATE INDEX idx_sweep_results_run_return ON sweep_results (run_id, return_pct)")
+  conn.execute("CREATE INDEX idx_sweep_results_run_sharpe ON sweep_results (run_id, sharpe)")
+
+
+def _v7_spans(conn):
+  # 실행 단계별 추적 span (tracing.py): trace 하나 = execute_trade 한 번, ts는 시작 시각(epoch 초, 소수점 포함)
+  conn.execute('''CREATE TABLE spans
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  ts REAL NOT NULL,
+                  trace_id TEXT NOT NULL,
+                  span_id TEXT NOT NULL,
+                  parent_id TEXT,
+                  name TEXT NOT NULL,
+                  market TEXT,
+                  duration_ms REAL NOT NULL,
+                  status TEXT NOT NULL,
+                  error TEXT,
+                  http_status INTEGER,
+                  prompt_tokens INTEGER,
+                  completion_tokens INTEGER,
+                  cost_usd REAL,
+                  attrs TEXT)''')
+  conn.execute("CREATE INDEX idx_spans_ts ON spans (ts)")
+  conn.execute("CREATE INDEX idx_spans_name_ts ON spans (name, ts)")
+  conn.execute("CREATE INDEX idx_spans_trace ON spans (trace_id)")
+
+
+def _v8_llm_batches(conn):
+  # OpenAI Batch API로 보낸 판단 요청 (llm_batch.py): 배치(llm_batches)와 요청별 판단(batch_decisions)
+  # batch_decisions는 제출할 때 스냅샷 시각/가격/잔고로 먼저 저장하고 (status = 'pending') 결과를 받으면 판단을 채움
+  # ts는 판단 시점(스냅샷 시각, 과거 스냅샷은 봉 마감 시각), 실제 매매 기록(decisions)과는 따로 둠
+  conn.execute('''CREATE TABLE llm_batches
+                 (id TEXT PRIMARY KEY,
+                  ts INTEGER NOT NULL,
+                  kind TEXT NOT NULL,
+                  model TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  requests INTEGER NOT NULL,
+                  completed INTEGER,
+                  failed INTEGER,
+                  input_file_id TEXT,
+                  output_file_id TEXT,
+                  error_file_id TEXT,
+                  finished_ts INTEGER,
+                  cost_usd REAL)''')
+  conn.execute('''CREATE TABLE batch_decisions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  batch_id TEXT NOT NULL REFERENCES llm_batches (id) ON DELETE CASCADE,
+                  custom_id TEXT NOT NULL UNIQUE,
+                  ts INTEGER NOT NULL,
+                  market TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  decision TEXT,
+                  percentage INTEGER,
+                  reason TEXT,
+                  btc_balance REAL,
+                  krw_balance REAL,
+                  btc_price REAL,
+                  prompt_tokens INTEGER,
+                  completion_tokens INTEGER,
+                  cost_usd REAL,
+                  error TEXT)''')
+  conn.execute("CREATE INDEX idx_llm_batches_status ON llm_batches (status)")
+  conn.execute("CREATE INDEX idx_batch_decisions_batch ON batch_decisions (batch_id, status)")
+  conn.execute("CREATE INDEX idx_batch_decisions_market_ts ON batch_decisions (market, ts)")
+
+
+def _v9_candles(conn):
+  # 로컬 OHLCV 저장소 (candle_store.py): open_time은 UTC epoch 초
+  # candle_sync.verified_from: 이 시점 이후로는 빈 구간 없이 연속으로 받아온 상태
+  # 예전에는 CandleStore가 직접 만들었으므로 이미 있는 DB에서는 그대로 둠
+  conn.execute('''CREATE TABLE IF NOT EXISTS candles
+                 (market TEXT NOT NULL,
+                  interval TEXT NOT NULL,
+                  open_time INTEGER NOT NULL,
+                  open REAL,
+                  high REAL,
+                  low REAL,
+                  close REAL,
+                  volume REAL,
+                  value REAL,
+                  PRIMARY KEY (market, interval, open_time))''')
+  conn.execute('''CREATE TABLE IF NOT EXISTS candle_sync
+                 (market TEXT NOT NULL,
+                  interval TEXT NOT NULL,
+                  verified_from INTEGER,
+                  synced_at REAL,
+                  PRIMARY KEY (market, interval))''')
+
+
+def _v10_indicators(conn):
+  # 봉별 지표 (indicators.IndicatorCache), 컬럼은 이 시점의 indicators.INDICATOR_COLUMNS
+  conn.execute('''CREATE TABLE IF NOT EXISTS indicators
+                 (market TEXT NOT NULL,
+                  interval TEXT NOT NULL,
+                  open_time INTEGER NOT NULL,
+                  sma_20 REAL,
+                  sma_50 REAL,
+                  ema_12 REAL,
+                  ema_26 REAL,
+                  rsi_14 REAL,
+                  macd REAL,
+                  macd_signal REAL,
+                  macd_hist REAL,
+                  bb_upper REAL,
+                  bb_middle REAL,
+                  bb_lower REAL,
+                  bb_pct_b REAL,
+                  atr_14 REAL,
+                  volume_z REAL,
+                  PRIMARY KEY (market, interval, open_time))''')
+
+
+def _v11_llm_cache(conn):
+  # OpenAI 판단 캐시 (llm_cache.DecisionCache)
+  conn.execute('''CREATE TABLE IF NOT EXISTS llm_cache
+                 (key TEXT PRIMARY KEY,
+                  prompt_hash TEXT,
+                  model TEXT,
+                  response TEXT,
+                  fingerprint TEXT,
+                  created_at REAL,
+                  last_used REAL)''')
+  conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_prompt ON llm_cache (prompt_hash, created_at)")
+
+
+MIGRATIONS = [
+    (1, "trades 기본 테이블", _v1_trades),
+    (2, "decisions 테이블 + epoch 시각 + 인덱스", _v2_decisions),
+    (3, "orders / fills 테이블", _v3_orders_fills),
+    (4, "news / news_fetches 테이블", _v4_news),
+    (5, "news 감성/관련도 점수", _v5_news_sentiment),
+    (6, "sweep_runs / sweep_results 테이블", _v6_sweeps),
+    (7, "spans 테이블 (실행 단계별 추적)", _v7_spans),
+    (8, "llm_batches / batch_decisions 테이블", _v8_llm_batches),
+    (9, "candles / candle_sync 테이블", _v9_candles),
+    (10, "indicators 테이블", _v10_indicators),
+    (11, "llm_cache 테이블", _v11_llm_cache),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+  return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+  # 밀린 마이그레이션을 한 트랜잭션으로 적용, 적용한 버전 목록 반환
+  # BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡으므로 여러 스레드/프로세스가 동시에 불러도 한 번만 적용됨
+  if schema_version(conn) >= SCHEMA_VERSION:
+    return []
+  isolation_level = conn.isolation_level
+  conn.isolation_level = None
+  applied = []
+  try:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      current = schema_version(conn)
+      for version, description, apply in MIGRATIONS:
+        if version <= current:
+          continue
+        apply(conn)
+        conn.execute(f"PRAGMA user_version = {version}")
+        applied.append(version)
+        print(f"[DB] 스키마 v{version} 적용: {description}")
+      conn.execute("COMMIT")
+    except Exception:
+      conn.execute("ROLLBACK")
+      raise
+  finally:
+    conn.isolation_level = isolation_level
+  return applied
+
+
+if __name__ == "__main__":
+  import sys
+  # 사용법: python migrations.py [db 경로]
+  conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+  before = schema_version(conn)
+  applied = migrate(conn)
+  print(f"스키마 v{before} -> v{schema_version(conn)} ({len(applied)}개 적용)")
+  conn.close()
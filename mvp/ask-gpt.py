@@ -1,39 +1,19 @@
-from openai import OpenAI
-import python_bithumb
+import json
 import os
+import sys
 from dotenv import load_dotenv
+
+# 상위 폴더의 공용 모듈(candle_store 등) 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import candle_store  # noqa: E402
+from strategies import chart_only_strategy  # noqa: E402
 load_dotenv()
 
-# 1. 빗썸 차트 데이터 가져오기 (30일 일봉)
-df = python_bithumb.get_ohlcv("KRW-BTC", interval="day", count=30)
+MARKET = os.getenv("MARKET", "KRW-BTC")
 
-# 2. AI에게 데이터 제공하고 판단 받기
-client = OpenAI()
+# 1. 빗썸 차트 데이터 가져오기 (30일 일봉)
+df = candle_store.get_ohlcv(MARKET, interval="day", count=30)
 
-response = client.chat.completions.create(
-    model="gpt-4o",
-    messages=[
-        {
-            "role": "system",
-            "content": [
-                {
-                    "type": "text",
-                    "text": "You are an expert in Bitcoin investing. Tell me whether to buy, sell, or hold at the moment based on the chart data provided. response in json format.\n\nResponse Example:\n{\"decision\": \"buy\", \"reason\": \"some technical reason\"}\n{\"decision\": \"sell\", \"reason\": \"some technical reason\"}\n{\"decision\": \"hold\", \"reason\": \"some technical reason\"}"
-                }
-            ]
-        },
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": df.to_json()
-                }
-            ]
-        }
-    ],
-    response_format={
-        "type": "json_object"
-    }
-)
-print(response.choices[0].message.content)
+# 2. AI에게 데이터 제공하고 판단 받기 (공용 판단 엔진 인터페이스)
+result = chart_only_strategy("gpt-4o").decide({"market": MARKET, "chart": df})
+print(json.dumps({key: result[key] for key in ("decision", "reason")}, ensure_ascii=False))
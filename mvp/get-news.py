@@ -1,10 +1,13 @@
 import os
 import json
-import requests  # 뉴스 수집용
+import sys
 from dotenv import load_dotenv
-import python_bithumb  # 빗썸 데이터 수집용
 from openai import OpenAI  # OpenAI API 사용
 
+# 상위 폴더의 공용 뉴스 조회 함수 사용 (자동매매 수집기와 같은 파서)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from news import fetch_serpapi  # noqa: E402
+
 # .env 파일에서 API 키 로드
 load_dotenv()
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
@@ -14,29 +17,10 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 
 def get_bitcoin_news(api_key, query="bitcoin", location="us", language="en", num_results=5):
   """
-  SerpAPI를 사용하여 Google News에서 뉴스 기사의 제목과 날짜를 가져옵니다.
+  SerpAPI를 사용하여 Google News에서 최근 7일 뉴스 기사의 제목과 날짜를 가져옵니다.
   """
-  params = {
-      "engine": "google_news",
-      "q": f"{query} when:7d",
-      "gl": location,
-      "hl": language,
-      "api_key": api_key
-  }
-  api_url = "https://serpapi.com/search.json"
-  news_data = []
-
-  response = requests.get(api_url, params=params)
-  response.raise_for_status()  # 기본적인 HTTP 오류는 확인
-  results = response.json()
-
-  if "news_results" in results:
-    for news_item in results["news_results"][:num_results]:
-      news_data.append({
-          "title": news_item.get("title"),
-          "date": news_item.get("date")
-      })
-  return news_data
+  articles = fetch_serpapi(query, location, language, when="7d", api_key=api_key)
+  return [{"title": article["title"], "date": article["date"]} for article in articles[:num_results]]
 
 
 news = get_bitcoin_news(SERPAPI_API_KEY, query="bitcoin")
@@ -1,55 +1,33 @@
 import time
-import python_bithumb
 import os
+import sys
 from dotenv import load_dotenv
+
+# 상위 폴더의 공용 모듈(candle_store 등) 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import candle_store  # noqa: E402
+import exchange_client  # noqa: E402
+from strategies import chart_only_strategy  # noqa: E402
 load_dotenv()
 
+MARKET = os.getenv("MARKET", "KRW-BTC")
+strategy = chart_only_strategy("gpt-4o")
+
 
 def ai_trading():
   # 1. 빗썸 차트 데이터 가져오기 (30일 일봉)
-  df = python_bithumb.get_ohlcv("KRW-BTC", interval="day", count=30)
-
-  # 2. AI에게 데이터 제공하고 판단 받기
-  from openai import OpenAI
-  client = OpenAI()
+  df = candle_store.get_ohlcv(MARKET, interval="day", count=30)
 
-  response = client.chat.completions.create(
-      model="gpt-4o",
-      messages=[
-          {
-              "role": "system",
-              "content": [
-                  {
-                      "type": "text",
-                      "text": "You are an expert in Bitcoin investing. Tell me whether to buy, sell, or hold at the moment based on the chart data provided. response in json format.\n\nResponse Example:\n{\"decision\": \"buy\", \"reason\": \"some technical reason\"}\n{\"decision\": \"sell\", \"reason\": \"some technical reason\"}\n{\"decision\": \"hold\", \"reason\": \"some technical reason\"}"
-                  }
-              ]
-          },
-          {
-              "role": "user",
-              "content": [
-                  {
-                      "type": "text",
-                      "text": df.to_json()
-                  }
-              ]
-          }
-      ],
-      response_format={
-          "type": "json_object"
-      }
-  )
-  result = response.choices[0].message.content
+  # 2. AI에게 데이터 제공하고 판단 받기 (공용 판단 엔진 인터페이스)
+  result = strategy.decide({"market": MARKET, "chart": df})
 
   # 3. AI의 판단에 따라 실제로 자동매매 진행하기
-  import json
-  result = json.loads(result)
   access = os.getenv("BITHUMB_ACCESS_KEY")
   secret = os.getenv("BITHUMB_SECRET_KEY")
-  bithumb = python_bithumb.Bithumb(access, secret)
+  bithumb = exchange_client.BithumbClient(access, secret)
 
   my_krw = bithumb.get_balance("KRW")
-  my_btc = bithumb.get_balance("BTC")
+  my_btc = bithumb.get_balance(MARKET.split("-")[1])
 
   print("### AI Decision: ", result["decision"].upper(), "###")
   print(f"### Reason: {result['reason']} ###")
@@ -57,15 +35,15 @@ def ai_trading():
   if result["decision"] == "buy":
     if my_krw > 5000:
       print("### Buy Order Executed ###")
-      bithumb.buy_market_order("KRW-BTC", my_krw * 0.997)
+      bithumb.buy_market_order(MARKET, my_krw * 0.997)
     else:
       print("### Buy Order Failed: Insufficient KRW (less than 5000 KRW) ###")
 
   elif result["decision"] == "sell":
-    current_price = python_bithumb.get_current_price("KRW-BTC")
+    current_price = exchange_client.get_current_price(MARKET)
     if my_btc * current_price > 5000:
       print("### Sell Order Executed ###")
-      bithumb.sell_market_order("KRW-BTC", my_btc * 0.997)
+      bithumb.sell_market_order(MARKET, my_btc * 0.997)
     else:
       print("### Sell Order Failed: Insufficient BTC (less than 5000 KRW worth) ###")
 
@@ -0,0 +1,266 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from exchange_client import http_get
+from sentiment import score_articles, summarize
+from storage import get_database
+
+# 뉴스 수집기: 백그라운드 스레드가 자체 주기로 SerpAPI(Google News)를 조회해 news 테이블에 저장
+# 판단 경로는 sentiment()/latest()로 로컬 테이블만 읽으므로 SerpAPI 응답을 기다리지 않음
+# 같은 검색어 안에서 URL 해시 또는 정규화한 제목 해시가 같으면 중복으로 보고 버림
+# 기사마다 저장할 때 한 번만 감성/관련도 점수를 매기고(sentiment.py), 판단에는 점수 요약만 넘김
+# SerpAPI 호출은 news_fetches에 기록하고 최근 30일 호출 수가 월 할당량을 넘지 않게 조회 간격을 늘림
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+MONTHLY_QUOTA = int(os.getenv("SERPAPI_MONTHLY_QUOTA", "5000"))
+POLL_INTERVAL = int(os.getenv("NEWS_POLL_INTERVAL", "900"))
+CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "60"))
+# 판단에 넘기는 기사는 이 기간(초) 안에 나온 것만
+MAX_AGE = int(os.getenv("NEWS_MAX_AGE", str(7 * 86400)))
+# 감성 요약 기간(초)
+SENTIMENT_WINDOW = int(os.getenv("NEWS_SENTIMENT_WINDOW", "86400"))
+QUOTA_WINDOW = 30 * 86400
+
+
+def _hash(text):
+  return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_title(title):
+  # 대소문자/문장부호/공백 차이만 있는 제목은 같은 기사로 봄
+  return re.sub(r"[\W_]+", " ", title.lower()).strip()
+
+
+def parse_date(item, default=None):
+  # SerpAPI 날짜: iso_date(2025-01-15T08:00:00Z) 또는 date("01/15/2025, 08:00 AM, +0000 UTC")
+  if item.get("iso_date"):
+    try:
+      return int(datetime.fromisoformat(item["iso_date"].replace("Z", "+00:00")).timestamp())
+    except ValueError:
+      pass
+  if item.get("date"):
+    try:
+      return int(datetime.strptime(item["date"].replace(" UTC", ""), "%m/%d/%Y, %I:%M %p, %z").timestamp())
+    except ValueError:
+      pass
+  return default
+
+
+def parse_results(results):
+  # news_results의 묶음 기사(highlight/stories)까지 펼쳐서 기사 목록으로 변환
+  articles = []
+  for item in results.get("news_results") or []:
+    for story in [item, item.get("highlight") or {}, *(item.get("stories") or [])]:
+      if not story.get("title"):
+        continue
+      source = story.get("source")
+      articles.append({
+          "title": story["title"],
+          "date": story.get("date"),
+          "url": story.get("link"),
+          "source": source.get("name") if isinstance(source, dict) else source,
+          "published_ts": parse_date(story),
+      })
+  return articles
+
+
+def fetch_serpapi(query, location="us", language="en", when=None, api_key=None):
+  # when: Google News 기간 필터 (예: "7d")
+  params = {
+      "engine": "google_news",
+      "q": f"{query} when:{when}" if when else query,
+      "gl": location,
+      "hl": language,
+      "api_key": api_key or os.getenv("SERPAPI_API_KEY"),
+  }
+  response = http_get(SERPAPI_URL, params=params, endpoint="serpapi")
+  response.raise_for_status()
+  return parse_results(response.json())
+
+
+def _insert_articles(conn, query, articles, now):
+  inserted = 0
+  for article in articles:
+    cursor = conn.execute('''INSERT OR IGNORE INTO news
+                               (ts, published_ts, query, title, date, url, source, url_hash, title_hash,
+                                sentiment, relevance)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                          (now, article.get("published_ts") or now, query, article["title"], article.get("date"),
+                           article.get("url"), article.get("source"),
+                           _hash(article["url"]) if article.get("url") else None,
+                           _hash(normalize_title(article["title"])),
+                           article.get("sentiment"), article.get("relevance")))
+    inserted += cursor.rowcount
+  conn.execute("INSERT INTO news_fetches (ts, query, status, articles, inserted) VALUES (?, ?, 'ok', ?, ?)",
+               (now, query, len(articles), inserted))
+  return inserted
+
+
+def _score_unscored(conn, scorer):
+  # 점수 컬럼이 생기기 전에 저장된 기사만 한 번 채점
+  rows = conn.execute("SELECT id, query, title FROM news WHERE sentiment IS NULL").fetchall()
+  for row_id, query, title in rows:
+    article = scorer([{"title": title}], query)[0]
+    conn.execute("UPDATE news SET sentiment = ?, relevance = ? WHERE id = ?",
+                 (article["sentiment"], article["relevance"], row_id))
+  return len(rows)
+
+
+def sentiment_series(db, query, since, bucket=3600):
+  # 구간(bucket초)별 관련도 가중 평균 감성과 기사 수 (대시보드용)
+  rows = db.read('''SELECT published_ts / ? * ? AS bucket,
+                           SUM(sentiment * relevance) / SUM(relevance),
+                           COUNT(*),
+                           SUM(sentiment >= 0.2),
+                           SUM(sentiment <= -0.2)
+                    FROM news
+                    WHERE query = ? AND published_ts >= ? AND sentiment IS NOT NULL
+                    GROUP BY bucket ORDER BY bucket''',
+                 (bucket, bucket, query, int(since)))
+  return [{"ts": ts, "sentiment": value, "articles": count, "positive": positive, "negative": negative}
+          for ts, value, count, positive, negative in rows]
+
+
+class NewsCollector:
+
+  def __init__(self, queries, fetch_fn=fetch_serpapi, db=None, interval=POLL_INTERVAL,
+               monthly_quota=MONTHLY_QUOTA, cache_ttl=CACHE_TTL, max_age=MAX_AGE,
+               sentiment_window=SENTIMENT_WINDOW, scorer=score_articles, clock=time.time):
+    # fetch_fn(query) -> [{"title", "date", "url", "source", "published_ts"}]
+    # scorer(articles, query) -> 같은 목록에 sentiment/relevance를 채워 반환
+    self.queries = list(dict.fromkeys(queries))
+    self.fetch_fn = fetch_fn
+    self.scorer = scorer
+    self.sentiment_window = sentiment_window
+    self.db = db or get_database()
+    self.interval = interval
+    self.monthly_quota = monthly_quota
+    self.cache_ttl = cache_ttl
+    self.max_age = max_age
+    self.clock = clock
+    self.lock = threading.Lock()
+    self._cache = {}
+    self._next_due = {}
+    self._stop = threading.Event()
+    self._thread = None
+    self.stats = {"fetches": 0, "errors": 0, "inserted": 0, "skipped_quota": 0, "cache_hits": 0}
+
+  # ---- 할당량 ----
+
+  def effective_interval(self):
+    # 모든 검색어를 계속 조회해도 30일 호출 수가 할당량 안에 들도록 간격을 늘림
+    if not self.monthly_quota:
+      return self.interval
+    return max(self.interval, QUOTA_WINDOW * len(self.queries) / self.monthly_quota)
+
+  def quota_used(self):
+    since = int(self.clock()) - QUOTA_WINDOW
+    return self.db.read("SELECT COUNT(*) FROM news_fetches WHERE ts >= ?", (since,))[0][0]
+
+  # ---- 수집 ----
+
+  def refresh(self, query):
+    # 검색어 하나를 조회해 저장, 새로 저장된 기사 수 반환 (할당량 초과 시 None)
+    if self.monthly_quota and self.quota_used() >= self.monthly_quota:
+      self.stats["skipped_quota"] += 1
+      print(f"[NEWS] SerpAPI 월 할당량({self.monthly_quota}) 도달, '{query}' 조회 건너뜀")
+      return None
+    now = int(self.clock())
+    try:
+      articles = self.fetch_fn(query)
+    except Exception as e:
+      self.stats["errors"] += 1
+      print(f"[NEWS ERROR] {query}: {str(e)}")
+      # 실패한 호출도 할당량을 쓰므로 기록 (다음 할당량 확인 전에 커밋되도록 기다림)
+      self.db.execute("INSERT INTO news_fetches (ts, query, status) VALUES (?, ?, 'error')", (now, query)).result()
+      return None
+    self.stats["fetches"] += 1
+    # 채점은 수집 스레드에서 저장 전에 한 번만
+    articles = self.scorer(articles, query)
+    inserted = self.db.write(_insert_articles, query, articles, now).result()
+    self.stats["inserted"] += inserted
+    if inserted:
+      with self.lock:
+        self._cache = {key: value for key, value in self._cache.items() if key[0] != query}
+    return inserted
+
+  def run_due(self):
+    # 조회 시각이 된 검색어만 조회, 다음 조회까지 남은 시간(초) 반환
+    now = self.clock()
+    interval = self.effective_interval()
+    for query in self.queries:
+      if self._next_due.get(query, 0) <= now:
+        self.refresh(query)
+        self._next_due[query] = self.clock() + interval
+    return max(1.0, min(self._next_due.values()) - self.clock()) if self._next_due else interval
+
+  def _run(self):
+    try:
+      scored = self.db.write(_score_unscored, self.scorer).result()
+      if scored:
+        print(f"[NEWS] 기존 기사 {scored}개 채점")
+    except Exception as e:
+      print(f"[NEWS ERROR] 기존 기사 채점 실패: {str(e)}")
+    while not self._stop.is_set():
+      try:
+        wait = self.run_due()
+      except Exception as e:
+        print(f"[NEWS ERROR] 수집 실패: {str(e)}")
+        wait = self.interval
+      self._stop.wait(wait)
+
+  def start(self):
+    with self.lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="news-collector", daemon=True)
+        self._thread.start()
+    return self
+
+  def stop(self, timeout=5):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join(timeout)
+
+  # ---- 조회 (판단 경로) ----
+
+  def _cached(self, key, load):
+    # 검색어별 TTL 캐시 (새 기사가 저장되면 해당 검색어 항목은 바로 지움)
+    now = self.clock()
+    with self.lock:
+      cached = self._cache.get(key)
+      if cached and cached[0] > now:
+        self.stats["cache_hits"] += 1
+        return cached[1]
+    value = load(now)
+    with self.lock:
+      self._cache[key] = (now + self.cache_ttl, value)
+    return value
+
+  def latest(self, query, n=5):
+    # 최근 max_age 안에 나온 기사 n개 (최신순, title/date/감성 점수), 로컬 테이블만 읽음
+    def load(now):
+      rows = self.db.read('''SELECT title, date, sentiment FROM news
+                             WHERE query = ? AND published_ts >= ?
+                             ORDER BY published_ts DESC, id DESC LIMIT ?''',
+                          (query, int(now - self.max_age), n))
+      return [{"title": title, "date": date, "sentiment": sentiment} for title, date, sentiment in rows]
+    return self._cached((query, "latest", n), load)
+
+  def sentiment(self, query):
+    # 판단에 넘기는 압축된 뉴스 특징 (기사 원문 대신 감성 요약)
+    def load(now):
+      rows = self.db.read('''SELECT published_ts, sentiment, relevance FROM news
+                             WHERE query = ? AND published_ts >= ? AND sentiment IS NOT NULL''',
+                          (query, int(now - self.sentiment_window)))
+      return summarize(rows, now, self.sentiment_window)
+    return self._cached((query, "sentiment"), load)
+
+  def count_since(self, since):
+    # since(epoch 초) 이후에 나온 기사 수 (검색어가 달라도 같은 제목은 한 번만, NewsBurstTrigger용)
+    return self.db.read("SELECT COUNT(DISTINCT title_hash) FROM news WHERE published_ts >= ?",
+                        (int(since),))[0][0]
@@ -0,0 +1,218 @@
+import asyncio
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import telegram
+from telegram.error import RetryAfter, NetworkError, TimedOut
+
+import tracing
+
+# 텔레그램 메시지 최대 길이
+MAX_MESSAGE_LENGTH = 4096
+GROUP_SEPARATOR = "\n"
+
+
+class TelegramNotifier:
+  # 백그라운드 스레드의 이벤트 루프 하나에서 Bot을 계속 재사용하며 큐에 쌓인 메시지를 전송
+  # send()는 큐에 넣기만 하므로 거래 흐름이 텔레그램 응답을 기다리지 않음
+  # group을 지정한 메시지는 release(group) 또는 hold_seconds가 지날 때까지 모았다가 한 번에 전송
+
+  def __init__(self, token, chat_id, base_url=None, max_queue=100, hold_seconds=30,
+               min_interval=1.0, max_retries=5, bot=None):
+    self.token = token
+    self.chat_id = chat_id
+    self.base_url = base_url
+    self.max_queue = max_queue
+    self.hold_seconds = hold_seconds
+    self.min_interval = min_interval
+    self.max_retries = max_retries
+    self.stats = {"sent": 0, "dropped": 0, "retries": 0, "failed": 0, "enqueue_errors": 0, "init_errors": 0}
+    self._bot = bot
+    self._groups = OrderedDict()
+    self._lock = threading.Lock()
+    self._loop = None
+    self._queue = None
+    self._thread = None
+    self._ready = threading.Event()
+    self._start_lock = threading.Lock()
+    self._closing = threading.Event()
+    self._last_sent = 0.0
+
+  # ---- 호출 측 (거래 스레드) ----
+
+  def start(self):
+    # 스레드가 끝났으면 (예상치 못한 오류) 새 루프로 다시 시작, 새 루프가 준비될 때까지 대기
+    with self._start_lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+    return self
+
+  def send(self, text, group=None):
+    # 논블로킹: 큐에 넣고 바로 반환
+    if group is not None:
+      with self._lock:
+        if group not in self._groups:
+          self._groups[group] = {"parts": [], "created": time.monotonic()}
+        self._groups[group]["parts"].append(text)
+      return
+    self._enqueue(text)
+
+  def release(self, group):
+    # 그룹에 모인 메시지(결정 + 주문 + 체결)를 하나로 합쳐 전송
+    with self._lock:
+      entry = self._groups.pop(group, None)
+    if entry and entry["parts"]:
+      self._enqueue(GROUP_SEPARATOR.join(entry["parts"]))
+
+  def _release_expired(self):
+    now = time.monotonic()
+    with self._lock:
+      expired = [key for key, entry in self._groups.items() if now - entry["created"] >= self.hold_seconds]
+    for key in expired:
+      self.release(key)
+
+  def _enqueue(self, text):
+    # 보내는 쪽의 span을 같이 넘겨 실제 전송을 같은 trace의 하위 span으로 기록
+    # 알림 실패가 거래 흐름으로 번지지 않도록 예외를 올리지 않고 세기만 함
+    try:
+      self.start()
+      parent = tracing.current()
+      for chunk in _split(text):
+        self._loop.call_soon_threadsafe(self._put, (chunk, parent))
+    except Exception as e:
+      self.stats["enqueue_errors"] += 1
+      print(f"[TELEGRAM ERROR] 메시지를 큐에 넣지 못했습니다: {str(e)}")
+
+  def flush(self, timeout=30):
+    # 모인 그룹과 큐에 남은 메시지를 모두 보낼 때까지 대기
+    with self._lock:
+      groups = list(self._groups)
+    for key in groups:
+      self.release(key)
+    if self._loop is None or self._loop.is_closed():
+      return True
+    future = asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop)
+    try:
+      future.result(timeout)
+      return True
+    except Exception:
+      return False
+
+  def close(self, timeout=30):
+    self._closing.set()
+    self.flush(timeout)
+    if self._loop is not None and not self._loop.is_closed():
+      self._loop.call_soon_threadsafe(self._put, None)
+      self._thread.join(timeout=5)
+
+  # ---- 백그라운드 이벤트 루프 ----
+
+  def _put(self, item):
+    # 큐가 가득 차면 가장 오래된 메시지를 버림
+    if item is not None and self._queue.full():
+      self._queue.get_nowait()
+      self._queue.task_done()
+      self.stats["dropped"] += 1
+      print("[TELEGRAM] 큐가 가득 차 오래된 메시지를 버렸습니다")
+    self._queue.put_nowait(item)
+
+  def _run(self):
+    self._loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(self._loop)
+    self._queue = asyncio.Queue(maxsize=self.max_queue + 1)
+    self._ready.set()
+    try:
+      self._loop.run_until_complete(self._worker())
+    finally:
+      self._loop.close()
+
+  async def _open_bot(self):
+    # 텔레그램 장애/잘못된 토큰이어도 스레드를 끝내지 않고 간격을 늘려가며 재시도 (그동안 메시지는 큐에 쌓임)
+    # send 직후 close 하면 스레드가 시작되기 전에 _closing이 설정되므로 최소 한 번은 시도하고 재시도만 멈춤
+    backoff = 1.0
+    while True:
+      try:
+        if self._bot is None:
+          kwargs = {"base_url": self.base_url} if self.base_url else {}
+          self._bot = telegram.Bot(token=self.token, **kwargs)
+        await self._bot.__aenter__()
+        return True
+      except Exception as e:
+        self.stats["init_errors"] += 1
+        if self._closing.is_set():
+          print(f"[TELEGRAM ERROR] 봇 초기화 실패: {str(e)} (종료 중이라 재시도하지 않음)")
+          return False
+        print(f"[TELEGRAM ERROR] 봇 초기화 실패: {str(e)} ({backoff:.0f}초 후 재시도)")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 300)
+
+  async def _worker(self):
+    if not await self._open_bot():
+      return
+    try:
+      while True:
+        try:
+          item = await asyncio.wait_for(self._queue.get(), timeout=1.0)
+        except asyncio.TimeoutError:
+          self._release_expired()
+          continue
+        try:
+          if item is None:
+            return
+          text, parent = item
+          with tracing.span("telegram.send", parent=parent, chars=len(text)) as span:
+            if not await self._deliver(text):
+              span.fail("전송 실패")
+        finally:
+          self._queue.task_done()
+    finally:
+      await self._bot.__aexit__(None, None, None)
+
+  async def _deliver(self, text):
+    backoff = 1.0
+    for attempt in range(self.max_retries + 1):
+      # 같은 채팅방에 너무 빠르게 보내지 않도록 간격 유지
+      wait = self.min_interval - (time.monotonic() - self._last_sent)
+      if wait > 0:
+        await asyncio.sleep(wait)
+      try:
+        await self._bot.send_message(chat_id=self.chat_id, text=text)
+        self._last_sent = time.monotonic()
+        self.stats["sent"] += 1
+        return True
+      except RetryAfter as e:
+        # 텔레그램이 알려준 시간만큼 기다린 뒤 재시도
+        retry_after = e.retry_after
+        delay = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+      except (TimedOut, NetworkError) as e:
+        delay = backoff
+        backoff = min(backoff * 2, 60)
+        print(f"[TELEGRAM ERROR] {str(e)} (재시도 {attempt + 1}/{self.max_retries})")
+      except Exception as e:
+        print(f"[TELEGRAM ERROR] {str(e)}")
+        self.stats["failed"] += 1
+        return False
+      self.stats["retries"] += 1
+      await asyncio.sleep(delay)
+    self.stats["failed"] += 1
+    print("[TELEGRAM ERROR] 재시도 횟수 초과로 메시지를 보내지 못했습니다")
+    return False
+
+
+def _split(text):
+  if len(text) <= MAX_MESSAGE_LENGTH:
+    return [text]
+  return [text[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(text), MAX_MESSAGE_LENGTH)]
+
+
+def create_notifier(token, chat_id, base_url=None):
+  # 프로세스 종료 시 남은 메시지를 보내도록 등록된 알림기
+  notifier = TelegramNotifier(token, chat_id, base_url=base_url)
+  atexit.register(notifier.close)
+  return notifier
@@ -1,10 +1,12 @@
 import os
 from dotenv import load_dotenv
-import python_bithumb
 import asyncio
-import telegram
-import time
-import schedule
+import price_feed
+from notifier import create_notifier
+from execution import ExecutionEngine, format_report
+from exchange_client import BithumbClient
+from portfolio import PortfolioState
+from trigger_engine import TriggerEngine, DailyTimer
 
 # .env 파일에서 API 키 로드
 load_dotenv()
@@ -13,61 +15,74 @@ ACCESS_KEY = os.getenv("BITHUMB_ACCESS_KEY")
 SECRET_KEY = os.getenv("BITHUMB_SECRET_KEY")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 KRW_AMOUNT = 10100
+# 주문할 마켓 목록 (쉼표로 구분, 예: KRW-BTC,KRW-ETH)
+MARKETS = [m.strip() for m in os.getenv("MARKETS", "KRW-BTC").split(",") if m.strip()]
 SCHEDULE_TIME = "03:17"
 
-# telegram bot
+# telegram bot (백그라운드 큐로 전송)
 telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-bot = telegram.Bot(token=telegram_bot_token)
+notifier = create_notifier(telegram_bot_token, CHAT_ID)
 
-# BITHUMB 잔고 확인
-bithumb = python_bithumb.Bithumb(ACCESS_KEY, SECRET_KEY)
-my_krw = bithumb.get_balance("KRW")
-my_btc = bithumb.get_balance("BTC")
+# BITHUMB 잔고는 주문할 때 조회 (짧게 캐시하고 주문이 끝나면 무효화)
+bithumb = BithumbClient(ACCESS_KEY, SECRET_KEY)
+portfolio = PortfolioState(bithumb)
 
 
-def buy_now():
-  current_btc_price = python_bithumb.get_current_price("KRW-BTC")
-  print(f"### Buy Order: {KRW_AMOUNT:,.0f} KRW {current_btc_price:,.0f} BTC ###")
-  asyncio.run(send_telegram_message(f"### Buy Order: {KRW_AMOUNT:,.0f} KRW {current_btc_price:,.0f} BTC ###"))
+def current_quote(market):
+  return price_feed.get_quote(market) or {"price": price_feed.get_price(market)}
+
+
+# 체결까지 확인하고 실제 평균 체결가/수수료를 보고
+execution_engine = ExecutionEngine(bithumb, quote_fn=current_quote, on_order=portfolio.on_order)
+
+
+def buy_now(market="KRW-BTC"):
+  currency = market.split("-")[1]
+  current_price = price_feed.get_price(market)
+  print(f"### Buy Order: {KRW_AMOUNT:,.0f} KRW {current_price:,.0f} {currency} ###")
+  notifier.send(f"### Buy Order: {KRW_AMOUNT:,.0f} KRW {current_price:,.0f} {currency} ###")
 
   try:
-    bithumb.buy_market_order("KRW-BTC", KRW_AMOUNT)
+    report = execution_engine.market_buy(market, KRW_AMOUNT)
+    print(format_report(report, currency))
+    notifier.send(format_report(report, currency))
   except Exception as e:
     message = f"### Transaction Failed: {str(e)} ###"
     print(message)
-    asyncio.run(send_telegram_message(message))
+    notifier.send(message)
+
 
-def sell_now():
-  current_btc_price = python_bithumb.get_current_price("KRW-BTC")
-  target_btc_amount = KRW_AMOUNT / current_btc_price
-  print(f"### Sell Order: {KRW_AMOUNT:,.0f} KRW {target_btc_amount:,.0f} BTC ###")
-  asyncio.run(send_telegram_message(f"### Sell Order: {KRW_AMOUNT:,.0f} KRW {target_btc_amount:,.0f} BTC ###"))
+def sell_now(market="KRW-BTC"):
+  currency = market.split("-")[1]
+  print(f"### Sell Order: {KRW_AMOUNT:,.0f} KRW {currency} ###")
+  notifier.send(f"### Sell Order: {KRW_AMOUNT:,.0f} KRW {currency} ###")
 
   try:
-    bithumb.sell_market_order("KRW-BTC", target_btc_amount)
+    # 수량은 주문 직전 매수호가로 환산
+    report = execution_engine.sell_krw(market, KRW_AMOUNT, max_volume=portfolio.get_balance(currency))
+    print(format_report(report, currency))
+    notifier.send(format_report(report, currency))
   except Exception as e:
     message = f"### Transaction Failed: {str(e)} ###"
     print(message)
-    asyncio.run(send_telegram_message(message))
-
-async def send_telegram_message(text):
-  try:
-    await bot.send_message(chat_id=CHAT_ID, text=text)
-  except Exception as e:
-    print(f"[TELEGRAM ERROR] {str(e)}")
+    notifier.send(message)
 
 
 def run_scheduler():
   print("비트코인 자동 트레이딩 시스템 시작...")
   print(f"스케줄링된 실행 시간: 매일 {SCHEDULE_TIME}")
 
+  # 실시간 시세 구독
+  price_feed.start_default_feed(MARKETS)
+
   # 매일 특정 시간에 작업 실행하도록 스케줄링
-  schedule.every().day.at(SCHEDULE_TIME).do(buy_now)
+  def buy_all(run_transaction=True, market=None, reason=None):
+    for target in MARKETS:
+      buy_now(target)
 
-  # 스케줄 루프 실행
-  while True:
-    schedule.run_pending()
-    time.sleep(60)  # 1분마다 스케줄 확인
+  engine = TriggerEngine(buy_all)
+  engine.add(DailyTimer(SCHEDULE_TIME, run_transaction=True))
+  asyncio.run(engine.run())
 
 
 # 실행
@@ -0,0 +1,112 @@
+import json
+
+from indicators import price_digits, round_price
+
+# 프롬프트에 넣을 차트 데이터 인코딩 방식
+#   columns: 기존 방식 (json.loads(df.to_json()), 컬럼마다 타임스탬프 키 반복)
+#   rows:    헤더 한 줄 + 봉마다 배열 한 줄
+#   csv:     헤더 + CSV 문자열
+#   summary: 봉 데이터 대신 요약 지표만
+FORMATS = ("columns", "rows", "csv", "summary")
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+PRICE_FIELDS = ['open', 'high', 'low', 'close']
+TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+try:
+  import tiktoken
+  _encoding = tiktoken.encoding_for_model("gpt-4o")
+except Exception:  # tiktoken이 없으면 글자 수 기반 추정
+  _encoding = None
+
+
+def count_tokens(text):
+  if _encoding is not None:
+    return len(_encoding.encode(text))
+  return max(1, len(text) // 4)
+
+
+def _rounded(df):
+  # 가격은 마지막 종가 크기에 맞춘 자릿수로 (indicators.summarize와 같은 규칙, 1원 미만 코인도 0이 되지 않게)
+  out = df[OHLCV_FIELDS].astype(float)
+  digits = price_digits(float(out['close'].iloc[-1]))
+  out[PRICE_FIELDS] = out[PRICE_FIELDS].round(digits)
+  out['volume'] = out['volume'].round(4)
+  return out, digits
+
+
+def _encode_rows(df):
+  rounded, digits = _rounded(df)
+  times = df.index.strftime(TIME_FORMAT)
+  return {
+      "columns": ["time"] + OHLCV_FIELDS,
+      "rows": [[t] + [round_price(v, digits) if k != 'volume' else v for k, v in zip(OHLCV_FIELDS, values)]
+               for t, values in zip(times, rounded.itertuples(index=False, name=None))]
+  }
+
+
+def _encode_csv(df):
+  rounded, digits = _rounded(df)
+  rounded.index = df.index.strftime(TIME_FORMAT)
+  rounded.index.name = 'time'
+  if digits:
+    return rounded.to_csv(float_format=f'%.{max(digits, 4)}f')
+  return rounded.to_csv(float_format='%.4f').replace('.0000', '')
+
+
+def _encode_summary(df):
+  close = df['close'].astype(float)
+  volume = df['volume'].astype(float)
+  digits = price_digits(float(close.iloc[-1]))
+  return {
+      "bars": len(df),
+      "from": df.index[0].strftime(TIME_FORMAT),
+      "to": df.index[-1].strftime(TIME_FORMAT),
+      "last_close": round_price(close.iloc[-1], digits),
+      "change_pct": round(float((close.iloc[-1] / close.iloc[0] - 1) * 100), 2),
+      "high": round_price(df['high'].max(), digits),
+      "low": round_price(df['low'].min(), digits),
+      "sma": round_price(close.mean(), digits),
+      "avg_volume": round(float(volume.mean()), 4),
+      "last_volume": round(float(volume.iloc[-1]), 4),
+  }
+
+
+def encode_frame(df, fmt="rows"):
+  if df is None or df.empty:
+    return None
+  if fmt == "columns":
+    return json.loads(df.to_json())
+  if fmt == "rows":
+    return _encode_rows(df)
+  if fmt == "csv":
+    return _encode_csv(df)
+  if fmt == "summary":
+    return _encode_summary(df)
+  raise ValueError(f"Unknown payload format: {fmt}")
+
+
+def encode_charts(frames, fmt="rows"):
+  # frames: {"short_term": df, "mid_term": df, "long_term": df}
+  return {name: encode_frame(df, fmt) for name, df in frames.items()}
+
+
+def token_report(frames, formats=FORMATS):
+  # 포맷별 차트 데이터 토큰 수 비교
+  return {fmt: count_tokens(json.dumps(encode_charts(frames, fmt))) for fmt in formats}
+
+
+if __name__ == "__main__":
+  import candle_store
+
+  frames = {
+      "short_term": candle_store.get_ohlcv("KRW-BTC", interval="minute60", count=24),
+      "mid_term": candle_store.get_ohlcv("KRW-BTC", interval="minute240", count=30),
+      "long_term": candle_store.get_ohlcv("KRW-BTC", interval="day", count=30),
+  }
+  report = token_report(frames)
+  baseline = report["columns"]
+  method = "tiktoken" if _encoding is not None else "len/4 estimate"
+  print(f"차트 데이터 토큰 수 ({method})")
+  for fmt, tokens in report.items():
+    print(f"  {fmt:8s} {tokens:6d} tokens ({tokens / baseline * 100:5.1f}%)")
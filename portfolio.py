@@ -0,0 +1,88 @@
+import threading
+import time
+
+# 계좌 잔고/평균 매수가 캐시
+# /v1/accounts 한 번 호출로 모든 통화의 잔고를 받아 ttl초 동안 재사용
+# 주문이 들어가거나 체결/취소되면 invalidate()로 즉시 무효화 -> 다음 조회에서 새로 받아옴 (고정 대기 없음)
+# exchange는 exchange_client.BithumbClient 또는 fakes.exchange.MockExchange
+
+DEFAULT_TTL = 5.0
+
+
+def _float(value):
+  return float(value) if value not in (None, "") else 0.0
+
+
+class PortfolioState:
+
+  def __init__(self, exchange, ttl=DEFAULT_TTL, clock=time.monotonic):
+    self.exchange = exchange
+    self.ttl = ttl
+    self.clock = clock
+    self.lock = threading.Lock()
+    # 동시에 여러 마켓이 조회해도 /v1/accounts는 한 번만 호출
+    self.fetch_lock = threading.Lock()
+    self._balances = None
+    self._accounts = {}
+    self._fetched_at = None
+    self._invalidated_at = float("-inf")
+    self.stats = {"hits": 0, "fetches": 0, "invalidations": 0}
+
+  def _fresh(self, max_age):
+    if self._balances is None:
+      return False
+    return self.clock() - self._fetched_at <= (self.ttl if max_age is None else max_age)
+
+  def _fetch(self):
+    started = self.clock()
+    balances = self.exchange.get_balances()
+    with self.lock:
+      self.stats["fetches"] += 1
+      # 조회 도중 무효화됐으면 응답이 주문 이전 잔고일 수 있으므로 캐시하지 않음
+      if started >= self._invalidated_at:
+        self._balances = balances
+        self._accounts = {
+            bal["currency"]: {
+                "balance": _float(bal.get("balance")),
+                "locked": _float(bal.get("locked")),
+                "avg_buy_price": _float(bal.get("avg_buy_price")),
+            }
+            for bal in balances
+        }
+        self._fetched_at = started
+    return balances
+
+  def get_balances(self, max_age=None):
+    # 거래소 get_balances()와 같은 형태(list of dict)로 반환
+    with self.lock:
+      if self._fresh(max_age):
+        self.stats["hits"] += 1
+        return self._balances
+    with self.fetch_lock:
+      # 기다리는 동안 다른 스레드가 새로 받아왔으면 그 결과 사용
+      with self.lock:
+        if self._fresh(max_age):
+          self.stats["hits"] += 1
+          return self._balances
+      return self._fetch()
+
+  def account(self, currency, max_age=None):
+    self.get_balances(max_age)
+    with self.lock:
+      return dict(self._accounts.get(currency) or {"balance": 0.0, "locked": 0.0, "avg_buy_price": 0.0})
+
+  def get_balance(self, currency, max_age=None):
+    return self.account(currency, max_age)["balance"]
+
+  def get_avg_buy_price(self, currency, max_age=None):
+    return self.account(currency, max_age)["avg_buy_price"]
+
+  def invalidate(self):
+    with self.lock:
+      self._balances = None
+      self._invalidated_at = self.clock()
+      self.stats["invalidations"] += 1
+
+  def on_order(self, market, report=None):
+    # ExecutionEngine(on_order=...) 콜백: 주문이 들어갔으면 체결 여부와 관계없이 잔고/주문가능 금액이 바뀜
+    self.invalidate()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+
+import websockets
+
+import exchange_client
+
+WS_URL = "wss://ws-api.bithumb.com/websocket/v1"
+
+# 이 시간(초)보다 오래된 시세는 stale로 보고 REST로 다시 조회
+DEFAULT_MAX_AGE = 10
+
+
+class PriceFeed:
+  # 빗썸 WebSocket 체결가/호가 구독 후 메모리에 최신 시세를 유지
+  # 거래 코드는 동기 코드이므로 이벤트 루프는 별도 스레드에서 실행
+
+  def __init__(self, markets, url=WS_URL, max_age=DEFAULT_MAX_AGE, orderbook=True,
+               rest_fallback=exchange_client.get_current_price, max_backoff=60):
+    self.markets = list(markets)
+    self.url = url
+    self.max_age = max_age
+    self.orderbook = orderbook
+    self.rest_fallback = rest_fallback
+    self.max_backoff = max_backoff
+    self.quotes = {}
+    self.lock = threading.Lock()
+    self.connected = threading.Event()
+    self.reconnects = 0
+    self.stats = {"ws_hits": 0, "rest_fallbacks": 0}
+    self._stopping = False
+    self._loop = None
+    self._task = None
+    self._thread = None
+
+  # ---- 구독 ----
+
+  def _subscription(self):
+    request = [{"ticket": str(uuid.uuid4())}, {"type": "ticker", "codes": self.markets}]
+    if self.orderbook:
+      request.append({"type": "orderbook", "codes": self.markets})
+    return request
+
+  def handle_message(self, raw):
+    # 수신 메시지 하나를 시세 캐시에 반영 (테스트에서 직접 호출 가능)
+    if isinstance(raw, bytes):
+      raw = raw.decode("utf-8")
+    message = json.loads(raw)
+    market = message.get("code")
+    if market is None:
+      return
+    now = time.time()
+    with self.lock:
+      quote = self.quotes.setdefault(market, {"market": market})
+      if message.get("type") == "ticker":
+        quote["price"] = float(message["trade_price"])
+        quote["price_time"] = message.get("timestamp", now * 1000) / 1000
+        quote["price_received_at"] = now
+      elif message.get("type") == "orderbook" and message.get("orderbook_units"):
+        top = message["orderbook_units"][0]
+        quote["bid"] = float(top["bid_price"])
+        quote["ask"] = float(top["ask_price"])
+        quote["bid_size"] = float(top["bid_size"])
+        quote["ask_size"] = float(top["ask_size"])
+        quote["book_received_at"] = now
+      quote["source"] = "ws"
+
+  async def _listen(self):
+    backoff = 1
+    while not self._stopping:
+      try:
+        async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as ws:
+          await ws.send(json.dumps(self._subscription()))
+          self.connected.set()
+          backoff = 1
+          async for raw in ws:
+            self.handle_message(raw)
+      except asyncio.CancelledError:
+        break
+      except Exception as e:
+        print(f"[PRICE FEED] 연결 끊김: {str(e)}")
+      finally:
+        self.connected.clear()
+      if self._stopping:
+        break
+      # 지수 백오프 + 지터 후 재연결
+      delay = min(self.max_backoff, backoff) * random.uniform(0.5, 1.0)
+      self.reconnects += 1
+      await asyncio.sleep(delay)
+      backoff *= 2
+
+  def _run(self):
+    self._loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(self._loop)
+    self._task = self._loop.create_task(self._listen())
+    try:
+      self._loop.run_until_complete(self._task)
+    except asyncio.CancelledError:
+      pass
+    finally:
+      self._loop.close()
+
+  def start(self, wait=0):
+    # wait초까지 첫 연결을 기다림 (0이면 기다리지 않음)
+    if self._thread is None or not self._thread.is_alive():
+      self._stopping = False
+      self._thread = threading.Thread(target=self._run, name="price-feed", daemon=True)
+      self._thread.start()
+    if wait:
+      self.connected.wait(wait)
+    return self
+
+  def stop(self):
+    self._stopping = True
+    if self._loop is not None and self._task is not None and not self._loop.is_closed():
+      self._loop.call_soon_threadsafe(self._task.cancel)
+    if self._thread is not None:
+      self._thread.join(timeout=5)
+
+  # ---- 조회 ----
+
+  def get_quote(self, market):
+    with self.lock:
+      quote = self.quotes.get(market)
+      return dict(quote) if quote else None
+
+  def age(self, market):
+    quote = self.get_quote(market)
+    if not quote or "price_received_at" not in quote:
+      return None
+    return time.time() - quote["price_received_at"]
+
+  def is_stale(self, market, max_age=None):
+    age = self.age(market)
+    return age is None or age > (self.max_age if max_age is None else max_age)
+
+  def get_price(self, market, max_age=None):
+    # 신선한 WebSocket 시세가 있으면 바로 반환, 없거나 오래됐으면 REST 조회
+    if not self.is_stale(market, max_age):
+      self.stats["ws_hits"] += 1
+      return self.get_quote(market)["price"]
+    self.stats["rest_fallbacks"] += 1
+    price = self.rest_fallback(market)
+    if price is not None:
+      with self.lock:
+        quote = self.quotes.setdefault(market, {"market": market})
+        quote["price"] = float(price)
+        quote["price_received_at"] = time.time()
+        quote["source"] = "rest"
+    return price
+
+
+_default_feed = None
+
+
+def start_default_feed(markets, url=WS_URL, wait=5):
+  global _default_feed
+  if _default_feed is None:
+    _default_feed = PriceFeed(markets, url=url)
+  return _default_feed.start(wait=wait)
+
+
+def get_price(market, max_age=None):
+  # 모든 현재가 조회의 진입점: 피드가 시작되지 않았으면 REST 조회
+  if _default_feed is None:
+    return exchange_client.get_current_price(market)
+  return _default_feed.get_price(market, max_age)
+
+
+def get_quote(market):
+  return _default_feed.get_quote(market) if _default_feed is not None else None
+
+
+async def record(markets, path, seconds=60, url=WS_URL):
+  # 실제 수신 메시지를 JSON lines로 저장 (fakes.bithumb_ws 리플레이용)
+  feed = PriceFeed(markets, url=url)
+  deadline = time.monotonic() + seconds
+  with open(path, "w", encoding="utf-8") as f:
+    async with websockets.connect(url) as ws:
+      await ws.send(json.dumps(feed._subscription()))
+      while time.monotonic() < deadline:
+        try:
+          raw = await asyncio.wait_for(ws.recv(), timeout=deadline - time.monotonic())
+        except asyncio.TimeoutError:
+          break
+        f.write((raw.decode("utf-8") if isinstance(raw, bytes) else raw) + "\n")
+
+
+if __name__ == "__main__":
+  import sys
+  # 사용법: python price_feed.py record.jsonl 60 KRW-BTC KRW-ETH
+  asyncio.run(record(sys.argv[3:] or ["KRW-BTC"], sys.argv[1], float(sys.argv[2])))
@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class RateLimiter:
+  # 토큰 버킷: 초당 rate개씩 채워지고 최대 burst개까지 쌓임
+  # 여러 스레드(마켓별 파이프라인)가 같은 인스턴스를 공유
+
+  def __init__(self, rate, burst=None):
+    self.rate = float(rate)
+    # 요청 하나에 토큰 1개가 필요하므로 버킷은 최소 1개 (초당 1회 미만 rate에서도 acquire가 끝나도록)
+    self.burst = max(1.0, float(burst if burst is not None else rate))
+    self.tokens = self.burst
+    self.updated = time.monotonic()
+    self.lock = threading.Lock()
+
+  def _refill(self, now):
+    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+  def acquire(self, tokens=1):
+    # 토큰이 생길 때까지 기다림, 기다린 시간(초)을 반환
+    waited = 0.0
+    while True:
+      with self.lock:
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= tokens:
+          self.tokens -= tokens
+          return waited
+        wait = (tokens - self.tokens) / self.rate
+      time.sleep(wait)
+      waited += wait
+
+  def wrap(self, fn):
+    # fn 호출 전에 토큰을 하나 받도록 감싼 함수
+    def limited(*args, **kwargs):
+      self.acquire()
+      return fn(*args, **kwargs)
+    return limited
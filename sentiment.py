@@ -0,0 +1,123 @@
+import math
+import re
+
+# 뉴스 제목 감성/관련도 점수 (CPU만 쓰는 사전 기반 모델, 외부 의존성 없음)
+# 기사마다 수집할 때 한 번만 점수를 매겨 news 테이블에 저장하고,
+# 판단과 대시보드는 저장된 점수를 모은 요약/시계열만 사용
+#   sentiment: -1(매우 부정) ~ 1(매우 긍정), relevance: 0 ~ 1 (검색한 코인과 얼마나 직접 관련된 기사인지)
+
+# 단어/구 -> 가중치 (가상자산 시장 기사 제목 기준)
+LEXICON = {
+    # 긍정
+    "surge": 2.5, "surges": 2.5, "soar": 2.5, "soars": 2.5, "rally": 2.0, "rallies": 2.0, "jump": 1.5,
+    "jumps": 1.5, "gain": 1.5, "gains": 1.5, "rise": 1.0, "rises": 1.0, "climb": 1.5, "climbs": 1.5,
+    "rebound": 1.5, "rebounds": 1.5, "recover": 1.0, "recovers": 1.0, "bullish": 2.5, "bull": 1.5,
+    "breakout": 2.0, "high": 0.5, "record": 1.0, "ath": 2.0, "all time high": 2.5, "record high": 2.5,
+    "approval": 2.0, "approved": 2.0, "approve": 1.5, "adoption": 1.5, "adopt": 1.5, "inflow": 1.5,
+    "inflows": 1.5, "buy": 0.5, "buys": 1.0, "accumulate": 1.5, "accumulation": 1.5, "upgrade": 1.0,
+    "partnership": 1.0, "launch": 0.5, "launches": 0.5, "optimism": 1.5, "optimistic": 1.5,
+    "boost": 1.5, "boosts": 1.5, "strong": 1.0, "support": 0.5, "legal tender": 2.0, "etf": 0.5,
+    "rate cut": 1.5, "rate cuts": 1.5, "outperform": 1.5, "outperforms": 1.5, "win": 1.0, "wins": 1.0,
+    # 부정
+    "crash": -3.0, "crashes": -3.0, "plunge": -2.5, "plunges": -2.5, "plummet": -2.5, "plummets": -2.5,
+    "tumble": -2.0, "tumbles": -2.0, "slump": -2.0, "slumps": -2.0, "drop": -1.5, "drops": -1.5,
+    "fall": -1.5, "falls": -1.5, "decline": -1.5, "declines": -1.5, "sell off": -2.0, "selloff": -2.0,
+    "sell-off": -2.0, "dump": -2.0, "dumps": -2.0, "bearish": -2.5, "bear": -1.5, "low": -0.5,
+    "liquidation": -2.0, "liquidations": -2.0, "liquidated": -2.0, "outflow": -1.5, "outflows": -1.5,
+    "hack": -3.0, "hacked": -3.0, "exploit": -2.5, "stolen": -2.5, "theft": -2.5, "scam": -2.5,
+    "fraud": -3.0, "ban": -2.5, "bans": -2.5, "banned": -2.5, "crackdown": -2.5, "lawsuit": -2.0,
+    "sues": -2.0, "sued": -2.0, "probe": -1.5, "investigation": -1.5, "charged": -2.0, "fine": -1.0,
+    "fined": -1.5, "reject": -2.0, "rejects": -2.0, "rejected": -2.0, "delay": -1.0, "delays": -1.0,
+    "bankrupt": -3.0, "bankruptcy": -3.0, "collapse": -3.0, "collapses": -3.0, "insolvency": -3.0,
+    "fear": -1.5, "fears": -1.5, "panic": -2.5, "risk": -0.5, "risks": -0.5, "warning": -1.5,
+    "warns": -1.5, "volatile": -0.5, "weak": -1.0, "loss": -1.5, "losses": -1.5, "rate hike": -1.5,
+    "rate hikes": -1.5, "underperform": -1.5, "halt": -1.5, "halts": -1.5, "outage": -2.0,
+}
+NEGATIONS = {"not", "no", "never", "without", "fails", "fail", "failed", "despite", "unlikely", "denies"}
+INTENSIFIERS = {"massive": 1.5, "huge": 1.5, "sharp": 1.3, "sharply": 1.3, "biggest": 1.5,
+                "major": 1.2, "slight": 0.6, "slightly": 0.6, "modest": 0.7}
+# 검색어(코인 이름) -> 제목에서 찾을 별칭
+ALIASES = {
+    "bitcoin": ("bitcoin", "btc"),
+    "ethereum": ("ethereum", "ether", "eth"),
+    "xrp": ("xrp", "ripple"),
+    "solana": ("solana", "sol"),
+    "dogecoin": ("dogecoin", "doge"),
+}
+MARKET_TERMS = ("crypto", "cryptocurrency", "cryptocurrencies", "blockchain", "digital asset", "stablecoin",
+                "altcoin", "altcoins", "token", "defi", "exchange", "sec", "etf")
+# 점수 정규화 계수 (합계 s를 s / sqrt(s^2 + ALPHA)로 -1~1에 매핑)
+ALPHA = 15.0
+MAX_PHRASE = max(len(phrase.split()) for phrase in LEXICON)
+
+
+def tokenize(text):
+  return re.findall(r"[a-z0-9]+(?:[-'][a-z0-9]+)*", text.lower())
+
+
+def score(title):
+  # 제목 하나의 감성 점수: 긴 구부터 사전과 맞추고, 앞 3단어 안에 부정어가 있으면 부호를 뒤집고 약하게
+  tokens = tokenize(title)
+  total = 0.0
+  i = 0
+  while i < len(tokens):
+    for size in range(min(MAX_PHRASE, len(tokens) - i), 0, -1):
+      phrase = " ".join(tokens[i:i + size])
+      if phrase in LEXICON:
+        weight = LEXICON[phrase]
+        before = tokens[max(0, i - 3):i]
+        if any(token in NEGATIONS for token in before):
+          weight = -0.75 * weight
+        if before and before[-1] in INTENSIFIERS:
+          weight *= INTENSIFIERS[before[-1]]
+        total += weight
+        i += size
+        break
+    else:
+      i += 1
+  return total / math.sqrt(total * total + ALPHA) if total else 0.0
+
+
+def relevance(title, query):
+  # 검색한 코인이 제목에 직접 나오면 1, 가상자산 시장 일반 기사면 0.5, 그 외 0.2
+  text = " ".join(tokenize(title))
+  padded = f" {text} "
+  if any(f" {alias} " in padded for alias in ALIASES.get(query, (query,))):
+    return 1.0
+  if any(f" {term} " in padded for term in MARKET_TERMS):
+    return 0.5
+  return 0.2
+
+
+def score_articles(articles, query):
+  # 기사 목록에 sentiment/relevance를 채워 반환 (수집 시 한 번 호출)
+  for article in articles:
+    article["sentiment"] = round(score(article["title"]), 4)
+    article["relevance"] = relevance(article["title"], query)
+  return articles
+
+
+def summarize(rows, now, window, trend_window=None):
+  # rows: [(published_ts, sentiment, relevance)] -> 판단에 넘길 요약 (관련도 가중 평균)
+  # trend: 최근 trend_window(기본 window/4) 평균 - 그 이전 평균
+  trend_window = trend_window or window / 4
+  recent, earlier = [], []
+  for published_ts, value, weight in rows:
+    if published_ts >= now - window:
+      (recent if published_ts >= now - trend_window else earlier).append((value, weight))
+
+  def mean(items):
+    weight = sum(w for _, w in items)
+    return sum(v * w for v, w in items) / weight if weight else None
+
+  articles = recent + earlier
+  overall = mean(articles)
+  recent_mean, earlier_mean = mean(recent), mean(earlier)
+  return {
+      "articles": len(articles),
+      "sentiment": round(overall, 3) if overall is not None else None,
+      "positive": sum(1 for v, _ in articles if v >= 0.2),
+      "negative": sum(1 for v, _ in articles if v <= -0.2),
+      "trend": round(recent_mean - earlier_mean, 3) if recent_mean is not None and earlier_mean is not None else None,
+      "window_hours": round(window / 3600, 1),
+  }
@@ -0,0 +1,14 @@
+import numpy as np
+
+# 주문 금액 범위 (KRW)와 수수료 보정 계수
+MIN_ORDER_KRW = 10100
+MAX_ORDER_KRW = 20000
+FEE_FACTOR = 0.997
+
+
+def order_krw_amount(percentage, min_amount=MIN_ORDER_KRW, max_amount=MAX_ORDER_KRW, fee_factor=FEE_FACTOR):
+  # AI가 준 투자 비율(0-100)을 최소/최대 금액 사이로 환산하고 수수료만큼 올려줌
+  # 스칼라와 numpy 배열 모두 지원
+  normalized_percentage = np.asarray(percentage, dtype=float) / 100.0
+  amount = (min_amount + (max_amount - min_amount) * normalized_percentage) / fee_factor
+  return float(amount) if amount.ndim == 0 else amount
@@ -0,0 +1,208 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from migrations import migrate
+
+DB_PATH = 'bitcoin_trading.db'
+
+# 모든 연결에 적용하는 설정
+#   WAL: 읽기와 쓰기가 서로를 막지 않음 (대시보드 조회 중에도 거래 기록 가능)
+#   synchronous=NORMAL: WAL에서는 커밋마다 fsync 하지 않아도 DB가 깨지지 않음
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+)
+BUSY_TIMEOUT_MS = 10000
+
+
+def connect(path=DB_PATH, readonly=False):
+  # 설정이 적용된 단독 연결 (스레드 간 공유 가능, 동시 사용은 호출 측에서 막아야 함)
+  conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+  conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+  for pragma in PRAGMAS:
+    conn.execute(pragma)
+  if readonly:
+    conn.execute("PRAGMA query_only = ON")
+  return conn
+
+
+class Database:
+  # 프로세스에서 하나만 쓰는 저장소
+  #   쓰기: 전용 스레드의 연결 하나가 큐에 쌓인 작업을 모아 한 트랜잭션으로 커밋 (호출 측은 Future만 받고 바로 반환)
+  #   읽기: 읽기 전용 연결 풀에서 빌려 씀 (WAL이라 쓰기 트랜잭션과 경합하지 않음)
+
+  def __init__(self, path=DB_PATH, pool_size=4, batch_size=100, flush_interval=0.05, max_queue=10000):
+    self.path = path
+    self.pool_size = pool_size
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.stats = {"writes": 0, "batches": 0, "errors": 0}
+    self._pool = queue.LifoQueue()
+    self._queue = queue.Queue(maxsize=max_queue)
+    self._lock = threading.Lock()
+    self._thread = None
+    self._closed = False
+    conn = connect(path)
+    try:
+      migrate(conn)
+    finally:
+      conn.close()
+
+  # ---- 읽기 ----
+
+  @contextmanager
+  def reading(self):
+    try:
+      conn = self._pool.get_nowait()
+    except queue.Empty:
+      conn = connect(self.path, readonly=True)
+    try:
+      yield conn
+    finally:
+      if conn.in_transaction:
+        conn.rollback()
+      if self._closed or self._pool.qsize() >= self.pool_size:
+        conn.close()
+      else:
+        self._pool.put(conn)
+
+  def read(self, sql, params=()):
+    with self.reading() as conn:
+      return conn.execute(sql, params).fetchall()
+
+  # ---- 쓰기 ----
+
+  def start(self):
+    with self._lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+    return self
+
+  def write(self, fn, *args):
+    # fn(conn, *args)를 쓰기 스레드에서 실행, 반환값은 Future로 전달
+    if self._closed:
+      raise RuntimeError("database is closed")
+    self.start()
+    future = Future()
+    self._queue.put((fn, args, future))
+    return future
+
+  def execute(self, sql, params=()):
+    # 단일 INSERT/UPDATE, Future 결과는 lastrowid
+    return self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+  def flush(self, timeout=10):
+    # 지금까지 넣은 쓰기가 모두 커밋될 때까지 대기
+    if self._thread is None:
+      return True
+    marker = self.write(lambda conn: None)
+    try:
+      marker.result(timeout)
+      return True
+    except Exception:
+      return False
+
+  def close(self, timeout=10):
+    if self._closed:
+      return
+    self.flush(timeout)
+    self._closed = True
+    if self._thread is not None and self._thread.is_alive():
+      self._queue.put(None)
+      self._thread.join(timeout)
+    while True:
+      try:
+        self._pool.get_nowait().close()
+      except queue.Empty:
+        break
+
+  def _next_batch(self):
+    item = self._queue.get()
+    if item is None:
+      return None
+    batch = [item]
+    deadline = time.monotonic() + self.flush_interval
+    while len(batch) < self.batch_size:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        item = self._queue.get(timeout=remaining)
+      except queue.Empty:
+        break
+      if item is None:
+        self._queue.put(None)  # 이번 묶음을 커밋한 뒤 종료
+        break
+      batch.append(item)
+    return batch
+
+  def _run(self):
+    conn = connect(self.path)
+    conn.isolation_level = None
+    try:
+      while True:
+        batch = self._next_batch()
+        if batch is None:
+          return
+        self._commit(conn, batch)
+    finally:
+      conn.close()
+
+  def _commit(self, conn, batch):
+    # 작업마다 SAVEPOINT를 두어 하나가 실패해도 나머지는 함께 커밋
+    done = []
+    try:
+      conn.execute("BEGIN IMMEDIATE")
+      for fn, args, future in batch:
+        conn.execute("SAVEPOINT item")
+        try:
+          result = fn(conn, *args)
+          conn.execute("RELEASE item")
+          done.append((future, result))
+        except Exception as e:
+          conn.execute("ROLLBACK TO item")
+          conn.execute("RELEASE item")
+          self.stats["errors"] += 1
+          print(f"[DB ERROR] 쓰기 실패: {str(e)}")
+          future.set_exception(e)
+      conn.execute("COMMIT")
+    except Exception as e:
+      if conn.in_transaction:
+        conn.execute("ROLLBACK")
+      self.stats["errors"] += len(done)
+      print(f"[DB ERROR] 커밋 실패: {str(e)}")
+      for future, _ in done:
+        future.set_exception(e)
+      for fn, args, future in batch:
+        if not future.done():
+          future.set_exception(e)
+      return
+    self.stats["writes"] += len(done)
+    self.stats["batches"] += 1
+    for future, result in done:
+      future.set_result(result)
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path=DB_PATH):
+  # 경로마다 하나의 Database (처음 열 때 마이그레이션, 종료 시 남은 쓰기 커밋)
+  with _databases_lock:
+    db = _databases.get(path)
+    if db is None:
+      db = Database(path)
+      _databases[path] = db
+      atexit.register(db.close)
+    return db
@@ -0,0 +1,383 @@
+import argparse
+import json
+import time
+
+import numpy as np
+from openai import APIError
+
+import tracing
+from llm_cache import make_key
+from llm_stream import DecisionError, DeadlineExceeded, check_field, stream_decision
+
+# 판단 엔진: 모든 엔진은 decide(snapshot) -> 판단 dict 를 구현
+# 판단 dict: decision(buy/sell/hold), percentage(0-100), reason, engine, confidence(0-1, 없으면 None),
+#            latency_ms, cost_usd (기존 코드가 쓰던 decision/percentage/reason 키는 그대로)
+# snapshot은 market_data.collect_market_snapshot 결과 (indicators: {short_term/mid_term/long_term: 지표 dict})
+
+# 모델별 토큰 단가 (USD / 100만 토큰: 입력, 출력)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# 규칙 엔진 기본값
+RULE_PARAMS = {
+    "timeframe": "short_term",
+    "rsi_oversold": 30.0,
+    "rsi_overbought": 70.0,
+    "macd_weight": 1.0,
+    "trend_weight": 1.0,
+    "sentiment_weight": 0.5,
+    "sentiment_threshold": 0.3,
+    # 점수가 이 값 이상이면 매수, -이 값 이하이면 매도, 그 사이는 애매한 구간(hold)
+    "buy_threshold": 2.0,
+    "sell_threshold": 2.0,
+}
+
+# gated 엔진이 LLM 없이 바로 결정하는 최소 confidence (매수 기준 2점 = 0.5보다 높아야 애매한 구간을 LLM이 판단)
+GATE_MIN_CONFIDENCE = 0.75
+
+
+def make_decision(decision, percentage, reason, engine, confidence=None, cost_usd=0.0):
+  return {
+      "decision": decision,
+      "percentage": percentage,
+      "reason": reason,
+      "engine": engine,
+      "confidence": confidence,
+      "latency_ms": None,
+      "cost_usd": cost_usd,
+  }
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+  input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+  return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class Strategy:
+  # 판단 엔진 공통: 지연시간/비용 누적 (benchmark 용)
+  name = "strategy"
+
+  def __init__(self):
+    self.stats = {"decisions": 0, "latency_ms": 0.0, "cost_usd": 0.0}
+
+  def _decide(self, snapshot):
+    raise NotImplementedError
+
+  def decide(self, snapshot):
+    # external_ms: 실제로 기다리지 않고 재현한 외부 호출 시간 (ReplayLLM)
+    start = time.perf_counter()
+    result = self._decide(snapshot)
+    result["latency_ms"] = (time.perf_counter() - start) * 1000 + result.get("external_ms", 0.0)
+    self.stats["decisions"] += 1
+    self.stats["latency_ms"] += result["latency_ms"]
+    self.stats["cost_usd"] += result.get("cost_usd") or 0.0
+    return result
+
+
+# ---- 규칙 엔진 ----
+
+def rule_score(ind, params=RULE_PARAMS, sentiment=None):
+  # 지표 값으로 매수(+)/매도(-) 점수 계산, 값이 없는(NaN) 지표는 0점
+  # ind의 값은 스칼라 또는 numpy 배열 (백테스트/파라미터 탐색에서 봉 전체를 한 번에 계산)
+  def col(name):
+    value = ind.get(name)
+    return np.asarray(np.nan if value is None else value, dtype=float)
+
+  rsi, macd_hist, pct_b = col("rsi_14"), col("macd_hist"), col("bb_pct_b")
+  sma_fast, sma_slow = col("sma_20"), col("sma_50")
+  score = np.where(rsi <= params["rsi_oversold"], 1.0, np.where(rsi >= params["rsi_overbought"], -1.0, 0.0))
+  score = score + np.nan_to_num(np.sign(macd_hist)) * params["macd_weight"]
+  score = score + np.where(pct_b <= 0, 1.0, np.where(pct_b >= 1, -1.0, 0.0))
+  trend = np.where(sma_fast > sma_slow, 1.0, np.where(sma_fast < sma_slow, -1.0, 0.0))
+  score = score + trend * params["trend_weight"]
+  if sentiment is not None:
+    threshold = params["sentiment_threshold"]
+    score = score + np.where(sentiment >= threshold, 1.0, np.where(sentiment <= -threshold, -1.0, 0.0)) \
+        * params["sentiment_weight"]
+  return score
+
+
+def max_rule_score(params=RULE_PARAMS, with_sentiment=False):
+  return 2.0 + params["macd_weight"] + params["trend_weight"] + (params["sentiment_weight"] if with_sentiment else 0.0)
+
+
+def rule_signals(ind, params=RULE_PARAMS, sentiment=None):
+  # 점수 -> (decision 배열, percentage 배열, confidence 배열)
+  score = rule_score(ind, params, sentiment)
+  confidence = np.clip(np.abs(score) / max_rule_score(params, sentiment is not None), 0.0, 1.0)
+  decision = np.select([score >= params["buy_threshold"], score <= -params["sell_threshold"]],
+                       ["buy", "sell"], default="hold")
+  percentage = np.where(decision == "hold", 0.0, np.clip(np.round(confidence * 100), 1, 100))
+  return decision, percentage, confidence
+
+
+class RuleStrategy(Strategy):
+  # 지표 기반 결정적 규칙 (외부 호출 없음, 수십 마이크로초)
+  name = "rules"
+
+  def __init__(self, params=None):
+    super().__init__()
+    self.params = {**RULE_PARAMS, **(params or {})}
+
+  def _decide(self, snapshot):
+    ind = (snapshot.get("indicators") or {}).get(self.params["timeframe"]) or {}
+    news = snapshot.get("news") or {}
+    sentiment = news.get("sentiment") if isinstance(news, dict) else None
+    decision, percentage, confidence = rule_signals(ind, self.params, sentiment)
+    decision, percentage, confidence = str(decision), float(percentage), float(confidence)
+    reason = (f"rules: RSI {ind.get('rsi_14')}, MACD hist {ind.get('macd_hist')}, %B {ind.get('bb_pct_b')}, "
+              f"SMA20/50 {ind.get('sma_20')}/{ind.get('sma_50')}, news {sentiment}")
+    return make_decision(decision, percentage, reason, self.name, confidence)
+
+
+# ---- LLM ----
+
+class LLMStrategy(Strategy):
+  # OpenAI chat completion 판단 (JSON 응답, 스트리밍으로 받으며 필드마다 검사)
+  # prompt_fn(market) -> 시스템 프롬프트, payload_fn(snapshot) -> 사용자 메시지 (dict면 JSON으로 직렬화)
+  # cache: llm_cache.DecisionCache (fingerprint_fn(snapshot)이 있으면 근사 중복도 확인)
+  # deadline(초) 안에 유효한 판단이 오지 않거나 API 오류면 fallback_model(있으면, fallback_deadline 안에) -> fallback_decision
+  name = "llm"
+
+  def __init__(self, prompt_fn, payload_fn, model="gpt-4o", client=None, cache=None, fingerprint_fn=None,
+               limiter=None, deadline=60.0, fallback_model=None, fallback_deadline=10.0, fallback_decision="hold",
+               require_percentage=True):
+    super().__init__()
+    check_field("decision", fallback_decision)
+    self.prompt_fn = prompt_fn
+    self.payload_fn = payload_fn
+    self.model = model
+    self.client = client
+    self.cache = cache
+    self.fingerprint_fn = fingerprint_fn
+    self.limiter = limiter
+    self.deadline = deadline
+    self.fallback_model = fallback_model
+    self.fallback_deadline = fallback_deadline
+    self.fallback_decision = fallback_decision
+    self.require_percentage = require_percentage
+    self.stats.update({"llm_calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0, "ttft_ms": 0.0,
+                       "deadline_misses": 0, "invalid_responses": 0, "api_errors": 0, "fallbacks": 0})
+
+  def get_client(self):
+    if self.client is None:
+      from openai import OpenAI
+      self.client = OpenAI()
+    return self.client
+
+  def _decide(self, snapshot):
+    system_prompt = self.prompt_fn(snapshot["market"])
+    payload = self.payload_fn(snapshot)
+
+    # 같은 입력으로 이미 받은 판단이 있으면 재사용
+    cache_key = fingerprint = None
+    if self.cache is not None:
+      cache_key = make_key(self.model, system_prompt, payload)
+      fingerprint = self.fingerprint_fn(snapshot) if self.fingerprint_fn else None
+      cached = self.cache.get(cache_key)
+      if cached is None and fingerprint is not None:
+        cached = self.cache.get_near_duplicate(self.model, system_prompt, fingerprint)
+      if cached is not None:
+        print("[LLM CACHE] 캐시된 판단 재사용")
+        self.stats["cache_hits"] += 1
+        return make_decision(cached["decision"], cached.get("percentage", 0), cached["reason"], "llm-cache")
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": payload if isinstance(payload, str) else json.dumps(payload)},
+    ]
+    try:
+      call = self._call(self.model, messages, self.deadline)
+    except (DeadlineExceeded, DecisionError, APIError) as e:
+      return self._fallback(messages, e)
+    if self.cache is not None:
+      self.cache.put(cache_key, self.model, system_prompt, call["result"], fingerprint)
+    return self._decision(call, self.name)
+
+  def _call(self, model, messages, deadline, **attrs):
+    # 스트리밍 호출 한 번 (span에 첫 토큰 시간/토큰/비용 기록)
+    with tracing.span("llm", model=model, deadline_s=deadline, **attrs) as span:
+      if self.limiter is not None:
+        span.set(rate_wait_ms=self.limiter.acquire() * 1000)
+      try:
+        call = stream_decision(self.get_client(), model, messages, deadline, self.require_percentage)
+      except DeadlineExceeded:
+        self.stats["deadline_misses"] += 1
+        raise
+      except DecisionError:
+        self.stats["invalid_responses"] += 1
+        raise
+      except APIError:
+        # 호출 제한(429)/연결 오류/타임아웃/5xx
+        self.stats["api_errors"] += 1
+        raise
+      call["cost_usd"] = estimate_cost(model, call["prompt_tokens"], call["completion_tokens"])
+      span.set(http_status=200, ttft_ms=call["ttft_ms"], prompt_tokens=call["prompt_tokens"],
+               completion_tokens=call["completion_tokens"], cost_usd=call["cost_usd"])
+    self.stats["llm_calls"] += 1
+    self.stats["prompt_tokens"] += call["prompt_tokens"]
+    self.stats["completion_tokens"] += call["completion_tokens"]
+    self.stats["ttft_ms"] += call["ttft_ms"] or 0.0
+    return call
+
+  def _decision(self, call, engine):
+    result = call["result"]
+    return {**make_decision(result["decision"], result["percentage"], result["reason"], engine,
+                            cost_usd=call["cost_usd"]),
+            "ttft_ms": call["ttft_ms"]}
+
+  def _fallback(self, messages, error):
+    # 기한 초과/잘못된 응답/API 오류: 보조 모델 -> 안전 판단 순서로 대체 (대체 판단은 캐시하지 않음)
+    self.stats["fallbacks"] += 1
+    print(f"[LLM FALLBACK] {type(error).__name__}: {error}")
+    reason = f"{self.model} 판단 실패 ({type(error).__name__}: {error})"
+    if self.fallback_model:
+      try:
+        call = self._call(self.fallback_model, messages, self.fallback_deadline, fallback=True)
+        result = self._decision(call, f"{self.name}:{self.fallback_model}")
+        result["reason"] = f"[{reason}] {result['reason']}"
+        return result
+      except (DeadlineExceeded, DecisionError, APIError) as e:
+        print(f"[LLM FALLBACK] {self.fallback_model} {type(e).__name__}: {e}")
+        reason += f", {self.fallback_model} 판단 실패 ({type(e).__name__}: {e})"
+    return make_decision(self.fallback_decision, 0, f"{reason} -> 안전 판단 {self.fallback_decision}",
+                         f"{self.name}-fallback")
+
+
+# 차트(일봉 JSON)만 보고 판단하는 단순 프롬프트 (mvp 스크립트용)
+CHART_ONLY_PROMPT = ("You are an expert in Bitcoin investing. Tell me whether to buy, sell, or hold at the moment "
+                     "based on the chart data provided. response in json format.\n\nResponse Example:\n"
+                     "{\"decision\": \"buy\", \"reason\": \"some technical reason\"}\n"
+                     "{\"decision\": \"sell\", \"reason\": \"some technical reason\"}\n"
+                     "{\"decision\": \"hold\", \"reason\": \"some technical reason\"}")
+
+
+def chart_only_strategy(model="gpt-4o", client=None):
+  # snapshot: {"market", "chart": OHLCV DataFrame}
+  return LLMStrategy(lambda market: CHART_ONLY_PROMPT, lambda snapshot: snapshot["chart"].to_json(), model, client,
+                     require_percentage=False)
+
+
+# ---- 게이트 ----
+
+class GatedStrategy(Strategy):
+  # 규칙이 확실한 경우(매수/매도이고 confidence >= min_confidence)는 바로 결정, 애매하면 LLM에 위임
+  name = "gated"
+
+  def __init__(self, rules, llm, min_confidence=GATE_MIN_CONFIDENCE):
+    super().__init__()
+    self.rules = rules
+    self.llm = llm
+    self.min_confidence = min_confidence
+    self.stats.update({"fast_path": 0, "llm_path": 0})
+
+  def _decide(self, snapshot):
+    ruled = self.rules.decide(snapshot)
+    if ruled["decision"] != "hold" and ruled["confidence"] >= self.min_confidence:
+      self.stats["fast_path"] += 1
+      return {**ruled, "engine": f"{self.name}:rules"}
+    self.stats["llm_path"] += 1
+    result = self.llm.decide(snapshot)
+    # LLM이 규칙과 반대로 판단했는지 기록 (사후 분석용)
+    agrees = ruled["decision"] in ("hold", result["decision"])
+    return {**result, "engine": f"{self.name}:{result['engine']}", "rule_decision": ruled["decision"],
+            "rule_agrees": agrees}
+
+
+def create_strategy(kind, llm=None, rule_params=None, min_confidence=GATE_MIN_CONFIDENCE):
+  # kind: llm / rules / gated
+  if kind == "rules":
+    return RuleStrategy(rule_params)
+  if llm is None:
+    raise ValueError(f"'{kind}' 판단 엔진에는 LLM 설정이 필요합니다")
+  if kind == "llm":
+    return llm
+  if kind == "gated":
+    return GatedStrategy(RuleStrategy(rule_params), llm, min_confidence)
+  raise ValueError(f"알 수 없는 판단 엔진: {kind}")
+
+
+# ---- 벤치마크 ----
+
+def benchmark(strategy, snapshots):
+  # 판단 하나당 지연시간(ms)과 비용(USD), 판단 분포
+  latencies = []
+  counts = {"buy": 0, "sell": 0, "hold": 0}
+  cost = 0.0
+  for snapshot in snapshots:
+    result = strategy.decide(snapshot)
+    latencies.append(result["latency_ms"])
+    counts[result["decision"]] = counts.get(result["decision"], 0) + 1
+    cost += result.get("cost_usd") or 0.0
+  latencies = np.asarray(latencies)
+  n = max(len(latencies), 1)
+  return {
+      "engine": strategy.name,
+      "decisions": len(latencies),
+      "mean_ms": float(latencies.mean()) if len(latencies) else 0.0,
+      "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+      "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+      "max_ms": float(latencies.max()) if len(latencies) else 0.0,
+      "cost_per_decision_usd": cost / n,
+      **{f"{key}_pct": value / n * 100 for key, value in counts.items()},
+  }
+
+
+def snapshots_from_candles(candles, market="KRW-BTC", timeframe="short_term"):
+  # 저장된 캔들 위에서 지표만 채운 스냅샷 (봉마다 하나, 벤치마크용)
+  from indicators import compute_indicators, summarize
+  ind = compute_indicators(candles)
+  snapshots = []
+  for (_, row), close in zip(ind.iterrows(), candles["close"]):
+    snapshots.append({
+        "market": market,
+        "current_price": float(close),
+        "indicators": {timeframe: summarize(row, close=float(close))},
+        "news": None,
+    })
+  return snapshots
+
+
+class ReplayLLM(Strategy):
+  # 벤치마크용 LLM 대역: 지정한 지연시간/토큰 수로 비용과 지연만 재현 (API 호출/대기 없음)
+  name = "llm-replay"
+
+  def __init__(self, latency_s=2.5, prompt_tokens=6000, completion_tokens=80, model="gpt-4o"):
+    super().__init__()
+    self.latency_s = latency_s
+    self.cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+  def _decide(self, snapshot):
+    return {**make_decision("hold", 0, "replay", self.name, cost_usd=self.cost),
+            "external_ms": self.latency_s * 1000}
+
+
+if __name__ == "__main__":
+  from backtest import load_history
+
+  parser = argparse.ArgumentParser(description="판단 엔진 지연시간/비용 벤치마크 (저장된 캔들 기준)")
+  parser.add_argument("--market", default="KRW-BTC")
+  parser.add_argument("--interval", default="minute60")
+  parser.add_argument("--days", type=int, default=90)
+  parser.add_argument("--no-sync", action="store_true", help="거래소 호출 없이 로컬 데이터만 사용")
+  parser.add_argument("--llm-latency", type=float, default=2.5, help="LLM 호출 한 번의 지연시간(초, 재현용)")
+  parser.add_argument("--llm-prompt-tokens", type=int, default=6000)
+  parser.add_argument("--min-confidence", type=float, default=GATE_MIN_CONFIDENCE)
+  args = parser.parse_args()
+
+  candles = load_history(args.market, args.interval, args.days, sync=not args.no_sync)
+  snapshots = snapshots_from_candles(candles, args.market)
+  print(f"{len(snapshots)}개 스냅샷 ({args.market} {args.interval})")
+
+  # LLM 지연은 실제로 기다리지 않고 값만 더함 (게이트가 LLM으로 넘긴 비율이 비용/지연을 결정)
+  replay = ReplayLLM(args.llm_latency, args.llm_prompt_tokens)
+  engines = [RuleStrategy(), replay, GatedStrategy(RuleStrategy(), replay, args.min_confidence)]
+  for engine in engines:
+    result = benchmark(engine, snapshots)
+    print(f"[{result['engine']}] 평균 {result['mean_ms']:.3f} ms, p50 {result['p50_ms']:.3f} ms, "
+          f"p95 {result['p95_ms']:.3f} ms, 판단당 ${result['cost_per_decision_usd']:.5f}, "
+          f"buy/sell/hold {result['buy_pct']:.0f}/{result['sell_pct']:.0f}/{result['hold_pct']:.0f}%")
+  gated = engines[2]
+  print(f"[gated] 규칙으로 결정 {gated.stats['fast_path']}, LLM 위임 {gated.stats['llm_path']}")
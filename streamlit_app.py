@@ -1,9 +1,16 @@
+import json
 import streamlit as st
-import sqlite3
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
+from storage import get_database
+from trade_history import TradeHistory
+from chart_data import decision_markers, downsample, range_step, scatter_class
+from indicators import IndicatorCache, summarize
+from news import sentiment_series
+from sentiment import ALIASES
+from tracing import stage_summary
 
 # 페이지 설정
 st.set_page_config(
@@ -15,32 +22,110 @@ st.set_page_config(
 # 데이터베이스 연결 및 데이터 로드
 
 
-def load_trade_data():
-  conn = sqlite3.connect('bitcoin_trading.db')
-  query = "SELECT * FROM trades ORDER BY timestamp DESC"
-  df = pd.read_sql_query(query, conn)
-  conn.close()
+@st.cache_data(ttl=60)
+def load_markets():
+  # (market, ts) 인덱스만 읽어 마켓 목록 조회
+  markets = [row[0] for row in get_database().read("SELECT DISTINCT market FROM decisions ORDER BY market")]
+  return markets or ['KRW-BTC']
 
-  # 타임스탬프 처리
-  df['timestamp'] = pd.to_datetime(df['timestamp'])
 
-  # 포트폴리오 가치 계산
-  df['portfolio_value'] = df['krw_balance'] + (df['btc_balance'] * df['btc_price'])
+@st.cache_resource
+def get_trade_history(market):
+  # 세션/재실행 간에 공유되는 거래 내역 (새 행만 추가로 읽음)
+  return TradeHistory(market=market)
 
-  # 수익률 계산 (첫 거래 기준)
-  if len(df) > 0:
-    first_trade = df.iloc[-1]
-    df['profit_loss'] = df['portfolio_value'] - first_trade['portfolio_value']
-    df['profit_loss_pct'] = (df['profit_loss'] / first_trade['portfolio_value']) * 100
 
-  return df
+@st.cache_resource
+def get_indicator_cache():
+  # 재실행마다 저장소/지표 캐시를 새로 만들지 않도록 세션 간 공유
+  return IndicatorCache()
+
+
+@st.cache_data(ttl=60)
+def load_news_sentiment(market, days=None):
+  # 수집할 때 매겨둔 점수를 시간별로 모음 (기사 원문은 읽지 않음)
+  currency = market.split("-")[1].lower()
+  query = next((name for name, aliases in ALIASES.items() if currency in aliases), currency)
+  since = (datetime.now() - timedelta(days=days)).timestamp() if days else 0
+  series = pd.DataFrame(sentiment_series(get_database(), query, since),
+                        columns=['ts', 'sentiment', 'articles', 'positive', 'negative'])
+  series['timestamp'] = pd.to_datetime(series['ts'], unit='s', utc=True).dt.tz_convert(None)
+  return series
+
+
+@st.cache_data(ttl=60)
+def load_stage_summary(market, days=None):
+  since = (datetime.now() - timedelta(days=days)).timestamp() if days else 0
+  return pd.DataFrame(stage_summary(get_database(), since, market),
+                      columns=['stage', 'count', 'errors', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms', 'tokens',
+                               'cost_usd'])
+
+
+@st.cache_data(ttl=60)
+def load_run_latency(market, days=None):
+  # 실행(trace)별 전체 소요 시간과 LLM 토큰/비용
+  since = (datetime.now() - timedelta(days=days)).timestamp() if days else 0
+  rows = get_database().read('''SELECT root.ts, root.duration_ms, root.status,
+                                       COALESCE(SUM(llm.prompt_tokens + llm.completion_tokens), 0),
+                                       COALESCE(SUM(llm.cost_usd), 0)
+                                FROM spans root
+                                LEFT JOIN spans llm ON llm.trace_id = root.trace_id AND llm.name = 'llm'
+                                WHERE root.name = 'execute_trade' AND root.parent_id IS NULL
+                                  AND root.market = ? AND root.ts >= ?
+                                GROUP BY root.id ORDER BY root.ts''', (market, since))
+  runs = pd.DataFrame(rows, columns=['ts', 'duration_ms', 'status', 'tokens', 'cost_usd'])
+  runs['timestamp'] = pd.to_datetime(runs['ts'], unit='s', utc=True).dt.tz_convert(None)
+  return runs
+
+
+@st.cache_data(ttl=60)
+def load_sweep_runs():
+  rows = get_database().read('''SELECT id, ts, market, interval, bars, method, configs, workers, elapsed
+                                FROM sweep_runs ORDER BY id DESC''')
+  return pd.DataFrame(rows, columns=['id', 'ts', 'market', 'interval', 'bars', 'method', 'configs', 'workers',
+                                     'elapsed'])
+
+
+# 파라미터 탐색 순위 기준: 표시 이름 -> (컬럼, 내림차순 여부)
+SWEEP_METRICS = {"수익률": ("return_pct", True), "샤프 지수": ("sharpe", True), "최대 낙폭": ("max_drawdown_pct", True)}
+
+
+@st.cache_data(ttl=60)
+def load_sweep_results(run_id, metric, limit=50):
+  # (run_id, 지표) 인덱스 순서로 상위 설정만 읽고 params JSON을 컬럼으로 펼침
+  column, descending = SWEEP_METRICS[metric]
+  rows = get_database().read(f'''SELECT params, return_pct, max_drawdown_pct, sharpe, trades, rejected, fees_krw
+                                 FROM sweep_results WHERE run_id = ?
+                                 ORDER BY {column} {"DESC" if descending else "ASC"} LIMIT ?''',
+                             (run_id, limit))
+  results = pd.DataFrame(rows, columns=['params', 'return_pct', 'max_drawdown_pct', 'sharpe', 'trades', 'rejected',
+                                        'fees_krw'])
+  params = pd.DataFrame([json.loads(p) for p in results['params']])
+  return pd.concat([results.drop(columns='params'), params], axis=1)
+
+
+# 조회 기간 (일), None은 전체
+WINDOW_OPTIONS = {"7일": 7, "30일": 30, "90일": 90, "1년": 365, "전체": None}
+
+
+def load_trade_data(market='KRW-BTC', days=None):
+  # 처음에는 선택한 기간만 읽고, 이후 더 긴 기간을 고르면 모자란 구간만 추가로 읽음
+  history = get_trade_history(market)
+  since = datetime.now() - timedelta(days=days) if days else None
+  history.refresh(since)
+  return history.window(since)
 
 
 # 헤더
 st.title("Bitcoin AI Trading Dashboard")
 
+# 마켓 선택 (마켓별 거래 내역)
+markets = load_markets()
+selected_market = st.selectbox("마켓", markets) if len(markets) > 1 else markets[0]
+selected_window = st.selectbox("기간", list(WINDOW_OPTIONS), index=len(WINDOW_OPTIONS) - 1)
+
 # 데이터 로드
-df = load_trade_data()
+df = load_trade_data(selected_market, WINDOW_OPTIONS[selected_window])
 
 # 최신 거래 정보
 if not df.empty:
@@ -73,12 +158,87 @@ if not df.empty:
     **KRW 잔고:** ₩{latest['krw_balance']:,.0f}
     """)
 
-# 수익률 차트 (Plotly)
+# 기술 지표 (캔들 저장소 기준, 거래소 호출 없음)
+indicator_cache = get_indicator_cache()
+indicator_frames = {}
+for label, interval in [('1시간', 'minute60'), ('4시간', 'minute240'), ('일봉', 'day')]:
+  latest_indicators = indicator_cache.get(selected_market, interval, count=1)
+  if not latest_indicators.empty:
+    row = latest_indicators.iloc[-1]
+    indicator_frames[label] = summarize(row, close=float(row['close']))
+
+if indicator_frames:
+  st.subheader("기술 지표")
+  # 값이 없는 지표(워밍업 부족 등)는 빈 칸으로
+  indicator_table = pd.DataFrame(indicator_frames).T.reindex(
+      columns=['rsi_14', 'macd_hist', 'bb_pct_b', 'atr_pct', 'volume_z'])
+  st.dataframe(
+      indicator_table.rename(columns={
+          'rsi_14': 'RSI(14)',
+          'macd_hist': 'MACD 히스토그램',
+          'bb_pct_b': '볼린저 %B',
+          'atr_pct': 'ATR(%)',
+          'volume_z': '거래량 Z',
+      }),
+      use_container_width=True
+  )
+
+# 뉴스 감성 (시간별 관련도 가중 평균과 기사 수)
+news_df = load_news_sentiment(selected_market, WINDOW_OPTIONS[selected_window])
+if not news_df.empty:
+  st.subheader("뉴스 감성")
+  fig = go.Figure()
+  fig.add_trace(go.Bar(
+      x=news_df['timestamp'],
+      y=news_df['articles'],
+      name='기사 수',
+      marker=dict(color='lightgray'),
+      yaxis='y2'
+  ))
+  fig.add_trace(go.Scatter(
+      x=news_df['timestamp'],
+      y=news_df['sentiment'],
+      mode='lines+markers',
+      name='감성',
+      line=dict(color='purple', width=2)
+  ))
+  fig.add_hline(y=0, line=dict(color='gray', width=1, dash='dash'))
+  fig.update_layout(
+      xaxis_title='날짜',
+      yaxis=dict(title='감성 (-1 ~ 1)', range=[-1, 1]),
+      yaxis2=dict(title='기사 수', overlaying='y', side='right', showgrid=False),
+      hovermode='x unified',
+      legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+      height=350,
+      margin=dict(l=40, r=40, t=60, b=40)
+  )
+  st.plotly_chart(fig, use_container_width=True)
+
+# 차트 구간 (좁히면 해당 구간을 다시 읽어 더 촘촘한 점으로 그림)
+# 슬라이더는 DB의 첫 거래부터 시작하므로 조회 기간보다 앞을 고르면 그 구간을 DB에서 읽어 옴
+chart_df = df.iloc[::-1]
 if not df.empty and len(df) > 1:
+  range_start = df['timestamp'].iloc[-1].to_pydatetime()
+  range_end = df['timestamp'].iloc[0].to_pydatetime()
+  first_trade_time = get_trade_history(selected_market).first_timestamp() or range_start
+  chart_range = st.slider(
+      "차트 구간",
+      min_value=min(first_trade_time, range_start),
+      max_value=range_end,
+      value=(range_start, range_end),
+      step=range_step(min(first_trade_time, range_start), range_end),
+      format="YYYY-MM-DD HH:mm"
+  )
+  if chart_range != (range_start, range_end):
+    chart_df = get_trade_history(selected_market).window(*chart_range).iloc[::-1]
+
+# 수익률 차트 (Plotly)
+if len(chart_df) > 1:
   st.subheader("수익률 변화")
 
-  # 시간순으로 정렬
-  df_sorted = df.sort_values('timestamp')
+  # 시간순 데이터를 화면에 필요한 점 개수로 줄임
+  line_df = downsample(chart_df, 'timestamp', 'profit_loss_pct', method='lttb')
+  Scatter = scatter_class(len(chart_df))
 
   # 기본 수익률 라인 차트 생성
   fig = go.Figure()
@@ -86,11 +246,11 @@ if not df.empty and len(df) > 1:
   # 0% 라인 추가
   fig.add_hline(y=0, line=dict(color='gray', width=1, dash='dash'))
 
-  # 수익률 라인 추가
-  fig.add_trace(go.Scatter(
-      x=df_sorted['timestamp'],
-      y=df_sorted['profit_loss_pct'],
-      mode='lines+markers',
+  # 수익률 라인 추가 (점이 많으면 마커 없이 선만)
+  fig.add_trace(Scatter(
+      x=line_df['timestamp'],
+      y=line_df['profit_loss_pct'],
+      mode='lines+markers' if Scatter is go.Scatter else 'lines',
       name='수익률',
       line=dict(color='blue', width=2),
       marker=dict(size=8)
@@ -98,9 +258,9 @@ if not df.empty and len(df) > 1:
 
   # 매수/매도 포인트 추가
   for decision, color in [('buy', 'green'), ('sell', 'red'), ('hold', 'orange')]:
-    decision_df = df_sorted[df_sorted['decision'] == decision]
+    decision_df = decision_markers(chart_df, 'timestamp', decision)
     if not decision_df.empty:
-      fig.add_trace(go.Scatter(
+      fig.add_trace(scatter_class(len(decision_df))(
           x=decision_df['timestamp'],
           y=decision_df['profit_loss_pct'],
           mode='markers',
@@ -130,20 +290,21 @@ if not df.empty and len(df) > 1:
   st.plotly_chart(fig, use_container_width=True)
 
 # BTC 가격 차트 (Plotly)
-if not df.empty:
+if not chart_df.empty:
   st.subheader("BTC 가격 변화")
 
-  # 시간순으로 정렬
-  df_sorted = df.sort_values('timestamp')
+  # 가격은 구간별 최저/최고점을 남겨 급등락이 사라지지 않게 함
+  line_df = downsample(chart_df, 'timestamp', 'btc_price', method='minmax')
+  Scatter = scatter_class(len(chart_df))
 
   # 기본 BTC 가격 차트 생성
   fig = go.Figure()
 
   # BTC 가격 라인 추가
-  fig.add_trace(go.Scatter(
-      x=df_sorted['timestamp'],
-      y=df_sorted['btc_price'],
-      mode='lines+markers',
+  fig.add_trace(Scatter(
+      x=line_df['timestamp'],
+      y=line_df['btc_price'],
+      mode='lines+markers' if Scatter is go.Scatter else 'lines',
       name='BTC 가격',
       line=dict(color='orange', width=2),
       marker=dict(size=6)
@@ -151,9 +312,9 @@ if not df.empty:
 
   # 매수/매도 포인트 추가
   for decision, color, symbol in [('buy', 'green', 'triangle-up'), ('sell', 'red', 'triangle-down')]:
-    decision_df = df_sorted[df_sorted['decision'] == decision]
+    decision_df = decision_markers(chart_df, 'timestamp', decision)
     if not decision_df.empty:
-      fig.add_trace(go.Scatter(
+      fig.add_trace(scatter_class(len(decision_df))(
           x=decision_df['timestamp'],
           y=decision_df['btc_price'],
           mode='markers',
@@ -255,3 +416,84 @@ if not df.empty:
 
     st.markdown(f"### {selected_trade2['timestamp'].strftime('%Y-%m-%d %H:%M')} AI 판단 이유")
     st.write(selected_trade2['reason'])
+
+# 실행 단계별 지연시간 / 비용 (tracing.py가 저장한 span)
+runs_df = load_run_latency(selected_market, WINDOW_OPTIONS[selected_window])
+if not runs_df.empty:
+  st.subheader("실행 지연시간 / 비용")
+  col1, col2, col3, col4 = st.columns(4)
+  col1.metric("실행 수", f"{len(runs_df)}회")
+  col2.metric("p95 실행 시간", f"{runs_df['duration_ms'].quantile(0.95) / 1000:.2f}s")
+  col3.metric("실패", f"{(runs_df['status'] == 'error').sum()}회")
+  col4.metric("LLM 비용", f"${runs_df['cost_usd'].sum():.4f}")
+
+  fig = go.Figure()
+  fig.add_trace(go.Bar(
+      x=runs_df['timestamp'],
+      y=runs_df['cost_usd'],
+      name='LLM 비용($)',
+      marker=dict(color='lightgray'),
+      yaxis='y2'
+  ))
+  fig.add_trace(go.Scatter(
+      x=runs_df['timestamp'],
+      y=runs_df['duration_ms'] / 1000,
+      mode='lines+markers',
+      name='실행 시간(s)',
+      line=dict(color='teal', width=2),
+      marker=dict(color=runs_df['status'].map({'ok': 'teal', 'error': 'red'}), size=7)
+  ))
+  fig.update_layout(
+      xaxis_title='날짜',
+      yaxis=dict(title='실행 시간 (s)'),
+      yaxis2=dict(title='LLM 비용 ($)', overlaying='y', side='right', showgrid=False),
+      hovermode='x unified',
+      legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+      height=350,
+      margin=dict(l=40, r=40, t=60, b=40)
+  )
+  st.plotly_chart(fig, use_container_width=True)
+
+  # 단계별 분위수 (p95 큰 순: 가장 느린 단계가 맨 위)
+  st.dataframe(
+      load_stage_summary(selected_market, WINDOW_OPTIONS[selected_window]),
+      use_container_width=True,
+      hide_index=True,
+      column_config={
+          "stage": "단계",
+          "count": "호출 수",
+          "errors": "오류",
+          "p50_ms": st.column_config.NumberColumn("p50(ms)", format="%.1f"),
+          "p95_ms": st.column_config.NumberColumn("p95(ms)", format="%.1f"),
+          "max_ms": st.column_config.NumberColumn("최대(ms)", format="%.1f"),
+          "total_ms": st.column_config.NumberColumn("합계(ms)", format="%.0f"),
+          "tokens": "토큰",
+          "cost_usd": st.column_config.NumberColumn("비용($)", format="%.4f"),
+      }
+  )
+
+# 파라미터 탐색 결과 (python sweep.py 로 저장한 실행)
+sweep_runs = load_sweep_runs()
+if not sweep_runs.empty:
+  st.subheader("파라미터 탐색 순위")
+  col1, col2 = st.columns(2)
+  with col1:
+    run_id = st.selectbox(
+        "탐색 실행",
+        sweep_runs['id'].tolist(),
+        format_func=lambda i: (lambda r: f"#{i} {datetime.fromtimestamp(r['ts']).strftime('%Y-%m-%d %H:%M')} "
+                               f"{r['market']} {r['interval']} {r['method']} {r['configs']}개 설정 "
+                               f"({r['elapsed']:.0f}s)")(sweep_runs.set_index('id').loc[i])
+    )
+  with col2:
+    metric = st.selectbox("순위 기준", list(SWEEP_METRICS))
+  st.dataframe(
+      load_sweep_results(run_id, metric),
+      use_container_width=True,
+      column_config={
+          "return_pct": st.column_config.NumberColumn("수익률(%)", format="%.2f"),
+          "max_drawdown_pct": st.column_config.NumberColumn("최대 낙폭(%)", format="%.2f"),
+          "sharpe": st.column_config.NumberColumn("샤프", format="%.2f"),
+          "fees_krw": st.column_config.NumberColumn("수수료(KRW)", format="%.0f"),
+      }
+  )
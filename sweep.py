@@ -0,0 +1,215 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import load_history, simulate
+from candle_store import INTERVAL_SECONDS, KST_OFFSET
+from indicators import compute_indicators
+from sizing import MIN_ORDER_KRW, MAX_ORDER_KRW, FEE_FACTOR
+from storage import get_database
+from strategies import RULE_PARAMS, rule_signals
+
+# 주문 금액/수수료 계수/실행 시각과 규칙 엔진 임계값을 과거 캔들 위에서 탐색
+# 캔들과 지표는 부모 프로세스가 한 번 계산해 공유 메모리에 올리고, 워커는 복사 없이 같은 배열을 읽음
+# 결과는 sweep_runs / sweep_results 테이블에 저장 (대시보드에서 순위 확인)
+
+# 공유 메모리에 올리는 열 (open/close/시각 + 규칙 엔진이 쓰는 지표)
+COLUMNS = ["open", "close", "hour", "rsi_14", "macd_hist", "bb_pct_b", "sma_20", "sma_50"]
+
+# 실행 시각: 이름 -> 판단하는 시(KST), None이면 매 봉
+SCHEDULES = {
+    "every_bar": None,
+    "daily_0317": (3,),
+    "current": (3, 10, 18, 23),
+    "every_4h": (1, 5, 9, 13, 17, 21),
+}
+
+# 기본 탐색 공간: 격자는 모든 조합, 무작위는 각 목록에서 하나씩 뽑음
+DEFAULT_SPACE = {
+    "min_amount": [5100, MIN_ORDER_KRW, 20100],
+    "max_amount": [MAX_ORDER_KRW, 50000, 100000],
+    "fee_factor": [FEE_FACTOR, 0.9975],
+    "schedule": list(SCHEDULES),
+    "rsi_oversold": [25.0, 30.0, 35.0],
+    "rsi_overbought": [65.0, 70.0, 75.0],
+    "macd_weight": [0.5, 1.0],
+    "trend_weight": [0.5, 1.0, 1.5],
+    "buy_threshold": [1.0, 1.5, 2.0, 2.5],
+    "sell_threshold": [1.0, 1.5, 2.0, 2.5],
+}
+
+
+def _epoch(kst_time):
+  # 캔들 인덱스(KST, tz 없음) -> epoch 초
+  return int((kst_time - KST_OFFSET).value // 10**9)
+
+
+def grid_configs(space):
+  keys = list(space)
+  return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_configs(space, n, seed=0):
+  # 중복 없이 최대 n개 (격자 크기보다 크면 격자 전체)
+  total = math.prod(len(values) for values in space.values())
+  if n >= total:
+    return grid_configs(space)
+  rng = random.Random(seed)
+  seen, configs = set(), []
+  while len(configs) < n:
+    config = {key: rng.choice(values) for key, values in space.items()}
+    key = tuple(config.values())
+    if key not in seen:
+      seen.add(key)
+      configs.append(config)
+  return configs
+
+
+# ---- 공유 메모리 ----
+
+def share_arrays(candles):
+  # 열 하나가 행 하나인 (열 수 x 봉 수) float64 배열을 공유 메모리에 올림
+  ind = compute_indicators(candles)
+  data = {
+      "open": candles["open"].to_numpy(dtype=float),
+      "close": candles["close"].to_numpy(dtype=float),
+      "hour": candles.index.hour.to_numpy(dtype=float),
+      **{col: ind[col].to_numpy(dtype=float) for col in COLUMNS[3:]},
+  }
+  shape = (len(COLUMNS), len(candles))
+  shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+  view = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+  for i, col in enumerate(COLUMNS):
+    view[i] = data[col]
+  return shm, shape
+
+
+_worker = {}
+
+
+def _attach(name, shape):
+  # 워커 초기화: 공유 메모리 블록에 붙어서 열 이름 -> 배열(뷰) 준비
+  # 워커는 부모의 자원 추적기를 같이 쓰므로 블록 정리(unlink)는 부모가 한 번만 함
+  shm = shared_memory.SharedMemory(name=name)
+  _worker["shm"] = shm
+  _use(np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+
+
+def _use(view):
+  _worker["arrays"] = {col: view[i] for i, col in enumerate(COLUMNS)}
+
+
+def evaluate(config, arrays, bars_per_year, initial_krw=1_000_000):
+  # 설정 하나를 백테스트: 봉 마감 지표로 판단 -> 다음 봉 시가에 체결
+  rule_params = {**RULE_PARAMS, **{key: config[key] for key in RULE_PARAMS if key in config}}
+  decision, percentage, _ = rule_signals(arrays, rule_params)
+  decision = np.concatenate([["hold"], decision[:-1]])
+  percentage = np.concatenate([[0.0], percentage[:-1]])
+  hours = SCHEDULES[config.get("schedule", "every_bar")]
+  if hours is not None:
+    decision = np.where(np.isin(arrays["hour"], hours), decision, "hold")
+
+  summary, _, _, equity, drawdown = simulate(
+      arrays["open"], arrays["close"], decision, percentage, initial_krw,
+      min_amount=config.get("min_amount", MIN_ORDER_KRW),
+      max_amount=config.get("max_amount", MAX_ORDER_KRW),
+      fee_factor=config.get("fee_factor", FEE_FACTOR))
+  returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.array([0.0])
+  std = returns.std()
+  summary["sharpe"] = float(returns.mean() / std * math.sqrt(bars_per_year)) if std > 0 else 0.0
+  return summary
+
+
+def _evaluate_chunk(configs, bars_per_year):
+  return [evaluate(config, _worker["arrays"], bars_per_year) for config in configs]
+
+
+def run_sweep(candles, configs, workers=None, bars_per_year=8760, chunks_per_worker=4):
+  # configs를 워커 수 x chunks_per_worker 묶음으로 나눠 병렬 실행, 입력 순서대로 결과 반환
+  workers = workers or os.cpu_count() or 1
+  shm, shape = share_arrays(candles)
+  try:
+    if workers == 1:
+      _use(np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+      return _evaluate_chunk(configs, bars_per_year)
+    size = max(1, math.ceil(len(configs) / (workers * chunks_per_worker)))
+    chunks = [configs[i:i + size] for i in range(0, len(configs), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shm.name, shape)) as executor:
+      results = executor.map(_evaluate_chunk, chunks, [bars_per_year] * len(chunks))
+      return [summary for chunk in results for summary in chunk]
+  finally:
+    _worker.clear()
+    shm.close()
+    shm.unlink()
+
+
+def _save(conn, run, configs, results):
+  cursor = conn.execute('''INSERT INTO sweep_runs
+                             (ts, market, interval, start_ts, end_ts, bars, method, configs, workers, elapsed)
+                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                        (int(time.time()), run["market"], run["interval"], run["start_ts"], run["end_ts"],
+                         run["bars"], run["method"], len(configs), run["workers"], run["elapsed"]))
+  run_id = cursor.lastrowid
+  conn.executemany('''INSERT INTO sweep_results
+                        (run_id, params, return_pct, max_drawdown_pct, sharpe, trades, rejected, fees_krw,
+                         final_equity)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                   [(run_id, json.dumps(config, sort_keys=True), r["return_pct"], r["max_drawdown_pct"],
+                     r["sharpe"], r["trades"], r["rejected"], r["fees_krw"], r["final_equity"])
+                    for config, r in zip(configs, results)])
+  return run_id
+
+
+def save_sweep(run, configs, results, db=None):
+  # 실행 정보와 설정별 결과를 한 트랜잭션으로 저장, run id 반환
+  return (db or get_database()).write(_save, run, configs, results).result()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="주문 금액/실행 시각/규칙 임계값 파라미터 탐색 (저장된 캔들 기준)")
+  parser.add_argument("--market", default="KRW-BTC")
+  parser.add_argument("--interval", default="minute60")
+  parser.add_argument("--days", type=int, default=365)
+  parser.add_argument("--method", choices=["grid", "random"], default="random")
+  parser.add_argument("--configs", type=int, default=1000, help="무작위 탐색 설정 수")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--workers", type=int, default=None, help="기본: CPU 코어 수")
+  parser.add_argument("--top", type=int, default=10)
+  parser.add_argument("--no-sync", action="store_true", help="거래소 호출 없이 로컬 데이터만 사용")
+  args = parser.parse_args()
+
+  candles = load_history(args.market, args.interval, args.days, sync=not args.no_sync)
+  configs = grid_configs(DEFAULT_SPACE) if args.method == "grid" else \
+      random_configs(DEFAULT_SPACE, args.configs, args.seed)
+  workers = args.workers or os.cpu_count() or 1
+  print(f"{len(candles)}개 봉, {len(configs)}개 설정, 워커 {workers}개")
+
+  start = time.perf_counter()
+  results = run_sweep(candles, configs, workers, bars_per_year=365 * 86400 / INTERVAL_SECONDS[args.interval])
+  elapsed = time.perf_counter() - start
+  print(f"완료: {elapsed:.1f}s ({elapsed / max(len(configs), 1) * 1000:.1f} ms/설정)")
+
+  run_id = save_sweep({
+      "market": args.market,
+      "interval": args.interval,
+      "start_ts": _epoch(candles.index[0]) if len(candles) else None,
+      "end_ts": _epoch(candles.index[-1]) if len(candles) else None,
+      "bars": len(candles),
+      "method": args.method,
+      "workers": workers,
+      "elapsed": elapsed,
+  }, configs, results)
+  print(f"저장: sweep_runs.id = {run_id}")
+
+  ranked = sorted(zip(configs, results), key=lambda item: item[1]["return_pct"], reverse=True)
+  for config, result in ranked[:args.top]:
+    print(f"{result['return_pct']:+7.2f}%  MDD {result['max_drawdown_pct']:6.2f}%  sharpe {result['sharpe']:5.2f}  "
+          f"trades {result['trades']:4d}  {json.dumps(config)}")
@@ -0,0 +1,40 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def autotrade(tmp_path, monkeypatch):
+  # import 시 현재 디렉터리에 bitcoin_trading.db를 만들므로 임시 디렉터리에서 import
+  monkeypatch.chdir(tmp_path)
+  monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+  return importlib.import_module("autotrade")
+
+
+def test_cycle_runs_markets_in_parallel_and_isolates_failures(autotrade, monkeypatch, capsys):
+  markets = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL"]
+  finished, threads = [], set()
+
+  def execute_trade(run_transaction, market):
+    threads.add(threading.current_thread().name)
+    time.sleep(0.2)
+    if market == "KRW-XRP":
+      raise RuntimeError("orderbook unavailable")
+    finished.append(market)
+
+  monkeypatch.setattr(autotrade, "MARKETS", markets)
+  monkeypatch.setattr(autotrade, "execute_trade", execute_trade)
+  start = time.perf_counter()
+  autotrade.run_cycle(run_transaction=False)
+  assert time.perf_counter() - start < 0.6
+  assert len(threads) == len(markets)
+  # 한 마켓이 실패해도 나머지 마켓은 끝까지 실행
+  assert sorted(finished) == ["KRW-BTC", "KRW-ETH", "KRW-SOL"]
+  assert "KRW-XRP 트레이딩 작업 실패: orderbook unavailable" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("market, query", [("KRW-BTC", "bitcoin"), ("KRW-ETH", "ethereum"), ("KRW-ABC", "abc")])
+def test_each_market_gets_its_own_news_query(autotrade, market, query):
+  assert autotrade.news_query(market) == query
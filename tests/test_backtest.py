@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import batch_decisions, recorded_decisions, run_backtest, simulate, sma_cross_decisions
+from storage import get_database
+
+# 2025-01-01 09:30 KST에 내린 판단 -> 10:00 KST 봉에서 체결
+DECIDED_AT = 1735691400
+EXPECTED_BAR = pd.Timestamp("2025-01-01 10:00")
+
+
+@pytest.fixture(params=["UTC", "America/New_York", "Asia/Seoul"])
+def host_timezone(request, monkeypatch):
+  monkeypatch.setenv("TZ", request.param)
+  time.tzset()
+  yield request.param
+  monkeypatch.undo()
+  time.tzset()
+
+
+def hourly_candles():
+  index = pd.date_range("2025-01-01 00:00", periods=24, freq="h", name="candle_date_time_kst")
+  return pd.DataFrame({"open": 100.0, "close": 100.0}, index=index)
+
+
+def test_recorded_decisions_align_to_kst_bars(tmp_path, host_timezone):
+  db = get_database(str(tmp_path / f"recorded-{host_timezone.replace('/', '-')}.db"))
+  db.execute("INSERT INTO decisions (ts, market, decision, percentage) VALUES (?, 'KRW-BTC', 'buy', 30)",
+             (DECIDED_AT,)).result()
+  signals = recorded_decisions(hourly_candles(), db.path)
+  assert signals.dropna(subset=['decision']).index.tolist() == [EXPECTED_BAR]
+  assert signals.loc[EXPECTED_BAR, 'percentage'] == 30
+
+
+def test_batch_decisions_align_to_kst_bars(tmp_path, host_timezone):
+  db = get_database(str(tmp_path / f"batch-{host_timezone.replace('/', '-')}.db"))
+  db.execute('''INSERT INTO llm_batches (id, ts, kind, model, status, requests)
+                VALUES ('batch_1', ?, 'research', 'gpt-4o', 'completed', 1)''', (DECIDED_AT,)).result()
+  db.execute('''INSERT INTO batch_decisions (batch_id, custom_id, ts, market, status, decision, percentage)
+                VALUES ('batch_1', 'req-1', ?, 'KRW-BTC', 'ok', 'sell', 40)''', (DECIDED_AT,)).result()
+  signals = batch_decisions(hourly_candles(), ["batch_1"], db.path)
+  assert signals.dropna(subset=['decision']).index.tolist() == [EXPECTED_BAR]
+  assert signals.loc[EXPECTED_BAR, 'decision'] == 'sell'
+
+
+def test_simulate_matches_hand_computed_round_trip():
+  price = np.array([100.0, 100.0, 200.0, 200.0])
+  decision = np.array([None, "buy", "sell", None], dtype=object)
+  percentage = np.array([0.0, 0.0, 0.0, 0.0])
+  summary, krw, btc, equity, _ = simulate(price, price, decision, percentage, initial_krw=100_000,
+                                          min_amount=10_000, max_amount=20_000, fee_factor=1.0)
+  # 매수 10,000원 -> 100 BTC, 가격이 두 배가 된 뒤 10,000원어치(50 BTC) 매도
+  assert (summary["buys"], summary["sells"], summary["rejected"]) == (1, 1, 0)
+  assert btc.tolist() == [0.0, 100.0, 50.0, 50.0]
+  assert krw.tolist() == [100_000.0, 90_000.0, 100_000.0, 100_000.0]
+  assert summary["final_equity"] == 110_000.0 and summary["return_pct"] == pytest.approx(10.0)
+  assert summary["fees_krw"] == 0.0
+
+
+def test_orders_beyond_balance_are_rejected():
+  price = np.full(5, 100.0)
+  decision = np.array(["sell", "buy", "buy", "buy", "sell"], dtype=object)
+  summary, krw, btc, _, _ = simulate(price, price, decision, np.zeros(5), initial_krw=25_000,
+                                     min_amount=10_000, max_amount=10_000, fee_factor=0.99)
+  # 코인 없이 매도 -> 거절, 세 번째 매수는 잔고 부족으로 거절
+  assert summary["rejected"] == 2
+  assert (summary["buys"], summary["sells"]) == (2, 1)
+  assert krw.min() >= 0 and btc.min() >= 0
+  assert summary["fees_krw"] == pytest.approx((20_000 / 0.99 + 10_000 / 0.99) * 0.01)
+
+
+def test_sma_cross_uses_only_closed_bars():
+  index = pd.date_range("2025-01-01", periods=80, freq="h")
+  close = pd.Series(np.r_[np.linspace(100, 50, 40), np.linspace(50, 150, 40)], index=index)
+  candles = pd.DataFrame({"open": close, "close": close})
+  signals = sma_cross_decisions(candles, fast=3, slow=10)
+  changed = candles.copy()
+  changed.iloc[60:, :] = 1.0
+  # 60번째 봉 이후 가격을 바꿔도 그 봉까지의 판단은 같음
+  assert signals["decision"].iloc[:61].equals(sma_cross_decisions(changed, fast=3, slow=10)["decision"].iloc[:61])
+  assert "buy" in signals["decision"].tolist()
+  summary, curve = run_backtest(candles, signals)
+  assert summary["trades"] >= 1 and len(curve) == 80
@@ -0,0 +1,65 @@
+import pytest
+
+import bench
+from exchange_client import BithumbClient
+from fakes import fixtures
+from fakes.bithumb_http import FakeBithumbServer
+
+
+def result(median, minimum=None):
+  return {"median_ms": median, "min_ms": median if minimum is None else minimum, "p95_ms": median}
+
+
+def test_recorded_fixtures_have_synthetic_shape():
+  recorded = fixtures.load_all()
+  assert set(recorded) == set(fixtures.NAMES)
+  for name in fixtures.NAMES:
+    synthetic = fixtures.synthetic(name)
+    sample, expected = (recorded[name][0], synthetic[0]) if isinstance(synthetic, list) else (recorded[name],
+                                                                                            synthetic)
+    assert set(expected) <= set(sample), name
+
+
+@pytest.mark.parametrize("interval", list(fixtures.CANDLE_STEPS))
+def test_fake_server_replays_recorded_candles(interval):
+  recorded = fixtures.load(f"candles_{interval}")
+  server = FakeBithumbServer(candles={interval: recorded}).start()
+  try:
+    df = BithumbClient(base_url=server.url).get_ohlcv("KRW-BTC", interval=interval, count=50)
+  finally:
+    server.stop()
+  newest = max(recorded, key=lambda row: row["timestamp"])
+  assert len(df) == 50
+  assert df.index.is_monotonic_increasing
+  assert df["close"].iloc[-1] == newest["trade_price"]
+
+
+def test_measure_excludes_warmup_and_setup():
+  calls = []
+  summary = bench.measure(lambda: calls.append("run"), repeat=5, warmup=2, setup=lambda: calls.append("setup"))
+  assert summary["n"] == 5
+  assert calls == ["setup", "run"] * 7
+
+
+def test_regression_needs_median_and_min_above_tolerance():
+  baseline = {"results": {"slow": result(10), "noisy": result(10), "tiny": result(0.1), "fast": result(10)}}
+  rows, regressions = bench.compare({
+      "slow": result(14),            # +40%
+      "noisy": result(14, minimum=10),  # 몇 번만 느려진 측정
+      "tiny": result(0.5),           # 비율은 커도 차이가 NOISE_FLOOR_MS 이하
+      "fast": result(5),
+      "added": result(1),
+  }, baseline)
+  assert regressions == ["slow"]
+  assert {name: status for name, _, _, _, status in rows} == {
+      "slow": "REGRESSION", "noisy": "ok", "tiny": "ok", "fast": "faster", "added": "new"}
+
+
+def test_fixture_digest_changes_when_a_recording_changes(tmp_path, monkeypatch):
+  monkeypatch.setattr(fixtures, "FIXTURE_DIR", str(tmp_path))
+  assert fixtures.ensure() == fixtures.NAMES
+  assert fixtures.ensure() == []
+  before = bench.fixture_digest()
+  fixtures.save("ticker", fixtures.synthetic_ticker("KRW-ETH"))
+  after = bench.fixture_digest()
+  assert [name for name in fixtures.NAMES if before[name] != after[name]] == ["ticker"]
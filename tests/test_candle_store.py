@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from candle_store import CandleStore
+from exchange_client import BithumbClient
+from fakes.bithumb_http import FakeBithumbServer
+from indicators import IndicatorCache
+from migrations import SCHEMA_VERSION, migrate
+from storage import get_database
+
+
+@pytest.fixture(scope="module")
+def bithumb():
+  server = FakeBithumbServer().start()
+  yield BithumbClient(base_url=server.url)
+  server.stop()
+
+
+def test_sync_fetches_once_then_reads_locally(tmp_path, bithumb):
+  calls = []
+
+  def fetch(market, interval, count):
+    calls.append(count)
+    return bithumb.get_ohlcv(market, interval=interval, count=count)
+
+  store = CandleStore(str(tmp_path / "candles.db"), fetch_fn=fetch)
+  assert store.sync("KRW-BTC", "minute60", 50) == 50
+  # MIN_REFRESH_SECONDS 안에 다시 부르면 거래소를 호출하지 않음
+  assert store.sync("KRW-BTC", "minute60", 50) == 0
+  assert calls == [50]
+  window = store.get_window("KRW-BTC", "minute60", 50)
+  assert len(window) == 50
+  assert window.index.is_monotonic_increasing
+
+
+def test_indicators_written_through_shared_database(tmp_path, bithumb):
+  path = str(tmp_path / "indicators.db")
+  cache = IndicatorCache(path, store=CandleStore(path, fetch_fn=bithumb.get_ohlcv), history=60)
+  assert cache.update("KRW-BTC", "minute60") == 61
+  latest = cache.get("KRW-BTC", "minute60", count=1)
+  assert len(latest) == 1 and latest['sma_50'].notna().all()
+  # 캔들/지표 쓰기 모두 경로의 공유 Database 쓰기 스레드를 거침
+  assert cache.db is cache.store.db is get_database(path)
+  assert cache.db.stats["writes"] >= 2
+
+
+def test_migration_keeps_tables_created_by_older_code(tmp_path):
+  # v8 시절에는 CandleStore가 candles 테이블을 직접 만들었음
+  path = str(tmp_path / "old.db")
+  conn = sqlite3.connect(path)
+  conn.execute('''CREATE TABLE candles (market TEXT NOT NULL, interval TEXT NOT NULL, open_time INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL, value REAL,
+                    PRIMARY KEY (market, interval, open_time))''')
+  conn.execute("INSERT INTO candles VALUES ('KRW-BTC', 'day', 0, 1, 1, 1, 1, 1, 1)")
+  conn.execute("PRAGMA user_version = 8")
+  conn.commit()
+  assert migrate(conn) == list(range(9, SCHEMA_VERSION + 1))
+  assert conn.execute("SELECT COUNT(*) FROM candles").fetchone()[0] == 1
+  tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+  assert {"candle_sync", "indicators", "llm_cache"} <= tables
+  conn.close()
@@ -0,0 +1,65 @@
+import pytest
+from python_bithumb import BithumbAPIException
+
+from exchange_client import BithumbClient, HttpClient
+from fakes.bithumb_http import FakeBithumbServer
+
+
+@pytest.fixture
+def server():
+  fake = FakeBithumbServer().start()
+  yield fake
+  fake.stop()
+
+
+@pytest.fixture
+def sleeps():
+  return []
+
+
+@pytest.fixture
+def client(server, sleeps):
+  return BithumbClient("a" * 32, "s" * 32, base_url=server.url, http=HttpClient(sleep=sleeps.append))
+
+
+def test_public_get_is_retried_on_5xx(server, client, sleeps):
+  server.fail_first = 2
+  assert client.get_current_price("KRW-BTC") == 100_000_000.0
+  assert server.requests == [("GET", "/v1/ticker")] * 3
+  assert len(sleeps) == 2
+  assert client.http.stats == {"requests": 3, "retries": 2, "failures": 0}
+
+
+def test_retries_give_up_and_surface_the_error(server, client, sleeps):
+  server.fail_first = 10
+  with pytest.raises(BithumbAPIException):
+    client.get_current_price("KRW-BTC")
+  assert len(server.requests) == client.http.retries + 1
+  assert client.http.stats["failures"] == 1
+
+
+def test_order_is_not_retried_after_5xx(server, client, sleeps):
+  # 서버에 닿았을 수 있는 주문은 재시도하면 중복 주문이 될 수 있음
+  server.fail_first = 1
+  with pytest.raises(BithumbAPIException):
+    client.buy_market_order("KRW-BTC", 10_000)
+  assert server.requests == [("POST", "/v1/orders")]
+  assert sleeps == []
+  assert server.exchange.orders == {}
+
+
+def test_order_is_retried_after_429_honoring_retry_after(server, client, sleeps):
+  server.rate_limit_first, server.retry_after = 1, 2
+  order = client.buy_market_order("KRW-BTC", 10_000)
+  assert sleeps == [2.0]
+  assert list(server.exchange.orders) == [order["uuid"]]
+
+
+def test_requests_reuse_one_pooled_connection(server, client):
+  for _ in range(5):
+    client.get_current_price("KRW-BTC")
+  client.get_ohlcv("KRW-BTC", "minute60", count=3)
+  assert len(server.requests) == 6
+  assert server.connections == 1
+  snap = client.http.latency["GET ticker"].snapshot()
+  assert snap["count"] == 5 and snap["errors"] == 0
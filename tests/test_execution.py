@@ -0,0 +1,76 @@
+from execution import ExecutionEngine, format_report, record_execution
+from fakes.exchange import MockExchange
+from storage import get_database
+
+MARKET = "KRW-BTC"
+
+
+class LostStatusExchange(MockExchange):
+  # fail_from번째 주문부터 상태 조회가 실패 (주문 자체는 접수됨)
+
+  def __init__(self, fail_from=1, **kwargs):
+    super().__init__(**kwargs)
+    self.fail_from = fail_from
+
+  def get_order(self, uuid):
+    if list(self.orders).index(uuid) + 1 >= self.fail_from:
+      raise ConnectionError("read timed out")
+    return super().get_order(uuid)
+
+
+def engine_for(exchange, **kwargs):
+  orders = []
+  engine = ExecutionEngine(exchange, quote_fn=exchange.get_quote, sleep=lambda seconds: None,
+                           on_order=lambda market, report: orders.append(report), **kwargs)
+  return engine, orders
+
+
+def test_market_buy_reports_fills_and_slippage():
+  exchange = MockExchange()
+  engine, orders = engine_for(exchange)
+  report = engine.buy(MARKET, 100_000)
+  assert report["state"] == "done"
+  assert report["executed_volume"] > 0
+  assert report["avg_price"] >= exchange.get_quote(MARKET)["ask"]
+  assert report["slippage_bps"] >= 0
+  assert orders == [report]
+
+
+def test_lost_status_keeps_placed_order_as_unknown():
+  exchange = LostStatusExchange()
+  engine, orders = engine_for(exchange)
+  report = engine.buy(MARKET, 100_000)
+  assert report["state"] == "unknown"
+  assert report["uuid"] == next(iter(exchange.orders))
+  assert report["executed_volume"] == 0
+  # 잔고 캐시 무효화는 그대로 호출됨
+  assert orders == [report]
+  assert "체결 확인 실패" in format_report(report, "BTC")
+  assert "체결 없음" not in format_report(report, "BTC")
+
+
+def test_twap_stops_after_unknown_slice():
+  exchange = LostStatusExchange(fail_from=2)
+  engine, _ = engine_for(exchange, twap_threshold_krw=50_000, twap_slices=4, twap_interval=0)
+  report = engine.buy(MARKET, 200_000)
+  assert len(exchange.orders) == 2
+  assert [child["state"] for child in report["children"]] == ["done", "unknown"]
+  assert report["state"] == "unknown"
+  text = format_report(report, "BTC")
+  assert "분할 주문: 2회" in text and "확인하지 못함" in text
+
+
+def test_format_report_without_average_price():
+  report = {"state": "done", "uuid": "x", "executed_volume": 0.001, "funds": 0.0, "avg_price": None, "fee": 0.0,
+            "slippage_bps": None, "reference_price": None, "children": []}
+  assert "평균 체결가: -" in format_report(report, "BTC")
+
+
+def test_unknown_order_is_recorded(tmp_path):
+  db = get_database(str(tmp_path / "orders.db"))
+  engine, _ = engine_for(LostStatusExchange())
+  report = engine.buy(MARKET, 100_000)
+  decision_id = db.execute("INSERT INTO decisions (ts, market, decision, percentage) VALUES (0, ?, 'buy', 10)",
+                           (MARKET,)).result()
+  db.write(record_execution, decision_id, report).result()
+  assert db.read("SELECT exchange_order_id, state FROM orders") == [(report["uuid"], "unknown")]
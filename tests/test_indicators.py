@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes.fixtures import synthetic_candles
+from indicators import INDICATOR_COLUMNS, compute_indicators, price_digits, summarize
+
+
+def candle_frame(scale=1.0, count=300):
+  rows = synthetic_candles("minute60", count=count)[::-1]
+  df = pd.DataFrame({
+      "open": [row["opening_price"] for row in rows],
+      "high": [row["high_price"] for row in rows],
+      "low": [row["low_price"] for row in rows],
+      "close": [row["trade_price"] for row in rows],
+      "volume": [row["candle_acc_trade_volume"] for row in rows],
+  }, index=pd.to_datetime([row["candle_date_time_kst"] for row in rows]))
+  df[["open", "high", "low", "close"]] *= scale
+  return df
+
+
+def test_compute_indicators_matches_pandas_reference():
+  df = candle_frame()
+  out = compute_indicators(df)
+  assert list(out.columns) == INDICATOR_COLUMNS
+  assert out["sma_20"].iloc[-1] == pytest.approx(df["close"].tail(20).mean())
+  assert out["sma_50"].iloc[:49].isna().all()
+  assert out["rsi_14"].dropna().between(0, 100).all()
+  pct_b = out["bb_pct_b"].iloc[-1]
+  expected = (df["close"].iloc[-1] - out["bb_lower"].iloc[-1]) / (out["bb_upper"].iloc[-1] - out["bb_lower"].iloc[-1])
+  assert pct_b == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("price, digits", [(150_000_000, 0), (10_000, 0), (1_500, 1), (150, 2), (0.5, 5),
+                                           (0.0012, 7), (0, 0), (float("nan"), 0)])
+def test_price_digits_keep_five_significant_digits(price, digits):
+  assert price_digits(price) == digits
+
+
+def test_summarize_keeps_btc_output_integral():
+  df = candle_frame()
+  row = compute_indicators(df).iloc[-1]
+  summary = summarize(row, close=float(df["close"].iloc[-1]))
+  assert isinstance(summary["sma_20"], int) and isinstance(summary["atr_14"], int)
+  assert summary["rsi_14"] == round(float(row["rsi_14"]), 2)
+  assert summary["atr_pct"] > 0
+
+
+def test_summarize_sub_krw_coin_is_not_zeroed():
+  # BTC와 같은 모양의 차트를 1원 미만 가격으로 축소
+  df = candle_frame(scale=0.5 / 140_000_000)
+  row = compute_indicators(df).iloc[-1]
+  close = float(df["close"].iloc[-1])
+  summary = summarize(row, close=close)
+  step = 10 ** -price_digits(close)
+  for col in ("sma_20", "sma_50", "ema_12", "bb_upper", "bb_lower", "atr_14"):
+    assert summary[col] != 0
+    assert summary[col] == pytest.approx(float(row[col]), abs=step / 2)
+  assert summary["atr_pct"] > 0
+  # 비율 지표는 가격 크기와 무관
+  btc = summarize(compute_indicators(candle_frame()).iloc[-1], close=1.4e8)
+  assert summary["rsi_14"] == pytest.approx(btc["rsi_14"], abs=0.01)
+
+
+def test_summarize_skips_missing_values():
+  row = pd.Series({"rsi_14": 50.0, "sma_20": np.nan, "atr_14": None})
+  assert summarize(row, close=100.0) == {"rsi_14": 50.0}
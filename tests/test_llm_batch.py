@@ -0,0 +1,107 @@
+import pytest
+from openai import OpenAI
+
+import llm_batch
+from candle_store import CandleStore
+from exchange_client import BithumbClient
+from fakes.bithumb_http import FakeBithumbServer
+from fakes.fixtures import synthetic_completion
+from fakes.openai_server import FakeOpenAIServer
+from storage import Database
+from strategies import estimate_cost
+
+MODEL = "gpt-4o"
+
+
+@pytest.fixture
+def db(tmp_path):
+  database = Database(str(tmp_path / "batch.db"))
+  yield database
+  database.close()
+
+
+@pytest.fixture
+def openai_server():
+  servers = []
+
+  def make(**kwargs):
+    server = FakeOpenAIServer(synthetic_completion(MODEL), **kwargs).start()
+    servers.append(server)
+    return server, OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+
+  yield make
+  for server in servers:
+    server.stop()
+
+
+def items(count):
+  return [llm_batch.make_item("KRW-BTC", 1_700_000_000 + i * 3600, "system", {"i": i}, price=100.0 + i)
+          for i in range(count)]
+
+
+def test_submit_then_poll_stores_decisions(openai_server, db):
+  server, client = openai_server(batch_delay=0.2, batch_errors=1)
+  [batch_id] = llm_batch.submit(client, "advisory", MODEL, items(3), db=db)
+  assert llm_batch.pending_batches(db) == [(batch_id, "advisory")]
+  assert llm_batch.poll(client, batch_id, db) is False
+  assert llm_batch.wait(client, [batch_id], db=db, interval=0.05, timeout=5) == []
+  results = llm_batch.batch_results(batch_id, db)
+  assert [row["status"] for row in results] == ["error", "ok", "ok"]
+  assert results[0]["error"].startswith("HTTP 500")
+  assert [row["btc_price"] for row in results] == [100.0, 101.0, 102.0]
+  usage = synthetic_completion(MODEL)["usage"]
+  assert results[1]["cost_usd"] == pytest.approx(
+      estimate_cost(MODEL, usage["prompt_tokens"], usage["completion_tokens"]) * llm_batch.BATCH_DISCOUNT)
+  assert db.read("SELECT status, completed, failed FROM llm_batches") == [("completed", 2, 1)]
+  assert llm_batch.pending_batches(db) == []
+  # 끝난 배치는 다시 조회하지 않음
+  requests = len(server.requests)
+  assert llm_batch.poll(client, batch_id, db) is True
+  assert len(server.requests) == requests
+
+
+def test_poller_resumes_stored_batches(openai_server, db):
+  _, client = openai_server()
+  batch_ids = llm_batch.submit(client, "research", MODEL, items(2), db=db)
+  finished = []
+  # 제출한 프로세스가 아닌 새 poller도 DB에 남은 배치를 이어서 조회
+  poller = llm_batch.BatchPoller(client, on_finished=lambda *args: finished.append(args), db=db)
+  poller.run_once()  # validating -> in_progress
+  poller.run_once()
+  poller.run_once()
+  assert finished == [(batch_ids[0], "research")]
+  assert poller.stats["finished"] == 1
+
+
+def test_cancelled_batch_marks_requests_as_errors(openai_server, db):
+  _, client = openai_server(batch_delay=60)
+  [batch_id] = llm_batch.submit(client, "advisory", MODEL, items(2), db=db)
+  client.batches.cancel(batch_id)
+  assert llm_batch.poll(client, batch_id, db) is True
+  assert [(row["status"], row["error"]) for row in llm_batch.batch_results(batch_id, db)] == \
+      [("error", "batch cancelled")] * 2
+
+
+def test_invalid_decision_in_output_is_kept_as_invalid():
+  line = {"custom_id": "x-0", "response": {"status_code": 200, "body": synthetic_completion(
+      MODEL, {"decision": "moon", "percentage": 10, "reason": "r"})}}
+  custom_id, values = llm_batch.parse_result(line, MODEL)
+  assert custom_id == "x-0"
+  assert values["status"] == "invalid" and "decision" in values["error"]
+  assert values["cost_usd"] > 0
+
+
+def test_research_items_skip_warmup_and_use_candle_close_time(tmp_path):
+  server = FakeBithumbServer().start()
+  try:
+    store = CandleStore(str(tmp_path / "candles.db"), fetch_fn=BithumbClient(base_url=server.url).get_ohlcv)
+    store.sync("KRW-BTC", "minute60", 120)
+  finally:
+    server.stop()
+  candles = store.get_window("KRW-BTC", "minute60", 120)
+  research = llm_batch.research_items(candles, interval="minute60")
+  # sma_50이 계산되기 전 봉은 건너뜀
+  assert 0 < len(research) <= 120 - 49
+  last_open = int((candles.index[-1] - llm_batch.KST_OFFSET).value // 10**9)
+  assert research[-1]["ts"] == last_open + 3600
+  assert research[-1]["payload"]["recent_closes"][-1] == round(candles["close"].iloc[-1])
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+from openai import OpenAI
+
+import llm_cache
+from fakes.fixtures import synthetic_completion
+from fakes.openai_server import FakeOpenAIServer
+from llm_cache import DecisionCache, make_key, market_fingerprint
+from strategies import LLMStrategy
+
+MODEL = "gpt-4o"
+PROMPT = "system"
+DECISION = {"decision": "hold", "percentage": 0, "reason": "range bound"}
+
+
+class FakeTime:
+
+  def __init__(self):
+    self.now = 1_700_000_000.0
+
+  def time(self):
+    return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  fake = FakeTime()
+  monkeypatch.setattr(llm_cache, "time", fake)
+  return fake
+
+
+def cache_at(tmp_path, **kwargs):
+  return DecisionCache(str(tmp_path / "cache.db"), **kwargs)
+
+
+def test_key_ignores_payload_key_order():
+  assert make_key(MODEL, PROMPT, {"a": 1, "b": [1, 2]}) == make_key(MODEL, PROMPT, {"b": [1, 2], "a": 1})
+  assert make_key(MODEL, PROMPT, {"a": 1}) != make_key("gpt-4o-mini", PROMPT, {"a": 1})
+  assert make_key(MODEL, PROMPT, {"a": 1}) != make_key(MODEL, PROMPT, {"a": 1.5})
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+  cache = cache_at(tmp_path, ttl=60)
+  cache.put("k", MODEL, PROMPT, DECISION).result()
+  clock.now += 59
+  assert cache.get("k") == DECISION
+  clock.now += 2
+  assert cache.get("k") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+  cache = cache_at(tmp_path, max_entries=2)
+  cache.put("a", MODEL, PROMPT, DECISION).result()
+  clock.now += 1
+  cache.put("b", MODEL, PROMPT, DECISION).result()
+  clock.now += 1
+  assert cache.get("a") == DECISION  # a를 다시 사용 -> b가 가장 오래 안 쓴 항목
+  clock.now += 1
+  cache.put("c", MODEL, PROMPT, DECISION).result()
+  assert [key for key in "abc" if cache.get(key)] == ["a", "c"]
+
+
+def test_near_duplicate_market_reuses_last_decision(tmp_path, clock):
+  closes = pd.DataFrame({"close": [100.0, 101.0, 102.0]})
+  cache = cache_at(tmp_path, near_duplicate=True, price_tolerance=0.002, candle_tolerance=0.002)
+  cache.put("k1", MODEL, PROMPT, DECISION, market_fingerprint(102.0, closes)).result()
+  assert cache.get_near_duplicate(MODEL, PROMPT, market_fingerprint(102.1, closes)) == DECISION
+  assert cache.get_near_duplicate(MODEL, PROMPT, market_fingerprint(103.0, closes)) is None
+  moved = pd.DataFrame({"close": [100.0, 101.0, 105.0]})
+  assert cache.get_near_duplicate(MODEL, PROMPT, market_fingerprint(102.0, moved)) is None
+  assert cache.get_near_duplicate(MODEL, "other prompt", market_fingerprint(102.0, closes)) is None
+  assert cache_at(tmp_path).get_near_duplicate(MODEL, PROMPT, market_fingerprint(102.0, closes)) is None
+
+
+def test_strategy_serves_repeated_payload_from_cache(tmp_path):
+  server = FakeOpenAIServer(synthetic_completion(MODEL, DECISION)).start()
+  try:
+    cache = cache_at(tmp_path)
+    llm = LLMStrategy(lambda market: PROMPT, lambda snapshot: {"market": snapshot["market"], "rsi": 50},
+                      model=MODEL, client=OpenAI(base_url=server.base_url, api_key="test", max_retries=0),
+                      cache=cache)
+    first = llm.decide({"market": "KRW-BTC"})
+    cache.db.flush()
+    second = llm.decide({"market": "KRW-BTC"})
+  finally:
+    server.stop()
+  assert first["engine"] == "llm" and second["engine"] == "llm-cache"
+  assert (second["decision"], second["reason"]) == (DECISION["decision"], DECISION["reason"])
+  assert len(server.requests) == 1
+  assert (llm.stats["llm_calls"], llm.stats["cache_hits"]) == (1, 1)
@@ -0,0 +1,110 @@
+import json
+import time
+
+import pytest
+from openai import OpenAI
+
+from fakes.fixtures import synthetic_completion
+from fakes.openai_server import FakeOpenAIServer
+from llm_stream import DeadlineExceeded, DecisionError, JSONFieldParser, stream_decision
+from strategies import LLMStrategy
+
+DECISION = {"decision": "buy", "percentage": 12.5, "reason": "RSI 28, MACD turning up"}
+MESSAGES = [{"role": "user", "content": "{}"}]
+
+
+def feed_in_chunks(text, size):
+  parser = JSONFieldParser()
+  fields = []
+  for i in range(0, len(text), size):
+    fields += parser.feed(text[i:i + size])
+  return fields
+
+
+@pytest.mark.parametrize("size", range(1, 12))
+def test_parser_yields_each_field_once_for_any_chunking(size):
+  text = json.dumps({**DECISION, "extra": {"nested": [1, 2e3]}, "flag": True})
+  assert feed_in_chunks(text, size) == list(json.loads(text).items())
+
+
+def test_parser_waits_for_number_boundary():
+  parser = JSONFieldParser()
+  assert parser.feed('{"percentage": 12') == []
+  assert parser.feed('.') == []
+  assert parser.feed('5 ') == []
+  assert parser.feed(',') == [("percentage", 12.5)]
+  assert parser.feed('"n": 1') == []
+  assert parser.feed('e2}') == [("n", 100.0)]
+  assert parser.closed
+
+
+def test_parser_rejects_non_json_early():
+  with pytest.raises(DecisionError):
+    JSONFieldParser().feed("Sure! Here is")
+  with pytest.raises(DecisionError):
+    JSONFieldParser().feed('{"decision": buy')
+
+
+@pytest.fixture
+def openai_server():
+  servers = []
+
+  def make(decision=DECISION, **kwargs):
+    server = FakeOpenAIServer(synthetic_completion(decision=decision), **kwargs).start()
+    servers.append(server)
+    return server, OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+
+  yield make
+  for server in servers:
+    server.stop()
+
+
+def test_stream_decision_returns_validated_result(openai_server):
+  server, client = openai_server(chunk_size=3)
+  call = stream_decision(client, "gpt-4o", MESSAGES, deadline=5)
+  assert call["result"] == DECISION
+  assert call["ttft_ms"] is not None and call["ttft_ms"] <= call["total_ms"]
+  assert (call["prompt_tokens"], call["completion_tokens"]) == (6200, 48)
+  assert server.requests[0][2]["stream"] is True
+
+
+def test_stream_decision_stops_on_invalid_field(openai_server):
+  _, client = openai_server({"decision": "moon", "percentage": 10, "reason": "x" * 2000}, chunk_size=4,
+                            chunk_delay=0.01)
+  start = time.perf_counter()
+  with pytest.raises(DecisionError, match="decision"):
+    stream_decision(client, "gpt-4o", MESSAGES, deadline=10)
+  # reason 2000자를 다 받기 전에 중단
+  assert time.perf_counter() - start < 2
+
+
+def test_stream_decision_enforces_deadline(openai_server):
+  _, client = openai_server(chunk_size=2, chunk_delay=0.2)
+  start = time.perf_counter()
+  with pytest.raises(DeadlineExceeded):
+    stream_decision(client, "gpt-4o", MESSAGES, deadline=0.5)
+  assert time.perf_counter() - start < 1.0
+
+
+def strategy(client, **kwargs):
+  return LLMStrategy(lambda market: "system", lambda snapshot: {"market": snapshot["market"]}, client=client,
+                     **kwargs)
+
+
+def test_rate_limit_falls_back_to_secondary_model(openai_server):
+  server, client = openai_server(rate_limit_first=1)
+  llm = strategy(client, fallback_model="gpt-4o-mini")
+  result = llm.decide({"market": "KRW-BTC"})
+  assert result["engine"] == "llm:gpt-4o-mini"
+  assert result["decision"] == "buy"
+  assert "RateLimitError" in result["reason"]
+  assert llm.stats["api_errors"] == 1 and llm.stats["fallbacks"] == 1
+  assert [body["model"] for _, _, body in server.requests] == ["gpt-4o", "gpt-4o-mini"]
+
+
+def test_connection_error_falls_back_to_safe_decision():
+  client = OpenAI(base_url="http://127.0.0.1:9/v1", api_key="test", max_retries=0)
+  llm = strategy(client, fallback_model="gpt-4o-mini")
+  result = llm.decide({"market": "KRW-BTC"})
+  assert (result["decision"], result["percentage"], result["engine"]) == ("hold", 0, "llm-fallback")
+  assert llm.stats["api_errors"] == 2
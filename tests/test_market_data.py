@@ -0,0 +1,97 @@
+import time
+
+import pandas as pd
+import pytest
+
+import market_data
+import price_feed
+from fakes.exchange import MockExchange
+from market_data import collect_market_snapshot, missing_fields, run_parallel
+
+MARKET = "KRW-BTC"
+
+
+def slow(value, seconds):
+  time.sleep(seconds)
+  return value
+
+
+def fail():
+  raise ConnectionError("connection reset")
+
+
+def test_calls_run_concurrently():
+  start = time.perf_counter()
+  results, errors, latency = run_parallel({name: (slow, (name, 0.2), {}) for name in "abcde"})
+  assert time.perf_counter() - start < 0.5
+  assert results == {name: name for name in "abcde"} and errors == {}
+  assert all(0.2 <= seconds < 0.5 for seconds in latency.values())
+
+
+def test_timeouts_and_errors_are_reported_per_call():
+  start = time.perf_counter()
+  results, errors, latency = run_parallel({
+      "fast": (slow, (1, 0), {}),
+      "hung": (slow, (2, 2), {}),
+      "broken": (fail, (), {}),
+  }, timeouts={"hung": 0.2})
+  # 늦은 호출을 끝까지 기다리지 않음
+  assert time.perf_counter() - start < 1
+  assert results == {"fast": 1}
+  assert errors == {"hung": "timeout after 0.2s", "broken": "connection reset"}
+  assert set(latency) == {"fast", "hung", "broken"}
+
+
+@pytest.fixture
+def stand_ins(monkeypatch):
+  charts = []
+
+  def load_chart(market, interval, count):
+    charts.append(interval)
+    time.sleep(0.1)
+    return pd.DataFrame({"close": [1.0] * count}), {"rsi_14": 50.0}
+
+  monkeypatch.setattr(market_data, "load_chart", load_chart)
+  monkeypatch.setattr(price_feed, "get_price", lambda market, max_age=None: 100_000_000.0)
+  return charts
+
+
+class CountingExchange(MockExchange):
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self.balance_calls = 0
+
+  def get_balances(self):
+    self.balance_calls += 1
+    return super().get_balances()
+
+
+def test_snapshot_collects_everything_in_parallel(stand_ins):
+  exchange = CountingExchange(balances={"KRW": 500_000.0, "BTC": 0.01})
+  exchange.avg_buy_prices["BTC"] = 90_000_000.0
+  start = time.perf_counter()
+  snapshot = collect_market_snapshot(exchange, lambda: slow({"articles": 3}, 0.1), MARKET)
+  assert time.perf_counter() - start < 0.35
+  assert sorted(stand_ins) == ["day", "minute240", "minute60"]
+  # KRW/코인 잔고와 평균 매수가는 /v1/accounts 한 번으로
+  assert exchange.balance_calls == 1
+  assert (snapshot["krw_balance"], snapshot["coin_balance"], snapshot["avg_buy_price"]) == (500_000.0, 0.01,
+                                                                                            90_000_000.0)
+  assert len(snapshot["short_term_df"]) == 24 and len(snapshot["long_term_df"]) == 30
+  assert snapshot["indicators"]["mid_term"] == {"rsi_14": 50.0}
+  assert snapshot["news"] == {"articles": 3}
+  assert snapshot["errors"] == {} and missing_fields(snapshot) == []
+
+
+def test_snapshot_survives_slow_news_and_failed_balances(stand_ins):
+  class DownExchange:
+    def get_balances(self):
+      raise ConnectionError("accounts unavailable")
+
+  snapshot = collect_market_snapshot(DownExchange(), lambda: slow("late", 2), MARKET, timeouts={"news": 0.2})
+  assert snapshot["news"] is None
+  assert snapshot["errors"]["news"].startswith("timeout")
+  assert snapshot["errors"]["balances"] == "accounts unavailable"
+  assert snapshot["short_term_df"] is not None
+  assert missing_fields(snapshot) == ["krw_balance", "coin_balance"]
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS, SCHEMA_VERSION, migrate, schema_version
+
+
+def legacy_db(path):
+  # 마이그레이션 도입 전 autotrade.py가 만들던 trades 테이블 (market 컬럼 없음, 로컬 ISO 시각)
+  conn = sqlite3.connect(path)
+  conn.execute('''CREATE TABLE trades
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, decision TEXT, percentage INTEGER,
+                  reason TEXT, btc_balance REAL, krw_balance REAL, btc_price REAL)''')
+  conn.executemany(
+      "INSERT INTO trades (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_price) "
+      "VALUES (?, ?, ?, ?, ?, ?, ?)",
+      [("2024-05-01T09:00:00", "buy", 30, "oversold", 0.01, 700000, 90000000),
+       ("2024-05-01T13:00:00", "hold", 0, "wait", 0.01, 700000, 91000000),
+       ("2024-05-02T09:00:00", None, 10, "missing decision", 0.0, 1000000, 89000000)])
+  conn.commit()
+  return conn
+
+
+def test_versions_are_contiguous():
+  assert [version for version, _, _ in MIGRATIONS] == list(range(1, SCHEMA_VERSION + 1))
+
+
+def test_legacy_trades_are_moved_to_decisions(tmp_path):
+  conn = legacy_db(str(tmp_path / "legacy.db"))
+  assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+  assert schema_version(conn) == SCHEMA_VERSION
+  rows = conn.execute("SELECT market, decision, percentage FROM decisions ORDER BY id").fetchall()
+  assert rows == [("KRW-BTC", "buy", 30), ("KRW-BTC", "hold", 0), ("KRW-BTC", "hold", 10)]
+  # trades 뷰는 기존 조회 코드에 같은 로컬 시각 문자열을 돌려줌
+  timestamps = [row[0] for row in conn.execute("SELECT timestamp FROM trades ORDER BY id")]
+  assert timestamps == ["2024-05-01T09:00:00", "2024-05-01T13:00:00", "2024-05-02T09:00:00"]
+  ts = [row[0] for row in conn.execute("SELECT ts FROM decisions ORDER BY id")]
+  assert ts[1] - ts[0] == 4 * 3600
+
+
+def test_migrate_is_idempotent(tmp_path):
+  conn = sqlite3.connect(str(tmp_path / "fresh.db"))
+  assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+  assert migrate(conn) == []
+  assert schema_version(conn) == SCHEMA_VERSION
+
+
+def test_market_time_queries_use_index(tmp_path):
+  conn = sqlite3.connect(str(tmp_path / "plan.db"))
+  migrate(conn)
+  plan = " ".join(row[-1] for row in conn.execute(
+      "EXPLAIN QUERY PLAN SELECT * FROM decisions WHERE market = ? AND ts >= ? ORDER BY ts", ("KRW-BTC", 0)))
+  assert "idx_decisions_market_ts" in plan
+  assert "TEMP B-TREE" not in plan
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+  def broken(conn):
+    conn.execute("CREATE TABLE half_done (id INTEGER)")
+    raise sqlite3.OperationalError("boom")
+
+  conn = sqlite3.connect(str(tmp_path / "broken.db"))
+  monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:3] + [(4, "broken", broken)])
+  monkeypatch.setattr(migrations, "SCHEMA_VERSION", 4)
+  with pytest.raises(sqlite3.OperationalError):
+    migrate(conn)
+  assert schema_version(conn) == 0
+  tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+  assert "half_done" not in tables and "decisions" not in tables
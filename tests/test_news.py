@@ -0,0 +1,96 @@
+import pytest
+
+import news
+from fakes.fixtures import SYNTHETIC_END, synthetic_serpapi
+from fakes.serpapi_server import FakeSerpAPIServer
+from news import NewsCollector, fetch_serpapi
+from storage import Database
+
+
+@pytest.fixture
+def serpapi(monkeypatch):
+  server = FakeSerpAPIServer(synthetic_serpapi(count=30)).start()
+  monkeypatch.setattr(news, "SERPAPI_URL", server.url)
+  monkeypatch.setenv("SERPAPI_API_KEY", "test")
+  yield server
+  server.stop()
+
+
+@pytest.fixture
+def db(tmp_path):
+  database = Database(str(tmp_path / "news.db"))
+  yield database
+  database.close()
+
+
+class FakeClock:
+
+  def __init__(self, now=SYNTHETIC_END + 600):
+    self.now = now
+
+  def __call__(self):
+    return self.now
+
+
+def test_fetch_flattens_grouped_stories(serpapi):
+  articles = fetch_serpapi("bitcoin", when="7d")
+  # 기사 30개 + 10개마다 묶인 관련 기사 3개
+  assert len(articles) == 33
+  assert serpapi.queries == ["bitcoin when:7d"]
+  assert articles[0]["published_ts"] == SYNTHETIC_END
+  assert articles[0]["source"] == "Source 0"
+  assert all(article["published_ts"] for article in articles)
+
+
+def test_refresh_stores_scored_articles_once(serpapi, db):
+  collector = NewsCollector(["bitcoin"], db=db, clock=FakeClock())
+  assert collector.refresh("bitcoin") == 33
+  assert collector.refresh("bitcoin") == 0
+  assert db.read("SELECT COUNT(*) FROM news WHERE sentiment IS NOT NULL AND relevance IS NOT NULL") == [(33,)]
+  assert db.read("SELECT status, articles, inserted FROM news_fetches ORDER BY id") == [("ok", 33, 33),
+                                                                                           ("ok", 33, 0)]
+
+
+def test_titles_differing_only_in_punctuation_are_duplicates(db):
+  articles = [{"title": "Bitcoin Surges Past $100K!", "url": "https://a.example/1", "published_ts": SYNTHETIC_END},
+              {"title": "bitcoin surges past 100k", "url": "https://b.example/2", "published_ts": SYNTHETIC_END}]
+  collector = NewsCollector(["bitcoin"], fetch_fn=lambda query: [dict(a) for a in articles], db=db,
+                            clock=FakeClock())
+  assert collector.refresh("bitcoin") == 1
+  # 다른 검색어로 받은 같은 기사는 따로 저장
+  assert collector.refresh("btc") == 1
+
+
+def test_failed_fetch_counts_against_quota(db):
+  def down(query):
+    raise ConnectionError("serpapi down")
+
+  collector = NewsCollector(["bitcoin"], fetch_fn=down, db=db, monthly_quota=2, clock=FakeClock())
+  assert collector.refresh("bitcoin") is None
+  assert collector.refresh("bitcoin") is None
+  assert collector.quota_used() == 2
+  assert collector.refresh("bitcoin") is None
+  assert collector.stats["errors"] == 2 and collector.stats["skipped_quota"] == 1
+
+
+def test_interval_is_stretched_to_fit_quota(db):
+  collector = NewsCollector(["bitcoin", "ethereum"], db=db, interval=900, monthly_quota=1000)
+  assert collector.effective_interval() == news.QUOTA_WINDOW * 2 / 1000
+  assert NewsCollector(["bitcoin"], db=db, interval=900, monthly_quota=0).effective_interval() == 900
+
+
+def test_reads_are_cached_until_new_articles_arrive(serpapi, db):
+  clock = FakeClock()
+  collector = NewsCollector(["bitcoin"], db=db, clock=clock, cache_ttl=60)
+  assert collector.latest("bitcoin") == []
+  assert collector.latest("bitcoin") == []
+  assert collector.stats["cache_hits"] == 1
+  collector.refresh("bitcoin")
+  latest = collector.latest("bitcoin", n=3)
+  newest = synthetic_serpapi()["news_results"][0]
+  # 같은 시각에 나온 기사는 나중에 저장된 것부터
+  assert [item["title"] for item in latest[:2]] == [newest["stories"][0]["title"], newest["title"]]
+  summary = collector.sentiment("bitcoin")
+  assert 0 < summary["articles"] <= 33
+  assert -1 <= summary["sentiment"] <= 1
+  assert summary["window_hours"] == collector.sentiment_window / 3600
@@ -0,0 +1,78 @@
+import pytest
+
+from fakes.telegram_server import FakeTelegramServer
+from notifier import MAX_MESSAGE_LENGTH, TelegramNotifier
+
+
+@pytest.fixture
+def server():
+  fake = FakeTelegramServer(retry_after=0).start()
+  yield fake
+  fake.stop()
+
+
+def notifier_for(server, **kwargs):
+  return TelegramNotifier("123:fake", "1", base_url=server.base_url, min_interval=0, **kwargs)
+
+
+def test_messages_are_delivered_in_order(server):
+  notifier = notifier_for(server)
+  for i in range(3):
+    notifier.send(f"message {i}")
+  assert notifier.flush(10)
+  notifier.close()
+  assert [m["text"] for m in server.messages] == ["message 0", "message 1", "message 2"]
+  assert notifier.stats["sent"] == 3
+
+
+def test_group_is_sent_as_one_message(server):
+  notifier = notifier_for(server)
+  notifier.send("decision", group="run-1")
+  notifier.send("order", group="run-1")
+  notifier.release("run-1")
+  notifier.close()
+  assert [m["text"] for m in server.messages] == ["decision\norder"]
+
+
+def test_long_message_is_split(server):
+  notifier = notifier_for(server)
+  notifier.send("x" * (MAX_MESSAGE_LENGTH + 10))
+  notifier.close()
+  assert [len(m["text"]) for m in server.messages] == [MAX_MESSAGE_LENGTH, 10]
+
+
+def test_rate_limited_send_is_retried(server):
+  server.rate_limit_first = 1
+  notifier = notifier_for(server)
+  notifier.send("after 429")
+  notifier.close()
+  assert [m["text"] for m in server.messages] == ["after 429"]
+  assert notifier.stats["retries"] == 1
+
+
+def test_bot_init_failure_is_retried_without_losing_messages(server):
+  server.fail_init = 1
+  notifier = notifier_for(server)
+  notifier.send("queued while telegram is down")
+  assert notifier.flush(10)
+  assert notifier.stats["init_errors"] == 1
+  assert notifier._thread.is_alive()
+  notifier.close()
+  assert [m["text"] for m in server.messages] == ["queued while telegram is down"]
+
+
+def test_send_after_close_never_raises(server):
+  notifier = notifier_for(server)
+  notifier.send("first")
+  notifier.close()
+  notifier.send("after close")
+  assert server.messages[0]["text"] == "first"
+
+
+def test_close_right_after_send_still_delivers(server):
+  # close()가 워커 스레드의 봇 초기화보다 먼저 실행되는 경우
+  notifier = notifier_for(server)
+  notifier._closing.set()
+  notifier.send("last words")
+  notifier.close()
+  assert [m["text"] for m in server.messages] == ["last words"]
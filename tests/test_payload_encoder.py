@@ -0,0 +1,58 @@
+import json
+
+import pandas as pd
+import pytest
+
+from payload_encoder import FORMATS, encode_charts, encode_frame, token_report
+
+
+def frame(prices, volumes=None):
+  index = pd.date_range("2025-01-01 09:00", periods=len(prices), freq="h")
+  return pd.DataFrame({
+      "open": prices,
+      "high": [p * 1.01 for p in prices],
+      "low": [p * 0.99 for p in prices],
+      "close": prices,
+      "volume": volumes or [1.234567] * len(prices),
+  }, index=index)
+
+
+BTC = frame([150_000_000.4, 151_000_000.6, 152_500_000.2])
+SUB_KRW = frame([0.51234, 0.50871, 0.52019])
+
+
+def test_rows_keep_integers_for_btc():
+  encoded = encode_frame(BTC, "rows")
+  assert encoded["columns"] == ["time", "open", "high", "low", "close", "volume"]
+  assert encoded["rows"][0] == ["2025-01-01 09:00", 150000000, 151500000, 148500000, 150000000, 1.2346]
+  assert all(isinstance(value, int) for row in encoded["rows"] for value in row[1:5])
+
+
+def test_rows_keep_sub_krw_prices():
+  encoded = encode_frame(SUB_KRW, "rows")
+  assert [row[4] for row in encoded["rows"]] == [0.51234, 0.50871, 0.52019]
+  assert all(value != 0 for row in encoded["rows"] for value in row[1:5])
+
+
+def test_csv_keeps_sub_krw_prices():
+  lines = encode_frame(SUB_KRW, "csv").splitlines()
+  assert lines[0] == "time,open,high,low,close,volume"
+  assert lines[-1].split(",")[4] == "0.52019"
+  assert encode_frame(BTC, "csv").splitlines()[1].split(",")[1] == "150000000"
+
+
+def test_summary_uses_same_rounding():
+  summary = encode_frame(SUB_KRW, "summary")
+  assert summary["last_close"] == 0.52019
+  assert summary["low"] == pytest.approx(0.50871 * 0.99, abs=1e-5)
+  assert encode_frame(BTC, "summary")["last_close"] == 152500000
+
+
+def test_formats_are_json_serialisable_and_smaller_than_columns():
+  frames = {"short_term": BTC, "mid_term": SUB_KRW, "long_term": None}
+  for fmt in FORMATS:
+    json.dumps(encode_charts(frames, fmt))
+  report = token_report({"short_term": BTC})
+  assert report["rows"] < report["columns"]
+  with pytest.raises(ValueError):
+    encode_frame(BTC, "xml")
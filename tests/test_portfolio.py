@@ -0,0 +1,88 @@
+import threading
+import time
+
+from execution import ExecutionEngine
+from fakes.exchange import MockExchange
+from portfolio import PortfolioState
+
+
+class CountingExchange(MockExchange):
+
+  def __init__(self, delay=0.0, during_fetch=None, **kwargs):
+    super().__init__(**kwargs)
+    self.delay = delay
+    self.during_fetch = during_fetch
+    self.balance_calls = 0
+
+  def get_balances(self):
+    self.balance_calls += 1
+    balances = super().get_balances()
+    if self.during_fetch:
+      self.during_fetch()
+    time.sleep(self.delay)
+    return balances
+
+
+class FakeClock:
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+def test_balances_are_reused_within_ttl():
+  exchange, clock = CountingExchange(), FakeClock()
+  portfolio = PortfolioState(exchange, ttl=5, clock=clock)
+  assert portfolio.get_balance("KRW") == 1_000_000.0
+  clock.now = 4.9
+  assert portfolio.get_balance("BTC") == 0.0
+  assert exchange.balance_calls == 1
+  clock.now = 5.1
+  portfolio.get_balance("KRW")
+  assert exchange.balance_calls == 2
+  assert portfolio.stats == {"hits": 1, "fetches": 2, "invalidations": 0}
+
+
+def test_order_invalidates_cached_balances():
+  exchange = CountingExchange()
+  portfolio = PortfolioState(exchange, ttl=60)
+  engine = ExecutionEngine(exchange, quote_fn=exchange.get_quote, sleep=lambda seconds: None,
+                           on_order=portfolio.on_order)
+  assert portfolio.get_balance("BTC") == 0.0
+  report = engine.buy("KRW-BTC", 100_000)
+  # TTL이 남아 있어도 주문 직후 조회는 거래소에서 새로 받아옴
+  assert portfolio.get_balance("BTC") == report["executed_volume"] > 0
+  assert portfolio.get_balance("KRW") < 1_000_000.0
+  assert portfolio.get_avg_buy_price("BTC") > 0
+  assert exchange.balance_calls == 2
+
+
+def test_fetch_racing_an_order_is_not_cached():
+  exchange, clock = CountingExchange(), FakeClock()
+  portfolio = PortfolioState(exchange, ttl=60, clock=clock)
+
+  def order_placed():
+    # 잔고 응답을 받는 사이에 주문 콜백이 실행된 경우
+    clock.now += 0.1
+    portfolio.invalidate()
+
+  exchange.during_fetch = order_placed
+  portfolio.get_balances()
+  exchange.during_fetch = None
+  portfolio.get_balances()
+  portfolio.get_balances()
+  assert exchange.balance_calls == 2
+
+
+def test_concurrent_readers_share_one_fetch():
+  exchange = CountingExchange(delay=0.1)
+  portfolio = PortfolioState(exchange, ttl=60)
+  threads = [threading.Thread(target=portfolio.get_balance, args=("KRW",)) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert exchange.balance_calls == 1
+  assert portfolio.stats["hits"] == 7
@@ -0,0 +1,94 @@
+import json
+import time
+
+import pytest
+
+from fakes.bithumb_ws import ReplayServer
+from price_feed import PriceFeed
+
+
+def ticker(market, price, timestamp=1_700_000_000_000):
+  return {"type": "ticker", "code": market, "trade_price": price, "timestamp": timestamp}
+
+
+def orderbook(market, bid, ask):
+  return {"type": "orderbook", "code": market,
+          "orderbook_units": [{"bid_price": bid, "ask_price": ask, "bid_size": 0.5, "ask_size": 0.7}]}
+
+
+def wait_until(condition, timeout=5):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if condition():
+      return True
+    time.sleep(0.01)
+  return False
+
+
+def rest_unavailable(market):
+  raise AssertionError(f"REST 조회가 호출됨: {market}")
+
+
+def test_ticker_and_orderbook_merge_into_one_quote():
+  feed = PriceFeed(["KRW-BTC"], rest_fallback=rest_unavailable)
+  feed.handle_message(b'{"type": "ticker", "code": "KRW-BTC", "trade_price": 100000000, "timestamp": 1700000000000}')
+  feed.handle_message(json.dumps(orderbook("KRW-BTC", 99_990_000, 100_010_000)))
+  feed.handle_message('{"status": "UP"}')
+  quote = feed.get_quote("KRW-BTC")
+  assert (quote["price"], quote["bid"], quote["ask"], quote["ask_size"]) == (100_000_000.0, 99_990_000.0,
+                                                                              100_010_000.0, 0.7)
+  assert quote["price_time"] == 1_700_000_000
+  assert feed.get_price("KRW-BTC") == 100_000_000.0
+  assert feed.stats == {"ws_hits": 1, "rest_fallbacks": 0}
+
+
+def test_stale_or_missing_quote_falls_back_to_rest():
+  calls = []
+  feed = PriceFeed(["KRW-BTC"], max_age=10, rest_fallback=lambda market: calls.append(market) or 123.0)
+  assert feed.get_price("KRW-BTC") == 123.0
+  feed.quotes["KRW-BTC"]["price_received_at"] -= 11
+  assert feed.is_stale("KRW-BTC")
+  assert feed.get_price("KRW-BTC") == 123.0
+  assert feed.get_quote("KRW-BTC")["source"] == "rest"
+  assert calls == ["KRW-BTC", "KRW-BTC"]
+  assert feed.stats == {"ws_hits": 0, "rest_fallbacks": 2}
+
+
+@pytest.fixture
+def replay():
+  servers = []
+
+  def make(messages, **kwargs):
+    server = ReplayServer(messages, **kwargs).start()
+    servers.append(server)
+    return server
+
+  yield make
+  for server in servers:
+    server.stop()
+
+
+def test_feed_follows_replayed_stream(replay):
+  server = replay([ticker("KRW-BTC", 100.0), ticker("KRW-ETH", 5.0), orderbook("KRW-BTC", 101.0, 102.0),
+                   ticker("KRW-BTC", 101.5)])
+  feed = PriceFeed(["KRW-BTC"], url=server.url, rest_fallback=rest_unavailable).start(wait=5)
+  try:
+    assert wait_until(lambda: (feed.get_quote("KRW-BTC") or {}).get("price") == 101.5)
+  finally:
+    feed.stop()
+  assert feed.get_quote("KRW-BTC")["ask"] == 102.0
+  # 구독하지 않은 마켓은 서버가 걸러서 보내지 않음
+  assert feed.get_quote("KRW-ETH") is None
+  assert [item.get("type") for item in server.subscriptions[0][1:]] == ["ticker", "orderbook"]
+  assert not feed._thread.is_alive()
+
+
+def test_feed_reconnects_after_disconnect(replay):
+  server = replay([ticker("KRW-BTC", 100.0), ticker("KRW-BTC", 200.0)], close_after=1)
+  feed = PriceFeed(["KRW-BTC"], url=server.url, max_backoff=0.1, rest_fallback=rest_unavailable).start(wait=5)
+  try:
+    assert wait_until(lambda: server.connections >= 2)
+  finally:
+    feed.stop()
+  assert feed.reconnects >= 1
+  assert feed.get_quote("KRW-BTC")["price"] == 100.0
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter
+
+
+class FakeTime:
+  # sleep()이 시계만 옮기는 가짜 time 모듈
+
+  def __init__(self):
+    self.now = 0.0
+    self.slept = []
+
+  def monotonic(self):
+    return self.now
+
+  def sleep(self, seconds):
+    self.slept.append(seconds)
+    self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  fake = FakeTime()
+  monkeypatch.setattr(rate_limit, "time", fake)
+  return fake
+
+
+def test_sub_one_rate_still_grants_tokens(clock):
+  limiter = RateLimiter(0.5)
+  assert limiter.burst == 1.0
+  assert limiter.acquire() == 0.0
+  assert limiter.acquire() == pytest.approx(2.0)
+  assert limiter.acquire() == pytest.approx(2.0)
+
+
+def test_burst_then_steady_rate(clock):
+  limiter = RateLimiter(10, burst=3)
+  assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+  assert limiter.acquire() == pytest.approx(0.1)
+  clock.now += 60
+  # 오래 쉬어도 burst개까지만 쌓임
+  assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+  assert limiter.acquire() > 0
+
+
+def test_wrap_acquires_before_each_call(clock):
+  limiter = RateLimiter(1)
+  calls = []
+  limited = limiter.wrap(lambda value: calls.append(value) or value)
+  assert [limited(i) for i in range(3)] == [0, 1, 2]
+  assert clock.slept == [pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_shared_between_threads():
+  # 실제 시계: 스레드 8개가 rate 100/s, burst 10 버킷을 나눠 씀 -> 30개에 최소 0.2초
+  limiter = RateLimiter(100, burst=10)
+  start = rate_limit.time.monotonic()
+  threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(3)]) for _ in range(10)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert rate_limit.time.monotonic() - start >= 0.19
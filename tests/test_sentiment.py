@@ -0,0 +1,64 @@
+import pytest
+
+from sentiment import relevance, score, score_articles, summarize
+
+
+def test_lexicon_sign_and_range():
+  assert score("Bitcoin surges to record high as ETF inflows jump") > 0.5
+  assert score("Exchange hacked, withdrawals halted amid panic") < -0.5
+  assert score("Bitcoin price today") == 0.0
+  assert -1 < score("crash crash crash crash crash crash") < -0.9
+
+
+def test_phrases_match_before_single_words():
+  # "record high"(2.5)는 "record"(1.0) + "high"(0.5)보다 강함
+  assert score("Bitcoin hits record high") > score("Bitcoin high hits record")
+
+
+def test_negation_flips_and_softens():
+  positive = score("SEC approval for bitcoin ETF")
+  negated = score("SEC denies approval for bitcoin ETF")
+  assert negated < 0
+  assert abs(negated) < positive
+
+
+def test_intensifier_strengthens():
+  assert score("Bitcoin sees massive rally") > score("Bitcoin sees rally") > score("Bitcoin sees slight rally") > 0
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("BTC breaks out", 1.0),
+    ("Ether ETF flows", 0.5),  # 검색어가 bitcoin이면 가상자산 시장 일반 기사
+    ("Crypto exchange expands in Asia", 0.5),
+    ("Fed holds rates steady", 0.2),
+])
+def test_relevance_levels(title, expected):
+  assert relevance(title, "bitcoin") == expected
+
+
+def test_score_articles_fills_columns_in_place():
+  articles = [{"title": "Bitcoin rallies"}, {"title": "Solana outage"}]
+  assert score_articles(articles, "bitcoin") is articles
+  assert [a["relevance"] for a in articles] == [1.0, 0.2]
+  assert articles[0]["sentiment"] > 0 > articles[1]["sentiment"]
+
+
+def test_summary_weights_by_relevance_and_reports_trend():
+  now = 100_000
+  rows = [
+      (now - 1000, 0.8, 1.0),    # 최근, 직접 관련
+      (now - 2000, -0.8, 0.2),   # 최근, 관련 낮음
+      (now - 80_000, -0.4, 1.0),  # 이전 구간
+      (now - 90_000, 0.9, 1.0),   # 요약 기간 밖
+  ]
+  summary = summarize(rows, now, window=86_400)
+  assert summary["articles"] == 3
+  assert summary["sentiment"] == round((0.8 - 0.16 - 0.4) / 2.2, 3)
+  assert summary["trend"] == round((0.8 - 0.16) / 1.2 - (-0.4), 3)
+  assert (summary["positive"], summary["negative"]) == (1, 2)
+  assert summary["window_hours"] == 24.0
+
+
+def test_summary_without_articles():
+  summary = summarize([], 0, window=3600)
+  assert summary["articles"] == 0 and summary["sentiment"] is None and summary["trend"] is None
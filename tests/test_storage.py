@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+
+import pytest
+
+from storage import Database
+
+INSERT = "INSERT INTO decisions (ts, market, decision, percentage) VALUES (?, ?, ?, ?)"
+
+
+@pytest.fixture
+def db(tmp_path):
+  database = Database(str(tmp_path / "trading.db"), flush_interval=0.2)
+  yield database
+  database.close()
+
+
+def test_queued_writes_commit_in_one_batch(db):
+  futures = [db.execute(INSERT, (i, "KRW-BTC", "hold", 0)) for i in range(50)]
+  assert [future.result(5) for future in futures] == list(range(1, 51))
+  assert db.stats == {"writes": 50, "batches": 1, "errors": 0}
+  assert db.read("SELECT COUNT(*) FROM decisions") == [(50,)]
+
+
+def test_failed_write_does_not_roll_back_its_batch(db):
+  good = db.execute(INSERT, (1, "KRW-BTC", "buy", 10))
+  bad = db.execute(INSERT, (2, None, "buy", 10))  # market NOT NULL 위반
+  after = db.write(lambda conn: conn.execute(INSERT, (3, "KRW-ETH", "sell", 5)).lastrowid)
+  assert good.result(5) == 1
+  with pytest.raises(sqlite3.IntegrityError):
+    bad.result(5)
+  assert after.result(5) == 2
+  assert db.read("SELECT ts FROM decisions ORDER BY ts") == [(1,), (3,)]
+  assert db.stats["errors"] == 1 and db.stats["batches"] == 1
+
+
+def test_write_function_runs_in_one_savepoint(db):
+  def decision_with_order(conn, ts):
+    decision_id = conn.execute(INSERT, (ts, "KRW-BTC", "buy", 10)).lastrowid
+    conn.execute("INSERT INTO orders (decision_id, ts, market, side, order_type) VALUES (?, ?, ?, ?, ?)",
+                 (decision_id, ts, "KRW-BTC", "buy", "price"))  # side CHECK 위반
+
+  with pytest.raises(sqlite3.IntegrityError):
+    db.write(decision_with_order, 1).result(5)
+  # 같은 작업 안에서 먼저 넣은 decision도 함께 취소
+  assert db.read("SELECT COUNT(*) FROM decisions") == [(0,)]
+
+
+def test_reads_use_read_only_connections(db):
+  with db.reading() as conn:
+    with pytest.raises(sqlite3.OperationalError):
+      conn.execute(INSERT, (1, "KRW-BTC", "hold", 0))
+
+
+def test_concurrent_writers_share_one_writer_thread(db):
+  def writer(offset):
+    for i in range(20):
+      db.execute(INSERT, (offset + i, "KRW-BTC", "hold", 0))
+
+  threads = [threading.Thread(target=writer, args=(n * 100,)) for n in range(5)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert db.flush(5)
+  assert db.read("SELECT COUNT(*) FROM decisions") == [(100,)]
+  assert db.write(lambda conn: threading.current_thread().name).result(5) == "db-writer"
+  assert db.stats["batches"] < 100
+
+
+def test_write_after_close_raises(db):
+  db.execute(INSERT, (1, "KRW-BTC", "hold", 0))
+  db.close()
+  with pytest.raises(RuntimeError):
+    db.execute(INSERT, (2, "KRW-BTC", "hold", 0))
+  assert Database(db.path).read("SELECT COUNT(*) FROM decisions") == [(1,)]
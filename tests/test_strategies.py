@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from openai import OpenAI
+
+from fakes.fixtures import synthetic_completion
+from fakes.openai_server import FakeOpenAIServer
+from strategies import (GatedStrategy, LLMStrategy, RuleStrategy, Strategy, create_strategy, make_decision,
+                        rule_signals)
+
+
+class StubLLM(Strategy):
+  name = "llm"
+
+  def _decide(self, snapshot):
+    return make_decision("hold", 0, "stub", self.name)
+
+
+def snapshot(**indicators):
+  return {"market": "KRW-BTC", "indicators": {"short_term": indicators}}
+
+
+def test_plain_trend_defers_to_llm():
+  # RSI 중립, %B 중간, MACD 히스토그램 양수, SMA20 > SMA50: 규칙만으로는 매수(2점)지만 확실하지 않음
+  state = snapshot(rsi_14=55, bb_pct_b=0.6, macd_hist=10, sma_20=101, sma_50=100)
+  assert RuleStrategy().decide(state)["decision"] == "buy"
+  gated = create_strategy("gated", StubLLM())
+  result = gated.decide(state)
+  assert result["engine"] == "gated:llm"
+  assert result["rule_decision"] == "buy"
+  assert (gated.stats["fast_path"], gated.stats["llm_path"]) == (0, 1)
+
+
+def test_strong_signal_takes_fast_path():
+  state = snapshot(rsi_14=25, bb_pct_b=-0.1, macd_hist=10, sma_20=101, sma_50=100)
+  gated = GatedStrategy(RuleStrategy(), StubLLM())
+  result = gated.decide(state)
+  assert result["engine"] == "gated:rules"
+  assert result["decision"] == "buy"
+  assert gated.stats["fast_path"] == 1
+
+
+def test_scalar_and_vectorized_signals_agree():
+  rows = [dict(rsi_14=25, bb_pct_b=-0.1, macd_hist=10, sma_20=101, sma_50=100),
+          dict(rsi_14=80, bb_pct_b=1.2, macd_hist=-5, sma_20=99, sma_50=100),
+          dict(rsi_14=50, bb_pct_b=0.5, macd_hist=0, sma_20=100, sma_50=100)]
+  columns = {key: np.array([row[key] for row in rows], dtype=float) for key in rows[0]}
+  decisions, percentages, _ = rule_signals(columns)
+  single = [RuleStrategy().decide(snapshot(**row)) for row in rows]
+  assert decisions.tolist() == [result["decision"] for result in single] == ["buy", "sell", "hold"]
+  assert percentages.tolist() == [result["percentage"] for result in single]
+
+
+def test_missing_indicators_hold():
+  result = RuleStrategy().decide({"market": "KRW-BTC", "indicators": {}})
+  assert (result["decision"], result["percentage"], result["confidence"]) == ("hold", 0.0, 0.0)
+
+
+def test_news_sentiment_counts_as_a_signal():
+  # MACD/추세만 하락(-2점)이면 매도, 긍정적인 뉴스(+0.5점)가 있으면 애매한 구간
+  state = snapshot(rsi_14=50, bb_pct_b=0.5, macd_hist=-10, sma_20=99, sma_50=100)
+  assert RuleStrategy().decide(state)["decision"] == "sell"
+  assert RuleStrategy().decide({**state, "news": {"sentiment": 0.5}})["decision"] == "hold"
+  assert RuleStrategy().decide({**state, "news": {"sentiment": 0.1}})["decision"] == "sell"
+
+
+def test_gate_only_calls_openai_when_rules_are_unsure():
+  server = FakeOpenAIServer(synthetic_completion(decision={"decision": "hold", "percentage": 0,
+                                                           "reason": "wait for confirmation"})).start()
+  try:
+    llm = LLMStrategy(lambda market: "system", lambda state: {"market": state["market"]},
+                      client=OpenAI(base_url=server.base_url, api_key="test", max_retries=0))
+    gated = create_strategy("gated", llm)
+    strong = gated.decide(snapshot(rsi_14=25, bb_pct_b=-0.1, macd_hist=10, sma_20=101, sma_50=100))
+    assert server.requests == []
+    unsure = gated.decide(snapshot(rsi_14=55, bb_pct_b=0.6, macd_hist=10, sma_20=101, sma_50=100))
+  finally:
+    server.stop()
+  assert strong["engine"] == "gated:rules"
+  assert (unsure["engine"], unsure["decision"], unsure["rule_agrees"]) == ("gated:llm", "hold", False)
+  assert len(server.requests) == 1
+  assert gated.stats["cost_usd"] == llm.stats["cost_usd"] > 0
+
+
+def test_unknown_or_incomplete_engine_config_is_rejected():
+  with pytest.raises(ValueError):
+    create_strategy("gated")
+  with pytest.raises(ValueError):
+    create_strategy("magic", StubLLM())
+  assert isinstance(create_strategy("rules"), RuleStrategy)
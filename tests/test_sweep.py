@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import sweep
+from storage import Database
+
+SPACE = {"schedule": ["every_bar", "daily_0317"], "buy_threshold": [1.0, 2.0], "sell_threshold": [1.0, 2.0],
+         "rsi_oversold": [30.0, 35.0]}
+
+
+def hourly_candles(count=600, seed=1):
+  rng = np.random.default_rng(seed)
+  close = 100_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+  open_ = np.concatenate([[close[0]], close[:-1]])
+  index = pd.date_range("2024-01-01", periods=count, freq="h", name="candle_date_time_kst")
+  return pd.DataFrame({"open": open_, "high": np.maximum(open_, close) * 1.002,
+                       "low": np.minimum(open_, close) * 0.998, "close": close,
+                       "volume": rng.lognormal(0, 0.5, count), "value": close}, index=index)
+
+
+def test_config_generation():
+  grid = sweep.grid_configs(SPACE)
+  assert len(grid) == 16 and len({json.dumps(c, sort_keys=True) for c in grid}) == 16
+  sample = sweep.random_configs(SPACE, 5, seed=3)
+  assert len({tuple(c.values()) for c in sample}) == 5
+  assert sample == sweep.random_configs(SPACE, 5, seed=3)
+  assert len(sweep.random_configs(SPACE, 100)) == 16
+
+
+def test_parallel_sweep_matches_serial_order_and_values():
+  candles, configs = hourly_candles(), sweep.grid_configs(SPACE)
+  serial = sweep.run_sweep(candles, configs, workers=1)
+  parallel = sweep.run_sweep(candles, configs, workers=2, chunks_per_worker=3)
+  assert parallel == serial
+  assert any(result["trades"] for result in serial)
+
+
+def test_schedule_limits_when_trades_happen():
+  candles = hourly_candles()
+  every_bar, daily = sweep.run_sweep(candles, [{"schedule": "every_bar", "buy_threshold": 1.0},
+                                               {"schedule": "daily_0317", "buy_threshold": 1.0}], workers=1)
+  assert daily["trades"] <= len(candles) // 24 + 1
+  assert daily["trades"] < every_bar["trades"]
+
+
+def test_results_are_saved_with_their_params(tmp_path):
+  db = Database(str(tmp_path / "sweep.db"))
+  configs = sweep.grid_configs({"buy_threshold": [1.0, 2.0]})
+  results = sweep.run_sweep(hourly_candles(200), configs, workers=1)
+  run = {"market": "KRW-BTC", "interval": "minute60", "start_ts": 0, "end_ts": 1, "bars": 200, "method": "grid",
+         "workers": 1, "elapsed": 0.1}
+  run_id = sweep.save_sweep(run, configs, results, db=db)
+  rows = db.read("SELECT params, return_pct, trades FROM sweep_results WHERE run_id = ? ORDER BY id", (run_id,))
+  assert [json.loads(params) for params, _, _ in rows] == configs
+  assert [(r, t) for _, r, t in rows] == [(res["return_pct"], res["trades"]) for res in results]
+  db.close()
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+import tracing
+from exchange_client import BithumbClient, HttpClient
+from fakes.bithumb_http import FakeBithumbServer
+from storage import Database
+
+
+class FakeAPIError(Exception):
+  status_code = 429
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+  db = Database(str(tmp_path / "spans.db"))
+  tracer = tracing.Tracer(db=db, enabled=True)
+  # 공용 코드(HttpClient 등)의 tracing.span()도 이 tracer로 기록
+  monkeypatch.setattr(tracing, "_tracer", tracer)
+  yield tracer
+  db.close()
+
+
+def spans(tracer):
+  tracer.flush()
+  rows = tracer.db.read("SELECT trace_id, span_id, parent_id, name, market, status, error, http_status FROM spans")
+  return {row[3]: dict(zip(("trace_id", "span_id", "parent_id", "name", "market", "status", "error",
+                            "http_status"), row)) for row in rows}
+
+
+def test_trace_is_written_once_when_root_finishes(tracer):
+  writes = tracer.db.stats["writes"]
+  with tracing.trace("execute_trade", market="KRW-ETH"):
+    with tracing.span("collect"):
+      with tracing.span("collect.ohlcv"):
+        pass
+    with tracing.span("llm", prompt_tokens=100, cost_usd=0.01):
+      pass
+  recorded = spans(tracer)
+  assert set(recorded) == {"execute_trade", "collect", "collect.ohlcv", "llm"}
+  assert len({row["trace_id"] for row in recorded.values()}) == 1
+  assert recorded["collect.ohlcv"]["parent_id"] == recorded["collect"]["span_id"]
+  assert recorded["execute_trade"]["parent_id"] is None
+  # 마켓은 루트에서 물려받음
+  assert {row["market"] for row in recorded.values()} == {"KRW-ETH"}
+  assert tracer.db.stats["writes"] == writes + 1
+
+
+def test_spans_outside_a_trace_are_not_recorded(tracer):
+  with tracing.span("http.ticker") as span:
+    assert span is tracing.NULL_SPAN
+  assert tracing.current() is tracing.NULL_SPAN
+  assert spans(tracer) == {}
+
+
+def test_failure_is_recorded_on_span_and_propagated(tracer):
+  with pytest.raises(FakeAPIError):
+    with tracing.trace("execute_trade"):
+      with tracing.span("llm"):
+        with tracing.span("http.chat"):
+          raise FakeAPIError("rate limited")
+  recorded = spans(tracer)
+  assert {name: row["status"] for name, row in recorded.items()} == {
+      "execute_trade": "error", "llm": "error", "http.chat": "error"}
+  # 상태 코드는 가장 안쪽 span에만
+  assert [name for name, row in recorded.items() if row["http_status"]] == ["http.chat"]
+  assert "FakeAPIError: rate limited" in recorded["execute_trade"]["error"]
+
+
+def test_span_handed_to_another_thread_joins_the_trace(tracer):
+  def send(parent):
+    with tracing.span("telegram.send", parent=parent):
+      pass
+
+  with tracing.trace("execute_trade") as root:
+    threads = [threading.Thread(target=tracing.traced("news", lambda: None)),
+               threading.Thread(target=send, args=(root,))]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+  recorded = spans(tracer)
+  # 컨텍스트가 전달되지 않는 스레드는 기록하지 않고, parent를 넘기면 같은 trace로 기록
+  assert "news" not in recorded
+  assert recorded["telegram.send"]["parent_id"] == root.span_id
+  assert recorded["telegram.send"]["trace_id"] == root.trace_id
+
+
+def test_http_calls_inside_a_trace_record_status_and_retries(tracer):
+  server = FakeBithumbServer(fail_first=1).start()
+  try:
+    client = BithumbClient(base_url=server.url, http=HttpClient(sleep=lambda seconds: None))
+    with tracing.trace("execute_trade", market="KRW-BTC"):
+      client.get_current_price("KRW-BTC")
+  finally:
+    server.stop()
+  recorded = spans(tracer)
+  assert recorded["http.ticker"]["http_status"] == 200
+  assert recorded["http.ticker"]["status"] == "ok"
+  assert tracer.db.read("SELECT json_extract(attrs, '$.retries') FROM spans WHERE name = 'http.ticker'") == [(1,)]
+
+
+def test_prometheus_export_has_cumulative_buckets(tracer):
+  for _ in range(3):
+    with tracing.trace("execute_trade", market="KRW-BTC"):
+      with tracing.span("llm", model="gpt-4o", ttft_ms=3, prompt_tokens=10, completion_tokens=2, cost_usd=0.5):
+        pass
+  tracer.flush()
+  text = tracing.prometheus_text(tracer.db)
+  assert 'autotrade_stage_duration_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+  assert 'autotrade_stage_duration_seconds_count{stage="execute_trade"} 3' in text
+  assert 'autotrade_llm_tokens_total{stage="llm",type="prompt"} 30' in text
+  assert 'autotrade_llm_time_to_first_token_seconds_bucket{model="gpt-4o",le="0.005"} 3' in text
+  assert 'autotrade_last_run_timestamp_seconds{market="KRW-BTC"}' in text
+  summary = {row["stage"]: row for row in tracing.stage_summary(tracer.db)}
+  assert summary["llm"]["count"] == 3 and summary["llm"]["tokens"] == 36
+  assert summary["llm"]["cost_usd"] == pytest.approx(1.5)
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta
+
+from storage import get_database
+from trade_history import TradeHistory
+
+HOUR = 3600
+
+
+def _insert(db, rows):
+  def write(conn):
+    conn.executemany('''INSERT INTO decisions
+                          (ts, market, decision, percentage, reason, btc_balance, krw_balance, btc_price)
+                        VALUES (?, ?, 'hold', 0, '', ?, ?, ?)''', rows)
+  db.write(write).result()
+
+
+def _hourly(start, count, market='KRW-BTC'):
+  # 가격이 1씩 오르는 시간봉 판단 (btc 1개 + krw 0이라 포트폴리오 가치 = 가격)
+  return [(start + i * HOUR, market, 1.0, 0.0, 100.0 + i) for i in range(count)]
+
+
+def test_refresh_reads_only_new_rows(tmp_path):
+  path = str(tmp_path / "history.db")
+  db = get_database(path)
+  now = int(time.time()) - 10 * HOUR
+  _insert(db, _hourly(now, 5))
+  history = TradeHistory(path)
+  assert history.refresh() == 5
+  assert history.refresh() == 0
+  _insert(db, [(now + 5 * HOUR, 'KRW-BTC', 1.0, 0.0, 110.0), (now + 5 * HOUR, 'KRW-ETH', 1.0, 0.0, 1.0)])
+  assert history.refresh() == 1
+  latest = history.window().iloc[0]
+  assert latest['profit_loss_pct'] == 10.0
+
+
+def test_initial_load_limited_to_window(tmp_path):
+  path = str(tmp_path / "history.db")
+  db = get_database(path)
+  start = int(time.time()) - 100 * HOUR
+  _insert(db, _hourly(start, 100))
+  history = TradeHistory(path)
+  since = datetime.fromtimestamp(start + 90 * HOUR)
+  assert history.refresh(since) == 10
+  assert len(history.df) == 10
+  # 읽지 않은 구간이 있어도 수익률 기준은 첫 거래
+  assert history.df['profit_loss_pct'].iloc[0] == 90.0
+  assert history.first_timestamp() == datetime.fromtimestamp(start)
+
+
+def test_window_loads_earlier_range_from_database(tmp_path):
+  path = str(tmp_path / "history.db")
+  db = get_database(path)
+  start = int(time.time()) - 100 * HOUR
+  _insert(db, _hourly(start, 100))
+  history = TradeHistory(path)
+  history.refresh(datetime.fromtimestamp(start + 90 * HOUR))
+
+  zoom = history.window(datetime.fromtimestamp(start + 20 * HOUR), datetime.fromtimestamp(start + 29 * HOUR))
+  assert len(zoom) == 10
+  assert list(zoom['btc_price']) == [129.0 - i for i in range(10)]
+  # 20시간째 이후만 추가로 읽었고 시간순이 유지됨
+  assert len(history.df) == 80
+  assert history.df['timestamp'].is_monotonic_increasing
+  assert history.df['id'].is_unique
+
+  # 이미 읽은 구간은 다시 읽지 않고, 전체를 요청하면 나머지만 읽음
+  assert history._load_before(datetime.fromtimestamp(start + 50 * HOUR)) == 0
+  assert len(history.window()) == 100
+  assert history.refresh() == 0
+  _insert(db, _hourly(start + 100 * HOUR, 1))
+  assert history.refresh() == 1
+  assert len(history.window(datetime.fromtimestamp(start) - timedelta(days=1))) == 101
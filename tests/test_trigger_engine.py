@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from trigger_engine import DailyTimer, PriceMoveTrigger, SimulatedClock, TriggerEngine
+
+START = 1_000_000
+
+
+def run_for(engine, clock, seconds):
+  async def main():
+    task = asyncio.create_task(engine.run())
+    await clock.advance(seconds)
+    engine.stop()
+    # 타이머만 있으면 다음 타이머 시각까지 잠들어 있으므로 하루를 더 넘겨 루프를 끝냄
+    await clock.advance(86400)
+    await task
+  asyncio.run(main())
+
+
+def stepped_price(clock, at, before=100.0, after=104.0):
+  return lambda market: after if clock.time() >= at else before
+
+
+def test_price_move_fires_at_exact_simulated_time():
+  for _ in range(5):
+    clock = SimulatedClock(START)
+    fired = []
+    engine = TriggerEngine(lambda **kwargs: fired.append((clock.time(), kwargs["reason"])), clock=clock,
+                           poll_interval=5)
+    engine.add(PriceMoveTrigger("KRW-BTC", stepped_price(clock, START + 13), threshold_pct=3, cooldown=1800))
+    run_for(engine, clock, 60)
+    assert [at for at, _, _ in engine.history] == [START + 15]
+    assert fired == [(START + 15, "KRW-BTC +4.00% in 60m")]
+
+
+def test_debounce_counts_from_check_time():
+  clock = SimulatedClock(START)
+  engine = TriggerEngine(lambda **kwargs: None, clock=clock, poll_interval=5)
+  engine.add(PriceMoveTrigger("KRW-BTC", stepped_price(clock, START + 10), threshold_pct=3, debounce=10))
+  run_for(engine, clock, 60)
+  assert [at for at, _, _ in engine.history] == [START + 20]
+
+
+def test_daily_timer_fires_at_scheduled_time():
+  midnight = datetime.fromtimestamp(START).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+  clock = SimulatedClock(midnight)
+  engine = TriggerEngine(lambda **kwargs: None, clock=clock, poll_interval=5)
+  engine.add(DailyTimer("03:17"))
+  run_for(engine, clock, 4 * 3600)
+  assert [at for at, _, _ in engine.history] == [midnight + 3 * 3600 + 17 * 60]
+
+
+def test_real_clock_checks_run_on_injected_executor():
+  threads = []
+  executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trigger-check")
+
+  def price(market):
+    threads.append(threading.current_thread().name)
+    return 100.0
+
+  async def main():
+    engine = TriggerEngine(lambda **kwargs: None, poll_interval=0.01, executor=executor)
+    engine.add(PriceMoveTrigger("KRW-BTC", price))
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.1)
+    engine.stop()
+    await task
+
+  asyncio.run(main())
+  executor.shutdown()
+  assert threads and all(name.startswith("trigger-check") for name in threads)
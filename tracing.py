@@ -0,0 +1,334 @@
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from storage import get_database
+
+# 실행 단계별 추적 (span)
+# execute_trade 한 번이 trace 하나: 루트 span 아래에 데이터 수집/판단(LLM)/주문/HTTP 호출/텔레그램 전송이 하위 span
+# span은 메모리에 모았다가 루트 span이 끝날 때 spans 테이블에 한 번에 저장 (쓰기 큐, 거래 흐름은 기다리지 않음)
+# 진행 중인 trace가 없으면 span()은 아무것도 기록하지 않으므로 HTTP 클라이언트 같은 공용 코드에서도 그냥 호출
+# 저장된 span은 prometheus_text()로 Prometheus 텍스트 형식으로 내보내고 대시보드에서 단계별 지연시간/비용을 봄
+
+ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+
+# 단계 지연시간 히스토그램 버킷 상한 (ms, 주문/TWAP처럼 긴 단계까지)
+STAGE_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+
+# 별도 컬럼으로 저장하는 속성 (나머지는 attrs JSON)
+COLUMNS = ("market", "http_status", "prompt_tokens", "completion_tokens", "cost_usd")
+
+_current = contextvars.ContextVar("tracing_span", default=None)
+
+
+class Span:
+
+  def __init__(self, name, trace_id, parent=None, attrs=None):
+    self.name = name
+    self.trace_id = trace_id
+    self.span_id = uuid.uuid4().hex[:16]
+    self.parent_id = parent.span_id if parent is not None else None
+    # 마켓은 부모에서 물려받음 (마켓별 집계용)
+    self.attrs = {"market": parent.attrs.get("market")} if parent is not None else {}
+    self.attrs.update(attrs or {})
+    self.ts = time.time()
+    self.start = time.perf_counter()
+    self.duration_ms = None
+    self.status = "ok"
+    self.error = None
+
+  def set(self, **attrs):
+    self.attrs.update(attrs)
+    return self
+
+  def fail(self, error):
+    self.status = "error"
+    self.error = str(error)[:500]
+    return self
+
+  def row(self):
+    attrs = {key: value for key, value in self.attrs.items() if key not in COLUMNS and value is not None}
+    return (self.ts, self.trace_id, self.span_id, self.parent_id, self.name, self.attrs.get("market"),
+            self.duration_ms, self.status, self.error, self.attrs.get("http_status"),
+            self.attrs.get("prompt_tokens"), self.attrs.get("completion_tokens"), self.attrs.get("cost_usd"),
+            json.dumps(attrs, default=str) if attrs else None)
+
+
+class _NullSpan:
+  # 진행 중인 trace가 없을 때 (기록하지 않음)
+  trace_id = None
+
+  def set(self, **attrs):
+    return self
+
+  def fail(self, error):
+    return self
+
+
+NULL_SPAN = _NullSpan()
+
+
+def _insert_spans(conn, rows):
+  conn.executemany('''INSERT INTO spans
+                        (ts, trace_id, span_id, parent_id, name, market, duration_ms, status, error, http_status,
+                         prompt_tokens, completion_tokens, cost_usd, attrs)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+  return len(rows)
+
+
+class Tracer:
+
+  def __init__(self, db=None, enabled=ENABLED):
+    self._db = db
+    self.enabled = enabled
+    self.lock = threading.Lock()
+    # trace id -> 끝난 하위 span 행 (루트가 끝날 때 한 번에 저장)
+    self._pending = {}
+    self._last_write = None
+    self.stats = {"traces": 0, "spans": 0, "write_errors": 0}
+
+  @property
+  def db(self):
+    if self._db is None:
+      self._db = get_database()
+    return self._db
+
+  @contextmanager
+  def span(self, name, parent=None, root=False, **attrs):
+    # parent: 다른 스레드/이벤트 루프로 넘긴 span (없으면 현재 컨텍스트의 span)
+    # root=True면 진행 중인 trace가 없을 때 새 trace 시작, False면 trace 밖에서는 기록하지 않음
+    parent = parent if parent is not None else _current.get()
+    if not self.enabled or (parent is None and not root) or parent is NULL_SPAN:
+      yield NULL_SPAN
+      return
+    span = Span(name, parent.trace_id if parent is not None else uuid.uuid4().hex[:16], parent, attrs)
+    is_root = parent is None
+    if is_root:
+      with self.lock:
+        self._pending[span.trace_id] = []
+    token = _current.set(span)
+    try:
+      yield span
+    except BaseException as e:
+      span.fail(f"{type(e).__name__}: {e}")
+      # API 오류의 상태 코드는 예외가 처음 지나간 (가장 안쪽) span에만 기록
+      if getattr(e, "status_code", None) is not None and not getattr(e, "_traced", False):
+        span.attrs.setdefault("http_status", e.status_code)
+        try:
+          e._traced = True
+        except AttributeError:
+          pass
+      raise
+    finally:
+      _current.reset(token)
+      self._finish(span, is_root)
+
+  def _finish(self, span, is_root):
+    span.duration_ms = (time.perf_counter() - span.start) * 1000
+    status = span.attrs.get("http_status")
+    if span.status == "ok" and status is not None and status >= 400:
+      span.fail(f"HTTP {status}")
+    with self.lock:
+      self.stats["spans"] += 1
+      if is_root:
+        self.stats["traces"] += 1
+        rows = self._pending.pop(span.trace_id, []) + [span.row()]
+      elif span.trace_id in self._pending:
+        self._pending[span.trace_id].append(span.row())
+        return
+      else:
+        # 루트가 끝난 뒤에 끝난 span (타임아웃으로 버려진 호출, 텔레그램 전송)은 따로 저장
+        rows = [span.row()]
+    try:
+      self._last_write = self.db.write(_insert_spans, rows)
+    except Exception as e:
+      self.stats["write_errors"] += 1
+      print(f"[TRACE ERROR] span 저장 실패: {str(e)}")
+
+  def flush(self, timeout=10):
+    # 마지막으로 큐에 넣은 span 저장이 끝날 때까지 대기 (내보내기 전에 호출)
+    if self._last_write is not None:
+      try:
+        self._last_write.result(timeout)
+      except Exception as e:
+        print(f"[TRACE ERROR] span 저장 실패: {str(e)}")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+  global _tracer
+  with _tracer_lock:
+    if _tracer is None:
+      _tracer = Tracer()
+    return _tracer
+
+
+def trace(name, **attrs):
+  # 새 trace의 루트 span (이미 trace 안이면 하위 span)
+  return get_tracer().span(name, root=True, **attrs)
+
+
+def span(name, parent=None, **attrs):
+  return get_tracer().span(name, parent=parent, **attrs)
+
+
+def current():
+  # 현재 컨텍스트의 span (없으면 NULL_SPAN)
+  return _current.get() or NULL_SPAN
+
+
+def traced(name, fn, **attrs):
+  # fn을 span으로 감싼 함수 (run_parallel처럼 다른 스레드에서 실행할 호출용)
+  def wrapper(*args, **kwargs):
+    with span(name, **attrs):
+      return fn(*args, **kwargs)
+  return wrapper
+
+
+# ---- 집계 / 내보내기 ----
+
+def stage_summary(db=None, since=0, market=None):
+  # 단계(span 이름)별 호출 수, 오류 수, 지연시간 분위수(ms), 토큰/비용 합계 (p95 큰 순)
+  db = db or get_database()
+  sql = '''SELECT name, duration_ms, status = 'error', COALESCE(prompt_tokens, 0) + COALESCE(completion_tokens, 0),
+                  COALESCE(cost_usd, 0)
+           FROM spans WHERE ts >= ?'''
+  params = [since]
+  if market:
+    sql += " AND market = ?"
+    params.append(market)
+  stages = {}
+  for name, duration, error, tokens, cost in db.read(sql, params):
+    stage = stages.setdefault(name, {"durations": [], "errors": 0, "tokens": 0, "cost_usd": 0.0})
+    stage["durations"].append(duration)
+    stage["errors"] += error
+    stage["tokens"] += tokens
+    stage["cost_usd"] += cost
+  summary = []
+  for name, stage in stages.items():
+    durations = np.asarray(stage["durations"])
+    summary.append({
+        "stage": name,
+        "count": len(durations),
+        "errors": stage["errors"],
+        "p50_ms": float(np.percentile(durations, 50)),
+        "p95_ms": float(np.percentile(durations, 95)),
+        "max_ms": float(durations.max()),
+        "total_ms": float(durations.sum()),
+        "tokens": stage["tokens"],
+        "cost_usd": stage["cost_usd"],
+    })
+  return sorted(summary, key=lambda item: -item["p95_ms"])
+
+
+def _labels(**labels):
+  escaped = {key: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+             for key, value in labels.items() if value is not None}
+  return "{" + ",".join(f'{key}="{value}"' for key, value in escaped.items()) + "}" if escaped else ""
+
+
+def prometheus_text(db=None, buckets=STAGE_BUCKETS_MS, prefix="autotrade"):
+  # spans 테이블 전체를 누적 카운터/히스토그램으로 (node_exporter textfile collector 또는 /metrics 응답용)
+  db = db or get_database()
+  lines = []
+  bucket_sql = ", ".join(f"SUM(duration_ms <= {b})" for b in buckets)
+  rows = db.read(f'''SELECT name, COUNT(*), SUM(duration_ms), SUM(status = 'error'), {bucket_sql}
+                     FROM spans GROUP BY name ORDER BY name''')
+  lines.append(f"# HELP {prefix}_stage_duration_seconds 실행 단계별 소요 시간")
+  lines.append(f"# TYPE {prefix}_stage_duration_seconds histogram")
+  for name, count, total, _, *cumulative in rows:
+    for bound, value in zip(buckets, cumulative):
+      lines.append(f"{prefix}_stage_duration_seconds_bucket{_labels(stage=name, le=bound / 1000)} {value}")
+    lines.append(f"{prefix}_stage_duration_seconds_bucket{_labels(stage=name, le='+Inf')} {count}")
+    lines.append(f"{prefix}_stage_duration_seconds_sum{_labels(stage=name)} {total / 1000:.6f}")
+    lines.append(f"{prefix}_stage_duration_seconds_count{_labels(stage=name)} {count}")
+  lines.append(f"# HELP {prefix}_stage_errors_total 실패한 단계 수")
+  lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+  for name, _, _, errors, *_ in rows:
+    lines.append(f"{prefix}_stage_errors_total{_labels(stage=name)} {errors}")
+
+  rows = db.read('''SELECT name, http_status, COUNT(*) FROM spans
+                    WHERE http_status IS NOT NULL GROUP BY name, http_status ORDER BY name, http_status''')
+  lines.append(f"# HELP {prefix}_http_responses_total HTTP 응답 수 (상태 코드별)")
+  lines.append(f"# TYPE {prefix}_http_responses_total counter")
+  for name, status, count in rows:
+    lines.append(f"{prefix}_http_responses_total{_labels(stage=name, code=status)} {count}")
+
+  rows = db.read('''SELECT name, SUM(prompt_tokens), SUM(completion_tokens), SUM(cost_usd) FROM spans
+                    WHERE prompt_tokens IS NOT NULL OR cost_usd IS NOT NULL GROUP BY name ORDER BY name''')
+  lines.append(f"# HELP {prefix}_llm_tokens_total LLM 토큰 수")
+  lines.append(f"# TYPE {prefix}_llm_tokens_total counter")
+  for name, prompt, completion, _ in rows:
+    lines.append(f"{prefix}_llm_tokens_total{_labels(stage=name, type='prompt')} {prompt or 0}")
+    lines.append(f"{prefix}_llm_tokens_total{_labels(stage=name, type='completion')} {completion or 0}")
+  lines.append(f"# HELP {prefix}_llm_cost_usd_total LLM 예상 비용 (USD)")
+  lines.append(f"# TYPE {prefix}_llm_cost_usd_total counter")
+  for name, _, _, cost in rows:
+    lines.append(f"{prefix}_llm_cost_usd_total{_labels(stage=name)} {cost or 0:.6f}")
+
+  # 스트리밍 LLM 호출의 첫 토큰까지 걸린 시간 (전체 시간은 stage="llm" 히스토그램)
+  ttft_sql = ", ".join(f"SUM(ttft <= {b})" for b in buckets)
+  rows = db.read(f'''SELECT model, COUNT(*), SUM(ttft), {ttft_sql}
+                     FROM (SELECT json_extract(attrs, '$.model') AS model, json_extract(attrs, '$.ttft_ms') AS ttft
+                           FROM spans WHERE name = 'llm')
+                     WHERE ttft IS NOT NULL GROUP BY model ORDER BY model''')
+  lines.append(f"# HELP {prefix}_llm_time_to_first_token_seconds LLM 첫 토큰까지 걸린 시간")
+  lines.append(f"# TYPE {prefix}_llm_time_to_first_token_seconds histogram")
+  for model, count, total, *cumulative in rows:
+    for bound, value in zip(buckets, cumulative):
+      lines.append(f"{prefix}_llm_time_to_first_token_seconds_bucket{_labels(model=model, le=bound / 1000)} {value}")
+    lines.append(f"{prefix}_llm_time_to_first_token_seconds_bucket{_labels(model=model, le='+Inf')} {count}")
+    lines.append(f"{prefix}_llm_time_to_first_token_seconds_sum{_labels(model=model)} {total / 1000:.6f}")
+    lines.append(f"{prefix}_llm_time_to_first_token_seconds_count{_labels(model=model)} {count}")
+
+  rows = db.read('''SELECT market, MAX(ts), duration_ms FROM spans
+                    WHERE parent_id IS NULL AND name = 'execute_trade' GROUP BY market ORDER BY market''')
+  lines.append(f"# HELP {prefix}_last_run_timestamp_seconds 마지막 실행 시작 시각")
+  lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+  for market, ts, _ in rows:
+    lines.append(f"{prefix}_last_run_timestamp_seconds{_labels(market=market)} {ts:.3f}")
+  lines.append(f"# HELP {prefix}_last_run_duration_seconds 마지막 실행 소요 시간")
+  lines.append(f"# TYPE {prefix}_last_run_duration_seconds gauge")
+  for market, _, duration in rows:
+    lines.append(f"{prefix}_last_run_duration_seconds{_labels(market=market)} {duration / 1000:.6f}")
+  return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, db=None):
+  # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 교체
+  text = prometheus_text(db)
+  tmp = f"{path}.{os.getpid()}.tmp"
+  with open(tmp, "w", encoding="utf-8") as f:
+    f.write(text)
+  os.replace(tmp, path)
+  return path
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="실행 단계별 지연시간/비용 요약 및 Prometheus 내보내기")
+  parser.add_argument("--days", type=float, default=7, help="요약 기간 (일)")
+  parser.add_argument("--market", default=None)
+  parser.add_argument("--prom", action="store_true", help="Prometheus 텍스트 형식으로 출력")
+  parser.add_argument("--textfile", default=None, help="Prometheus 텍스트를 이 파일에 저장")
+  args = parser.parse_args()
+
+  if args.prom:
+    print(prometheus_text(), end="")
+  elif args.textfile:
+    print(f"저장: {write_textfile(args.textfile)}")
+  else:
+    summary = stage_summary(since=time.time() - args.days * 86400, market=args.market)
+    print(f"{'단계':<24}{'호출':>7}{'오류':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'토큰':>9}{'비용 $':>9}")
+    for row in summary:
+      print(f"{row['stage']:<24}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['max_ms']:>10.1f}{row['tokens']:>9}{row['cost_usd']:>9.4f}")
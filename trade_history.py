@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from storage import get_database
+
+DB_PATH = 'bitcoin_trading.db'
+
+
+def _epoch(value):
+  # 대시보드 시각은 로컬 시각(naive)이므로 datetime.timestamp()로 epoch 변환
+  return int(pd.Timestamp(value).to_pydatetime().timestamp())
+
+
+class TradeHistory:
+  # 대시보드용 거래 내역: 마지막으로 읽은 id 이후의 행만 가져와서 파생 컬럼과 함께 이어 붙임
+  # 처음에는 요청한 기간만 읽고, 더 이전 구간을 요청하면 그 구간만 DB에서 추가로 읽어 앞에 붙임
+  # 내부 프레임은 시간순(오래된 것 먼저)으로 유지
+
+  def __init__(self, path=DB_PATH, market='KRW-BTC'):
+    self.path = path
+    self.market = market
+    self.df = pd.DataFrame()
+    self.last_id = 0
+    # 메모리에 올라온 구간의 시작 epoch (None: 아직 읽지 않음, 0: 전체)
+    self.loaded_since = None
+    self.baseline_value = None
+    self.lock = threading.Lock()
+
+  def _query_baseline(self, conn):
+    # 수익률 기준은 (읽은 구간과 상관없이) 해당 마켓 첫 거래의 포트폴리오 가치
+    row = conn.execute('''SELECT krw_balance + btc_balance * btc_price FROM decisions
+                          WHERE market = ? ORDER BY ts, id LIMIT 1''', (self.market,)).fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+  def _query_new_rows(self, conn):
+    # idx_decisions_market_ts (market, ts, rowid) 순서 그대로 읽으므로 정렬 단계가 없음
+    query = "SELECT * FROM trades WHERE market = ? AND ts >= ? AND id > ? ORDER BY ts, id"
+    return pd.read_sql_query(query, conn, params=(self.market, self.loaded_since, self.last_id))
+
+  def _query_range(self, conn, start, end):
+    query = "SELECT * FROM trades WHERE market = ? AND ts >= ? AND ts < ? ORDER BY ts, id"
+    return pd.read_sql_query(query, conn, params=(self.market, start, end))
+
+  def _derive(self, new):
+    # 새로 들어온 행에 대해서만 파생 컬럼 계산
+    new['timestamp'] = pd.to_datetime(new['timestamp'])
+    new['portfolio_value'] = new['krw_balance'] + (new['btc_balance'] * new['btc_price'])
+    if self.baseline_value is None:
+      self.baseline_value = float(new['portfolio_value'].iloc[0])
+    new['profit_loss'] = new['portfolio_value'] - self.baseline_value
+    new['profit_loss_pct'] = (new['profit_loss'] / self.baseline_value) * 100
+    return new
+
+  def refresh(self, since=None):
+    # since: 처음 읽을 때의 시작 시각 (None이면 전체), 이후에는 새 행만 읽음
+    # 반환: 새로 읽은 행 수
+    with self.lock:
+      with get_database(self.path).reading() as conn:
+        if self.loaded_since is None:
+          self.loaded_since = _epoch(since) if since is not None else 0
+          self.baseline_value = self._query_baseline(conn)
+        new = self._query_new_rows(conn)
+      if new.empty:
+        return 0
+      new = self._derive(new)
+      self.df = new if self.df.empty else pd.concat([self.df, new], ignore_index=True)
+      self.last_id = max(self.last_id, int(new['id'].max()))
+      return len(new)
+
+  def _load_before(self, since):
+    # since ~ 읽은 구간 시작 사이의 행만 DB에서 읽어 앞에 붙임 (lock 안에서 호출)
+    start = _epoch(since) if since is not None else 0
+    if self.loaded_since is None or start >= self.loaded_since:
+      return 0
+    with get_database(self.path).reading() as conn:
+      old = self._query_range(conn, start, self.loaded_since)
+    self.loaded_since = start
+    if old.empty:
+      return 0
+    old = self._derive(old)
+    self.df = old if self.df.empty else pd.concat([old, self.df], ignore_index=True)
+    self.last_id = max(self.last_id, int(old['id'].max()))
+    return len(old)
+
+  def first_timestamp(self):
+    # 차트 구간 슬라이더의 왼쪽 끝: 메모리에 없는 구간까지 포함한 첫 거래 시각
+    with get_database(self.path).reading() as conn:
+      row = conn.execute("SELECT MIN(ts) FROM decisions WHERE market = ?", (self.market,)).fetchone()
+    return datetime.fromtimestamp(row[0]) if row and row[0] is not None else None
+
+  def window(self, since=None, until=None):
+    # since ~ until 사이 거래를 최신순으로 반환 (None이면 해당 방향으로 제한 없음)
+    # 읽은 구간보다 이전을 요청하면 모자란 부분을 DB에서 읽어 옴
+    with self.lock:
+      self._load_before(since)
+      df = self.df
+      if df.empty:
+        return df.copy()
+      start = df['timestamp'].searchsorted(pd.Timestamp(since)) if since is not None else 0
+      end = df['timestamp'].searchsorted(pd.Timestamp(until), side='right') if until is not None else len(df)
+      return df.iloc[start:end].iloc[::-1].reset_index(drop=True)
@@ -0,0 +1,365 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+
+# ---- 시계 ----
+
+class RealClock:
+
+  def time(self):
+    return time.time()
+
+  async def sleep(self, delay):
+    await asyncio.sleep(max(0.0, delay))
+
+
+class SimulatedClock:
+  # 테스트용 시계: advance()로 시간을 옮길 때만 sleep이 깨어남
+  # 엔진은 이 시계에서 시장 트리거를 스레드 없이 바로 확인 (실행 결과가 매번 같도록)
+  simulated = True
+
+  def __init__(self, start=0.0):
+    self._now = float(start)
+    self._sleepers = []
+    self._seq = itertools.count()
+
+  def time(self):
+    return self._now
+
+  async def sleep(self, delay):
+    future = asyncio.get_running_loop().create_future()
+    heapq.heappush(self._sleepers, (self._now + max(0.0, delay), next(self._seq), future))
+    await future
+
+  async def advance(self, seconds):
+    # 깨어날 시각 순서대로 시간을 옮기고, 깨어난 작업이 실행될 기회를 줌
+    target = self._now + seconds
+    await _drain()
+    while self._sleepers and self._sleepers[0][0] <= target:
+      wake_at, _, future = heapq.heappop(self._sleepers)
+      self._now = max(self._now, wake_at)
+      if not future.done():
+        future.set_result(None)
+      await _drain()
+    self._now = target
+    await _drain()
+
+
+async def _drain(rounds=20):
+  for _ in range(rounds):
+    await asyncio.sleep(0)
+
+
+# ---- 트리거 ----
+# check(now)는 실행 사유(str) 또는 None을 반환
+
+class DailyTimer:
+  # 매일 지정 시각 (로컬 시간)
+
+  def __init__(self, at, run_transaction=False, name=None, action=None):
+    # action: 이 타이머만 엔진 기본 실행 함수 대신 호출할 함수 (같은 인자)
+    self.at = at
+    self.run_transaction = run_transaction
+    self.action = action
+    self.market = None
+    self.name = name or f"daily {at}"
+    self.cooldown = 0
+    self.debounce = 0
+    self.next_at = None
+
+  def _next_after(self, now):
+    hour, minute = (int(part) for part in self.at.split(":"))
+    current = datetime.fromtimestamp(now)
+    target = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target.timestamp() <= now:
+      target += timedelta(days=1)
+    return target.timestamp()
+
+  def next_fire(self, now):
+    if self.next_at is None:
+      self.next_at = self._next_after(now)
+    return self.next_at
+
+  def check(self, now):
+    if now >= self.next_fire(now):
+      self.next_at = self._next_after(now)
+      return f"scheduled {self.at}"
+    return None
+
+
+class PriceMoveTrigger:
+  # window초 안에 가격이 threshold_pct% 이상 움직이면 실행
+
+  def __init__(self, market, price_fn, threshold_pct=3.0, window=3600,
+               run_transaction=False, cooldown=1800, debounce=0):
+    self.market = market
+    self.price_fn = price_fn
+    self.threshold_pct = threshold_pct
+    self.window = window
+    self.run_transaction = run_transaction
+    self.cooldown = cooldown
+    self.debounce = debounce
+    self.name = f"{market} price move {threshold_pct}%"
+    self.samples = deque()
+
+  def next_fire(self, now):
+    return None
+
+  def check(self, now):
+    price = self.price_fn(self.market)
+    if price is None:
+      return None
+    self.samples.append((now, float(price)))
+    while self.samples and self.samples[0][0] < now - self.window:
+      self.samples.popleft()
+    reference = self.samples[0][1]
+    change_pct = (price / reference - 1) * 100
+    if abs(change_pct) >= self.threshold_pct:
+      return f"{self.market} {change_pct:+.2f}% in {self.window // 60:.0f}m"
+    return None
+
+  def reset(self):
+    # 실행 후에는 그 시점 가격부터 다시 측정
+    if self.samples:
+      self.samples = deque([self.samples[-1]])
+
+
+class VolatilityTrigger:
+  # 최근 short_window초 실현 변동성이 long_window초 변동성의 ratio배를 넘으면 실행
+
+  def __init__(self, market, price_fn, short_window=900, long_window=21600, ratio=2.5,
+               min_samples=10, run_transaction=False, cooldown=3600, debounce=60):
+    self.market = market
+    self.price_fn = price_fn
+    self.short_window = short_window
+    self.long_window = long_window
+    self.ratio = ratio
+    self.min_samples = min_samples
+    self.run_transaction = run_transaction
+    self.cooldown = cooldown
+    self.debounce = debounce
+    self.name = f"{market} volatility x{ratio}"
+    self.samples = deque()
+
+  def next_fire(self, now):
+    return None
+
+  @staticmethod
+  def _volatility(samples):
+    # 시간당 로그수익률 표준편차 (샘플 간격이 달라도 비교 가능하도록 시간으로 정규화)
+    returns = []
+    for (t0, p0), (t1, p1) in zip(samples, samples[1:]):
+      if t1 > t0 and p0 > 0:
+        returns.append(math.log(p1 / p0) / math.sqrt((t1 - t0) / 3600))
+    if len(returns) < 2:
+      return None
+    mean = sum(returns) / len(returns)
+    return math.sqrt(sum((r - mean) ** 2 for r in returns) / (len(returns) - 1))
+
+  def check(self, now):
+    price = self.price_fn(self.market)
+    if price is None:
+      return None
+    self.samples.append((now, float(price)))
+    while self.samples and self.samples[0][0] < now - self.long_window:
+      self.samples.popleft()
+    recent = [s for s in self.samples if s[0] >= now - self.short_window]
+    if len(recent) < self.min_samples or len(self.samples) < self.min_samples * 2:
+      return None
+    short_vol = self._volatility(recent)
+    long_vol = self._volatility(list(self.samples))
+    if short_vol and long_vol and short_vol >= self.ratio * long_vol:
+      return f"{self.market} volatility {short_vol / long_vol:.1f}x"
+    return None
+
+
+class NewsBurstTrigger:
+  # window초 동안 새 기사가 threshold개 이상 들어오면 실행
+  # count_fn(since)는 since(epoch 초) 이후 수집된 기사 수를 반환
+
+  def __init__(self, count_fn, threshold=5, window=1800, run_transaction=False, cooldown=3600, debounce=0):
+    self.count_fn = count_fn
+    self.threshold = threshold
+    self.window = window
+    self.market = None
+    self.run_transaction = run_transaction
+    self.cooldown = cooldown
+    self.debounce = debounce
+    self.name = f"news burst {threshold}/{window // 60:.0f}m"
+
+  def next_fire(self, now):
+    return None
+
+  def check(self, now):
+    count = self.count_fn(now - self.window)
+    if count >= self.threshold:
+      return f"{count} news articles in {self.window // 60:.0f}m"
+    return None
+
+
+# ---- 엔진 ----
+
+class TriggerEngine:
+  # 타이머는 정확한 시각까지 잠들고, 시장 트리거는 poll_interval마다 확인
+  # action(run_transaction=..., market=..., reason=...)은 동기/비동기 함수 모두 가능
+  # 시장 트리거 확인(시세 REST 조회, DB 조회)은 스레드에서 실행해 이벤트 루프를 막지 않음
+  # check_timeout초 안에 끝나지 않으면 이번 확인은 버리고, 그 확인이 끝날 때까지 다음 확인을 건너뜀
+  # executor: 확인을 실행할 concurrent.futures 실행기 (None이면 이벤트 루프 기본 실행기)
+
+  def __init__(self, action, clock=None, poll_interval=5, max_concurrent=1, global_cooldown=0, check_timeout=10,
+               executor=None):
+    self.action = action
+    self.clock = clock or RealClock()
+    self.poll_interval = poll_interval
+    self.check_timeout = check_timeout
+    self.executor = executor
+    self.max_concurrent = max_concurrent
+    self.global_cooldown = global_cooldown
+    self.triggers = []
+    self.history = []
+    self.skipped = []
+    self._running = 0
+    self._tasks = set()
+    self._stopped = False
+    self._last_fired = {}
+    self._true_since = {}
+    self._last_any_fired = None
+    self._pending = deque()
+    self._skip_logged = set()
+    self._checking = None
+
+  def add(self, trigger):
+    self.triggers.append(trigger)
+    return trigger
+
+  def stop(self):
+    self._stopped = True
+
+  def _ready(self, trigger, reason, now):
+    # debounce: 조건이 debounce초 동안 계속 참이어야 함
+    key = id(trigger)
+    if reason is None:
+      self._true_since.pop(key, None)
+      self._skip_logged.discard(key)
+      return False
+    since = self._true_since.setdefault(key, now)
+    if now - since < trigger.debounce:
+      return False
+    # cooldown: 같은 트리거는 cooldown초 동안 다시 실행하지 않음
+    last = self._last_fired.get(key)
+    if last is not None and now - last < trigger.cooldown:
+      return False
+    # 타이머가 아닌 트리거는 전체 cooldown도 지킴
+    if trigger.next_fire(now) is None and self._last_any_fired is not None \
+            and now - self._last_any_fired < self.global_cooldown:
+      return False
+    return True
+
+  async def _execute(self, trigger, reason):
+    try:
+      kwargs = {"run_transaction": trigger.run_transaction, "market": trigger.market, "reason": reason}
+      action = getattr(trigger, "action", None) or self.action
+      if inspect.iscoroutinefunction(action):
+        await action(**kwargs)
+      else:
+        await asyncio.get_running_loop().run_in_executor(None, lambda: action(**kwargs))
+    except Exception as e:
+      print(f"[TRIGGER ERROR] {trigger.name}: {str(e)}")
+    finally:
+      self._running -= 1
+      # 실행 중이라 밀려 있던 예약 작업이 있으면 이어서 실행
+      if self._pending and not self._stopped:
+        pending_trigger, pending_reason = self._pending.popleft()
+        self._start(pending_trigger, pending_reason, self.clock.time())
+
+  def _start(self, trigger, reason, now):
+    self._last_fired[id(trigger)] = now
+    self._last_any_fired = now
+    if hasattr(trigger, "reset"):
+      trigger.reset()
+    self.history.append((now, trigger.name, reason))
+    print(f"[TRIGGER] {datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')} {trigger.name}: {reason}")
+    self._running += 1
+    task = asyncio.get_running_loop().create_task(self._execute(trigger, reason))
+    self._tasks.add(task)
+    task.add_done_callback(self._tasks.discard)
+
+  def _fire(self, trigger, reason, now):
+    key = id(trigger)
+    self._true_since.pop(key, None)
+    if self._running < self.max_concurrent:
+      self._skip_logged.discard(key)
+      self._start(trigger, reason, now)
+      return
+    if trigger.next_fire(now) is not None:
+      # 예약된 시각의 작업은 버리지 않고 앞 작업이 끝나면 실행
+      self._pending.append((trigger, reason))
+      print(f"[TRIGGER] {trigger.name} 대기 (실행 중인 작업 {self._running}개)")
+      return
+    # 시장 트리거는 실행 중이면 건너뜀 (로그는 조건이 유지되는 동안 한 번만)
+    self.skipped.append((now, trigger.name, reason))
+    if key not in self._skip_logged:
+      self._skip_logged.add(key)
+      print(f"[TRIGGER] {trigger.name} 건너뜀 (실행 중인 작업 {self._running}개): {reason}")
+
+  def _check(self, triggers, now):
+    results = []
+    for trigger in triggers:
+      try:
+        results.append((trigger, trigger.check(now)))
+      except Exception as e:
+        print(f"[TRIGGER ERROR] {trigger.name} 확인 실패: {str(e)}")
+    return results
+
+  def _apply(self, results, now):
+    for trigger, reason in results:
+      if self._ready(trigger, reason, now):
+        self._fire(trigger, reason, now)
+
+  def evaluate(self, now):
+    # 모든 트리거를 현재 스레드에서 확인 (run()은 _evaluate 사용)
+    self._apply(self._check(self.triggers, now), now)
+
+  async def _evaluate(self, now):
+    # 타이머는 시각 비교뿐이라 루프에서 바로, 시장 트리거는 스레드에서 확인
+    timers = [trigger for trigger in self.triggers if trigger.next_fire(now) is not None]
+    markets = [trigger for trigger in self.triggers if trigger.next_fire(now) is None]
+    self._apply(self._check(timers, now), now)
+    if not markets:
+      return
+    if getattr(self.clock, "simulated", False):
+      self._apply(self._check(markets, now), now)
+      return
+    if self._checking is not None and not self._checking.done():
+      return
+    self._checking = asyncio.get_running_loop().run_in_executor(self.executor, self._check, markets, now)
+    try:
+      results = await asyncio.wait_for(asyncio.shield(self._checking), self.check_timeout)
+    except asyncio.TimeoutError:
+      print(f"[TRIGGER ERROR] 시장 트리거 확인이 {self.check_timeout}초 안에 끝나지 않아 건너뜀")
+      return
+    # 확인한 시각 기준으로 debounce/cooldown 판단 (확인에 걸린 시간만큼 실행 시각이 밀리지 않게)
+    self._apply(results, now)
+
+  def _next_wake(self, now):
+    # 시장 트리거가 없으면 다음 타이머 시각까지 그대로 잠듦
+    timers = [trigger.next_fire(now) for trigger in self.triggers]
+    wake = now + self.poll_interval if None in timers or not timers else math.inf
+    for at in timers:
+      if at is not None:
+        wake = min(wake, at)
+    return wake
+
+  async def run(self):
+    while not self._stopped:
+      now = self.clock.time()
+      await self._evaluate(now)
+      await self.clock.sleep(self._next_wake(self.clock.time()) - self.clock.time())
+    if self._tasks:
+      await asyncio.gather(*self._tasks, return_exceptions=True)